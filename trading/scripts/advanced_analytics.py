@@ -240,9 +240,36 @@ class AdvancedTradingAnalytics:
     # 3. PORTFOLIO REBALANCING MONITOR
     # ============================================
     
+    def portfolio_weights(self, positions):
+        """
+        Sector and stock weights of a book, grouped by security master sector in one pass.
+        positions: [{ symbol, market_value }] (or quantity × current_price)
+        Returns: { 'sectors': { sector: weight }, 'stocks': { symbol: weight } }
+        """
+        import security_master
+        
+        values = {}
+        for pos in positions:
+            value = pos.get('market_value')
+            if value is None:
+                value = pos.get('quantity', 0) * pos.get('current_price', 0)
+            values[pos['symbol']] = values.get(pos['symbol'], 0) + abs(value)
+        total = sum(values.values())
+        if not total:
+            return {'sectors': {}, 'stocks': {}}
+        
+        symbols = list(values)
+        sectors = security_master.sector_totals(symbols, [values[s] / total for s in symbols])
+        return {
+            'sectors': sectors.to_dict(),
+            'stocks': {s: values[s] / total for s in symbols},
+        }
+    
     def check_concentration_drift(self, current_weights):
         """
         Check if portfolio has drifted > 5% from target allocation
+        current_weights: { 'sectors': {...}, 'stocks': {...} } or { 'positions': [...] }
+        (weights then derived with portfolio_weights)
         
         Target limits:
         - Sector: 25% max
@@ -253,6 +280,8 @@ class AdvancedTradingAnalytics:
         stock_limit = 0.08
         
         drift_alerts = []
+        if 'positions' in current_weights:
+            current_weights = self.portfolio_weights(current_weights['positions'])
         
         # Check sector weights
         for sector, weight in current_weights.get('sectors', {}).items():
@@ -8,17 +8,25 @@ UPDATED: Includes economic calendar + earnings blackout checks
 """
 import os, json, sys, time
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
 from ib_insync import IB, Stock, Option, MarketOrder, util
 
 # Add scripts dir to path for imports
 SCRIPTS_DIR = Path(__file__).resolve().parent
 sys.path.insert(0, str(SCRIPTS_DIR))
+import trade_journal as journal
+from ib_order_service import client_id
+from option_pricing import price, greeks, realized_vol, realized_vol_history, round_strikes
+from bar_store import get_bars
+from option_chain_store import OptionChainStore
 
 try:
     from economic_calendar import is_economic_blackout, get_blackout_reason
-    from earnings_calendar import check_earnings_blackout
-    from sector_concentration_manager import can_add_position, check_sector_limit
+    from earnings_calendar import get_blackout_symbols
+    from sector_concentration_manager import filter_by_sector, check_sector_limit
     from dynamic_position_sizing import calculate_composite_position_size, get_vix_level
     from gap_risk_manager import get_gap_risk_positions, get_eod_checklist, should_close_gap_risk_positions
     from regime_detector import RegimeDetector
@@ -31,7 +39,6 @@ except ImportError as e:
 
 # Paths
 TRADING_DIR = Path(__file__).resolve().parents[1]
-LOGS_DIR = TRADING_DIR / 'logs'
 WATCHLIST_PATH = TRADING_DIR / 'watchlist.json'
 RISK_PATH = TRADING_DIR / 'risk.json'
 
@@ -46,7 +53,7 @@ if ENV_PATH.exists():
 # IB connection settings
 IB_HOST = os.getenv('IB_HOST', '127.0.0.1')
 IB_PORT = int(os.getenv('IB_PORT', 7497))
-IB_CLIENT_ID = 103  # Dedicated client ID for options (stocks use 101, test uses 102)
+IB_CLIENT_ID = client_id('options_executor')  # Dedicated client ID for options (see ib_order_service.CLIENT_IDS)
 
 # Telegram settings
 TG_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
@@ -58,8 +65,6 @@ MAX_OPTIONS_PER_MONTH = 8
 MIN_PREMIUM_PERCENT = 0.015  # Minimum 1.5% premium
 MAX_RISK_PER_CONTRACT = 5000  # Max $5000 assignment risk per contract
 
-LOGS_DIR.mkdir(exist_ok=True)
-
 def round_option_strike(strike):
     """Round strike to valid option intervals"""
     if strike > 200:
@@ -73,34 +78,12 @@ def round_option_strike(strike):
 def count_options_today():
     """Count options trades executed today"""
     today = datetime.now().date()
-    count = 0
-    
-    for log_file in LOGS_DIR.glob('options_*.json'):
-        try:
-            data = json.loads(log_file.read_text())
-            trade_date = datetime.fromisoformat(data.get('executed_at', '')).date()
-            if trade_date == today:
-                count += 1
-        except Exception:
-            continue
-    
-    return count
+    return journal.count(since=today, until=today, source='auto_options')
 
 def count_options_this_month():
     """Count options trades this month"""
-    now = datetime.now()
-    count = 0
-    
-    for log_file in LOGS_DIR.glob('options_*.json'):
-        try:
-            data = json.loads(log_file.read_text())
-            trade_date = datetime.fromisoformat(data.get('executed_at', ''))
-            if trade_date.month == now.month and trade_date.year == now.year:
-                count += 1
-        except Exception:
-            continue
-    
-    return count
+    month_start = datetime.now().date().replace(day=1)
+    return journal.count(since=month_start, source='auto_options')
 
 def get_ib_positions(ib):
     """Get current stock positions from IB"""
@@ -114,25 +97,25 @@ def get_ib_positions(ib):
             })
     return positions
 
-def check_covered_call_opportunities(ib):
+def check_covered_call_opportunities(ib, store):
     """Find covered call opportunities from current positions"""
     opportunities = []
-    positions = get_ib_positions(ib)
+    positions = [p for p in get_ib_positions(ib) if p['quantity'] >= 100]  # Need at least 100 shares
+    
+    # Current prices from IB (real-time) for all positions in one batched request
+    stocks = store.stocks([p['ticker'] for p in positions])
+    quotes = store.tickers(list(stocks.values()))
     
     for pos in positions:
-        if pos['quantity'] < 100:
-            continue  # Need at least 100 shares
-        
         ticker = pos['ticker']
         entry = pos['avgCost']
         
         try:
-            # Get current price from IB (real-time)
-            stock = Stock(ticker, 'SMART', 'USD')
-            ib.qualifyContracts(stock)
-            ib.reqMarketDataType(1)  # Live data
-            [ticker_data] = ib.reqTickers(stock)
-            ib.sleep(0.5)
+            stock = stocks.get(ticker)
+            ticker_data = quotes.get(stock.conId) if stock else None
+            if ticker_data is None:
+                print(f"No price data for {ticker}")
+                continue
             
             if ticker_data.last > 0:
                 current = float(ticker_data.last)
@@ -156,8 +139,10 @@ def check_covered_call_opportunities(ib):
                     continue
                 
                 if room_to_strike >= 0.08:
-                    # Calculate potential premium (estimate 2%)
-                    premium_estimate = current * 0.02
+                    # Model premium: American call, realized vol from the bar store
+                    bars = get_bars([ticker], start=datetime.now() - timedelta(days=90)).get(ticker)
+                    vol = realized_vol(bars['Close']) if bars is not None and len(bars) > 20 else 0.30
+                    premium_estimate = float(price(current, strike, 35 / 365, vol, right='C'))
                     premium_pct = premium_estimate / current
                     
                     if premium_pct >= MIN_PREMIUM_PERCENT:
@@ -178,132 +163,157 @@ def check_covered_call_opportunities(ib):
     
     return opportunities
 
+CSP_HISTORY_DAYS = 60  # Calendar days of daily bars behind the pullback/EMA50/volume rules
+CSP_DTE = 35
+
+
+def load_csp_tickers() -> list:
+    """NX screener watchlist symbols (long_candidates plus any plain ticker lists). Returns: sorted list"""
+    watchlist = json.loads(WATCHLIST_PATH.read_text())
+    tickers = []
+    if isinstance(watchlist, dict):
+        # Get symbols from long_candidates
+        for candidate in watchlist.get('long_candidates', []):
+            if isinstance(candidate, dict) and 'symbol' in candidate:
+                tickers.append(candidate['symbol'])
+        # Also check for old format (list of tickers)
+        for val in watchlist.values():
+            if isinstance(val, list) and val and isinstance(val[0], str):
+                tickers.extend(val)
+    return sorted(set(tickers))
+
+
+def _field_panel(bars: dict, field: str) -> pd.DataFrame:
+    """
+    (bars × symbols) frame of one field, each column's history aligned to the last row
+    (shorter histories are NaN-padded on top), so tail()/ewm() match per-symbol results.
+    """
+    n = max(len(df) for df in bars.values())
+    out = np.full((n, len(bars)), np.nan)
+    for j, df in enumerate(bars.values()):
+        values = df[field].to_numpy(dtype=float)
+        out[n - len(values):, j] = values
+    return pd.DataFrame(out, columns=list(bars))
+
+
+def csp_rules(close: pd.DataFrame, high: pd.DataFrame, volume: pd.DataFrame) -> dict:
+    """
+    Pullback / EMA50 support / volume rules on every row of (bars × symbols) panels;
+    row t only uses bars up to t (csp_signals takes the last row, backtest.py all of them).
+    Returns: { current, recent_high, ema50, pullback_pct, vol_ratio, iv, strike, passes } DataFrames
+    """
+    recent_high = high.rolling(20, min_periods=1).max()
+    ema50 = close.ewm(span=50, adjust=False).mean()
+    avg_vol = volume.rolling(20, min_periods=1).mean()
+    strike = pd.DataFrame(round_strikes(ema50 * 0.99), index=close.index, columns=close.columns)
+
+    rules = {
+        'current': close,
+        'recent_high': recent_high,
+        'ema50': ema50,
+        'pullback_pct': (recent_high - close) / recent_high,
+        'vol_ratio': (volume / avg_vol).where(avg_vol > 0, 0.0),
+        'iv': realized_vol_history(close),  # Model premium: realized vol as IV
+        'strike': strike,
+    }
+    near_support = (close - ema50).abs() / close < 0.02
+    rules['passes'] = ((rules['pullback_pct'] >= 0.03) & (rules['pullback_pct'] <= 0.08) & near_support
+                       & (rules['vol_ratio'] < 1.5) & (strike * 100 <= MAX_RISK_PER_CONTRACT))
+    return rules
+
+
+def csp_signals(bars: dict) -> pd.DataFrame:
+    """
+    Pullback / EMA50 support / volume rules for every symbol in one vectorized pass.
+    Returns: DataFrame indexed by symbol (current, recent_high, ema50, pullback_pct,
+             vol_ratio, iv, strike, passes)
+    """
+    rules = csp_rules(_field_panel(bars, 'Close'), _field_panel(bars, 'High'), _field_panel(bars, 'Volume'))
+    return pd.DataFrame({name: frame.iloc[-1] for name, frame in rules.items()})
+
+
 def check_csp_opportunities():
-    """Find cash-secured put opportunities - scans NX screener watchlist"""
+    """
+    Find cash-secured put opportunities - scans NX screener watchlist.
+    Earnings blackouts (one batch) and daily bars (shared bar store) load concurrently,
+    then the rules and model premiums are evaluated for the whole watchlist at once.
+    """
     opportunities = []
     
     # Load NX screener watchlist (updated daily at 8 AM MT)
     try:
-        if WATCHLIST_PATH.exists():
-            watchlist = json.loads(WATCHLIST_PATH.read_text())
-            # Extract symbols from NX screener format
-            tickers = []
-            if isinstance(watchlist, dict):
-                # Get symbols from long_candidates and short_candidates
-                for candidate in watchlist.get('long_candidates', []):
-                    if isinstance(candidate, dict) and 'symbol' in candidate:
-                        tickers.append(candidate['symbol'])
-                # Also check for old format (list of tickers)
-                for val in watchlist.values():
-                    if isinstance(val, list) and val and isinstance(val[0], str):
-                        tickers.extend(val)
-            tickers = list(set(tickers))  # Remove duplicates
-        else:
+        if not WATCHLIST_PATH.exists():
             print(f"Watchlist not found at {WATCHLIST_PATH}")
             return opportunities
+        tickers = load_csp_tickers()
     except Exception as e:
         print(f"Error loading watchlist: {e}")
         return opportunities
-    
-    import yfinance as yf
+    if not tickers:
+        return opportunities
     
     print(f"🔍 Scanning {len(tickers)} symbols for CSP opportunities...")
+    t0 = time.time()
     
-    scanned = 0
-    earnings_skipped = 0
-    for ticker in tickers:  # Scan full universe
-        scanned += 1
-        if scanned % 50 == 0:
-            print(f"  Scanned {scanned}/{len(tickers)}...")
-        
-        # Skip if in earnings blackout
-        if CALENDAR_MODULES_LOADED and check_earnings_blackout(ticker):
-            earnings_skipped += 1
-            continue
-        
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        blackout_job = pool.submit(get_blackout_symbols, tickers) if CALENDAR_MODULES_LOADED else None
+        bars_job = pool.submit(get_bars, tickers, start=datetime.now() - timedelta(days=CSP_HISTORY_DAYS))
         try:
-            stock = yf.Ticker(ticker)
-            hist = stock.history(period='60d')
-            if hist.empty:
-                continue
-            
-            current = float(hist['Close'].iloc[-1])
-            recent_high = float(hist['High'].tail(20).max())
-            ema50 = hist['Close'].ewm(span=50, adjust=False).mean().iloc[-1]
-            
-            pullback_pct = (recent_high - current) / recent_high
-            near_support = abs(current - ema50) / current < 0.02
-            
-            avg_vol = hist['Volume'].tail(20).mean()
-            recent_vol = hist['Volume'].iloc[-1]
-            vol_ratio = recent_vol / avg_vol if avg_vol > 0 else 0
-            
-            # Check rules
-            if 0.03 <= pullback_pct <= 0.08 and near_support and vol_ratio < 1.5:
-                strike = round_option_strike(ema50 * 0.99)
-                assignment_risk = strike * 100  # Risk if assigned
-                
-                if assignment_risk <= MAX_RISK_PER_CONTRACT:
-                    premium_estimate = current * 0.02
-                    premium_pct = premium_estimate / current
-                    
-                    if premium_pct >= MIN_PREMIUM_PERCENT:
-                        opportunities.append({
-                            'ticker': ticker,
-                            'type': 'cash_secured_put',
-                            'current': current,
-                            'strike': strike,
-                            'dte': 35,
-                            'quantity': 1,
-                            'pullback_pct': pullback_pct,
-                            'premium_estimate': premium_estimate,
-                            'assignment_risk': assignment_risk
-                        })
-        except Exception:
-            continue
-    
-    if CALENDAR_MODULES_LOADED and earnings_skipped > 0:
-        print(f"  Skipped {earnings_skipped} symbols in earnings blackout")
-    
-    return opportunities
-
-def get_option_contract(ib, ticker, strike, right, dte):
-    """Get option contract for given parameters"""
-    from datetime import date, timedelta
-    from calendar import monthrange
-    
-    # Calculate next monthly expiration (3rd Friday)
-    today = date.today()
-    
-    # Start with next month
-    if today.month == 12:
-        next_month = 1
-        next_year = today.year + 1
-    else:
-        next_month = today.month + 1
-        next_year = today.year
+            bars = bars_job.result()
+        except Exception as e:
+            print(f"Error loading bars: {e}")
+            bars = {}
+        try:
+            blackout = blackout_job.result() if blackout_job else set()
+        except Exception as e:
+            print(f"Earnings lookup failed: {e}")
+            blackout = set()
     
-    # Find 3rd Friday of next month
-    # Start with the 15th (guaranteed to be in 3rd week)
-    third_week_start = date(next_year, next_month, 15)
+    bars = {sym: df for sym, df in bars.items() if sym not in blackout and not df.empty}
+    if not bars:
+        return opportunities
     
-    # Find the Friday in that week
-    days_until_friday = (4 - third_week_start.weekday()) % 7
-    third_friday = third_week_start + timedelta(days=days_until_friday)
+    sig = csp_signals(bars)
+    hits = sig[sig['passes']]
+    if not hits.empty:
+        T = CSP_DTE / 365
+        hits = hits.assign(
+            premium_estimate=price(hits['current'], hits['strike'], T, hits['iv'], right='P'),
+            delta=greeks(hits['current'], hits['strike'], T, hits['iv'], right='P', american=False)['delta'],
+        )
+        hits = hits[hits['premium_estimate'] / hits['current'] >= MIN_PREMIUM_PERCENT]
     
-    expiration = third_friday.strftime('%Y%m%d')
+    for ticker, row in hits.iterrows():
+        opportunities.append({
+            'ticker': ticker,
+            'type': 'cash_secured_put',
+            'current': float(row['current']),
+            'strike': float(row['strike']),
+            'dte': CSP_DTE,
+            'quantity': 1,
+            'pullback_pct': float(row['pullback_pct']),
+            'premium_estimate': float(row['premium_estimate']),
+            'delta': float(row['delta']),
+            'assignment_risk': float(row['strike']) * 100  # Risk if assigned
+        })
     
-    option = Option(ticker, expiration, strike, right, 'SMART')
+    print(f"  Scanned {len(sig)}/{len(tickers)} symbols in {time.time() - t0:.1f}s")
+    if CALENDAR_MODULES_LOADED and blackout:
+        print(f"  Skipped {len(blackout & set(tickers))} symbols in earnings blackout")
     
+    return opportunities
+
+def get_option_contract(store, ticker, strike, right, dte):
+    """Get option contract for given parameters (listed monthly expiry nearest dte, listed strike)"""
     try:
-        ib.qualifyContracts(option)
+        [option] = store.contracts([store.leg(ticker, dte, strike, right)])
         return option
     except Exception as e:
         print(f"Failed to qualify option contract: {e}")
         return None
 
-def execute_option_trade(ib, opportunity):
-    """Execute option trade with IB"""
+def execute_option_trade(ib, opportunity, store, option=None, ticker_data=None):
+    """Execute option trade with IB (option/ticker_data: prefetched contract and quote)"""
     ticker = opportunity['ticker']
     strike = opportunity['strike']
     dte = opportunity['dte']
@@ -313,18 +323,18 @@ def execute_option_trade(ib, opportunity):
     
     try:
         # Get option contract
-        option = get_option_contract(ib, ticker, strike, right, dte)
+        option = option or get_option_contract(store, ticker, strike, right, dte)
         
         if not option:
             print(f"Could not get valid option contract for {ticker} ${strike}{right}")
             return None
+        strike = option.strike
         
         # Get market price
-        ib.reqMarketDataType(1)  # Live data
-        [ticker_data] = ib.reqTickers(option)
-        ib.sleep(1)
+        if ticker_data is None:
+            ticker_data = store.tickers([option]).get(option.conId)
         
-        if not ticker_data.marketPrice():
+        if ticker_data is None or not ticker_data.marketPrice():
             print(f"No market data for {ticker} ${strike}{right}")
             return None
         
@@ -362,8 +372,7 @@ def execute_option_trade(ib, opportunity):
             }
             
             # Log trade
-            log_file = LOGS_DIR / f"options_{int(time.time())}.json"
-            log_file.write_text(json.dumps(result, indent=2))
+            journal.record_option_fill(result)
             
             return result
         else:
@@ -446,12 +455,14 @@ def main():
         return
     
     try:
+        store = OptionChainStore(ib)
+        
         # Get current positions for sector/sizing checks
         current_positions = get_current_positions(ib)
         account_value = 1940000  # TODO: Pull from IB account
         
         # Find opportunities
-        cc_opps = check_covered_call_opportunities(ib)
+        cc_opps = check_covered_call_opportunities(ib, store)
         csp_opps = check_csp_opportunities()
         
         print(f"\nFound:")
@@ -462,12 +473,13 @@ def main():
         valid_opps = []
         if STRATEGY_MODULES_LOADED:
             print(f"\n🔍 Checking sector concentration...")
-            for opp in cc_opps + csp_opps:
-                sector_check = can_add_position(opp['ticker'], current_positions)
-                if sector_check['allowed']:
+            opps = cc_opps + csp_opps
+            sector_check = filter_by_sector([opp['ticker'] for opp in opps], current_positions)
+            for opp, allowed, sector in zip(opps, sector_check['allowed'], sector_check['sectors']):
+                if allowed:
                     valid_opps.append(opp)
                 else:
-                    print(f"  ❌ {opp['ticker']}: {sector_check['reason']}")
+                    print(f"  ❌ {opp['ticker']}: Sector \"{sector}\" already at limit: {sector_check['held'][sector]}")
         else:
             valid_opps = cc_opps + csp_opps
         
@@ -478,7 +490,14 @@ def main():
         # Execute up to daily limit
         remaining = MAX_OPTIONS_PER_DAY - today_count
         
-        for opp in valid_opps[:remaining]:
+        # Contracts + quotes for every candidate leg up front (one qualify, one reqTickers)
+        candidates = valid_opps[:remaining]
+        options = store.contracts([store.leg(o['ticker'], o['dte'], o['strike'],
+                                             'C' if o['type'] == 'covered_call' else 'P')
+                                   for o in candidates])
+        quotes = store.tickers(options)
+        
+        for opp, option in zip(candidates, options):
             # Calculate dynamic position sizing
             if STRATEGY_MODULES_LOADED:
                 vix_data = get_vix_level()
@@ -501,7 +520,8 @@ def main():
                 print(f"📊 {opp['ticker']}: {opp['quantity']} contracts (sizing: {sizing['composite_multiplier']:.0%})")
             
             print(f"\n🔄 Executing: {opp['ticker']} ${opp['strike']} {opp['type']}")
-            result = execute_option_trade(ib, opp)
+            result = execute_option_trade(ib, opp, store, option,
+                                          quotes.get(option.conId) if option else None)
             
             if result:
                 executed.append(result)
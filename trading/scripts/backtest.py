@@ -0,0 +1,472 @@
+#!/usr/bin/env python3
+"""
+Vectorized Backtester
+Replays the screener rule sets over years of universe history as array operations, so
+threshold changes (e.g. the Feb 24 NX loosening) can be measured instead of made blind.
+
+Rules come from the screeners themselves, evaluated on every date of a (dates × symbols) panel:
+- nx_long / nx_short: nx_metrics.compute_nx_history + candidate_masks (NX dict thresholds)
+- box:   box_screener.box_signals
+- trend: trend_screener.trend_signals
+- csp:   auto_options_executor.csp_rules + MIN_PREMIUM_PERCENT (short put held to expiry)
+conservative_screener is not replayed: it screens on current fundamentals (.info), which have
+no point-in-time history. Earnings/economic blackouts are not applied either.
+
+Fills (stock strategies), for every signal of every symbol at once:
+- entry on the first bar of a signal (signal off → on), at the next bar's open ± SLIPPAGE_BPS
+- stop STOP_ATR × ATR(14) away, target TARGET_R × risk, time exit after MAX_HOLD_BARS at the close
+- a bar touching both stop and target counts as a stop; gaps through either fill at the open
+- R = direction × (exit - entry) / (entry - stop); trades can overlap if a signal re-fires
+- NaN bars are skipped for stops/targets; a trade still open when its symbol's data ends
+  (delisted: TWTR, SPLK, ...) exits at the last valid close ("data_end")
+CSP: sell the rule's strike at the model premium (less CSP_SLIPPAGE_PCT), hold CSP_DTE days,
+settle at intrinsic value. R is in units of the credit received.
+
+Equity: R summed by exit date; compounded equity risks RISK_PER_TRADE (risk.json) per trade.
+
+Sweeps: NX metrics don't depend on the thresholds, so they are computed once; each threshold
+combination (masks → fills → stats) then runs on a process pool across cores.
+
+Usage:
+  python3 backtest.py                                     # nx_long, 5 years, screener universe
+  python3 backtest.py --strategy trend --years 3 --symbols AAPL MSFT NVDA
+  python3 backtest.py --sweep rs_long_min=0.45,0.50,0.55 rvol_min=0.8,1.0,1.2 --out sweep.csv
+
+  from backtest import load_history, run, sweep
+  panel, spy = load_history(symbols, years=5)
+  result = run('nx_long', panel, spy)             # { trades, curve, symbol_curves, stats }
+  table = sweep({'rs_long_min': [0.45, 0.5]}, panel, spy)
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from itertools import product
+import argparse
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from bar_store import get_bars
+from nx_metrics import build_panel, compute_nx_history, candidate_masks, nx_tier, RECORD_DIGITS
+from nx_state import BENCHMARK
+
+logger = logging.getLogger(__name__)
+
+STRATEGIES = ("nx_long", "nx_short", "box", "trend", "csp")
+HISTORY_YEARS = 5
+
+SLIPPAGE_BPS = 5.0        # Per fill, against the trade
+STOP_ATR = 2.0            # Stop distance in ATR(14) at the signal bar
+TARGET_R = 2.0            # Profit target in R
+MAX_HOLD_BARS = 20        # Time exit
+ATR_LEN = 14
+RISK_PER_TRADE = 0.01     # risk.json position_sizing.risk_per_trade_percent
+CSP_SLIPPAGE_PCT = 0.05   # Share of the model premium lost to the spread
+
+# Threshold columns the NX green-light rules compare (rounded like watchlist records)
+_NX_FIELDS = ("comp_score", "rvol", "struct_q", "rs_pct", "htf_bias", "long_ready", "short_ready", "eligible")
+
+
+# --- data ---
+
+def load_history(symbols, years=HISTORY_YEARS):
+    """
+    Daily bars for symbols from the shared bar store.
+    Returns: (panel { field: DataFrame[dates × symbols] }, SPY close Series)
+    """
+    start = datetime.now() - timedelta(days=int(years * 365))
+    bars = get_bars(list(dict.fromkeys(list(symbols) + [BENCHMARK])), start=start)
+    spy = bars.get(BENCHMARK)
+    panel = build_panel({sym: df for sym, df in bars.items() if sym in set(symbols)})
+    return panel, (spy["Close"] if spy is not None else None)
+
+
+def atr_history(panel: dict, length: int = ATR_LEN) -> pd.DataFrame:
+    """ATR(length) in price units on every date (dates × symbols)."""
+    close = panel["Close"]
+    prev = close.shift(1)
+    tr = np.maximum(panel["High"] - panel["Low"],
+                    np.maximum((panel["High"] - prev).abs(), (panel["Low"] - prev).abs()))
+    return tr.rolling(length).mean()
+
+
+# --- signals ---
+
+def _nx_context(history: dict) -> dict:
+    """Threshold-independent NX inputs, rounded like candidate records."""
+    out = {}
+    for field in _NX_FIELDS:
+        values = history[field].to_numpy()
+        out[field] = np.round(values, RECORD_DIGITS[field]) if field in RECORD_DIGITS else values
+    return out
+
+
+def _nx_signal(ctx: dict, nx: dict, direction: int) -> np.ndarray:
+    m = dict(ctx, tier=nx_tier(ctx["comp_score"], nx))
+    long_mask, short_mask = candidate_masks(m, nx)
+    return (long_mask if direction > 0 else short_mask) & ctx["eligible"]
+
+
+def signals(strategy: str, panel: dict, spy_close=None, nx: dict = None, history: dict = None) -> pd.DataFrame:
+    """
+    Rule hits for every date and symbol (row t: the screener run after day t's close).
+    history: precomputed compute_nx_history output (nx_* strategies).
+    Returns: bool DataFrame (dates × symbols)
+    """
+    close = panel["Close"]
+    if strategy in ("nx_long", "nx_short"):
+        if nx is None:
+            from nx_screener_production import NX as nx
+        history = history or compute_nx_history(panel, spy_close, nx)
+        sig = _nx_signal(_nx_context(history), nx, 1 if strategy == "nx_long" else -1)
+        return pd.DataFrame(sig, index=close.index, columns=close.columns)
+    if strategy == "box":
+        from box_screener import box_signals
+        return box_signals(panel)["signal"]
+    if strategy == "trend":
+        from trend_screener import trend_signals
+        return trend_signals(panel)["signal"]
+    if strategy == "csp":
+        return _csp_rules(panel)["passes"]
+    raise ValueError(f"Unknown strategy: {strategy} (choose from {', '.join(STRATEGIES)})")
+
+
+def _entries(signal: np.ndarray) -> np.ndarray:
+    """First bar of each signal run (off → on)."""
+    prev = np.vstack([np.zeros((1, signal.shape[1]), dtype=bool), signal[:-1]])
+    return signal & ~prev
+
+
+# --- fills ---
+
+def _fills(entries, O, H, L, C, atr, direction, slippage_bps, stop_atr, target_r, max_hold) -> dict:
+    """Entry/stop/target/exit for every entry of every symbol at once (arrays aligned by trade)."""
+    n_rows = len(O)
+    valid = np.isfinite(C)
+    # Each symbol's last bar with data (-1 if none): paths stop there
+    last_valid = np.where(valid.any(axis=0), n_rows - 1 - valid[::-1].argmax(axis=0), -1)
+
+    rows, cols = np.nonzero(entries[:-1])
+    e = rows + 1
+    entry_open, risk = O[e, cols], stop_atr * atr[rows, cols]
+    ok = np.isfinite(entry_open) & valid[e, cols] & np.isfinite(risk) & (risk > 0)
+    rows, cols, e, entry_open, risk = rows[ok], cols[ok], e[ok], entry_open[ok], risk[ok]
+
+    d, slip = direction, slippage_bps / 1e4
+    entry = entry_open * (1 + d * slip)
+    stop = entry - d * risk
+    target = entry + d * target_r * risk
+
+    path = e[:, None] + np.arange(max_hold)
+    in_data = path <= last_valid[cols][:, None]
+    path = np.minimum(path, n_rows - 1)
+    c = cols[:, None]
+    o, h, l, cl = O[path, c], H[path, c], L[path, c], C[path, c]
+    adverse, favorable = (l, h) if d > 0 else (h, l)
+
+    with np.errstate(invalid="ignore"):
+        stop_hit = in_data & (d * (adverse - stop[:, None]) <= 0)
+        target_hit = in_data & (d * (favorable - target[:, None]) >= 0)
+
+    def first(mask):
+        return np.where(mask.any(axis=1), mask.argmax(axis=1), max_hold)
+
+    k_stop, k_target = first(stop_hit), first(target_hit)
+    # Last bar with a close (NaN bars inside the path are skipped; the entry bar always has one)
+    closes = in_data & np.isfinite(cl)
+    last = max_hold - 1 - closes[:, ::-1].argmax(axis=1)
+    stopped = k_stop <= k_target
+    stopped &= k_stop < max_hold
+    targeted = ~stopped & (k_target < max_hold)
+    k = np.where(stopped, k_stop, np.where(targeted, k_target, last))
+
+    trade = np.arange(len(e))
+    bar_open = o[trade, k]
+    with np.errstate(invalid="ignore"):
+        stop_fill = np.where(d * (bar_open - stop) < 0, bar_open, stop)
+        target_fill = np.where(d * (bar_open - target) > 0, bar_open, target)
+    exit_price = np.where(stopped, stop_fill, np.where(targeted, target_fill, cl[trade, k]))
+    exit_price = exit_price * (1 - d * slip)
+
+    ended = ~in_data[:, -1]
+    reason = np.where(stopped, "stop", np.where(targeted, "target", np.where(
+        ~ended, "time", np.where(last_valid[cols] < n_rows - 1, "data_end", "open"))))
+    return {"signal_row": rows, "col": cols, "entry_row": e, "exit_row": e + k, "entry": entry,
+            "stop": stop, "target": target, "exit": exit_price, "r": d * (exit_price - entry) / risk,
+            "reason": reason}
+
+
+def _trade_frame(f: dict, dates, symbols, direction: int) -> pd.DataFrame:
+    return pd.DataFrame({
+        "symbol": np.asarray(symbols)[f["col"]],
+        "signal_date": dates[f["signal_row"]],
+        "entry_date": dates[f["entry_row"]],
+        "exit_date": dates[f["exit_row"]],
+        "direction": direction,
+        "entry": f["entry"],
+        "stop": f["stop"],
+        "target": f["target"],
+        "exit": f["exit"],
+        "r": f["r"],
+        "bars_held": f["exit_row"] - f["entry_row"] + 1,
+        "reason": f["reason"],
+    })
+
+
+def simulate(signal: pd.DataFrame, panel: dict, direction: int = 1, atr: pd.DataFrame = None,
+             slippage_bps=SLIPPAGE_BPS, stop_atr=STOP_ATR, target_r=TARGET_R,
+             max_hold=MAX_HOLD_BARS) -> pd.DataFrame:
+    """
+    Stock trades for every signal run of every symbol (direction 1 = long, -1 = short).
+    Returns: DataFrame, one row per trade (symbol, signal/entry/exit dates, entry, stop,
+             target, exit, r, bars_held, reason: stop | target | time | open | data_end)
+    """
+    close = panel["Close"]
+    atr = atr_history(panel) if atr is None else atr
+    arrays = [panel[f].reindex(index=close.index, columns=close.columns).to_numpy(dtype=float)
+              for f in ("Open", "High", "Low", "Close")]
+    f = _fills(_entries(signal.to_numpy(dtype=bool)), *arrays, atr.to_numpy(dtype=float),
+               direction, slippage_bps, stop_atr, target_r, max_hold)
+    return _trade_frame(f, close.index, close.columns, direction)
+
+
+def _csp_rules(panel: dict) -> dict:
+    from auto_options_executor import csp_rules, CSP_DTE, MIN_PREMIUM_PERCENT
+    from option_pricing import price
+
+    rules = csp_rules(panel["Close"], panel["High"], panel["Volume"])
+    # Model premium only where the chart rules pass (same pricing as check_csp_opportunities)
+    hits = rules["passes"].to_numpy() & rules["iv"].notna().to_numpy()
+    premium = np.full(hits.shape, np.nan)
+    premium[hits] = price(rules["current"].to_numpy()[hits], rules["strike"].to_numpy()[hits], CSP_DTE / 365,
+                          rules["iv"].to_numpy()[hits], right='P')
+    rules["premium"] = pd.DataFrame(premium, index=rules["current"].index, columns=rules["current"].columns)
+    rules["passes"] = rules["passes"] & (rules["premium"] / rules["current"] >= MIN_PREMIUM_PERCENT)
+    return rules
+
+
+def simulate_csp(panel: dict, rules: dict = None, slippage_pct=CSP_SLIPPAGE_PCT) -> pd.DataFrame:
+    """
+    Cash-secured puts sold on the first bar of each CSP signal run and held to expiry.
+    Returns: DataFrame, one row per trade (symbol, dates, strike, credit, intrinsic at expiry,
+             r = P&L / credit, reason: expired | assigned | open)
+    """
+    from auto_options_executor import CSP_DTE
+    from option_pricing import TRADING_DAYS
+
+    rules = rules or _csp_rules(panel)
+    close = rules["current"].to_numpy(dtype=float)
+    rows, cols = np.nonzero(_entries(rules["passes"].to_numpy(dtype=bool)))
+    hold = int(round(CSP_DTE * TRADING_DAYS / 365))
+    expiry = np.minimum(rows + hold, len(close) - 1)
+    # Last traded close on or before expiry (ffill covers halts)
+    settle = pd.DataFrame(close).ffill().to_numpy()[expiry, cols]
+
+    strike = rules["strike"].to_numpy()[rows, cols]
+    credit = rules["premium"].to_numpy()[rows, cols] * (1 - slippage_pct)
+    intrinsic = np.maximum(strike - settle, 0.0)
+    dates = rules["current"].index
+    return pd.DataFrame({
+        "symbol": np.asarray(rules["current"].columns)[cols],
+        "signal_date": dates[rows],
+        "entry_date": dates[rows],
+        "exit_date": dates[expiry],
+        "direction": 1,
+        "entry": close[rows, cols],
+        "strike": strike,
+        "credit": credit,
+        "exit": settle,
+        "intrinsic": intrinsic,
+        "r": (credit - intrinsic) / credit,
+        "bars_held": expiry - rows,
+        "reason": np.where(rows + hold >= len(close), "open", np.where(intrinsic > 0, "assigned", "expired")),
+    })
+
+
+# --- results ---
+
+def equity_curve(trades: pd.DataFrame, dates, risk_per_trade=RISK_PER_TRADE) -> pd.DataFrame:
+    """
+    Portfolio curve by exit date.
+    Returns: DataFrame indexed by date (r, cum_r, drawdown_r, equity; equity starts at 1.0)
+    """
+    daily = trades.groupby("exit_date")["r"].sum().reindex(dates, fill_value=0.0)
+    cum = daily.cumsum()
+    return pd.DataFrame({
+        "r": daily,
+        "cum_r": cum,
+        "drawdown_r": cum - cum.cummax().clip(lower=0),
+        "equity": (1 + risk_per_trade * daily).cumprod(),
+    })
+
+
+def symbol_curves(trades: pd.DataFrame, dates, symbols) -> pd.DataFrame:
+    """Cumulative R per symbol by exit date (dates × symbols)."""
+    daily = trades.pivot_table(index="exit_date", columns="symbol", values="r", aggfunc="sum")
+    return daily.reindex(index=dates, columns=symbols).fillna(0.0).cumsum()
+
+
+def summarize(trades: pd.DataFrame, curve: pd.DataFrame) -> dict:
+    """
+    Returns: { trades, win_rate, avg_r, median_r, profit_factor, total_r, max_drawdown_r,
+               final_equity, avg_bars_held, exits: {reason: count} }
+    """
+    r = trades["r"].to_numpy()
+    if len(r) == 0:
+        return {"trades": 0}
+    gains, losses = r[r > 0].sum(), -r[r < 0].sum()
+    return {
+        "trades": int(len(r)),
+        "win_rate": round(float((r > 0).mean()), 3),
+        "avg_r": round(float(r.mean()), 3),
+        "median_r": round(float(np.median(r)), 3),
+        "profit_factor": round(float(gains / losses), 2) if losses > 0 else None,
+        "total_r": round(float(r.sum()), 1),
+        "max_drawdown_r": round(float(curve["drawdown_r"].min()), 1),
+        "final_equity": round(float(curve["equity"].iloc[-1]), 3),
+        "avg_bars_held": round(float(trades["bars_held"].mean()), 1),
+        "exits": trades["reason"].value_counts().to_dict(),
+    }
+
+
+def run(strategy: str, panel: dict, spy_close=None, nx: dict = None, risk_per_trade=RISK_PER_TRADE,
+        **fill) -> dict:
+    """
+    Backtest one strategy over the panel.
+    fill: simulate() overrides (slippage_bps, stop_atr, target_r, max_hold); CSP: slippage_pct.
+    Returns: { trades, curve, symbol_curves, stats }
+    """
+    close = panel["Close"]
+    if strategy == "csp":
+        trades = simulate_csp(panel, **fill)
+    else:
+        sig = signals(strategy, panel, spy_close, nx)
+        trades = simulate(sig, panel, -1 if strategy == "nx_short" else 1, **fill)
+    curve = equity_curve(trades, close.index, risk_per_trade)
+    return {
+        "trades": trades,
+        "curve": curve,
+        "symbol_curves": symbol_curves(trades, close.index, close.columns),
+        "stats": summarize(trades, curve),
+    }
+
+
+# --- sweeps ---
+
+_SWEEP = {}
+
+
+def _init_sweep(context: dict):
+    _SWEEP.clear()
+    _SWEEP.update(context)
+
+
+def _sweep_one(nx: dict) -> dict:
+    c = _SWEEP
+    sig = _nx_signal(c["nx"], nx, c["direction"])
+    f = _fills(_entries(sig), c["O"], c["H"], c["L"], c["C"], c["atr"], c["direction"], **c["fill"])
+    trades = _trade_frame(f, c["dates"], c["symbols"], c["direction"])
+    stats = summarize(trades, equity_curve(trades, c["dates"], c["risk_per_trade"]))
+    stats.pop("exits", None)
+    return stats
+
+
+def sweep(grid: dict, panel: dict, spy_close=None, strategy: str = "nx_long", base_nx: dict = None,
+          workers: int = None, risk_per_trade=RISK_PER_TRADE, **fill) -> pd.DataFrame:
+    """
+    Backtest every combination of NX thresholds in grid ({ key: [values] }) on a process pool.
+    Returns: DataFrame, one row per combination (thresholds + stats), best avg_r first
+    """
+    if strategy not in ("nx_long", "nx_short"):
+        raise ValueError("Threshold sweeps apply to nx_long / nx_short")
+    if base_nx is None:
+        from nx_screener_production import NX as base_nx
+    unknown = set(grid) - set(base_nx)
+    if unknown:
+        raise ValueError(f"Not NX thresholds: {sorted(unknown)}")
+
+    combos = [{**base_nx, **dict(zip(grid, values))} for values in product(*grid.values())]
+    t0 = time.time()
+    close = panel["Close"]
+    history = compute_nx_history(panel, spy_close, base_nx)
+    defaults = {"slippage_bps": SLIPPAGE_BPS, "stop_atr": STOP_ATR, "target_r": TARGET_R, "max_hold": MAX_HOLD_BARS}
+    context = {
+        "nx": _nx_context(history),
+        "O": panel["Open"].reindex(index=close.index, columns=close.columns).to_numpy(dtype=float),
+        "H": panel["High"].reindex(index=close.index, columns=close.columns).to_numpy(dtype=float),
+        "L": panel["Low"].reindex(index=close.index, columns=close.columns).to_numpy(dtype=float),
+        "C": close.to_numpy(dtype=float),
+        "atr": atr_history(panel).to_numpy(dtype=float),
+        "dates": close.index,
+        "symbols": np.asarray(close.columns),
+        "direction": 1 if strategy == "nx_long" else -1,
+        "fill": {**defaults, **fill},
+        "risk_per_trade": risk_per_trade,
+    }
+    logger.info(f"Sweep: {len(combos)} combinations, metrics in {time.time() - t0:.1f}s")
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(combos) == 1:
+        _init_sweep(context)
+        results = [_sweep_one(nx) for nx in combos]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(combos)), initializer=_init_sweep,
+                                 initargs=(context,)) as pool:
+            results = list(pool.map(_sweep_one, combos, chunksize=max(1, len(combos) // (workers * 4))))
+    logger.info(f"Sweep finished in {time.time() - t0:.1f}s")
+
+    table = pd.DataFrame([{**{k: nx[k] for k in grid}, **stats} for nx, stats in zip(combos, results)])
+    return table.sort_values("avg_r", ascending=False, na_position="last").reset_index(drop=True) \
+        if "avg_r" in table else table
+
+
+def _parse_grid(specs) -> dict:
+    """['rs_long_min=0.45,0.5', ...] → { 'rs_long_min': [0.45, 0.5], ... }"""
+    grid = {}
+    for spec in specs:
+        key, _, values = spec.partition("=")
+        grid[key.strip()] = [float(v) for v in values.split(",") if v.strip()]
+    return grid
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorized screener backtests")
+    parser.add_argument("--strategy", choices=STRATEGIES, default="nx_long")
+    parser.add_argument("--years", type=float, default=HISTORY_YEARS)
+    parser.add_argument("--symbols", nargs="*", help="Default: the NX screener universe")
+    parser.add_argument("--sweep", nargs="*", metavar="KEY=V1,V2", help="NX threshold grid")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out", help="Write trades (or the sweep table) to this CSV")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(levelname)s: %(message)s')
+
+    symbols = args.symbols
+    if not symbols:
+        from nx_screener_production import get_universe_symbols
+        symbols = get_universe_symbols()
+    t0 = time.time()
+    panel, spy = load_history(symbols, args.years)
+    logger.info(f"History: {panel['Close'].shape[0]} dates × {panel['Close'].shape[1]} symbols "
+                f"in {time.time() - t0:.1f}s")
+
+    if args.sweep:
+        table = sweep(_parse_grid(args.sweep), panel, spy, args.strategy, workers=args.workers)
+        print(table.to_string(index=False))
+        if args.out:
+            table.to_csv(args.out, index=False)
+            print(f"Wrote {args.out}")
+        return
+
+    result = run(args.strategy, panel, spy)
+    print(f"{args.strategy}: {result['stats']}")
+    if args.out:
+        result["trades"].to_csv(args.out, index=False)
+        print(f"Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
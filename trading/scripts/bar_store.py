@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""
+Shared OHLCV Bar Store
+One local daily-bar history for every scanner instead of per-script yfinance downloads.
+
+- Columnar on-disk store: one memory-mapped NumPy file per symbol
+  (cache/bars/<SYMBOL>.npy, rows = [day, Open, High, Low, Close, Volume]).
+- Only the missing trailing days are downloaded; stale symbols are grouped by
+  their first missing day and fetched with multi-ticker yf.download calls
+  (through yf_broker's shared rate limiter).
+- Downloads run as fixed-size chunks on a bounded worker pool, with per-chunk
+  retry/backoff and timing (yf_broker serializes the yf.download calls themselves).
+  A symbol missing from an answered chunk counts one miss per day; after
+  DEAD_AFTER_MISSES days of misses (delisted: TWTR, SPLK, ...) it is dead and skipped
+  until the next recheck. Errored and all-empty multi-symbol chunks never count.
+- The last stored bar is always re-fetched so a partial intraday bar gets replaced.
+  If a final stored bar comes back with a different close, the history was re-adjusted
+  (split/dividend) and the symbol's full range is re-downloaded.
+
+Usage:
+  from bar_store import get_bars
+  bars = get_bars(['AAPL', 'SPY'], start=datetime.now() - timedelta(days=365))
+  bars['AAPL']   # DataFrame indexed by date: Open, High, Low, Close, Volume
+
+CLI:
+  python3 bar_store.py AAPL MSFT SPY
+"""
+
+import yf_broker
+import pandas as pd
+import numpy as np
+from datetime import datetime, date, timedelta
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+BARS_DIR = Path.home() / ".openclaw" / "workspace" / "trading" / "cache" / "bars"
+BARS_DIR.mkdir(parents=True, exist_ok=True)
+
+COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+DEFAULT_HISTORY_DAYS = 365   # Matches the old period="1y" downloads
+REFRESH_TTL_SEC = 15 * 60    # Don't re-hit yfinance for the same symbol more often than this
+
+# Fetch engine
+CHUNK_SIZE = 50              # Symbols per yf.download call
+MAX_WORKERS = 4              # Concurrent chunk downloads
+MAX_RETRIES = 3              # Attempts per chunk
+BACKOFF_BASE_SEC = 1.0       # Sleep 1s, 2s, 4s... between attempts
+DEAD_SYMBOLS_FILE = BARS_DIR / "dead_symbols.json"
+DEAD_AFTER_DAYS = 10         # Only a miss over a window this long counts toward dead
+DEAD_AFTER_MISSES = 3        # Misses on separate days before a symbol is dead
+DEAD_RECHECK_DAYS = 30       # Retry dead symbols after this many days
+ADJUST_TOLERANCE = 1e-4      # Relative close change on a final stored bar → history re-adjusted
+
+_EPOCH = date(1970, 1, 1)
+
+_dead_lock = threading.Lock()
+
+# Per-symbol write locks: the webhook gates, the regime gate and the warm-up refresh the
+# same tickers (and SPY) from several threads at once
+_symbol_locks = {}
+_symbol_locks_guard = threading.Lock()
+
+
+def _to_date(value) -> date:
+    """Normalize str/datetime/date/Timestamp/None to a date."""
+    if value is None:
+        return datetime.now().date()
+    if isinstance(value, str):
+        return pd.Timestamp(value).date()
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, pd.Timestamp):
+        return value.date()
+    return value
+
+
+def _day_num(d: date) -> int:
+    return (d - _EPOCH).days
+
+
+def _bar_path(symbol: str) -> Path:
+    return BARS_DIR / f"{symbol.upper().replace('/', '_')}.npy"
+
+
+def _last_weekday(d: date) -> date:
+    while d.weekday() >= 5:
+        d -= timedelta(days=1)
+    return d
+
+
+def _load(symbol: str):
+    """Memory-map stored bars for a symbol. Returns ndarray (n x 6) or None."""
+    path = _bar_path(symbol)
+    if not path.exists():
+        return None
+    try:
+        arr = np.load(path, mmap_mode="r")
+        if arr.ndim != 2 or arr.shape[1] != len(COLUMNS) + 1:
+            logger.warning(f"Bar file for {symbol} has bad shape {arr.shape}; rebuilding")
+            return None
+        return arr
+    except Exception as e:
+        logger.warning(f"Bar file for {symbol} unreadable ({e}); rebuilding")
+        return None
+
+
+def _symbol_lock(symbol: str) -> threading.Lock:
+    with _symbol_locks_guard:
+        return _symbol_locks.setdefault(symbol.upper(), threading.Lock())
+
+
+def _tmp_path(path: Path) -> Path:
+    """Temp file name unique per process and thread."""
+    return path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+def _save(symbol: str, arr: np.ndarray):
+    """Atomically replace a symbol's bar file (callers hold _symbol_lock(symbol))."""
+    path = _bar_path(symbol)
+    tmp = _tmp_path(path)
+    with open(tmp, "wb") as f:
+        np.save(f, np.ascontiguousarray(arr, dtype=np.float64))
+    os.replace(tmp, path)
+
+
+def _fetch_start(symbol: str, stored, start: date, end: date):
+    """
+    First day that must be downloaded for a symbol, or None if the store is fresh.
+    Re-fetches from the last stored day so a partial intraday bar gets replaced.
+    """
+    if stored is None or len(stored) == 0:
+        return start
+
+    first = _EPOCH + timedelta(days=int(stored[0, 0]))
+    last = _EPOCH + timedelta(days=int(stored[-1, 0]))
+
+    if start < first - timedelta(days=5):
+        # Caller wants more history than we hold: backfill the whole range
+        return start
+
+    stale = last < _last_weekday(end) or last >= datetime.now().date()
+    if not stale:
+        return None
+
+    age = time.time() - _bar_path(symbol).stat().st_mtime
+    if age < REFRESH_TTL_SEC:
+        return None
+    return last
+
+
+def _frame_for(data: pd.DataFrame, symbol: str, single: bool):
+    """Pull one symbol's OHLCV out of a (possibly multi-ticker) yf.download frame."""
+    if data is None or data.empty:
+        return None
+    if isinstance(data.columns, pd.MultiIndex):
+        if symbol in data.columns.get_level_values(0):
+            df = data[symbol]
+        elif symbol in data.columns.get_level_values(1):
+            df = data.xs(symbol, axis=1, level=1)
+        else:
+            return None
+    elif single:
+        df = data
+    else:
+        return None
+    if not all(c in df.columns for c in COLUMNS):
+        return None
+    return df[COLUMNS].dropna(subset=["Close"])
+
+
+def _to_array(df: pd.DataFrame) -> np.ndarray:
+    days = np.array([_day_num(ts.date()) for ts in pd.DatetimeIndex(df.index)], dtype=np.float64)
+    return np.column_stack([days, df[COLUMNS].to_numpy(dtype=np.float64)])
+
+
+def _merge(stored, new: np.ndarray) -> np.ndarray:
+    """
+    Splice downloaded rows into the stored ones: they overwrite the stored days in their
+    range, and stored days before and after it (a backfill with an early end) are kept.
+    """
+    if stored is None or len(stored) == 0:
+        return new
+    if len(new) == 0:
+        return np.asarray(stored)
+    before = np.asarray(stored[stored[:, 0] < new[0, 0]])
+    after = np.asarray(stored[stored[:, 0] > new[-1, 0]])
+    return np.vstack([before, new, after])
+
+
+def _readjusted(symbol: str, stored, df: pd.DataFrame) -> bool:
+    """True if the last stored bar was final when written and its close came back different."""
+    if stored is None or len(stored) == 0:
+        return False
+    last_day = int(stored[-1, 0])
+    written = datetime.fromtimestamp(_bar_path(symbol).stat().st_mtime).date()
+    if _day_num(written) <= last_day:
+        return False  # Stored bar may have been a partial intraday bar
+    days = np.array([_day_num(ts.date()) for ts in pd.DatetimeIndex(df.index)])
+    same = np.nonzero(days == last_day)[0]
+    if len(same) == 0:
+        return False
+    old, new = float(stored[-1, 4]), float(df["Close"].iloc[same[0]])
+    return abs(new - old) > ADJUST_TOLERANCE * abs(old)
+
+
+def _download(symbols: list, start: date, end: date) -> dict:
+    """Multi-ticker yf.download for one start date. Returns {symbol: DataFrame}."""
+    data = yf_broker.download(
+        symbols,
+        start=start.isoformat(),
+        end=(end + timedelta(days=1)).isoformat(),
+        group_by="ticker",
+        threads=False,  # Concurrency comes from our own bounded pool
+        ttl=0,          # The store is the cache; the broker only rate-limits / coalesces
+    )
+    frames = {}
+    for sym in symbols:
+        df = _frame_for(data, sym, single=len(symbols) == 1)
+        if df is not None and not df.empty:
+            frames[sym] = df
+    return frames
+
+
+def _load_misses() -> dict:
+    """Miss counts: { symbol: { misses, last_miss (YYYY-MM-DD) } }"""
+    if not DEAD_SYMBOLS_FILE.exists():
+        return {}
+    try:
+        with open(DEAD_SYMBOLS_FILE) as f:
+            raw = json.load(f)
+    except Exception as e:
+        logger.warning(f"Dead-symbol list unreadable: {e}")
+        return {}
+    # Older files held { symbol: date marked dead } after a single miss: keep as one miss
+    return {sym: v if isinstance(v, dict) else {"misses": 1, "last_miss": v} for sym, v in raw.items()}
+
+
+def load_dead_symbols() -> dict:
+    """Confirmed dead symbols (DEAD_AFTER_MISSES misses): { symbol: last miss (YYYY-MM-DD) }"""
+    return {sym: v["last_miss"] for sym, v in _load_misses().items() if v.get("misses", 0) >= DEAD_AFTER_MISSES}
+
+
+def _record_misses(missed: set, found: set, today: date) -> list:
+    """
+    Count one miss per symbol per day and clear symbols that returned bars.
+    Returns: symbols newly confirmed dead
+    """
+    if not missed and not found:
+        return []
+    newly_dead = []
+    with _dead_lock:
+        entries = _load_misses()
+        changed = False
+        for sym in found & entries.keys():
+            del entries[sym]
+            changed = True
+        for sym in missed:
+            entry = entries.setdefault(sym, {"misses": 0, "last_miss": None})
+            if entry["last_miss"] == today.isoformat():
+                continue
+            entry["misses"] += 1
+            entry["last_miss"] = today.isoformat()
+            changed = True
+            if entry["misses"] == DEAD_AFTER_MISSES:
+                newly_dead.append(sym)
+        if changed:
+            _save_dead_symbols(entries)
+    return newly_dead
+
+
+def _save_dead_symbols(dead: dict):
+    tmp = _tmp_path(DEAD_SYMBOLS_FILE)
+    with open(tmp, "w") as f:
+        json.dump(dict(sorted(dead.items())), f, indent=2)
+    os.replace(tmp, DEAD_SYMBOLS_FILE)
+
+
+def _is_dead(symbol: str, dead: dict, today: date) -> bool:
+    marked = dead.get(symbol)
+    if not marked:
+        return False
+    try:
+        return (today - date.fromisoformat(marked)).days < DEAD_RECHECK_DAYS
+    except ValueError:
+        return False
+
+
+def _fetch_chunk(chunk: list, start: date, end: date) -> dict:
+    """
+    Download one chunk with retry/backoff.
+    An exception or an all-empty response (typical of throttling) counts as a failed attempt.
+    Returns: { frames, attempts, seconds, error }
+    """
+    t0 = time.time()
+    error = None
+    for attempt in range(1, MAX_RETRIES + 1):
+        try:
+            frames = _download(chunk, start, end)
+            if frames:
+                return {"frames": frames, "attempts": attempt, "seconds": time.time() - t0, "error": None}
+            error = "empty response"
+        except Exception as e:
+            error = str(e)[:80]
+        if attempt < MAX_RETRIES:
+            time.sleep(BACKOFF_BASE_SEC * 2 ** (attempt - 1))
+    return {"frames": {}, "attempts": MAX_RETRIES, "seconds": time.time() - t0, "error": error}
+
+
+def refresh(symbols, start=None, end=None) -> dict:
+    """
+    Bring stored bars up to date for symbols, downloading only missing days.
+    Stale symbols are grouped by first missing day, split into CHUNK_SIZE chunks
+    and downloaded on a MAX_WORKERS pool.
+    Returns: { updated, dead (newly confirmed), missed, readjusted, chunks: [{symbols, start, received, attempts, seconds, error}], seconds }
+    """
+    t0 = time.time()
+    end_d = _to_date(end)
+    start_d = _to_date(start) if start is not None else end_d - timedelta(days=DEFAULT_HISTORY_DAYS)
+    today = datetime.now().date()
+
+    dead = load_dead_symbols()
+    skipped = {s for s in symbols if _is_dead(s, dead, today)}
+    if skipped:
+        logger.info(f"Bar store: skipping {len(skipped)} dead symbols")
+
+    # Group stale symbols by first missing day so each chunk is one download
+    groups = {}
+    for sym in symbols:
+        if sym in skipped:
+            continue
+        fetch_from = _fetch_start(sym, _load(sym), start_d, end_d)
+        if fetch_from is not None:
+            groups.setdefault(fetch_from, []).append(sym)
+
+    jobs = [
+        (fetch_from, group[i:i + CHUNK_SIZE])
+        for fetch_from, group in sorted(groups.items())
+        for i in range(0, len(group), CHUNK_SIZE)
+    ]
+    stats = {"updated": 0, "dead": [], "missed": 0, "readjusted": [], "chunks": [], "seconds": 0.0}
+    if not jobs:
+        return stats
+
+    logger.info(f"Bar store: {sum(len(c) for _, c in jobs)} stale symbols in {len(jobs)} chunks "
+                f"({MAX_WORKERS} workers)")
+
+    missed, found = set(), set()
+    readjusted = {}  # symbol → first stored day
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        futures = {pool.submit(_fetch_chunk, chunk, fetch_from, end_d): (fetch_from, chunk)
+                   for fetch_from, chunk in jobs}
+        for n, fut in enumerate(as_completed(futures), 1):
+            fetch_from, chunk = futures[fut]
+            result = fut.result()
+            frames = result["frames"]
+
+            for sym, df in frames.items():
+                with _symbol_lock(sym):
+                    stored = _load(sym)
+                    if _readjusted(sym, stored, df):
+                        readjusted[sym] = _EPOCH + timedelta(days=int(stored[0, 0]))
+                        continue
+                    _save(sym, _merge(stored, _to_array(df)))
+            found.update(frames)
+            stats["updated"] += len(frames)
+
+            # Count misses only when the chunk came back with data, or a lone symbol came back
+            # empty; an errored or all-empty multi-symbol response looks like throttling.
+            # One miss never makes a symbol dead (DEAD_AFTER_MISSES separate days)
+            answered = result["error"] is None or (result["error"] == "empty response" and len(chunk) == 1)
+            if answered and (end_d - fetch_from).days > DEAD_AFTER_DAYS:
+                missed.update(sym for sym in chunk if sym not in frames)
+
+            chunk_stats = {
+                "symbols": len(chunk),
+                "start": fetch_from.isoformat(),
+                "received": len(frames),
+                "attempts": result["attempts"],
+                "seconds": round(result["seconds"], 2),
+                "error": result["error"],
+            }
+            stats["chunks"].append(chunk_stats)
+            msg = (f"Bar store chunk {n}/{len(jobs)}: {len(frames)}/{len(chunk)} symbols from {fetch_from} "
+                   f"in {result['seconds']:.2f}s (attempts: {result['attempts']})")
+            if result["error"]:
+                logger.warning(f"{msg} - {result['error']}")
+            else:
+                logger.info(msg)
+
+    # Re-adjusted histories: replace the whole stored range (rare, so sequential)
+    for sym, first in sorted(readjusted.items()):
+        result = _fetch_chunk([sym], min(first, start_d), end_d)
+        df = result["frames"].get(sym)
+        if df is not None:
+            with _symbol_lock(sym):
+                _save(sym, _to_array(df))
+            logger.info(f"Bar store: {sym} history re-adjusted; re-downloaded from {min(first, start_d)}")
+        else:
+            logger.warning(f"Bar store: {sym} re-adjusted but full re-download failed ({result['error']})")
+    stats["readjusted"] = sorted(readjusted)
+
+    stats["missed"] = len(missed)
+    stats["dead"] = sorted(_record_misses(missed, found, today))
+    if stats["dead"]:
+        logger.info(f"Bar store: marked {len(stats['dead'])} dead symbols: {', '.join(sorted(stats['dead']))}")
+
+    stats["seconds"] = round(time.time() - t0, 2)
+    return stats
+
+
+def list_symbols() -> list:
+    """Every symbol with stored bars (the store's universe)."""
+    return sorted(p.stem for p in BARS_DIR.glob("*.npy"))
+
+
+def get_bars(symbols, start=None, end=None, refresh_stale=True) -> dict:
+    """
+    Daily OHLCV bars for symbols between start and end (inclusive).
+    Defaults: start = one year ago, end = today.
+    Returns: { symbol: DataFrame[Open, High, Low, Close, Volume] } (symbols without data are omitted)
+    """
+    if isinstance(symbols, str):
+        symbols = [symbols]
+    symbols = list(dict.fromkeys(symbols))
+
+    end_d = _to_date(end)
+    start_d = _to_date(start) if start is not None else end_d - timedelta(days=DEFAULT_HISTORY_DAYS)
+
+    if refresh_stale:
+        refresh(symbols, start_d, end_d)
+
+    lo, hi = _day_num(start_d), _day_num(end_d)
+    out = {}
+    for sym in symbols:
+        arr = _load(sym)
+        if arr is None or len(arr) == 0:
+            continue
+        i0, i1 = np.searchsorted(arr[:, 0], [lo, hi + 1])
+        rows = np.asarray(arr[i0:i1])
+        if len(rows) == 0:
+            continue
+        index = pd.to_datetime(rows[:, 0].astype("int64"), unit="D")
+        out[sym] = pd.DataFrame(rows[:, 1:], index=index, columns=COLUMNS)
+    return out
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    test_symbols = sys.argv[1:] or ["SPY", "AAPL", "MSFT"]
+    bars = get_bars(test_symbols)
+    for sym in test_symbols:
+        df = bars.get(sym)
+        if df is None:
+            print(f"{sym}: no data")
+        else:
+            last = df.iloc[-1]
+            print(f"{sym}: {len(df)} bars, last {df.index[-1].date()} close={last['Close']:.2f}")
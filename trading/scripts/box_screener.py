@@ -8,10 +8,12 @@ TODO: Confirm box lookback window, range %, and squeeze parameters with Ryan.
 import sys
 import json
 import pandas as pd
+from datetime import datetime, timedelta
 try:
-    import yfinance as yf  # type: ignore
+    from bar_store import get_bars
+    from nx_metrics import build_panel, on_own_bars
 except Exception as e:
-    print("Missing dependency: yfinance (pip install yfinance)")
+    print(f"Missing dependency: {e} (pip install yfinance)")
     sys.exit(1)
 
 DEFAULT_WATCHLIST = ["AFRM","UPST","COIN","HOOD","SOFI"]
@@ -20,38 +22,52 @@ LOOKBACK = 20
 MAX_RANGE = 0.15  # 15%
 
 
+def box_signals(panel: dict, lookback=LOOKBACK) -> dict:
+    """
+    Box + squeeze rules on every date of a (dates × symbols) panel (nx_metrics.build_panel);
+    row t only uses the symbol's own bars up to t (screen() takes each symbol's last bar,
+    backtest.py all of them).
+    Returns: { signal, box_high, box_low, box_range } DataFrames
+    """
+    return on_own_bars(panel, lambda bars: _box_rules(bars, lookback))
+
+
+def _box_rules(panel: dict, lookback: int) -> dict:
+    close = panel["Close"]
+    n = close.notna().cumsum()
+    box_high = panel["High"].rolling(lookback, min_periods=1).max()
+    box_low = panel["Low"].rolling(lookback, min_periods=1).min()
+    box_range = (box_high - box_low) / box_low.clip(lower=1e-9)
+    # crude squeeze proxy using Bollinger vs Keltner
+    ma = close.rolling(20).mean()
+    std = close.rolling(20).std()
+    upper_bb, lower_bb = ma + 2 * std, ma - 2 * std
+    upper_kc, lower_kc = ma + 1.5 * std, ma - 1.5 * std
+    squeeze_on = (lower_bb > lower_kc) & (upper_bb < upper_kc)
+    signal = (n >= lookback) & ~(box_range > MAX_RANGE) & squeeze_on
+    return {"signal": signal, "box_high": box_high, "box_low": box_low, "box_range": box_range}
+
+
 def screen(tickers, lookback=LOOKBACK):
     rows = []
-    for t in tickers:
-        try:
-            data = yf.download(t, period="3mo", progress=False)
-            if len(data) < lookback:
-                continue
-            recent = data.iloc[-lookback:]
-            box_high = float(recent["High"].max())
-            box_low = float(recent["Low"].min())
-            box_range = (box_high - box_low) / max(box_low, 1e-9)
-            if box_range > MAX_RANGE:
-                continue
-            # crude squeeze proxy using Bollinger vs Keltner
-            data["20_MA"] = data["Close"].rolling(20).mean()
-            data["20_STD"] = data["Close"].rolling(20).std()
-            data["Upper_BB"] = data["20_MA"] + 2 * data["20_STD"]
-            data["Lower_BB"] = data["20_MA"] - 2 * data["20_STD"]
-            data["Upper_KC"] = data["20_MA"] + 1.5 * data["20_STD"]
-            data["Lower_KC"] = data["20_MA"] - 1.5 * data["20_STD"]
-            squeeze_on = (data["Lower_BB"] > data["Lower_KC"]) & (data["Upper_BB"] < data["Upper_KC"])
-            if not bool(squeeze_on.iloc[-1]):
-                continue
-            rows.append({
-                "Ticker": t,
-                "Price": round(float(data.iloc[-1]["Close"]), 2),
-                "BoxHigh": round(box_high, 2),
-                "BoxLow": round(box_low, 2),
-                "BoxRangePct": round(box_range * 100, 2),
-            })
-        except Exception as e:
-            print(f"WARN: {t}: {e}")
+    bars = get_bars(tickers, start=datetime.now() - timedelta(days=92))
+    bars = {t: bars[t] for t in tickers if t in bars and not bars[t].empty}
+    if not bars:
+        return pd.DataFrame(rows)
+    panel = build_panel(bars)
+    sig = box_signals(panel, lookback)
+    for t, data in bars.items():
+        day = data.index[-1]
+        if not sig["signal"].at[day, t]:
+            continue
+        box_high, box_low = float(sig["box_high"].at[day, t]), float(sig["box_low"].at[day, t])
+        rows.append({
+            "Ticker": t,
+            "Price": round(float(data.iloc[-1]["Close"]), 2),
+            "BoxHigh": round(box_high, 2),
+            "BoxLow": round(box_low, 2),
+            "BoxRangePct": round(float(sig["box_range"].at[day, t]) * 100, 2),
+        })
     return pd.DataFrame(rows)
 
 if __name__ == "__main__":
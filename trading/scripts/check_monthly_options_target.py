@@ -3,14 +3,16 @@
 Monthly Options Target Checker
 Runs on last Friday of each month to ensure minimum deployment target is met
 """
-import os, json, sys
+import os, sys
 from pathlib import Path
 from datetime import datetime
 from calendar import monthrange
 
+sys.path.insert(0, str(Path(__file__).parent))
+import trade_journal as journal
+
 # Paths
 TRADING_DIR = Path(__file__).resolve().parents[1]
-LOGS_DIR = TRADING_DIR / 'logs'
 OPTIONS_DIR = TRADING_DIR / 'options'
 
 # Targets
@@ -19,37 +21,18 @@ IDEAL_MONTHLY_TARGET = 4
 
 def count_options_trades_this_month():
     """Count options trades deployed this month"""
-    if not LOGS_DIR.exists():
-        return 0, []
-    
-    now = datetime.now()
-    current_month = now.month
-    current_year = now.year
-    
+    month_start = datetime.now().date().replace(day=1)
     options_trades = []
     
-    for log_file in LOGS_DIR.glob('*.json'):
-        try:
-            with open(log_file) as f:
-                data = json.load(f)
-                intent = data.get('intent', {})
-                
-                # Check if this is an options trade
-                if intent.get('option_type'):
-                    # Get timestamp
-                    ts = intent.get('ts', 0)
-                    if ts:
-                        trade_date = datetime.fromtimestamp(ts / 1000)
-                        if trade_date.month == current_month and trade_date.year == current_year:
-                            options_trades.append({
-                                'date': trade_date.strftime('%Y-%m-%d'),
-                                'ticker': intent.get('ticker'),
-                                'type': intent.get('type'),
-                                'strike': intent.get('strike'),
-                                'option_type': intent.get('option_type')
-                            })
-        except Exception:
-            continue
+    for trade in journal.trades(since=month_start, source='webhook', kind='option'):
+        intent = trade['data']
+        options_trades.append({
+            'date': trade['trade_date'],
+            'ticker': intent.get('ticker'),
+            'type': intent.get('type'),
+            'strike': intent.get('strike'),
+            'option_type': intent.get('option_type')
+        })
     
     return len(options_trades), options_trades
 
@@ -8,8 +8,10 @@ TODO: Confirm exact thresholds with Ryan before production use.
 import sys
 import json
 import pandas as pd
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent))
 try:
-    import yfinance as yf  # type: ignore
+    import yf_broker
 except Exception as e:
     print("Missing dependency: yfinance (pip install yfinance)")
     sys.exit(1)
@@ -29,7 +31,7 @@ def screen(tickers):
     rows = []
     for t in tickers:
         try:
-            info = yf.Ticker(t).info
+            info = yf_broker.info(t)
             mc = info.get("marketCap") or 0
             dy = info.get("dividendYield") or 0
             pr = info.get("payoutRatio") or 1
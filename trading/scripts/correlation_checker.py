@@ -2,33 +2,25 @@
 """
 Position Correlation Checker
 Warns if adding a new position would create high correlation risk
+
+Correlations come from the precomputed matrix (correlation_matrix.py, rebuilt
+nightly, updated intraday); the bar-store computation is only the fallback for
+tickers the matrix doesn't cover.
 """
-import os, json, sys
+import os, sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent))
+import trade_journal as journal
+
 TRADING_DIR = Path(__file__).resolve().parents[1]
-LOGS_DIR = TRADING_DIR / 'logs'
 
 MAX_CORRELATION = 0.7  # Alert if correlation exceeds this
 
 def get_open_positions():
     """Get list of currently open positions"""
-    if not LOGS_DIR.exists():
-        return []
-    
-    positions = []
-    for log_file in LOGS_DIR.glob('*.json'):
-        try:
-            with open(log_file) as f:
-                data = json.load(f)
-                intent = data.get('intent', {})
-                
-                # Check if this is a stock trade (not options)
-                if not intent.get('option_type') and intent.get('ticker'):
-                    positions.append(intent.get('ticker'))
-        except Exception:
-            continue
-    
+    # Stock trades only (not options)
+    positions = [t['ticker'] for t in journal.trades(source='webhook', kind='stock') if t['ticker']]
     return list(set(positions))  # Unique tickers
 
 def check_correlation(new_ticker, existing_positions):
@@ -40,13 +32,27 @@ def check_correlation(new_ticker, existing_positions):
         return True, []
     
     try:
-        import yfinance as yf
+        from correlation_matrix import lookup
+        cached = lookup(new_ticker, existing_positions)
+    except Exception:
+        cached = None
+    if cached is not None:
+        warnings = [
+            f"{new_ticker} highly correlated with {existing}: {corr:.2f}"
+            for existing, corr in cached.items()
+            if abs(corr) > MAX_CORRELATION
+        ]
+        return len(warnings) == 0, warnings
+    
+    try:
         import pandas as pd
-        import numpy as np
+        from datetime import datetime, timedelta
+        from bar_store import get_bars
         
-        # Download 60 days of data for all tickers
+        # 60 days of closes for all tickers from the shared bar store
         all_tickers = existing_positions + [new_ticker]
-        data = yf.download(all_tickers, period='60d', progress=False)['Close']
+        bars = get_bars(all_tickers, start=datetime.now() - timedelta(days=60))
+        data = pd.DataFrame({t: df['Close'] for t, df in bars.items()})
         
         if data.empty:
             return True, ["Correlation check failed: no price data"]
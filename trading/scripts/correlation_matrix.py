@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Correlation Matrix Cache
+Precomputes the full-universe daily-return correlation matrix from the shared bar
+store, so correlation_checker answers with a row lookup instead of downloading closes.
+
+Files (cache/correlation/):
+- index.json          { symbols, matrix, as_of, window, built_at, intraday }
+- matrix-<id>.npy     float32 [N x N] pairwise Pearson correlation (NaN = too little overlap)
+- stats.npz           committed window returns and pairwise sums (float64) for intraday updates
+
+The matrix file named in index.json is never rewritten in place: a new one is
+written first and index.json swapped atomically, so readers never see a mix.
+
+Usage:
+  python3 correlation_matrix.py build      # nightly: full rebuild over the last WINDOW final days
+  python3 correlation_matrix.py intraday   # rank-1 update with today's live return (no full rebuild)
+  python3 correlation_matrix.py AAPL MSFT NVDA   # lookup
+
+  from correlation_matrix import lookup, covariance
+  lookup("AAPL", ["MSFT", "NVDA"])   # {"MSFT": 0.71, "NVDA": 0.64} or None if not cached
+  covariance(["AAPL", "MSFT"])       # daily-return covariance DataFrame (scenario_engine)
+"""
+
+import pandas as pd
+import numpy as np
+from datetime import datetime, timedelta
+from pathlib import Path
+import json
+import logging
+import os
+import sys
+import time
+
+logger = logging.getLogger(__name__)
+
+CORR_DIR = Path.home() / ".openclaw" / "workspace" / "trading" / "cache" / "correlation"
+CORR_DIR.mkdir(parents=True, exist_ok=True)
+INDEX_FILE = CORR_DIR / "index.json"
+STATS_FILE = CORR_DIR / "stats.npz"
+
+WINDOW = 40            # Daily returns (~60 calendar days, as the live checker used)
+HISTORY_DAYS = 90      # Calendar days of bars fetched to cover WINDOW returns
+MIN_OVERLAP = 10       # Pairs with fewer common returns get NaN
+MAX_AGE_DAYS = 4       # Older matrices are ignored by lookup (covers weekends/holidays)
+
+_cached = {"key": None, "pos": None, "matrix": None, "built": None}
+_stats = {"key": None, "pos": None, "cov": None}
+
+
+def _pairwise_sums(returns: np.ndarray) -> dict:
+    """Pairwise-complete sums over rows: count, sum x, sum x², sum xy (all N x N)."""
+    mask = np.isfinite(returns).astype(np.float64)
+    x = np.nan_to_num(returns)
+    return {
+        "cnt": mask.T @ mask,
+        "sx": x.T @ mask,         # sx[i, j] = sum of x_i over rows where i and j are both valid
+        "sxx": (x * x).T @ mask,
+        "sxy": x.T @ x,
+    }
+
+
+def _add_row(sums: dict, row: np.ndarray, sign: float):
+    """Add (sign=1) or remove (sign=-1) one return row from the pairwise sums in place."""
+    m = np.isfinite(row).astype(np.float64)
+    x = np.nan_to_num(row)
+    sums["cnt"] += sign * np.outer(m, m)
+    sums["sx"] += sign * np.outer(x, m)
+    sums["sxx"] += sign * np.outer(x * x, m)
+    sums["sxy"] += sign * np.outer(x, x)
+
+
+def _correlation(sums: dict) -> np.ndarray:
+    cnt, sx, sxx, sxy = sums["cnt"], sums["sx"], sums["sxx"], sums["sxy"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = cnt * sxy - sx * sx.T
+        var_i = cnt * sxx - sx * sx
+        corr = cov / np.sqrt(var_i * var_i.T)
+    corr = np.where((cnt >= MIN_OVERLAP) & np.isfinite(corr), np.clip(corr, -1, 1), np.nan)
+    return corr.astype(np.float32)
+
+
+def _write_matrix(symbols: list, corr: np.ndarray, as_of: str, intraday: bool):
+    """Write a new matrix file, swap index.json to it, then drop older matrix files."""
+    name = f"matrix-{int(time.time() * 1000)}.npy"
+    with open(CORR_DIR / name, "wb") as f:
+        np.save(f, corr)
+    index = {
+        "symbols": symbols,
+        "matrix": name,
+        "as_of": as_of,
+        "window": WINDOW,
+        "built_at": datetime.now().isoformat(),
+        "intraday": intraday,
+    }
+    tmp = INDEX_FILE.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(index))
+    os.replace(tmp, INDEX_FILE)
+    for old in CORR_DIR.glob("matrix-*.npy"):
+        if old.name != name:
+            old.unlink(missing_ok=True)  # Open memory maps stay valid after unlink
+
+
+def build(symbols=None, refresh=True) -> dict:
+    """
+    Full rebuild from the bar store over the last WINDOW final (pre-today) daily returns.
+    symbols: default = every symbol in the bar store.
+    Returns: { symbols, as_of, seconds }
+    """
+    from bar_store import get_bars, list_symbols
+
+    t0 = time.time()
+    today = datetime.now().date()
+    symbols = list(symbols) if symbols else list_symbols()
+    bars = get_bars(symbols, start=today - timedelta(days=HISTORY_DAYS), refresh_stale=refresh)
+    closes = pd.DataFrame({sym: df["Close"] for sym, df in bars.items()}).sort_index()
+    closes = closes[closes.index.date < today]
+    if closes.empty:
+        logger.warning("Correlation matrix: no bar history to build from")
+        return {"symbols": 0, "as_of": None, "seconds": 0.0}
+
+    returns = closes.pct_change(fill_method=None).iloc[-WINDOW:].to_numpy(dtype=np.float64)
+    syms = list(closes.columns)
+    last_close = closes.ffill().iloc[-1].to_numpy(dtype=np.float64)
+    as_of = closes.index[-1].date().isoformat()
+
+    sums = _pairwise_sums(returns)
+    tmp = STATS_FILE.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        np.savez(f, symbols=np.array(syms), returns=returns, last_close=last_close, as_of=as_of, **sums)
+    os.replace(tmp, STATS_FILE)
+
+    _write_matrix(syms, _correlation(sums), as_of, intraday=False)
+    seconds = round(time.time() - t0, 2)
+    logger.info(f"Correlation matrix: {len(syms)} symbols, {len(returns)} returns to {as_of} in {seconds}s")
+    return {"symbols": len(syms), "as_of": as_of, "seconds": seconds}
+
+
+def update_intraday() -> dict:
+    """
+    Replace the oldest window return with today's live return (rank-1 update of the
+    committed sums) and publish the result. Falls back to build() when the committed
+    stats are missing or a final day has closed since they were built.
+    Returns: { symbols, live, as_of, seconds }
+    """
+    from bar_store import get_bars
+
+    t0 = time.time()
+    today = datetime.now().date()
+    if not STATS_FILE.exists():
+        return build()
+    try:
+        with np.load(STATS_FILE, allow_pickle=False) as z:
+            syms = [str(s) for s in z["symbols"]]
+            returns, last_close, as_of = z["returns"], z["last_close"], str(z["as_of"])
+            sums = {k: z[k].copy() for k in ("cnt", "sx", "sxx", "sxy")}
+    except Exception as e:
+        logger.warning(f"Correlation stats unreadable ({e}); rebuilding")
+        return build()
+
+    bars = get_bars(syms, start=datetime.fromisoformat(as_of).date())
+    days = {ts.date() for df in bars.values() for ts in df.index}
+    if any(as_of < d.isoformat() < today.isoformat() for d in days):
+        logger.info("Correlation matrix: final day missing from committed stats; rebuilding")
+        return build(syms, refresh=False)
+
+    live = np.full(len(syms), np.nan)
+    for i, sym in enumerate(syms):
+        df = bars.get(sym)
+        if df is not None and not df.empty and df.index[-1].date() == today and last_close[i] > 0:
+            live[i] = df["Close"].iloc[-1] / last_close[i] - 1
+
+    _add_row(sums, returns[0], -1.0)
+    _add_row(sums, live, 1.0)
+    _write_matrix(syms, _correlation(sums), today.isoformat(), intraday=True)
+
+    seconds = round(time.time() - t0, 2)
+    n_live = int(np.isfinite(live).sum())
+    logger.info(f"Correlation matrix intraday: {n_live}/{len(syms)} live returns in {seconds}s")
+    return {"symbols": len(syms), "live": n_live, "as_of": today.isoformat(), "seconds": seconds}
+
+
+def _load():
+    """
+    Memory-mapped matrix and symbol index, reloaded only when index.json changes.
+    The age check runs on every call, so a long-running process stops using a matrix
+    once it is older than MAX_AGE_DAYS.
+    """
+    try:
+        stat = INDEX_FILE.stat()
+    except FileNotFoundError:
+        return None, None
+    key = (stat.st_mtime_ns, stat.st_size)
+    if _cached["key"] != key:
+        index = json.loads(INDEX_FILE.read_text())
+        _cached["matrix"] = np.load(CORR_DIR / index["matrix"], mmap_mode="r")
+        _cached["pos"] = {sym: i for i, sym in enumerate(index["symbols"])}
+        _cached["built"] = datetime.fromisoformat(index["built_at"])
+        _cached["key"] = key
+    if datetime.now() - _cached["built"] > timedelta(days=MAX_AGE_DAYS):
+        return None, None
+    return _cached["pos"], _cached["matrix"]
+
+
+def lookup(ticker: str, others) -> dict:
+    """
+    Cached correlations of ticker with each of others (no network access).
+    Returns: { other: corr } (NaN = not enough overlap), or None if ticker or any
+             of others isn't in the cached matrix (or the matrix is stale/missing)
+    """
+    try:
+        pos, matrix = _load()
+    except Exception as e:
+        logger.warning(f"Correlation matrix unreadable: {e}")
+        return None
+    if pos is None or ticker not in pos or any(o not in pos for o in others):
+        return None
+    row = matrix[pos[ticker]]
+    return {o: float(row[pos[o]]) for o in others}
+
+
+def covariance(symbols):
+    """
+    Pairwise-complete daily-return covariance of symbols over the committed window (stats.npz).
+    Returns: DataFrame (symbols × symbols), NaN for symbols not cached or pairs with fewer
+             than MIN_OVERLAP common returns; None if no stats are cached
+    """
+    try:
+        stat = STATS_FILE.stat()
+    except FileNotFoundError:
+        return None
+    key = (stat.st_mtime_ns, stat.st_size)
+    if _stats["key"] != key:
+        try:
+            with np.load(STATS_FILE, allow_pickle=False) as z:
+                cnt, sx, sxy = z["cnt"], z["sx"], z["sxy"]
+                syms = [str(s) for s in z["symbols"]]
+        except Exception as e:
+            logger.warning(f"Correlation stats unreadable: {e}")
+            return None
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cov = (cnt * sxy - sx * sx.T) / (cnt * (cnt - 1))
+        _stats.update(key=key, pos={sym: i for i, sym in enumerate(syms)},
+                      cov=np.where(cnt >= MIN_OVERLAP, cov, np.nan))
+    symbols = list(symbols)
+    idx = np.array([_stats["pos"].get(s, -1) for s in symbols], dtype=np.int64)
+    out = _stats["cov"][np.ix_(np.maximum(idx, 0), np.maximum(idx, 0))].copy()
+    out[idx < 0, :] = np.nan
+    out[:, idx < 0] = np.nan
+    return pd.DataFrame(out, index=symbols, columns=symbols)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    args = sys.argv[1:]
+    if not args or args[0] == "build":
+        print(build())
+    elif args[0] == "intraday":
+        print(update_intraday())
+    else:
+        print(lookup(args[0], args[1:]))
@@ -8,8 +8,10 @@ import os, json, sys
 from pathlib import Path
 from datetime import datetime
 
+sys.path.insert(0, str(Path(__file__).parent))
+import trade_journal as journal
+
 TRADING_DIR = Path(__file__).resolve().parents[1]
-LOGS_DIR = TRADING_DIR / 'logs'
 RISK_PATH = TRADING_DIR / 'risk.json'
 
 def load_risk_limits():
@@ -25,35 +27,20 @@ def load_risk_limits():
 
 def calculate_daily_pnl():
     """Calculate today's realized P&L from closed trades"""
-    if not LOGS_DIR.exists():
-        return 0.0, []
-    
     today = datetime.now().date()
     trades_today = []
     total_pnl = 0.0
     
-    for log_file in LOGS_DIR.glob('*.json'):
-        try:
-            with open(log_file) as f:
-                data = json.load(f)
-                intent = data.get('intent', {})
-                result = data.get('result', '')
-                
-                # Check if trade was today
-                ts = intent.get('ts', 0)
-                if ts:
-                    trade_date = datetime.fromtimestamp(ts / 1000).date()
-                    if trade_date == today:
-                        # For now, we don't have closed P&L yet (need IB positions API)
-                        # This is a placeholder that tracks executions
-                        trades_today.append({
-                            'ticker': intent.get('ticker'),
-                            'side': intent.get('signal') or intent.get('side'),
-                            'entry': intent.get('price') or intent.get('entry'),
-                            'pnl': 0.0  # TODO: Calculate from IB positions
-                        })
-        except Exception:
-            continue
+    for trade in journal.trades(since=today, until=today, source='webhook'):
+        intent = trade['data']
+        # For now, we don't have closed P&L yet (need IB positions API)
+        # This is a placeholder that tracks executions
+        trades_today.append({
+            'ticker': intent.get('ticker'),
+            'side': intent.get('signal') or intent.get('side'),
+            'entry': intent.get('price') or intent.get('entry'),
+            'pnl': 0.0  # TODO: Calculate from IB positions
+        })
     
     return total_pnl, trades_today
 
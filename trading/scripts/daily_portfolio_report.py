@@ -11,6 +11,7 @@ import os
 import json
 from datetime import datetime, timedelta
 from ib_insync import IB
+from ib_order_service import client_id
 import requests
 
 class PortfolioReportGenerator:
@@ -23,7 +24,7 @@ class PortfolioReportGenerator:
     def connect_ib(self):
         """Connect to IB Gateway"""
         try:
-            self.ib.connect('127.0.0.1', 4002, clientId=101, timeout=10)
+            self.ib.connect('127.0.0.1', 4002, clientId=client_id('portfolio_report'), timeout=10)
             return True
         except Exception as e:
             print(f"❌ IB connection failed: {e}")
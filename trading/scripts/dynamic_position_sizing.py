@@ -7,7 +7,7 @@ Adjusts position sizes based on:
 3. Account drawdown (larger drawdowns = smaller size)
 """
 
-import yfinance as yf
+import yf_broker
 from datetime import datetime, timedelta
 import logging
 
@@ -36,8 +36,7 @@ def get_vix_level() -> dict:
     }
     """
     try:
-        vix = yf.Ticker('^VIX')
-        hist = vix.history(period='1d')
+        hist = yf_broker.history('^VIX', period='1d')
         if hist.empty:
             return {'vix': None, 'error': 'No VIX data', 'category': 'unknown'}
         
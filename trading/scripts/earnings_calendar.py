@@ -3,122 +3,291 @@
 Earnings Calendar Module
 Fetches earnings dates for symbols and provides blackout periods.
 Earnings ±14 days → DO NOT TRADE (high volatility, unpredictable moves)
+
+Bulk subsystem (replaces the per-symbol JSON cache that was read and rewritten on every lookup):
+- refresh() fetches next earnings dates for a whole universe concurrently (yf.Ticker.calendar,
+  not the much heavier .info) and writes them in one atomic replace.
+- The index is one compact NumPy file (cache/earnings_index.npy), rows sorted by symbol:
+  (symbol, earnings day, fetched day), days counted from 1970-01-01. Readers memory-map it and
+  reload only when its mtime changes; lookups for a whole watchlist are one searchsorted call.
+- Writers hold an exclusive lock while merging into the current index, so concurrent scripts
+  no longer drop each other's updates.
+
+Usage:
+  python3 earnings_calendar.py refresh                 # universe + watchlist, one job
+  python3 earnings_calendar.py AAPL MSFT               # show dates / blackout
+
+  from earnings_calendar import is_blackout, get_blackout_symbols
+  is_blackout('AAPL')                                  # today
+  get_blackout_symbols(watchlist)                      # set, one batched lookup
 """
 
-import yfinance as yf
+import yf_broker
 import pandas as pd
-from datetime import datetime, timedelta
-import json
+import numpy as np
+from datetime import datetime, date, timedelta
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import fcntl
+import json
 import logging
+import os
+import sys
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
-EARNINGS_CACHE_FILE = Path.home() / ".openclaw" / "workspace" / "trading" / "cache" / "earnings_calendar.json"
-EARNINGS_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+CACHE_DIR = Path.home() / ".openclaw" / "workspace" / "trading" / "cache"
+CACHE_DIR.mkdir(parents=True, exist_ok=True)
+EARNINGS_INDEX_FILE = CACHE_DIR / "earnings_index.npy"
+EARNINGS_LOCK_FILE = CACHE_DIR / "earnings_index.lock"
+EARNINGS_CACHE_FILE = CACHE_DIR / "earnings_calendar.json"  # Legacy per-symbol cache, imported once
+
+BLACKOUT_DAYS = 14       # ±14 days from earnings date (28 days total)
+MAX_AGE_DAYS = 7         # Re-fetch entries older than this
+MAX_WORKERS = 16         # Concurrent yfinance calendar requests
+
+NO_DATE = -1             # Earnings day for symbols with no scheduled earnings (ETFs, ...)
+INDEX_DTYPE = np.dtype([("symbol", "U12"), ("earnings_day", "i4"), ("fetched_day", "i4")])
+
+_EPOCH = date(1970, 1, 1)
+
+
+def _day_num(d) -> int:
+    if d is None:
+        d = datetime.now().date()
+    elif isinstance(d, str):
+        d = pd.Timestamp(d).date()
+    elif isinstance(d, (datetime, pd.Timestamp)):
+        d = d.date()
+    return (d - _EPOCH).days
+
+
+def _day_str(day: int):
+    return (_EPOCH + timedelta(days=int(day))).strftime("%Y-%m-%d") if day != NO_DATE else None
+
+
+class EarningsIndex:
+    """Memory-mapped earnings index, reloaded when the file changes on disk."""
+
+    def __init__(self, path: Path = EARNINGS_INDEX_FILE):
+        self.path = Path(path)
+        self._arr = np.empty(0, dtype=INDEX_DTYPE)
+        self._stamp = None
+        self._lock = threading.Lock()
+
+    def rows(self) -> np.ndarray:
+        try:
+            st = self.path.stat()
+            stamp = (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            stamp = None
+        if stamp != self._stamp:
+            with self._lock:
+                if stamp != self._stamp:
+                    arr = np.empty(0, dtype=INDEX_DTYPE)
+                    if stamp is not None:
+                        try:
+                            arr = np.load(self.path, mmap_mode="r")
+                        except Exception as e:
+                            logger.warning(f"Earnings index unreadable ({e}); treating as empty")
+                    self._arr, self._stamp = arr, stamp
+        return self._arr
+
+    def lookup(self, symbols):
+        """
+        Batched lookup.
+        Returns: (earnings_day, fetched_day) int arrays aligned with symbols (-1 where unknown)
+        """
+        arr = self.rows()
+        keys = np.asarray([s.upper() for s in symbols], dtype=INDEX_DTYPE["symbol"])
+        if len(arr) == 0 or len(keys) == 0:
+            missing = np.full(len(keys), NO_DATE, dtype=np.int32)
+            return missing, missing.copy()
+        pos = np.clip(np.searchsorted(arr["symbol"], keys), 0, len(arr) - 1)
+        found = arr["symbol"][pos] == keys
+        return (np.where(found, arr["earnings_day"][pos], NO_DATE),
+                np.where(found, arr["fetched_day"][pos], NO_DATE))
+
+
+_index = EarningsIndex()
+
+
+def _blackout(earnings_day, on_day):
+    earnings_day = np.asarray(earnings_day)
+    return (earnings_day != NO_DATE) & (np.abs(earnings_day - on_day) <= BLACKOUT_DAYS)
+
+
+# --- fetching ---
+
+def _fetch_one(symbol: str) -> int:
+    """Next earnings day for a symbol (NO_DATE if none scheduled). Raises on fetch errors."""
+    cal = yf_broker.calendar(symbol)
+    if isinstance(cal, pd.DataFrame):  # Older yfinance: DataFrame indexed by field
+        dates = list(cal.loc["Earnings Date"]) if "Earnings Date" in cal.index else []
+    else:
+        dates = (cal or {}).get("Earnings Date") or []
+    if not isinstance(dates, (list, tuple)):
+        dates = [dates]
+    dates = [pd.Timestamp(d).date() for d in dates if d is not None and not pd.isna(d)]
+    return _day_num(min(dates)) if dates else NO_DATE
+
+
+def _write(updates: dict):
+    """Merge {symbol: (earnings_day, fetched_day)} into the index under an exclusive lock."""
+    with open(EARNINGS_LOCK_FILE, "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        merged = {str(r["symbol"]): (int(r["earnings_day"]), int(r["fetched_day"])) for r in _index.rows()}
+        merged.update(updates)
+        arr = np.array([(s, e, f) for s, (e, f) in merged.items()], dtype=INDEX_DTYPE)
+        arr.sort(order="symbol")
+        tmp = EARNINGS_INDEX_FILE.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            np.save(f, arr)
+        os.replace(tmp, EARNINGS_INDEX_FILE)
+
+
+def _import_legacy():
+    """One-time import of the old earnings_calendar.json cache into the index."""
+    if EARNINGS_INDEX_FILE.exists() or not EARNINGS_CACHE_FILE.exists():
+        return
+    try:
+        cache = json.loads(EARNINGS_CACHE_FILE.read_text())
+        updates = {}
+        for sym, entry in cache.items():
+            fetched = _day_num(datetime.fromisoformat(entry.get("cached_at", "2020-01-01")))
+            earnings = _day_num(entry["earnings_date"]) if entry.get("earnings_date") else NO_DATE
+            updates[sym.upper()] = (earnings, fetched)
+        if updates:
+            _write(updates)
+            logger.info(f"Imported {len(updates)} symbols from {EARNINGS_CACHE_FILE.name}")
+    except Exception as e:
+        logger.warning(f"Legacy earnings cache import failed: {e}")
+
+
+def refresh(symbols, force=False) -> dict:
+    """
+    Fetch earnings dates for every symbol that is missing or older than MAX_AGE_DAYS
+    (all of them if force), concurrently, then write the index once.
+    Returns: { requested, fetched, failed, seconds }
+    """
+    _import_legacy()
+    symbols = sorted({s.upper() for s in symbols})
+    today = _day_num(None)
+    if force:
+        stale = symbols
+    else:
+        _, fetched = _index.lookup(symbols)
+        stale = [s for s, f in zip(symbols, fetched) if f == NO_DATE or today - f > MAX_AGE_DAYS]
+
+    t0 = time.time()
+    updates, failed = {}, 0
+    if stale:
+        def fetch(sym):
+            try:
+                return sym, _fetch_one(sym)
+            except Exception as e:
+                logger.debug(f"Failed to fetch earnings for {sym}: {e}")
+                return sym, None
+
+        previous = dict(zip(stale, _index.lookup(stale)[0]))
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(stale))) as pool:
+            for sym, day in pool.map(fetch, stale):
+                if day is None:
+                    # Keep the previous date (if any); retried once the entry ages out
+                    failed += 1
+                    day = int(previous[sym])
+                updates[sym] = (day, today)
+        if updates:
+            _write(updates)
+    stats = {"requested": len(symbols), "fetched": len(updates) - failed, "failed": failed,
+             "seconds": round(time.time() - t0, 2)}
+    if stale:
+        logger.info(f"Earnings refresh: {stats}")
+    return stats
+
+
+# --- queries ---
+
+def earnings_days(symbols, refresh_missing=True) -> np.ndarray:
+    """Next earnings day numbers aligned with symbols (NO_DATE if unknown/none)."""
+    symbols = list(symbols)
+    if refresh_missing:
+        refresh(symbols)
+    return _index.lookup(symbols)[0]
+
+
+def is_blackout(symbol: str, on=None, refresh_missing=True) -> bool:
+    """Is the symbol within ±BLACKOUT_DAYS of earnings on `on` (default today)?"""
+    return bool(_blackout(earnings_days([symbol], refresh_missing), _day_num(on))[0])
+
 
 def get_earnings_date(symbol: str, use_cache=True) -> dict:
     """
     Get earnings date for a symbol.
     Returns: { symbol, earnings_date (str YYYY-MM-DD or None), is_blackout (bool) }
-    
+
     Blackout: ±14 days from earnings date (28 days total)
     """
-    
-    # Try cache first
-    if use_cache and EARNINGS_CACHE_FILE.exists():
-        try:
-            with open(EARNINGS_CACHE_FILE) as f:
-                cache = json.load(f)
-                if symbol in cache:
-                    cached = cache[symbol]
-                    # Check if cache is fresh (< 7 days old)
-                    cache_date = datetime.fromisoformat(cached.get("cached_at", "2020-01-01"))
-                    if datetime.now() - cache_date < timedelta(days=7):
-                        return cached
-        except Exception as e:
-            logger.warning(f"Cache read failed: {e}")
-    
-    # Fetch from yfinance
-    try:
-        ticker = yf.Ticker(symbol)
-        earnings_date = ticker.info.get("earningsDate")
-        
-        if earnings_date:
-            if isinstance(earnings_date, list) and len(earnings_date) > 0:
-                earnings_date = earnings_date[0]
-            
-            # Convert to datetime if needed
-            if isinstance(earnings_date, (int, float)):
-                earnings_date = datetime.fromtimestamp(earnings_date).date()
-            else:
-                earnings_date = pd.to_datetime(earnings_date).date()
-            
-            earnings_str = earnings_date.strftime("%Y-%m-%d")
-        else:
-            earnings_str = None
-    except Exception as e:
-        logger.warning(f"Failed to fetch earnings for {symbol}: {e}")
-        earnings_str = None
-    
-    # Calculate blackout
-    is_blackout = False
-    if earnings_str:
-        try:
-            earnings_dt = datetime.strptime(earnings_str, "%Y-%m-%d").date()
-            today = datetime.now().date()
-            days_until = (earnings_dt - today).days
-            # Blackout: ±14 days (so earnings ±28 days total)
-            is_blackout = -14 <= days_until <= 14
-        except:
-            pass
-    
-    result = {
+    if not use_cache:
+        refresh([symbol], force=True)
+    day = int(earnings_days([symbol])[0])
+    return {
         "symbol": symbol,
-        "earnings_date": earnings_str,
-        "is_blackout": is_blackout,
-        "cached_at": datetime.now().isoformat(),
+        "earnings_date": _day_str(day),
+        "is_blackout": bool(_blackout(day, _day_num(None))),
     }
-    
-    # Save to cache
-    try:
-        with open(EARNINGS_CACHE_FILE) as f:
-            cache = json.load(f)
-    except:
-        cache = {}
-    
-    cache[symbol] = result
-    try:
-        with open(EARNINGS_CACHE_FILE, "w") as f:
-            json.dump(cache, f, indent=2)
-    except Exception as e:
-        logger.warning(f"Cache write failed: {e}")
-    
-    return result
+
+
+def days_until_earnings(symbol: str, on=None):
+    """Days from `on` (default today) to the next earnings date, or None if unknown."""
+    day = int(earnings_days([symbol])[0])
+    return day - _day_num(on) if day != NO_DATE else None
+
 
 def check_earnings_blackout(symbol: str) -> bool:
     """
     Quick check: Is this symbol in earnings blackout?
     Returns: True if blackout, False if OK to trade
     """
-    earnings = get_earnings_date(symbol)
-    return earnings["is_blackout"]
+    return is_blackout(symbol)
+
 
-def get_blackout_symbols(symbols: list) -> set:
+def get_blackout_symbols(symbols: list, on=None) -> set:
     """
-    Get all symbols currently in earnings blackout.
+    Get all symbols currently in earnings blackout (one batched refresh + lookup).
     Returns: set of symbols to avoid
     """
-    blackout = set()
-    for symbol in symbols:
-        if check_earnings_blackout(symbol):
-            blackout.add(symbol)
-    return blackout
+    symbols = list(symbols)
+    mask = _blackout(earnings_days(symbols), _day_num(on))
+    return {sym for sym, hit in zip(symbols, mask) if hit}
+
+
+def _universe() -> list:
+    """Screener universe plus the current watchlist symbols."""
+    from nx_screener_production import get_universe_symbols
+    symbols = set(get_universe_symbols())
+    watchlist = Path(__file__).resolve().parents[1] / "watchlist.json"
+    try:
+        data = json.loads(watchlist.read_text())
+        for val in data.values():
+            for item in val if isinstance(val, list) else []:
+                sym = item.get("symbol") or item.get("ticker") if isinstance(item, dict) else item
+                if isinstance(sym, str):
+                    symbols.add(sym)
+    except Exception as e:
+        logger.warning(f"Watchlist not loaded: {e}")
+    return sorted(symbols)
+
 
 if __name__ == "__main__":
-    # Test
     logging.basicConfig(level=logging.INFO)
-    test_symbols = ["AAPL", "MSFT", "NVDA", "GS", "JPM"]
-    for sym in test_symbols:
-        result = get_earnings_date(sym)
-        print(f"{sym}: earnings={result['earnings_date']}, blackout={result['is_blackout']}")
+    args = sys.argv[1:]
+    if args and args[0] == "refresh":
+        print(refresh(_universe(), force="--force" in args))
+    else:
+        test_symbols = args or ["AAPL", "MSFT", "NVDA", "GS", "JPM"]
+        for sym in test_symbols:
+            result = get_earnings_date(sym)
+            print(f"{sym}: earnings={result['earnings_date']}, blackout={result['is_blackout']}")
@@ -9,6 +9,8 @@ import os
 from pathlib import Path
 from datetime import datetime
 from ib_insync import IB, Stock, Option, MarketOrder
+from ib_order_service import client_id
+from option_chain_store import OptionChainStore
 import logging
 
 # Setup logging
@@ -43,25 +45,10 @@ def load_candidates():
         logger.error(f"Failed to load candidates: {e}")
         return []
 
-def execute_csp_trade(ib, symbol, strike, dte):
-    """Execute a cash-secured put trade."""
+def execute_csp_trade(ib, contract):
+    """Execute a cash-secured put trade (contract qualified by the option chain store)."""
+    symbol, strike = contract.symbol, contract.strike
     try:
-        # Create put contract
-        contract = Option(
-            symbol=symbol,
-            lastTradeDateOrContractMonth=None,  # IB will find appropriate expiry
-            strike=strike,
-            right='P',
-            exchange='SMART'
-        )
-        
-        # Qualify contract
-        ib.qualifyContracts(contract)
-        
-        # Get current market data
-        ib.reqMktData(contract, '', False, False)
-        ib.sleep(0.5)
-        
         # Create sell order (we're SELLING puts)
         order = MarketOrder('SELL', 1)  # 1 contract
         
@@ -90,22 +77,30 @@ def main():
     # Connect to IB
     try:
         ib = IB()
-        ib.connect(IB_HOST, IB_PORT, clientId=104)  # Dedicated client ID for high-IV execution
+        ib.connect(IB_HOST, IB_PORT, clientId=client_id('high_iv_csp'))  # Dedicated client ID for high-IV execution
         logger.info("✅ Connected to IB Gateway")
     except Exception as e:
         logger.error(f"Failed to connect to IB: {e}")
         return
     
+    # Listed expiry/strike per candidate from the daily chain snapshot, qualified in one batch
+    store = OptionChainStore(ib)
+    contracts = store.contracts([store.leg(c.get('symbol'), c.get('dte', 40), c.get('strike'), 'P')
+                                 for c in candidates])
+    
     # Execute each candidate
     executed = 0
-    for candidate in candidates:
+    for candidate, contract in zip(candidates, contracts):
         symbol = candidate.get('symbol')
         strike = candidate.get('strike')
         premium = candidate.get('premium_pct')
         
-        logger.info(f"Executing: {symbol} ${strike} Put @ {premium}% premium")
+        if contract is None:
+            logger.error(f"No listed put for {symbol} ${strike}")
+            continue
+        logger.info(f"Executing: {symbol} ${contract.strike} Put {contract.lastTradeDateOrContractMonth} @ {premium}% premium")
         
-        trade = execute_csp_trade(ib, symbol, strike, 40)
+        trade = execute_csp_trade(ib, contract)
         if trade:
             executed += 1
     
@@ -12,6 +12,7 @@ from profitability_filters import ProfitabilityFilters
 import json
 from pathlib import Path
 from ib_insync import IB, Stock, Option, MarketOrder
+from ib_order_service import client_id
 import logging
 
 # Setup logging
@@ -95,7 +96,7 @@ class ExecutorWithRisk:
                 return False
             
             ib = IB()
-            ib.connect('127.0.0.1', 4002, clientId=108)
+            ib.connect('127.0.0.1', 4002, clientId=client_id('executor_with_risk'))
             
             # Create option contract
             contract = Option(
@@ -3,11 +3,15 @@
 End of Day Gap Risk Check
 Runs at 3:55 PM ET (2:55 PM MT) to close short positions before market close
 Prevents overnight gap losses on CSP and short call positions
+
+--watch: start earlier (e.g. 3:30 PM ET) and log whole-portfolio gap VaR / CVaR
+every WATCH_INTERVAL_SEC until the action window (the last sleep is cut short to
+wake at 3:55 PM ET), then run the check as usual
 """
 
 import os, json, sys, time
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, date
 from ib_insync import IB
 import logging
 
@@ -17,9 +21,12 @@ logging.basicConfig(level=logging.INFO)
 # Add scripts dir to path for imports
 SCRIPTS_DIR = Path(__file__).resolve().parent
 sys.path.insert(0, str(SCRIPTS_DIR))
+from ib_order_service import client_id
 
 try:
-    from gap_risk_manager import get_gap_risk_positions, should_close_gap_risk_positions, get_eod_checklist
+    from gap_risk_manager import (get_gap_risk_positions, should_close_gap_risk_positions, get_eod_checklist,
+                                  get_seconds_to_action)
+    from scenario_engine import portfolio_risk
     GAP_MANAGER_LOADED = True
 except ImportError as e:
     print(f"Warning: Gap Risk Manager not loaded: {e}")
@@ -32,12 +39,15 @@ LOGS_DIR = TRADING_DIR / 'logs'
 # IB connection settings
 IB_HOST = os.getenv('IB_HOST', '127.0.0.1')
 IB_PORT = int(os.getenv('IB_PORT', 7497))
-IB_CLIENT_ID = 104  # Dedicated client ID for EOD tasks
+IB_CLIENT_ID = client_id('gap_risk_eod')  # Dedicated client ID for EOD tasks
 
 # Telegram settings
 TG_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
 TG_CHAT = os.getenv('TELEGRAM_CHAT_ID')
 
+WATCH_INTERVAL_SEC = 300  # Portfolio scenario refresh in --watch mode
+WATCH_MIN_SLEEP_SEC = 1   # Floor on the last sleep before the action time
+
 LOGS_DIR.mkdir(exist_ok=True)
 
 def get_current_positions(ib) -> list:
@@ -45,12 +55,25 @@ def get_current_positions(ib) -> list:
     positions = []
     try:
         for pos in ib.positions():
-            positions.append({
-                'symbol': pos.contract.symbol,
+            c = pos.contract
+            entry = {
+                'symbol': c.symbol,
                 'quantity': int(pos.position),
-                'type': pos.contract.secType,
+                'type': c.secType,
                 'entry_price': float(pos.avgCost),
-            })
+            }
+            if c.secType == 'OPT':
+                expiry = c.lastTradeDateOrContractMonth
+                if pos.position < 0:
+                    entry['type'] = 'CSP' if c.right.startswith('P') else 'SHORT_CALL'
+                entry.update({
+                    'strike': float(c.strike),
+                    'right': c.right[:1],
+                    'expiry': expiry,
+                    'multiplier': int(c.multiplier or 100),
+                    'days_to_expiration': (datetime.strptime(expiry[:8], '%Y%m%d').date() - date.today()).days,
+                })
+            positions.append(entry)
     except Exception as e:
         logger.warning(f"Could not fetch positions: {e}")
     return positions
@@ -76,7 +99,22 @@ def send_telegram(text):
     except Exception:
         return False
 
-def main():
+def log_portfolio_risk(positions: list) -> dict:
+    """Run the portfolio gap scenarios and log VaR / CVaR and the worst contributors"""
+    risk = portfolio_risk(positions)
+    if not risk.get('scenarios'):
+        logger.info("Portfolio risk: no priceable positions")
+        return risk
+    logger.info(f"Portfolio gap risk ({risk['scenarios']} scenarios, {risk['seconds']:.2f}s): "
+                f"VaR95 ${risk['var']['95']:,.0f}  CVaR95 ${risk['cvar']['95']:,.0f}  "
+                f"VaR99 ${risk['var']['99']:,.0f}  CVaR99 ${risk['cvar']['99']:,.0f}")
+    for c in risk['contributors'][:3]:
+        logger.info(f"  {c['position']}: tail P&L ${c['tail_pnl']:,.0f}")
+    if risk['unpriced']:
+        logger.info(f"  Unpriced: {', '.join(risk['unpriced'])}")
+    return risk
+
+def main(watch: bool = False):
     logger.info("=== GAP RISK EOD CHECK STARTED ===")
     
     if not GAP_MANAGER_LOADED:
@@ -84,12 +122,10 @@ def main():
         return
     
     # Check if we should act (within 5 min of close)
-    if not should_close_gap_risk_positions():
+    if not watch and not should_close_gap_risk_positions():
         logger.info("Not yet time to act (need to be within 5 min of close)")
         return
     
-    logger.info("🚨 URGENT: Within 5 minutes of market close!")
-    
     # Connect to IB
     ib = IB()
     try:
@@ -102,6 +138,16 @@ def main():
         return
     
     try:
+        while watch and not should_close_gap_risk_positions():
+            try:
+                log_portfolio_risk(get_current_positions(ib))
+            except Exception as e:
+                logger.warning(f"Portfolio risk run failed: {e}")
+            # Wake at the action time itself, not up to an interval past it
+            ib.sleep(max(WATCH_MIN_SLEEP_SEC, min(WATCH_INTERVAL_SEC, get_seconds_to_action())))
+        
+        logger.info("🚨 URGENT: Within 5 minutes of market close!")
+        
         # Get current positions
         positions = get_current_positions(ib)
         logger.info(f"Current positions: {len(positions)}")
@@ -111,6 +157,7 @@ def main():
         
         logger.info(f"Time to close: {checklist['time_remaining_min']:.1f} minutes")
         logger.info(f"Gap risk positions: {len(checklist['gap_risk_positions'])}")
+        risk = checklist.get('portfolio_risk') or {}
         
         if checklist['gap_risk_positions']:
             # Report gap risk positions
@@ -121,6 +168,11 @@ def main():
             for pos in checklist['gap_risk_positions']:
                 msg += f"• {pos['symbol']} {pos['type']} (exp: {pos['days_to_expiration']}d)\n"
             
+            if risk.get('scenarios'):
+                msg += f"\nOvernight gap VaR95 ${risk['var']['95']:,.0f} / CVaR95 ${risk['cvar']['95']:,.0f}\n"
+                for c in risk['contributors'][:3]:
+                    msg += f"  {c['position']}: ${c['tail_pnl']:,.0f}\n"
+            
             if checklist['should_act']:
                 msg += f"\n🚨 *ACTION REQUIRED NOW*\n"
                 msg += f"Close these positions or reduce size\n"
@@ -137,6 +189,7 @@ def main():
                 'time_remaining_min': checklist['time_remaining_min'],
                 'should_act': checklist['should_act'],
                 'positions': checklist['gap_risk_positions'],
+                'portfolio_risk': risk,
             }, indent=2))
         else:
             logger.info("✅ No gap risk positions")
@@ -153,4 +206,4 @@ def main():
         logger.info("🔌 Disconnected from IB")
 
 if __name__ == '__main__':
-    main()
+    main(watch='--watch' in sys.argv)
@@ -6,6 +6,7 @@ Rules:
 - CSP (cash-secured puts): Close or liquidate at 3:55 PM
 - Short calls: Buy protective call or liquidate at 3:55 PM
 - Especially critical during earnings blackout periods
+- Whole-portfolio gap VaR / CVaR via scenario_engine.portfolio_risk
 """
 
 from datetime import datetime, time
@@ -17,6 +18,7 @@ logger = logging.getLogger(__name__)
 MARKET_CLOSE_ET = time(16, 0)
 # Action time: 3:55 PM (5 min before close)
 ACTION_TIME_ET = time(15, 55)
+OPTION_TYPES = {'OPT', 'CSP', 'SHORT_CALL'}
 
 def is_market_close_approaching(current_time_et: datetime = None) -> bool:
     """
@@ -55,6 +57,21 @@ def get_time_to_close_minutes(current_time_et: datetime = None) -> float:
     minutes_left = (close_seconds - current_seconds) / 60.0
     return max(0, minutes_left)
 
+def get_seconds_to_action(current_time_et: datetime = None) -> float:
+    """
+    Get seconds until ACTION_TIME_ET (same clock as is_market_close_approaching).
+    
+    Args:
+        current_time_et: Current time in ET
+    
+    Returns: Seconds until the action time (0 if already past)
+    """
+    if current_time_et is None:
+        current_time_et = datetime.now()
+    
+    action = datetime.combine(current_time_et.date(), ACTION_TIME_ET, current_time_et.tzinfo)
+    return max(0.0, (action - current_time_et).total_seconds())
+
 def should_close_gap_risk_positions(current_time_et: datetime = None) -> bool:
     """
     Check if gap risk positions should be closed (within 5 min of close).
@@ -109,6 +126,8 @@ def calculate_gap_risk_impact(position: dict, gap_scenarios: list = [1, 2, 5]) -
     
     current = position['current_price']
     quantity = position['quantity']
+    # Options are 100 shares per contract; stock is 1
+    multiplier = position.get('multiplier') or (100 if str(position.get('type', '')).upper() in OPTION_TYPES else 1)
     
     scenarios = []
     max_loss = 0
@@ -116,7 +135,7 @@ def calculate_gap_risk_impact(position: dict, gap_scenarios: list = [1, 2, 5]) -
     for gap in gap_scenarios:
         # Gap up on short position = loss
         new_price = current * (1 + gap / 100.0)
-        loss = (new_price - current) * quantity * 100  # Options are 100 shares per contract
+        loss = (new_price - current) * quantity * multiplier
         scenarios.append({
             'gap_pct': gap,
             'new_price': round(new_price, 2),
@@ -128,7 +147,7 @@ def calculate_gap_risk_impact(position: dict, gap_scenarios: list = [1, 2, 5]) -
         'symbol': position['symbol'],
         'type': position['type'],
         'current_price': current,
-        'current_value': current * quantity * 100,
+        'current_value': current * quantity * multiplier,
         'gap_scenarios': scenarios,
         'max_estimated_loss': max_loss,
     }
@@ -188,18 +207,20 @@ def recommend_gap_mitigation(position: dict) -> dict:
         'priority': priority,
     }
 
-def get_eod_checklist(positions: list, current_time_et: datetime = None) -> dict:
+def get_eod_checklist(positions: list, current_time_et: datetime = None, portfolio_risk: bool = True) -> dict:
     """
     Generate end-of-day checklist for gap risk management.
     
     Args:
         positions: List of current positions
         current_time_et: Current time in ET
+        portfolio_risk: Add the whole-portfolio gap scenario run (scenario_engine)
     
     Returns: {
         'time_remaining_min': float,
         'should_act': bool,
         'gap_risk_positions': [position],
+        'portfolio_risk': dict | None (scenario_engine.portfolio_risk),
         'actions': [str],
         'summary': str,
     }
@@ -221,6 +242,20 @@ def get_eod_checklist(positions: list, current_time_et: datetime = None) -> dict
     else:
         actions.append("✅ No gap risk positions to manage")
     
+    risk = None
+    if portfolio_risk and positions:
+        try:
+            from scenario_engine import portfolio_risk as run_scenarios
+            risk = run_scenarios(positions)
+        except Exception as e:
+            logger.warning(f"Portfolio scenario run failed: {e}")
+    if risk and risk.get('scenarios'):
+        line = f"📉 Overnight gap VaR95 ${risk['var']['95']:,.0f} / CVaR95 ${risk['cvar']['95']:,.0f}"
+        if risk['contributors']:
+            worst = risk['contributors'][0]
+            line += f" (worst: {worst['position']} ${worst['tail_pnl']:,.0f})"
+        actions.append(line)
+    
     summary = "URGENT" if should_act else "OK"
     if gap_risk:
         summary += f": {len(gap_risk)} position(s) need gap risk attention"
@@ -229,6 +264,7 @@ def get_eod_checklist(positions: list, current_time_et: datetime = None) -> dict
         'time_remaining_min': minutes,
         'should_act': should_act,
         'gap_risk_positions': gap_risk,
+        'portfolio_risk': risk,
         'actions': actions,
         'summary': summary,
     }
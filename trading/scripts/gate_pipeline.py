@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Pre-Trade Gate Pipeline
+Runs pre-trade checks in-process instead of one subprocess/download per check:
+- local gates (kill switch, window, watchlist, inline alert metrics) run first, in order
+- independent slower gates (cache/disk/network backed) run concurrently on a shared pool
+- the first hard reject wins; gates still queued are cancelled
+- every gate's latency is recorded so callers can hold an end-to-end budget
+
+A gate is a callable(ctx) -> (ok: bool, reason: str).
+Advisory gates (hard=False) never reject; a failing one only adds a warning.
+Gates that raise or time out pass if fail_open=True (the old subprocess behaviour),
+otherwise they reject.
+
+Usage:
+  gates = [Gate("watchlist", check_watchlist), Gate("earnings", check_earnings, parallel=True)]
+  result = run_gates(gates, {"ticker": "AAPL", ...})
+  result.ok, result.reason, result.latency_ms   # {"watchlist": 0.02, "earnings": 1.3, "total": 1.5}
+"""
+
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+MAX_WORKERS = 8          # Shared pool for concurrent gates
+GATE_TIMEOUT_SEC = 10.0  # Whole concurrent stage (old subprocess timeouts were 5-10s)
+LATENCY_BUDGET_MS = 250  # Warn when a full pipeline run exceeds this
+
+_pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="gate")
+
+
+@dataclass
+class Gate:
+    name: str
+    check: Callable[[dict], tuple]
+    parallel: bool = False    # Independent of other gates → run concurrently
+    hard: bool = True         # False = advisory (warning only)
+    fail_open: bool = True    # Exception/timeout counts as pass
+
+
+@dataclass
+class GateResult:
+    ok: bool
+    reason: str
+    failed_gate: Optional[str] = None
+    latency_ms: Dict[str, Optional[float]] = field(default_factory=dict)
+    warnings: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return {
+            "ok": self.ok,
+            "reason": self.reason,
+            "failed_gate": self.failed_gate,
+            "latency_ms": self.latency_ms,
+            "warnings": self.warnings,
+        }
+
+
+def _timed(gate: Gate, ctx: dict):
+    t0 = time.perf_counter()
+    try:
+        ok, reason = gate.check(ctx)
+    except Exception as e:
+        ok, reason = gate.fail_open, f"{gate.name} check failed: {e}"
+    return bool(ok), reason, round((time.perf_counter() - t0) * 1000, 2)
+
+
+def run_gates(gates: List[Gate], ctx: dict, timeout: float = GATE_TIMEOUT_SEC) -> GateResult:
+    """
+    Run gates against ctx: sequential local gates, then concurrent gates until the first hard reject.
+    Returns: GateResult (latency_ms has one entry per gate that finished, None if cancelled/timed out,
+             plus "total")
+    """
+    t0 = time.perf_counter()
+    result = GateResult(True, "filters ok")
+
+    def finish(res: GateResult) -> GateResult:
+        res.latency_ms["total"] = round((time.perf_counter() - t0) * 1000, 2)
+        if res.latency_ms["total"] > LATENCY_BUDGET_MS:
+            logger.warning(f"Gate pipeline over budget: {res.latency_ms}")
+        return res
+
+    def handle(gate: Gate, ok: bool, reason: str) -> bool:
+        """Record a gate outcome. Returns True if it's a hard reject."""
+        if ok:
+            return False
+        if not gate.hard:
+            result.warnings.append(reason)
+            return False
+        result.ok, result.reason, result.failed_gate = False, reason, gate.name
+        return True
+
+    for gate in (g for g in gates if not g.parallel):
+        ok, reason, ms = _timed(gate, ctx)
+        result.latency_ms[gate.name] = ms
+        if handle(gate, ok, reason):
+            return finish(result)
+
+    futures = {_pool.submit(_timed, g, ctx): g for g in gates if g.parallel}
+    pending = set(futures)
+    deadline = t0 + timeout
+    while pending:
+        done, pending = wait(pending, timeout=max(0.0, deadline - time.perf_counter()),
+                             return_when=FIRST_COMPLETED)
+        if not done:
+            break
+        for fut in done:
+            gate = futures[fut]
+            ok, reason, ms = fut.result()
+            result.latency_ms[gate.name] = ms
+            if handle(gate, ok, reason):
+                for other in pending:
+                    other.cancel()
+                    result.latency_ms[futures[other].name] = None
+                return finish(result)
+
+    # Timed out: treat like the old subprocess timeouts
+    for fut in pending:
+        gate = futures[fut]
+        fut.cancel()
+        result.latency_ms[gate.name] = None
+        reason = f"{gate.name} check timed out"
+        if handle(gate, gate.fail_open, reason):
+            return finish(result)
+        if gate.fail_open:
+            result.warnings.append(reason)
+
+    return finish(result)
@@ -4,15 +4,23 @@ High-IV CSP Screener
 Real-time monitoring for cash-secured put opportunities during volatility spikes.
 Finds quality stocks with elevated IV and attractive put premiums.
 Feeds candidates to options executor.
+
+Every strike × expiry in the criteria window is priced in one pass by
+option_pricing (American puts, realized-vol fallback for IV) and each name's
+best contract by return on risk is kept.
 """
 
-import yfinance as yf
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from pathlib import Path
 import json
 import logging
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent))
+from option_pricing import price, price_grid, realized_vol
+import yf_broker
 
 # Setup logging
 LOG_DIR = Path.home() / ".openclaw" / "workspace" / "trading" / "logs"
@@ -50,6 +58,15 @@ CSP_CRITERIA = {
     "iv_percentile_min": 60,      # Only when IV is elevated (vol spike)
 }
 
+# Candidate contract grid (strikes as fraction of spot, expiries in days)
+MONEYNESS_GRID = np.arange(0.80, 1.0001, 0.01)
+DTE_GRID = list(range(CSP_CRITERIA["dte_range"][0], CSP_CRITERIA["dte_range"][1] + 1, 7))
+
+def _dividend_fraction(dividend_yield):
+    """yfinance dividendYield as a fraction (newer yfinance reports percent, older a fraction)."""
+    y = float(dividend_yield or 0)
+    return y / 100 if y > 0.25 else y
+
 class HighIVCSPScreener:
     def __init__(self):
         self.candidates = []
@@ -58,9 +75,8 @@ class HighIVCSPScreener:
     def fetch_stock_data(self, symbol):
         """Fetch current price and recent history."""
         try:
-            stock = yf.Ticker(symbol)
-            hist = stock.history(period="1y")
-            info = stock.info
+            hist = yf_broker.history(symbol, period="1y")
+            info = yf_broker.info(symbol)
             
             if hist.empty:
                 return None
@@ -73,8 +89,10 @@ class HighIVCSPScreener:
                 "atr": float(hist["High"].rolling(14).mean().iloc[-1] - 
                            hist["Low"].rolling(14).mean().iloc[-1]),
                 "volume_avg": float(hist["Volume"].tail(20).mean()),
+                "realized_vol": realized_vol(hist["Close"]),
                 "pe_ratio": info.get("trailingPE", None),
                 "dividend_yield": info.get("dividendYield", 0),
+                "div_q": _dividend_fraction(info.get("dividendYield")),
             }
         except Exception as e:
             logger.warning(f"Error fetching {symbol}: {e}")
@@ -92,67 +110,59 @@ class HighIVCSPScreener:
     
     def estimate_premium(self, stock_data, strike, dte=40):
         """
-        Estimate put premium using Black-Scholes approximation.
+        Model put premium (American, realized vol as IV) as % of strike.
         In production, use actual option chain data from IB.
         """
-        stock_price = stock_data["price"]
-        
-        # Simplified: IV estimate based on price volatility
-        annual_return = stock_data.get("dividend_yield", 0)
-        
-        # ATR-based volatility proxy
-        if stock_data.get("atr") and stock_price > 0:
-            iv = (stock_data["atr"] / stock_price) * np.sqrt(252) * 100
-        else:
-            iv = 20  # Default 20% IV
-        
-        # Simple approximation for OTM put value
-        # Premium ≈ (stock_price - strike) / stock_price * IV * sqrt(DTE/365)
-        moneyness = (stock_price - strike) / stock_price
-        premium_pct = moneyness * (iv / 100) * np.sqrt(dte / 365)
-        
-        return abs(premium_pct) * 100  # Return as percentage
+        premium = price(stock_data["price"], strike, dte / 365, stock_data.get("realized_vol", 0.20),
+                        q=stock_data.get("div_q", 0.0), right="P")
+        return float(premium) / strike * 100
     
     def screen(self):
-        """Screen quality names for CSP opportunities."""
+        """Screen quality names for CSP opportunities (one pricing pass over every candidate contract)."""
         logger.info(f"Screening {len(QUALITY_NAMES)} quality names for CSP...")
         
+        stocks = []
         for symbol in QUALITY_NAMES:
-            try:
-                stock_data = self.fetch_stock_data(symbol)
-                if not stock_data:
-                    continue
-                
-                # Skip if price too low
-                if stock_data["price"] < CSP_CRITERIA["min_stock_price"]:
-                    continue
-                
-                # Calculate optimal put strike
-                strike = self.calculate_put_strike(stock_data["price"])
-                
-                # Estimate premium
-                premium_pct = self.estimate_premium(stock_data, strike, dte=40)
-                
-                # Check if meets premium threshold
-                if premium_pct >= CSP_CRITERIA["min_premium_pct"]:
-                    candidate = {
-                        "symbol": symbol,
-                        "price": round(stock_data["price"], 2),
-                        "strike": strike,
-                        "dte": 40,
-                        "premium_pct": round(premium_pct, 2),
-                        "max_loss": strike * 100,  # Per contract
-                        "return_on_risk": round(premium_pct / ((strike - stock_data["price"]) / strike) * 100, 1) if strike > stock_data["price"] else 0,
-                        "timestamp": datetime.now().isoformat(),
-                    }
-                    self.candidates.append(candidate)
-                    logger.info(f"✓ {symbol}: ${stock_data['price']} → Put ${strike} @ {premium_pct:.2f}%")
-                
-            except Exception as e:
-                logger.warning(f"Error screening {symbol}: {e}")
-                continue
+            stock_data = self.fetch_stock_data(symbol)
+            # Skip if price too low
+            if stock_data and stock_data["price"] >= CSP_CRITERIA["min_stock_price"]:
+                stocks.append(stock_data)
+        if not stocks:
+            logger.info("Found 0 CSP candidates")
+            return self.candidates
+        
+        grid = price_grid(
+            [s["symbol"] for s in stocks],
+            [s["price"] for s in stocks],
+            [s["realized_vol"] for s in stocks],
+            MONEYNESS_GRID, DTE_GRID, right="P",
+            q=np.array([s["div_q"] for s in stocks]),
+        )
+        delta_lo, delta_hi = sorted(CSP_CRITERIA["put_delta"])
+        eligible = grid[grid["delta"].between(delta_lo, delta_hi)
+                        & (grid["premium_pct"] >= CSP_CRITERIA["min_premium_pct"])]
+        best = eligible.sort_values("annualized_ror", ascending=False).drop_duplicates("symbol")
+        
+        for row in best.itertuples():
+            candidate = {
+                "symbol": row.symbol,
+                "price": round(row.spot, 2),
+                "strike": row.strike,
+                "dte": int(row.dte),
+                "premium": round(row.premium, 2),
+                "premium_pct": round(row.premium_pct, 2),
+                "delta": round(row.delta, 3),
+                "iv": round(row.iv * 100, 1),
+                "max_loss": row.strike * 100,  # Per contract
+                "return_on_risk": round(row.return_on_risk, 2),
+                "annualized_ror": round(row.annualized_ror, 1),
+                "timestamp": datetime.now().isoformat(),
+            }
+            self.candidates.append(candidate)
+            logger.info(f"✓ {row.symbol}: ${row.spot:.2f} → Put ${row.strike} {int(row.dte)}d "
+                        f"@ ${row.premium:.2f} ({row.premium_pct:.2f}%, Δ {row.delta:.2f})")
         
-        logger.info(f"Found {len(self.candidates)} CSP candidates")
+        logger.info(f"Found {len(self.candidates)} CSP candidates ({len(grid)} contracts priced)")
         return self.candidates
     
     def save_candidates(self):
@@ -162,7 +172,7 @@ class HighIVCSPScreener:
         try:
             data = {
                 "generated_at": datetime.now().isoformat(),
-                "candidates": sorted(self.candidates, key=lambda x: x["premium_pct"], reverse=True),
+                "candidates": sorted(self.candidates, key=lambda x: x["annualized_ror"], reverse=True),
                 "criteria": CSP_CRITERIA,
                 "summary": {
                     "total": len(self.candidates),
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Hot-Reloadable Config
+JSON config files (risk.json, feature_flags.json, watchlist.json) that a long-running
+process re-reads when the file changes, instead of once at import.
+
+- HotConfig(path, default, build) checks the file's mtime/size at most every
+  CHECK_INTERVAL_SEC; on change it parses the file, builds the derived object
+  (e.g. a WatchlistIndex) and swaps it in with a single reference assignment,
+  so readers always see one complete snapshot.
+- A file that fails to parse (e.g. caught mid-write) keeps the previous snapshot.
+
+Usage:
+  WATCH = HotConfig(WATCHLIST_PATH, {}, build=WatchlistIndex)
+  WATCH.get().contains('AAPL')    # O(1) set lookup
+"""
+
+from pathlib import Path
+import json
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+CHECK_INTERVAL_SEC = 1.0  # Max one stat() per file per second
+
+
+class WatchlistIndex:
+    """
+    Set-based index over any watchlist.json layout:
+    - {"watchlist": [{"ticker": ...}, ...]}             (listener layout)
+    - {"long_candidates": [{"symbol": ...}], ...}       (NX screener output)
+    - {"stocks": [{"symbol": ...}]}                     (watchlist_sync)
+    - {"<setup group>": ["AAPL", "MSFT", ...]}          (flat groups)
+    Every top-level list is a group; entries are tickers or dicts with ticker/symbol.
+    """
+
+    def __init__(self, data: dict):
+        self.data = data if isinstance(data, dict) else {}
+        groups = {}
+        for name, entries in self.data.items():
+            if not isinstance(entries, list):
+                continue
+            syms = set()
+            for entry in entries:
+                if isinstance(entry, str):
+                    syms.add(entry.upper())
+                elif isinstance(entry, dict):
+                    sym = entry.get("ticker") or entry.get("symbol")
+                    if isinstance(sym, str):
+                        syms.add(sym.upper())
+            groups[name] = frozenset(syms)
+        self.groups = groups
+        self.symbols = frozenset().union(*groups.values()) if groups else frozenset()
+
+    def contains(self, ticker) -> bool:
+        return bool(ticker) and ticker.upper() in self.symbols
+
+    def groups_for(self, ticker) -> list:
+        """Names of the groups (setup lists, long/short candidates...) holding ticker."""
+        t = (ticker or "").upper()
+        return [name for name, syms in self.groups.items() if t in syms]
+
+    def __len__(self):
+        return len(self.symbols)
+
+
+class HotConfig:
+    """A JSON file plus a derived object, rebuilt when the file changes."""
+
+    def __init__(self, path: Path, default=None, build=None):
+        self.path = Path(path)
+        self.default = {} if default is None else default
+        self.build = build or (lambda data: data)
+        self._lock = threading.Lock()
+        self._key = None
+        self._checked = 0.0
+        self._value = self.build(self.default)
+        self.reloads = 0
+        self._refresh()
+
+    def _refresh(self):
+        try:
+            stat = self.path.stat()
+            key = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            key = None
+        if key == self._key:
+            return
+        if key is None:
+            value = self.build(self.default)
+        else:
+            try:
+                value = self.build(json.loads(self.path.read_text()))
+            except Exception as e:
+                logger.warning(f"{self.path.name}: reload failed ({e}); keeping previous version")
+                return
+        self._value = value  # Atomic swap: readers see the old or the new snapshot, never a mix
+        self._key = key
+        self.reloads += 1
+        logger.info(f"{self.path.name}: loaded")
+
+    def get(self):
+        """Current snapshot (re-read first if the file changed)."""
+        now = time.monotonic()
+        if now - self._checked >= CHECK_INTERVAL_SEC:
+            with self._lock:
+                if now - self._checked >= CHECK_INTERVAL_SEC:
+                    self._checked = now
+                    self._refresh()
+        return self._value
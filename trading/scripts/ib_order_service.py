@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+IB Order Service
+Long-lived asyncio order service for the webhook listener, replacing one thread,
+one event loop and one synchronous qualifyContracts per approval:
+- a single event loop (background thread) owns POOL_SIZE ib_insync connections,
+  each with its own registered client ID, reconnected as soon as they drop
+- approved intents go on a local asyncio.Queue; one worker per connection places them
+- qualified contracts are cached (stocks for the process lifetime, options until expiry)
+
+submit(intent) returns a concurrent.futures.Future resolving to (placed: bool, message: str),
+so approval-to-submission is the broker round trip on an already-open connection.
+
+Client IDs: IB rejects a second connection with an ID already in use. Every script
+takes its ID from CLIENT_IDS via client_id(name) so no two of them share one.
+
+Usage:
+  from ib_order_service import get_service, client_id
+  placed, msg = get_service().submit(intent).result(timeout=30)
+  ib.connect(host, port, clientId=client_id('risk_manager'))
+"""
+
+from concurrent.futures import Future
+from datetime import datetime, timedelta, date
+import asyncio
+import logging
+import os
+import threading
+import time
+
+try:
+    from ib_insync import IB, Stock, Option, MarketOrder, LimitOrder, StopOrder  # type: ignore
+except Exception:
+    IB = None  # optional
+
+logger = logging.getLogger(__name__)
+
+IB_HOST = os.getenv('IB_HOST', '127.0.0.1')
+IB_PORT = int(os.getenv('IB_PORT', '7497'))
+POOL_SIZE = int(os.getenv('IB_POOL_SIZE', '2'))
+CONNECT_TIMEOUT_SEC = 10
+HEALTH_CHECK_SEC = 5  # Idle workers reconnect dropped connections this often
+
+_BASE_ID = int(os.getenv('IB_CLIENT_ID', '101'))
+CLIENT_IDS = {
+    'order_service': [_BASE_ID + 10 * i for i in range(POOL_SIZE)],  # 101, 111, ...
+    'test': 102,
+    'options_executor': 103,
+    'gap_risk_eod': 104,
+    'high_iv_csp': 105,
+    'portfolio_report': 106,
+    'risk_manager': 107,
+    'executor_with_risk': 108,
+    'weekly_review': 109,
+}
+
+
+def client_id(name: str):
+    """Registered IB client ID for a script (see CLIENT_IDS)."""
+    return CLIENT_IDS[name]
+
+
+def round_option_strike(strike):
+    """Round strike to valid option intervals"""
+    if strike > 200:
+        interval = 5.0
+    elif strike > 100:
+        interval = 2.5
+    else:
+        interval = 1.0
+    return round(strike / interval) * interval
+
+
+def option_expiry(dte: int) -> str:
+    """Standard monthly expiry (3rd Friday) for a target DTE: this month if dte <= 15, else next. Returns: YYYYMMDD"""
+    now = datetime.now()
+    target_month = now.month + 1 if dte > 15 else now.month
+    target_year = now.year if target_month <= 12 else now.year + 1
+    target_month = target_month if target_month <= 12 else 1
+    first_day = datetime(target_year, target_month, 1)
+    first_friday = first_day + timedelta(days=(4 - first_day.weekday()) % 7)
+    return (first_friday + timedelta(weeks=2)).strftime('%Y%m%d')
+
+
+class ContractCache:
+    """Qualified contracts by key; entries with an expiry date are dropped after it."""
+
+    def __init__(self):
+        self._cache = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def qualify(self, ib, contract, key: tuple, expires: date = None):
+        hit = self._cache.get(key)
+        if hit and (hit[1] is None or hit[1] >= date.today()):
+            self.hits += 1
+            return hit[0]
+        self.misses += 1
+        qualified = await ib.qualifyContractsAsync(contract)
+        if not qualified:
+            raise ValueError(f"could not qualify contract {key}")
+        self._cache[key] = (qualified[0], expires)
+        return qualified[0]
+
+    def __len__(self):
+        return len(self._cache)
+
+
+class OrderService:
+    def __init__(self, host=IB_HOST, port=IB_PORT, client_ids=None):
+        self.host = host
+        self.port = port
+        self.client_ids = list(client_ids or CLIENT_IDS['order_service'])
+        self.contracts = ContractCache()
+        self.connections = {}        # client_id -> IB
+        self.last_latency_ms = None  # Dequeue → placeOrder returned, last order
+        self._loop = None
+        self._queue = None
+        self._ready = threading.Event()
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        """Start the event loop thread and connect the pool (idempotent)."""
+        with self._start_lock:
+            if self._loop is None:
+                threading.Thread(target=self._run, name='ib-order-service', daemon=True).start()
+                self._ready.wait()
+        return self
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._queue = asyncio.Queue()
+        for cid in self.client_ids:
+            self._loop.create_task(self._worker(cid))
+        self._ready.set()
+        self._loop.run_forever()
+
+    def submit(self, intent: dict) -> Future:
+        """Queue an approved intent. Returns: Future → (placed: bool, message: str)"""
+        fut = Future()
+        if IB is None:
+            fut.set_result((False, 'ib_insync not installed; dry-run only'))
+            return fut
+        self.start()
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, (intent, fut, time.perf_counter()))
+        return fut
+
+    def stats(self) -> dict:
+        return {
+            'connected': sum(1 for ib in self.connections.values() if ib.isConnected()),
+            'pool_size': len(self.client_ids),
+            'queued': self._queue.qsize() if self._queue else 0,
+            'contracts_cached': len(self.contracts),
+            'contract_cache_hits': self.contracts.hits,
+            'last_latency_ms': self.last_latency_ms,
+        }
+
+    async def _connection(self, cid: int):
+        """Open connection for a client ID, reconnecting if it dropped."""
+        ib = self.connections.get(cid)
+        if ib is not None and ib.isConnected():
+            return ib
+        ib = IB()
+        logger.info(f"IB order service: connecting {self.host}:{self.port} clientId {cid}")
+        await ib.connectAsync(self.host, self.port, clientId=cid, timeout=CONNECT_TIMEOUT_SEC)
+        self.connections[cid] = ib
+        return ib
+
+    async def _keep_connected(self, cid: int):
+        try:
+            await self._connection(cid)
+        except Exception as e:
+            logger.warning(f"IB order service: clientId {cid} unavailable: {e}")
+
+    async def _worker(self, cid: int):
+        await self._keep_connected(cid)
+        while True:
+            try:
+                intent, fut, queued_at = await asyncio.wait_for(self._queue.get(), HEALTH_CHECK_SEC)
+            except asyncio.TimeoutError:
+                await self._keep_connected(cid)  # Keep the pool warm between orders
+                continue
+            try:
+                ib = await self._connection(cid)
+                result = (True, await self._place(ib, intent))
+            except Exception as e:
+                result = (False, str(e) or type(e).__name__)
+            self.last_latency_ms = round((time.perf_counter() - queued_at) * 1000, 1)
+            logger.info(f"IB order service: {intent.get('ticker')} {result} in {self.last_latency_ms}ms (clientId {cid})")
+            if not fut.done():
+                fut.set_result(result)
+
+    async def _place(self, ib, intent: dict) -> str:
+        """Build, qualify (cached) and place the order(s) for an intent. Returns: broker message"""
+        ticker = intent['ticker']
+        if intent.get('option_type'):
+            # Options order (covered call or cash-secured put)
+            strike = round_option_strike(float(intent['strike']))
+            expiry = option_expiry(int(intent.get('dte', 30)))
+            opt_type = intent['option_type'].upper()  # 'CALL' or 'PUT'
+            qty = int(intent.get('quantity', 1))  # contracts, not shares
+            contract = await self.contracts.qualify(
+                ib, Option(ticker, expiry, strike, opt_type, 'SMART'),
+                ('OPT', ticker, expiry, strike, opt_type),
+                expires=datetime.strptime(expiry, '%Y%m%d').date())
+            action = intent.get('action', 'SELL').upper()
+            trade = ib.placeOrder(contract, MarketOrder(action, qty))
+            return f'option {action} ${strike} {opt_type} exp {expiry} orderId={getattr(trade.order, "orderId", None)}'
+
+        # Stock order (swing trade)
+        contract = await self.contracts.qualify(ib, Stock(ticker, 'SMART', 'USD'), ('STK', ticker))
+        qty = max(1, int(intent.get('qty') or 1))
+        side = 'BUY' if str(intent.get('signal', '')).lower() in ('buy', 'entry', 'long') else 'SELL'
+        exit_side = 'SELL' if side == 'BUY' else 'BUY'
+        sl = intent.get('stop_loss')
+        tp = intent.get('take_profit')
+        if sl and tp:
+            # Bracket order: parent market + child stop + child limit target
+            parent = MarketOrder(side, qty, tif='DAY', transmit=False)
+            child_stop = StopOrder(exit_side, qty, float(sl), tif='DAY', parentId=0, transmit=False)
+            child_lmt = LimitOrder(exit_side, qty, float(tp), tif='DAY', parentId=0, transmit=True)
+            pid = ib.placeOrder(contract, parent).order.orderId
+            child_stop.parentId = pid
+            child_lmt.parentId = pid
+            ib.placeOrder(contract, child_stop)
+            ib.placeOrder(contract, child_lmt)
+            return f'bracket placed parentId={pid}'
+        trade = ib.placeOrder(contract, MarketOrder(side, qty))
+        return f'orderId={getattr(trade.order, "orderId", None)}'
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_service() -> OrderService:
+    """Process-wide order service (created on first use; call .start() to connect early)."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = OrderService()
+        return _service
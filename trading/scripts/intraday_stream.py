@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Streaming Intraday Bars
+Per-symbol ring buffers of today's intraday bars with incrementally updated
+VWAP, session extremes, EMA9/EMA20 and MACD, so the midday scans stop
+re-downloading and recomputing the whole session per ticker on every run.
+
+State for a fixed symbol list (rows), one session day and one bar interval
+(cache/intraday/stream_<interval>.npz):
+- ring buffers: ts, time of day, OHLCV and the per-bar VWAP / EMA / MACD values
+- running values: VWAP sums, EMA9/12/20/26 and MACD signal (regular-hours bars),
+  session / morning (09:30-11:00) / opening-range (09:30-10:00) / premarket / post-11:00
+  highs and lows, opening price, last morning close
+
+update() polls all symbols with one multi-ticker request (prepost included) and commits
+only completed bars newer than each symbol's last one, O(1) per symbol per new bar.
+The still-forming bar is applied provisionally to reads and never committed.
+A new session day (or a different symbol list) starts a fresh state.
+
+Usage:
+  from intraday_stream import get_stream
+  stream = get_stream(['AAPL', 'MSFT'])        # load + update + save
+  stream.frame('AAPL')                         # DataFrame: OHLCV, VWAP, EMA9, EMA20, MACD, Signal
+  stream.snapshot()                            # one row per symbol: levels and indicators
+
+CLI:
+  python3 intraday_stream.py --every 60 AAPL MSFT   # keep the cache warm every minute
+"""
+
+import pandas as pd
+import numpy as np
+from datetime import datetime
+from pathlib import Path
+import copy
+import logging
+import os
+import sys
+import time
+import warnings
+
+import yf_broker
+
+logger = logging.getLogger(__name__)
+
+STREAM_DIR = Path.home() / ".openclaw" / "workspace" / "trading" / "cache" / "intraday"
+STREAM_DIR.mkdir(parents=True, exist_ok=True)
+
+STATE_VERSION = 1
+ET = "America/New_York"
+INTERVAL_MIN = {"1m": 1, "2m": 2, "5m": 5, "15m": 15, "30m": 30}
+
+# Session windows, minutes after midnight ET (inclusive bounds, like DataFrame.between_time)
+PRE_START, OPEN, OPEN_BAR_END, OR_END, MORNING_END, CLOSE = 240, 570, 575, 600, 660, 960
+RECENT_BARS = 3  # Regular bars behind recent_high / recent_low and the prev_* values
+
+_RING = ("ts", "tod", "open", "high", "low", "close", "volume", "vwap", "ema9", "ema20", "macd", "signal")
+_RUNNING = ("cum_pv", "cum_v", "n_regular", "ema9", "ema12", "ema20", "ema26", "signal",
+            "high", "low", "morning_high", "morning_low", "or_high", "or_low",
+            "premarket_high", "premarket_low", "post11_high", "post11_low", "open_price", "morning_close")
+_EMA_SPANS = {"ema9": 9, "ema12": 12, "ema20": 20, "ema26": 26}
+
+
+def _stream_path(interval: str) -> Path:
+    return STREAM_DIR / f"stream_{interval}.npz"
+
+
+def _field_matrices(data: pd.DataFrame, symbols):
+    """
+    (timestamps × symbols) float matrices of OHLCV from a (possibly multi-ticker) download frame.
+    Returns: (DatetimeIndex, { Open, High, Low, Close, Volume: ndarray }); symbols missing → NaN columns
+    """
+    fields = ("Open", "High", "Low", "Close", "Volume")
+    if data is None or data.empty:
+        return pd.DatetimeIndex([]), {f: np.empty((0, len(symbols))) for f in fields}
+    out = {}
+    if isinstance(data.columns, pd.MultiIndex):
+        level = 1 if "Close" in data.columns.get_level_values(1) else 0  # Field level
+        for f in fields:
+            out[f] = data.xs(f, axis=1, level=level).reindex(columns=symbols).to_numpy(dtype=np.float64)
+    else:  # Single symbol
+        for f in fields:
+            out[f] = np.full((len(data), len(symbols)), np.nan)
+            out[f][:, 0] = data[f].to_numpy(dtype=np.float64)
+    return data.index, out
+
+
+class IntradayStream:
+    """Intraday ring buffers and running indicators for a fixed symbol list (rows)."""
+
+    def __init__(self, symbols, interval: str = "5m", day: str = None):
+        self.symbols = list(dict.fromkeys(symbols))
+        self.pos = {sym: i for i, sym in enumerate(self.symbols)}
+        self.interval = interval
+        self.step = INTERVAL_MIN[interval] * 60
+        self.day = day or pd.Timestamp.now(tz=ET).date().isoformat()
+        n_sym = len(self.symbols)
+
+        self.cap = (20 * 60 - PRE_START) // INTERVAL_MIN[interval] + 2  # 04:00-20:00 session
+        self.ring = {f: np.full((n_sym, self.cap), np.nan) for f in _RING}
+        self.n = np.zeros(n_sym, dtype=np.int64)             # Bars committed today
+        self.last_ts = np.full(n_sym, -1, dtype=np.int64)    # Epoch seconds of the last committed bar
+        self.run = {k: np.full(n_sym, np.nan) for k in _RUNNING}
+        for k in ("cum_pv", "cum_v", "n_regular"):
+            self.run[k][:] = 0.0
+        self.live = {}                                        # row -> provisional (forming) bar
+
+    # --- updates ---
+
+    def _advance(self, rows, ts, tod, o, h, l, c, v) -> dict:
+        """Running values and per-bar indicators after one bar per row (state is not modified)."""
+        r = {k: self.run[k][rows].copy() for k in _RUNNING}
+        reg = (tod >= OPEN) & (tod < CLOSE)
+        first = reg & (r["n_regular"] == 0)
+
+        tp = (h + l + c) / 3.0
+        r["cum_pv"] = np.where(reg, r["cum_pv"] + tp * v, r["cum_pv"])
+        r["cum_v"] = np.where(reg, r["cum_v"] + v, r["cum_v"])
+        for name, span in _EMA_SPANS.items():
+            alpha = 2.0 / (span + 1)
+            r[name] = np.where(first, c, np.where(reg, r[name] + alpha * (c - r[name]), r[name]))
+        macd = r["ema12"] - r["ema26"]
+        r["signal"] = np.where(first, macd, np.where(reg, r["signal"] + 0.2 * (macd - r["signal"]), r["signal"]))
+        r["n_regular"] = r["n_regular"] + reg
+
+        def extreme(key_hi, key_lo, mask):
+            r[key_hi] = np.where(mask, np.fmax(r[key_hi], h), r[key_hi])
+            r[key_lo] = np.where(mask, np.fmin(r[key_lo], l), r[key_lo])
+
+        extreme("high", "low", reg)
+        extreme("morning_high", "morning_low", reg & (tod <= MORNING_END))
+        extreme("or_high", "or_low", reg & (tod <= OR_END))
+        extreme("premarket_high", "premarket_low", (tod >= PRE_START) & (tod < OPEN))
+        extreme("post11_high", "post11_low", reg & (tod >= MORNING_END))
+        r["open_price"] = np.where(np.isnan(r["open_price"]) & reg & (tod <= OPEN_BAR_END), o, r["open_price"])
+        r["morning_close"] = np.where(reg & (tod <= MORNING_END), c, r["morning_close"])
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            vwap = np.where(r["cum_v"] > 0, r["cum_pv"] / r["cum_v"], np.nan)
+        bar = {"ts": ts, "tod": tod, "open": o, "high": h, "low": l, "close": c, "volume": v,
+               "vwap": vwap, "ema9": r["ema9"], "ema20": r["ema20"], "macd": macd, "signal": r["signal"]}
+        return r, bar
+
+    def _append(self, rows, ts, tod, o, h, l, c, v):
+        r, bar = self._advance(rows, ts, tod, o, h, l, c, v)
+        slot = self.n[rows] % self.cap
+        for f in _RING:
+            self.ring[f][rows, slot] = bar[f]
+        for k in _RUNNING:
+            self.run[k][rows] = r[k]
+        self.n[rows] += 1
+        self.last_ts[rows] = ts
+
+    def update(self, data: pd.DataFrame = None, now: float = None) -> int:
+        """
+        Commit completed bars newer than each symbol's last one; keep the forming bar provisional.
+        data: download frame (default: one multi-ticker poll through yf_broker)
+        Returns: number of bars committed
+        """
+        if data is None:
+            data = yf_broker.download(self.symbols, period="1d", interval=self.interval,
+                                      prepost=True, group_by="ticker", threads=False)
+        now = time.time() if now is None else now
+        index, m = _field_matrices(data, self.symbols)
+        idx = index if index.tz is not None else index.tz_localize("UTC")
+        idx = idx.tz_convert(ET)
+        ts = np.asarray((idx - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(seconds=1), dtype=np.int64)
+        tod = np.asarray(idx.hour * 60 + idx.minute, dtype=np.float64)
+        today = np.asarray(idx.strftime("%Y-%m-%d") == self.day) if len(idx) else np.zeros(0, dtype=bool)
+
+        close = m["Close"]
+        high = np.where(np.isfinite(m["High"]), m["High"], close)
+        low = np.where(np.isfinite(m["Low"]), m["Low"], close)
+        volume = np.nan_to_num(m["Volume"])
+        new = np.isfinite(close) & today[:, None] & (ts[:, None] > self.last_ts[None, :])
+        complete = (ts + self.step <= now)[:, None]
+
+        # Forming bar (newest incomplete one per symbol) is provisional
+        self.live = {}
+        for j, i in zip(*np.nonzero(new & ~complete)):
+            self.live[int(i)] = (float(ts[j]), tod[j], m["Open"][j, i], high[j, i], low[j, i], close[j, i], volume[j, i])
+
+        pending = {}   # ts -> (rows, bar row index)
+        commit = new & complete
+        for j in np.nonzero(commit.any(axis=1))[0]:
+            pending[int(ts[j])] = (np.nonzero(commit[j])[0], j)
+
+        committed = 0
+        for t in sorted(pending):
+            rows, j = pending[t]
+            self._append(rows, np.full(len(rows), t, dtype=np.float64), np.full(len(rows), tod[j]),
+                         m["Open"][j, rows], high[j, rows], low[j, rows], close[j, rows], volume[j, rows])
+            committed += len(rows)
+        if committed:
+            logger.info(f"Intraday stream: committed {committed} {self.interval} bars over {len(pending)} timestamps")
+        return committed
+
+    # --- reads ---
+
+    def _view(self):
+        """The state with provisional bars applied (a copy if there are any)."""
+        if not self.live:
+            return self
+        view = copy.copy(self)
+        view.ring = {f: a.copy() for f, a in self.ring.items()}
+        view.run = {k: a.copy() for k, a in self.run.items()}
+        view.n, view.last_ts, view.live = self.n.copy(), self.last_ts.copy(), {}
+        rows = np.array(sorted(self.live), dtype=np.int64)
+        cols = [np.array(col, dtype=np.float64) for col in zip(*(self.live[i] for i in rows))]
+        ts, tod, o, h, l, c, v = cols
+        view._append(rows, ts, tod, o, h, l, c, v)
+        return view
+
+    def _chrono(self, view, field):
+        """rows × cap matrix of a ring field in time order (oldest first, NaN where empty)."""
+        k = np.arange(self.cap)
+        idx = (view.n[:, None] - self.cap + k[None, :]) % self.cap
+        vals = np.take_along_axis(view.ring[field], idx, axis=1)
+        return np.where(view.n[:, None] - self.cap + k[None, :] >= 0, vals, np.nan)
+
+    def frame(self, symbol: str, prepost: bool = False):
+        """Today's bars with VWAP / EMA9 / EMA20 / MACD / Signal (None if no bars)."""
+        i = self.pos.get(symbol)
+        if i is None:
+            return None
+        n = int(self.n[i])
+        order = np.arange(max(0, n - self.cap), n) % self.cap
+        cols = {f: self.ring[f][i, order] for f in _RING}
+        if i in self.live:
+            # Forming bar: advance just this row, without copying the state
+            _, bar = self._advance(np.array([i]), *(np.array([x], dtype=np.float64) for x in self.live[i]))
+            cols = {f: np.append(cols[f], bar[f]) for f in _RING}
+        if len(cols["ts"]) == 0:
+            return None
+        tod = cols["tod"]
+        mask = np.ones(len(tod), dtype=bool) if prepost else (tod >= OPEN) & (tod < CLOSE)
+        if not mask.any():
+            return None
+        index = pd.to_datetime(cols["ts"][mask].astype(np.int64), unit="s", utc=True).tz_convert(ET)
+        names = {"open": "Open", "high": "High", "low": "Low", "close": "Close", "volume": "Volume",
+                 "vwap": "VWAP", "ema9": "EMA9", "ema20": "EMA20", "macd": "MACD", "signal": "Signal"}
+        return pd.DataFrame({name: cols[f][mask] for f, name in names.items()}, index=index)
+
+    def snapshot(self) -> pd.DataFrame:
+        """
+        Current levels and indicators for every symbol (regular-hours bars; premarket levels from 04:00).
+        Returns: DataFrame indexed by symbol: last, open_price, vwap, ema9, ema20, macd, signal,
+                 high, low, morning_high, morning_low, morning_close, or_high, or_low,
+                 premarket_high, premarket_low, post11_high, post11_low, last_volume, volume_median,
+                 recent_high, recent_low (last RECENT_BARS bars), prev_close, prev_ema20, prev_macd,
+                 prev_signal (bar before the last), bars (regular bars so far), last_ts
+        """
+        view = self._view()
+        tod = self._chrono(view, "tod")
+        reg = (tod >= OPEN) & (tod < CLOSE)
+        # Right-align each row's regular bars so column -1 is the newest, -2 the one before...
+        order = np.argsort(reg, axis=1, kind="stable")
+        aligned = lambda f: np.take_along_axis(np.where(reg, self._chrono(view, f), np.nan), order, axis=1)
+        close, ema20, macd, signal = (aligned(f) for f in ("close", "ema20", "macd", "signal"))
+        high, low, volume, vwap, ema9 = (aligned(f) for f in ("high", "low", "volume", "vwap", "ema9"))
+        r = view.run
+        with np.errstate(invalid="ignore"), warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # All-NaN rows (no bars yet)
+            out = pd.DataFrame({
+                "last": close[:, -1],
+                "open_price": r["open_price"],
+                "vwap": vwap[:, -1],
+                "ema9": ema9[:, -1],
+                "ema20": ema20[:, -1],
+                "macd": macd[:, -1],
+                "signal": signal[:, -1],
+                "high": r["high"], "low": r["low"],
+                "morning_high": r["morning_high"], "morning_low": r["morning_low"],
+                "morning_close": r["morning_close"],
+                "or_high": r["or_high"], "or_low": r["or_low"],
+                "premarket_high": r["premarket_high"], "premarket_low": r["premarket_low"],
+                "post11_high": r["post11_high"], "post11_low": r["post11_low"],
+                "last_volume": volume[:, -1],
+                "volume_median": np.nanmedian(volume, axis=1),
+                "recent_high": np.nanmax(high[:, -RECENT_BARS:], axis=1),
+                "recent_low": np.nanmin(low[:, -RECENT_BARS:], axis=1),
+                "prev_close": close[:, -2],
+                "prev_ema20": ema20[:, -2],
+                "prev_macd": macd[:, -2],
+                "prev_signal": signal[:, -2],
+                "bars": r["n_regular"].astype(np.int64),
+                "last_ts": view.last_ts,
+            }, index=pd.Index(self.symbols, name="symbol"))
+        return out
+
+    # --- persistence ---
+
+    def covers(self, symbols) -> bool:
+        return all(sym in self.pos for sym in symbols)
+
+    def save(self, path: Path = None):
+        path = path or _stream_path(self.interval)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                version=STATE_VERSION, interval=self.interval, day=self.day,
+                symbols=np.array(self.symbols), n=self.n, last_ts=self.last_ts,
+                **{f"ring_{k}": v for k, v in self.ring.items()},
+                **{f"run_{k}": v for k, v in self.run.items()},
+            )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, interval: str = "5m", path: Path = None):
+        """Persisted state for today's session, or None if missing, stale or corrupt."""
+        path = path or _stream_path(interval)
+        if not path.exists():
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as z:
+                if int(z["version"]) != STATE_VERSION or str(z["interval"]) != interval:
+                    return None
+                day = str(z["day"])
+                if day != pd.Timestamp.now(tz=ET).date().isoformat():
+                    return None  # New session
+                state = cls([str(s) for s in z["symbols"]], interval, day)
+                state.n = z["n"].astype(np.int64)
+                state.last_ts = z["last_ts"].astype(np.int64)
+                for k in _RING:
+                    state.ring[k] = z[f"ring_{k}"].astype(np.float64)
+                for k in _RUNNING:
+                    state.run[k] = z[f"run_{k}"].astype(np.float64)
+                if any(a.shape[0] != len(state.symbols) for a in (state.n, *state.ring.values(), *state.run.values())):
+                    raise ValueError("shape mismatch")
+            return state
+        except Exception as e:
+            logger.warning(f"Intraday stream state unreadable ({e}) - rebuilding")
+            return None
+
+
+def get_stream(symbols, interval: str = "5m", update: bool = True) -> IntradayStream:
+    """Today's stream covering symbols (persisted state reused when it covers them), updated and saved."""
+    stream = IntradayStream.load(interval)
+    if stream is None or not stream.covers(symbols):
+        stream = IntradayStream(sorted(set(symbols) | set(stream.symbols if stream else [])), interval)
+    if update:
+        t0 = time.time()
+        stream.update()
+        stream.save()
+        logger.info(f"Intraday stream: {len(stream.symbols)} symbols updated in {time.time() - t0:.2f}s")
+    return stream
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    args = sys.argv[1:]
+    every = None
+    if "--every" in args:
+        k = args.index("--every")
+        every = float(args[k + 1])
+        args = args[:k] + args[k + 2:]
+    symbols = args or ["SPY", "QQQ"]
+    while True:
+        snap = get_stream(symbols).snapshot()
+        print(f"{datetime.now():%H:%M:%S}")
+        print(snap[["last", "vwap", "morning_high", "morning_low", "ema20", "bars"]].round(2).to_string())
+        if every is None:
+            break
+        time.sleep(every)
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Keyword Matcher
+Compiled multi-keyword matcher for news impact classification, replacing per-term
+substring loops (cost terms × posts; 'dow' matched inside 'window').
+
+- All terms of all categories compile into one regex, factored as a character trie, with
+  word boundaries; a plain trailing plural is allowed ('tariff' matches 'tariffs').
+  Multi-word terms match across any whitespace or hyphens ('tax-cut').
+- Terms and texts are casefolded once and matched without IGNORECASE. The pattern
+  starts at the non-word character before a term, so the regex engine skips along with a
+  charset test and only walks the trie at word starts. Each search resumes at the term
+  it just matched, so overlapping terms are all found; shorter terms that are a word
+  prefix of the matched term ('trade' in 'trade war') are added from a table built at
+  compile time.
+- match_many scans a whole batch (hundreds of RSS items) in one regex pass over the
+  joined texts.
+
+Categories: { name: { 'terms': [...], 'impact': ..., 'sectors': [...] } } (as the monitors'
+keyword dicts), { name: [terms] }, or a plain list of terms (each term its own category).
+
+Usage:
+  matcher = KeywordMatcher(keywords)
+  m = matcher.match("New tariffs on China")    # { terms, categories, impacts, sectors, hits }
+  results = matcher.match_many(texts)          # one pass over every text
+"""
+
+from bisect import bisect_right
+import re
+
+SEPARATOR = '\n\x00\n'  # Between texts in a batch; never part of a word or a term
+
+
+def _norm(term: str) -> str:
+    return ' '.join(term.casefold().replace('-', ' ').split())
+
+
+def _trie_pattern(terms) -> str:
+    """
+    Regex equivalent to the alternation of terms, factored into a character trie so each
+    position costs one walk down the trie instead of one attempt per term.
+    Optional branches are greedy: the longest term wins, shorter ones on backtracking.
+    """
+    trie = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[''] = {}  # End of a term
+
+    def build(node) -> str:
+        end = '' in node
+        branches = [(r'[\s\-]+' if ch == ' ' else re.escape(ch)) + build(child)
+                    for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        if end:
+            return f'(?:{body})?' if len(branches) > 1 or len(branches[0]) > 1 else f'{body}?'
+        return body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    def __init__(self, categories):
+        if not isinstance(categories, dict):
+            categories = {term: [term] for term in categories}
+        self.categories = list(categories)
+        self.config = {name: cfg if isinstance(cfg, dict) else {'terms': list(cfg)}
+                       for name, cfg in categories.items()}
+
+        # Normalized term → categories (in category order)
+        self.term_categories = {}
+        for name, cfg in self.config.items():
+            for term in cfg['terms']:
+                cats = self.term_categories.setdefault(_norm(term), [])
+                if name not in cats:
+                    cats.append(name)
+        terms = sorted(self.term_categories, key=len, reverse=True)
+
+        # Terms implied by a longer match at the same position (word prefixes, plurals, itself)
+        self.implied = {t: [p for p in terms if t == p or t.startswith(p + ' ') or t in (p + 's', p + 'es')]
+                        for t in terms}
+
+        # \W instead of a (?<!\w) lookbehind: a leading lookbehind (or IGNORECASE) makes the
+        # regex engine try the trie at every position instead of skipping to word starts
+        self.pattern = re.compile(rf'\W({_trie_pattern(terms)})(?:e?s)?(?!\w)') if terms else None
+
+    def _scan(self, text: str):
+        """
+        text: already casefolded
+        Yields: (start offset, matched normalized term), every overlapping occurrence
+        """
+        if self.pattern is None:
+            return
+        text = '\n' + text  # So a term can start the text
+        search, pos = self.pattern.search, 0
+        while (m := search(text, pos)):
+            pos = m.start(1)
+            for term in self.implied.get(_norm(m.group(1)), ()):
+                yield pos - 1, term
+
+    def _result(self, terms: list) -> dict:
+        if not terms:  # Most posts
+            return {'terms': [], 'categories': [], 'impacts': [], 'sectors': [], 'hits': []}
+        cats = list(dict.fromkeys(c for t in terms for c in self.term_categories[t]))
+        return {
+            'terms': list(dict.fromkeys(terms)),
+            'categories': cats,
+            'impacts': [self.config[c].get('impact') for c in cats],
+            'sectors': list(dict.fromkeys(s for c in cats for s in self.config[c].get('sectors', []))),
+            'hits': [(c, self.config[c].get('impact')) for t in terms for c in self.term_categories[t]],
+        }
+
+    def match(self, text: str) -> dict:
+        """
+        All matches in one pass over text.
+        Returns: { terms, categories, impacts (aligned with categories), sectors,
+                   hits: [(category, impact)] per term occurrence }
+        """
+        return self._result([term for _, term in self._scan((text or '').casefold())])
+
+    def match_many(self, texts) -> list:
+        """match() for every text, in one regex pass over the whole batch."""
+        texts = [(t or '').casefold() for t in texts]
+        starts, pos = [], 0
+        for t in texts:
+            starts.append(pos)
+            pos += len(t) + len(SEPARATOR)
+        found = [[] for _ in texts]
+        for offset, term in self._scan(SEPARATOR.join(texts)):
+            found[bisect_right(starts, offset) - 1].append(term)
+        return [self._result(terms) for terms in found]
@@ -3,15 +3,30 @@
 Liquidity Filter
 Filters universe to only liquid, tradeable symbols.
 Removes penny stocks and illiquid securities.
+
+Bulk engine: price, share volume and dollar volume for the whole universe come from
+one batched 5-bar panel (shared bar store), evaluated in a single vectorized pass.
+Verdicts persist in cache/liquidity_state.json; later runs only re-check symbols that
+are new, stale, or were within NEAR_MARGIN of a threshold. Symbols without bars (fetch
+errors, throttled responses) are not persisted and are retried on the next run; only
+symbols on the bar store's confirmed dead list are stored as delisted.
 """
 
-import yfinance as yf
 import pandas as pd
+import numpy as np
+from datetime import date, timedelta
 from pathlib import Path
 import json
 import logging
+import os
+import sys
+import time
+import warnings
 from typing import List, Tuple
 
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from bar_store import get_bars, load_dead_symbols
+
 # Setup logging
 LOG_DIR = Path.home() / ".openclaw" / "workspace" / "trading" / "logs"
 LOG_DIR.mkdir(parents=True, exist_ok=True)
@@ -32,6 +47,16 @@ MIN_PRICE = 5.0                    # Minimum stock price ($5+)
 MIN_DAILY_VOLUME_USD = 500_000     # Minimum daily trading value ($500K+) — scaled to account size
 MIN_VOLUME_SHARES = 50_000         # Minimum daily volume (50K shares) — realistic for position sizing
 
+LOOKBACK_BARS = 5                  # Daily bars averaged for volume
+LOOKBACK_CALENDAR_DAYS = 10        # Calendar window that holds LOOKBACK_BARS bars
+CHECK_CHUNK = 250                  # Symbols per batched evaluation (state saved after each)
+NEAR_MARGIN = 0.25                 # Within ±25% of any threshold → re-check next trading day
+RECHECK_MAX_DAYS = 7               # Every verdict is re-checked at least weekly
+RECHECK_DEAD_DAYS = 7              # Delisted (bar store dead list) symbols
+
+STATE_FILE = Path.home() / ".openclaw" / "workspace" / "trading" / "cache" / "liquidity_state.json"
+STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
+
 class LiquidityFilter:
     """
     Filters symbols by liquidity metrics.
@@ -46,6 +71,7 @@ class LiquidityFilter:
             'no_data': [],
             'delisted': []
         }
+        self.state = self._load_state()  # symbol -> last verdict and metrics
     
     def get_default_universe(self) -> List[str]:
         """Return default universe (S&P 500 core + Nasdaq + Russell most-traded + ETFs)."""
@@ -102,72 +128,153 @@ class LiquidityFilter:
         logger.info(f"Default universe: {len(universe)} symbols")
         return sorted(universe)
     
+    def _load_state(self) -> dict:
+        try:
+            return json.loads(STATE_FILE.read_text())
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save_state(self):
+        tmp = STATE_FILE.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(self.state))
+        os.replace(tmp, STATE_FILE)
+
+    def _needs_check(self, symbol: str, today: date) -> bool:
+        """New, expired, or last seen near a threshold (within NEAR_MARGIN) → re-evaluate."""
+        entry = self.state.get(symbol)
+        if entry is None:
+            return True
+        age = (today - date.fromisoformat(entry['checked'])).days
+        if age >= RECHECK_MAX_DAYS:
+            return True
+        if entry['status'] == 'no_data':
+            return True  # Never persisted now; older state files may still hold them
+        if entry['status'] == 'delisted':
+            return age >= RECHECK_DEAD_DAYS
+        if age < 1:
+            return False
+        ratios = (entry['price'] / MIN_PRICE, entry['volume_usd'] / MIN_DAILY_VOLUME_USD,
+                  entry['volume_shares'] / MIN_VOLUME_SHARES)
+        return any(abs(r - 1) <= NEAR_MARGIN for r in ratios)
+
+    def evaluate(self, symbols: List[str]) -> pd.DataFrame:
+        """
+        Liquidity metrics and verdicts for symbols from one batched bar panel (last LOOKBACK_BARS
+        daily bars per symbol, shared bar store), evaluated in one vectorized pass.
+        Returns: DataFrame indexed by symbol (price, volume_shares, volume_usd, status, reason)
+                 status: liquid | price_too_low | volume_too_low | no_data | delisted
+                 (delisted = no bars and on the bar store's dead list)
+        """
+        symbols = list(dict.fromkeys(symbols))
+        try:
+            bars = get_bars(symbols, start=date.today() - timedelta(days=LOOKBACK_CALENDAR_DAYS))
+            error = None
+        except Exception as e:
+            bars, error = {}, str(e)
+
+        close = np.full((len(symbols), LOOKBACK_BARS), np.nan)
+        volume = np.full((len(symbols), LOOKBACK_BARS), np.nan)
+        for i, sym in enumerate(symbols):
+            df = bars.get(sym)
+            if df is not None and len(df):
+                tail = df.iloc[-LOOKBACK_BARS:]
+                close[i, LOOKBACK_BARS - len(tail):] = tail['Close'].to_numpy()
+                volume[i, LOOKBACK_BARS - len(tail):] = tail['Volume'].to_numpy()
+
+        price = close[:, -1]
+        with np.errstate(invalid='ignore'), warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)  # All-NaN rows (no data)
+            volume_shares = np.nanmean(volume, axis=1)
+        volume_usd = volume_shares * price
+        has_data = np.isfinite(price) & np.isfinite(volume_shares)
+        dead = load_dead_symbols()
+        is_dead = np.array([sym in dead for sym in symbols], dtype=bool)
+
+        status = np.select(
+            [~has_data & is_dead, ~has_data, price < MIN_PRICE, volume_usd < MIN_DAILY_VOLUME_USD,
+             volume_shares < MIN_VOLUME_SHARES],
+            ['delisted', 'no_data', 'price_too_low', 'volume_too_low', 'volume_too_low'],
+            'liquid')
+        out = pd.DataFrame({'price': price, 'volume_shares': volume_shares, 'volume_usd': volume_usd,
+                            'status': status}, index=pd.Index(symbols, name='symbol'))
+        out['reason'] = [self._reason(row, error) for row in out.itertuples()]
+        return out
+
+    @staticmethod
+    def _reason(row, error=None) -> str:
+        if row.status == 'liquid':
+            return "Liquid"
+        if row.status == 'price_too_low':
+            return f"Price ${row.price:.2f} < ${MIN_PRICE}"
+        if row.status == 'volume_too_low':
+            if row.volume_usd < MIN_DAILY_VOLUME_USD:
+                return f"Volume ${row.volume_usd:,.0f} < ${MIN_DAILY_VOLUME_USD:,.0f}"
+            return f"Volume {row.volume_shares:,.0f} shares < {MIN_VOLUME_SHARES:,.0f}"
+        if row.status == 'delisted':
+            return "Delisted (no bars)"
+        if error:
+            return f"Error: {str(error)[:50]}"
+        return "No data"
+
     def check_liquidity(self, symbol: str) -> Tuple[bool, str, dict]:
         """
         Check if symbol meets liquidity criteria.
         Returns: (is_liquid: bool, reason: str, metrics: dict)
         """
-        try:
-            # Fetch latest data
-            ticker = yf.Ticker(symbol)
-            hist = ticker.history(period='5d')
-            info = ticker.info
-            
-            if hist.empty:
-                return False, "No data", {'error': 'No historical data'}
-            
-            # Current metrics
-            current_price = float(hist['Close'].iloc[-1])
-            avg_volume_shares = float(hist['Volume'].tail(5).mean())
-            avg_volume_usd = avg_volume_shares * current_price
-            
-            metrics = {
-                'price': current_price,
-                'volume_shares': avg_volume_shares,
-                'volume_usd': avg_volume_usd,
-            }
-            
-            # Check price
-            if current_price < MIN_PRICE:
-                return False, f"Price ${current_price:.2f} < ${MIN_PRICE}", metrics
-            
-            # Check volume
-            if avg_volume_usd < MIN_DAILY_VOLUME_USD:
-                return False, f"Volume ${avg_volume_usd:,.0f} < ${MIN_DAILY_VOLUME_USD:,.0f}", metrics
-            
-            if avg_volume_shares < MIN_VOLUME_SHARES:
-                return False, f"Volume {avg_volume_shares:,.0f} shares < {MIN_VOLUME_SHARES:,.0f}", metrics
-            
-            return True, "Liquid", metrics
-            
-        except Exception as e:
-            return False, f"Error: {str(e)[:50]}", {'error': str(e)}
-    
+        row = self.evaluate([symbol]).iloc[0]
+        if row['status'] in ('no_data', 'delisted'):
+            return False, row['reason'], {'error': row['reason']}
+        metrics = {
+            'price': float(row['price']),
+            'volume_shares': float(row['volume_shares']),
+            'volume_usd': float(row['volume_usd']),
+        }
+        return row['status'] == 'liquid', row['reason'], metrics
+
     def filter_universe(self, universe: List[str]) -> List[str]:
-        """Filter universe to only liquid symbols."""
-        logger.info(f"Filtering {len(universe)} symbols for liquidity...")
-        
+        """
+        Filter universe to only liquid symbols.
+        Only new / expired / near-threshold symbols are re-evaluated (in chunks, persisted
+        after each); clearly liquid or illiquid ones reuse their stored verdict.
+        """
+        t0 = time.time()
+        universe = list(dict.fromkeys(universe))
+        today = date.today()
+        todo = [s for s in universe if self._needs_check(s, today)]
+        logger.info(f"Filtering {len(universe)} symbols for liquidity "
+                    f"({len(todo)} to check, {len(universe) - len(todo)} reused)...")
+
+        missing = set()  # No data this run and no earlier verdict: rejected now, retried next run
+        for i in range(0, len(todo), CHECK_CHUNK):
+            chunk = self.evaluate(todo[i:i + CHECK_CHUNK])
+            for sym, row in chunk.iterrows():
+                if row['status'] == 'no_data':
+                    # Not persisted: an earlier verdict stands (still due, so retried next run)
+                    if self.state.get(sym, {}).get('status', 'no_data') == 'no_data':
+                        self.state.pop(sym, None)
+                        missing.add(sym)
+                    continue
+                self.state[sym] = {
+                    'checked': today.isoformat(),
+                    'status': row['status'],
+                    'reason': row['reason'],
+                    'price': None if pd.isna(row['price']) else float(row['price']),
+                    'volume_shares': None if pd.isna(row['volume_shares']) else float(row['volume_shares']),
+                    'volume_usd': None if pd.isna(row['volume_usd']) else float(row['volume_usd']),
+                }
+            self._save_state()
+            logger.info(f"Progress: {min(i + CHECK_CHUNK, len(todo))}/{len(todo)}")
+
         self.filtered_symbols = []
-        
-        for i, symbol in enumerate(universe):
-            if (i + 1) % 50 == 0:
-                logger.info(f"Progress: {i+1}/{len(universe)}")
-            
-            is_liquid, reason, metrics = self.check_liquidity(symbol)
-            
-            if is_liquid:
+        self.rejected = {k: [] for k in self.rejected}
+        for symbol in universe:
+            status = 'no_data' if symbol in missing else self.state[symbol]['status']
+            if status == 'liquid':
                 self.filtered_symbols.append(symbol)
             else:
-                # Categorize rejection
-                if 'Price' in reason:
-                    self.rejected['price_too_low'].append(symbol)
-                elif 'Volume' in reason:
-                    self.rejected['volume_too_low'].append(symbol)
-                elif 'No data' in reason:
-                    self.rejected['no_data'].append(symbol)
-                elif 'Error' in reason:
-                    self.rejected['delisted'].append(symbol)
-        
+                self.rejected[status].append(symbol)
+
+        logger.info(f"Liquidity filter: {len(universe)} symbols in {time.time() - t0:.1f}s")
         return self.filtered_symbols
     
     def save_filtered_universe(self, symbols: List[str]) -> str:
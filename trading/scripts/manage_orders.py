@@ -3,7 +3,6 @@
 Order management CLI - for OpenClaw to approve/reject pending orders
 """
 import os
-import json
 import requests
 import sys
 from pathlib import Path
@@ -15,25 +14,15 @@ if ENV_PATH.exists():
             key, val = line.split('=', 1)
             os.environ[key.strip()] = val.strip()
 
+sys.path.insert(0, str(Path(__file__).parent))
+import trade_journal as journal
+
 SECRET = os.getenv('MOLT_WEBHOOK_SECRET')
-PENDING_DIR = Path(__file__).resolve().parents[1] / 'pending'
 
 
 def list_pending():
     """List all pending orders"""
-    if not PENDING_DIR.exists():
-        print("No pending orders")
-        return []
-    
-    pending = []
-    for f in PENDING_DIR.glob('*.json'):
-        try:
-            intent = json.loads(f.read_text())
-            pending.append(intent)
-        except Exception:
-            continue
-    
-    return pending
+    return journal.list_pending()
 
 
 def approve_order(intent_id):
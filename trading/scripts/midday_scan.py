@@ -1,12 +1,16 @@
 #!/usr/bin/env python3
 import json
+import os
 import sys
-from datetime import datetime, time
+from datetime import datetime
+import time
+from pathlib import Path
 import pandas as pd
 import numpy as np
 
+sys.path.insert(0, str(Path(__file__).resolve().parent))
 try:
-    import yfinance as yf
+    from intraday_stream import get_stream, STREAM_DIR
 except Exception:
     print("ERR: Missing dependency yfinance. Please pip install yfinance")
     sys.exit(1)
@@ -24,164 +28,145 @@ def load_watchlist(path="trading/watchlist.json"):
     return sorted(list(dict.fromkeys(tickers)))
 
 
-def compute_vwap(df):
-    # typical price * volume cumulative / cumulative volume
-    tp = (df['High'] + df['Low'] + df['Close']) / 3.0
-    cum_vol = df['Volume'].cumsum().replace(0, np.nan)
-    vwap = (tp * df['Volume']).cumsum() / cum_vol
-    return vwap
+_stream = None
+
+
+def intraday_stream(tickers=None):
+    """
+    Shared streaming intraday state (intraday_stream) covering the watchlist plus tickers.
+    Bars and VWAP/EMA/MACD are kept incrementally instead of re-downloaded per ticker.
+    """
+    global _stream
+    tickers = list(tickers or [])
+    if _stream is None:
+        _stream = get_stream(load_watchlist() + tickers)
+    elif not _stream.covers(tickers):
+        _stream = get_stream(_stream.symbols + tickers)
+    return _stream
 
 
 def get_intraday(ticker):
-    # 5m data for 1 day keeps today session
-    df = yf.download(ticker, period='1d', interval='5m', progress=False, prepost=False)
-    if df is None or df.empty:
-        return None
-    # Handle MultiIndex columns returned by yfinance
-    if isinstance(df.columns, pd.MultiIndex):
-        try:
-            df = df.xs(ticker, axis=1, level=1)
-        except Exception:
-            # Fallback: take first level slice
-            first = df.columns.get_level_values(1)[0]
-            df = df.xs(first, axis=1, level=1)
-    # Ensure ET timezone
-    df = df.tz_convert('America/New_York') if df.index.tz is not None else df.tz_localize('UTC').tz_convert('America/New_York')
-    df['VWAP'] = compute_vwap(df)
-    # EMAs for momentum
-    df['EMA9'] = df['Close'].ewm(span=9, adjust=False).mean()
-    df['EMA20'] = df['Close'].ewm(span=20, adjust=False).mean()
-    # MACD fast/slow on 5m close
-    ema12 = df['Close'].ewm(span=12, adjust=False).mean()
-    ema26 = df['Close'].ewm(span=26, adjust=False).mean()
-    df['MACD'] = ema12 - ema26
-    df['Signal'] = df['MACD'].ewm(span=9, adjust=False).mean()
-    return df
+    # Today's regular-session 5m bars with VWAP, EMA9/EMA20 and MACD/Signal (ET index)
+    return intraday_stream([ticker]).frame(ticker)
+
+
+# Pattern → (priority, action); lower priority sorts first
+PATTERNS = {
+    'Midday Reversal Down': (1, "Consider short/puts on LH or VWAP fail"),
+    'Midday Reversal Up': (1, "Consider long/calls on HL or VWAP reclaim"),
+    'Range Breakout': (2, "Watch pullback/HL for entry"),
+    'Range Breakdown': (2, "Watch LH/reject for entry"),
+    'Volume Spike': (3, "Confirm direction, follow through"),
+    'Momentum ↑': (4, "Potential continuation on dips"),
+    'Momentum ↓': (4, "Potential fade on pops"),
+    'Retest R': (5, "Look for breakout or rejection"),
+    'Retest S': (5, "Bounce vs fail setup"),
+    'VWAP Test': (6, "Trend bias on hold vs reclaim"),
+}
+SIGNALS_FILE = STREAM_DIR / "midday_signals.json"  # Signals active on the previous pass (today)
+
+
+def detect_signals(snap: pd.DataFrame) -> list:
+    """
+    Evaluate every pattern for all symbols at once from an intraday_stream snapshot
+    (one row per symbol: morning levels, VWAP, EMA20/MACD, last/previous bar values).
+    Returns: [(ticker, level, pattern, action)] sorted by pattern priority, then ticker
+    """
+    col = lambda k: snap[k].to_numpy(dtype=np.float64)
+    last, mh, ml, vwap = col('last'), col('morning_high'), col('morning_low'), col('vwap')
+    ema20, macd, signal = col('ema20'), col('macd'), col('signal')
+    prev_close, prev_ema20, prev_macd, prev_signal = col('prev_close'), col('prev_ema20'), col('prev_macd'), col('prev_signal')
+    vol_med, last_vol, open_price = col('volume_median'), col('last_volume'), col('open_price')
+    has_morning = np.isfinite(mh)  # Morning window 09:30-11:00 ET seen
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # Morning trend: open (09:30-09:35 bar) → last close by 11:00
+        change_to_11 = np.where(open_price > 0, col('morning_close') / open_price - 1.0, 0.0)
+        macd_cross_down = (macd < signal) & (prev_macd >= prev_signal)
+        macd_cross_up = (macd > signal) & (prev_macd <= prev_signal)
+        near = lambda level, pct=0.003: np.abs(last - level) / level <= pct
+        post11 = np.isfinite(col('post11_high'))
+        hits = {
+            # Range breakout/breakdown after 11:00 ET, crossed within the last 3 bars
+            'Range Breakout': post11 & (col('recent_high') > mh),
+            'Range Breakdown': post11 & (col('recent_low') < ml),
+            # Support/resistance test: within 0.3% of morning H/L, 0.2% of VWAP
+            'Retest R': near(mh),
+            'Retest S': near(ml),
+            'VWAP Test': np.isfinite(vwap) & near(vwap, 0.002),
+            # Unusual volume: last bar >= 2x the day's median (20+ bars)
+            'Volume Spike': (snap['bars'].to_numpy() >= 20) & (vol_med > 0) & (last_vol >= 2.0 * vol_med),
+            # Midday reversal: strong morning trend, then EMA20 break with an opposite MACD cross
+            'Midday Reversal Down': np.isfinite(open_price) & (change_to_11 >= 0.015) & (last < ema20) & macd_cross_down,
+            'Midday Reversal Up': np.isfinite(open_price) & (change_to_11 <= -0.015) & (last > ema20) & macd_cross_up,
+            # Momentum shift: close crosses EMA20 with MACD confirmation
+            'Momentum ↑': (last > ema20) & (prev_close <= prev_ema20) & (macd > signal),
+            'Momentum ↓': (last < ema20) & (prev_close >= prev_ema20) & (macd < signal),
+        }
+    level = {
+        'Range Breakout': lambda i: f"Morn H {mh[i]:.2f}",
+        'Range Breakdown': lambda i: f"Morn L {ml[i]:.2f}",
+        'Retest R': lambda i: f"Morn H {mh[i]:.2f}",
+        'Retest S': lambda i: f"Morn L {ml[i]:.2f}",
+        'VWAP Test': lambda i: f"VWAP {vwap[i]:.2f}",
+        'Volume Spike': lambda i: f"Vol x{last_vol[i] / vol_med[i]:.1f}",
+        'Midday Reversal Down': lambda i: f"~{last[i]:.2f}",
+        'Midday Reversal Up': lambda i: f"~{last[i]:.2f}",
+        'Momentum ↑': lambda i: f"EMA20 {ema20[i]:.2f}",
+        'Momentum ↓': lambda i: f"EMA20 {ema20[i]:.2f}",
+    }
+    tickers = snap.index.to_numpy()
+    signals = [(tickers[i], level[pattern](i), pattern, PATTERNS[pattern][1])
+               for pattern, mask in hits.items() for i in np.nonzero(mask & has_morning)[0]]
+    return sorted(signals, key=lambda x: (PATTERNS[x[2]][0], x[0]))
+
+
+def changed_signals(signals: list, path: Path = SIGNALS_FILE) -> list:
+    """
+    Signals whose (ticker, pattern) was not active on the previous pass today, so repeated
+    scans don't re-alert. The current active set replaces the stored one.
+    """
+    today = pd.Timestamp.now(tz='America/New_York').date().isoformat()
+    try:
+        prev = json.loads(path.read_text())
+        active = {tuple(k) for k in prev['active']} if prev.get('day') == today else set()
+    except (FileNotFoundError, ValueError, KeyError):
+        active = set()
+    current = {(t, pattern) for t, _, pattern, _ in signals}
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps({'day': today, 'active': sorted(current)}))
+    os.replace(tmp, path)
+    return [s for s in signals if (s[0], s[2]) not in active]
 
 
 def scan_ticker(t):
-    df = get_intraday(t)
-    if df is None or df.empty:
-        return []
-    # session window in ET
-    idx = df.index
-    # Morning window 09:30-11:00 ET
-    morning = df.between_time('09:30', '11:00')
-    if morning.empty:
-        return []
-    morning_high = morning['High'].max()
-    morning_low = morning['Low'].min()
-
-    now_row = df.iloc[-1]
-    last_close = float(now_row['Close'])
-
-    signals = []
-
-    # Range breakout/breakdown after 11:00 ET
-    post11 = df.between_time('11:00', '16:00')
-    if not post11.empty:
-        post11_high = post11['High'].max()
-        post11_low = post11['Low'].min()
-        # Check cross within last 3 bars to keep fresh
-        recent = df.iloc[-3:]
-        if (recent['High'] > morning_high).any():
-            signals.append((t, f"Morn H {morning_high:.2f}", "Range Breakout", "Watch pullback/HL for entry"))
-        if (recent['Low'] < morning_low).any():
-            signals.append((t, f"Morn L {morning_low:.2f}", "Range Breakdown", "Watch LH/reject for entry"))
-
-    # Support/resistance test: within 0.3% of morning H/L or VWAP
-    def near(level, price, pct=0.003):
-        return abs(price - level) / level <= pct
-
-    if near(morning_high, last_close):
-        signals.append((t, f"Morn H {morning_high:.2f}", "Retest R", "Look for breakout or rejection"))
-    if near(morning_low, last_close):
-        signals.append((t, f"Morn L {morning_low:.2f}", "Retest S", "Bounce vs fail setup"))
-    if not np.isnan(now_row['VWAP']) and near(now_row['VWAP'], last_close, 0.002):
-        signals.append((t, f"VWAP {now_row['VWAP']:.2f}", "VWAP Test", "Trend bias on hold vs reclaim"))
-
-    # Unusual volume spike: last 5m volume > 2.0x median of day
-    if len(df) >= 20:
-        vol_med = float(df['Volume'].median())
-        last_vol = float(now_row['Volume'])
-        if vol_med > 0 and last_vol >= 2.0 * vol_med:
-            signals.append((t, f"Vol x{last_vol/vol_med:.1f}", "Volume Spike", "Confirm direction, follow through"))
-
-    # Midday reversal: morning trend strong then EMA20 break and MACD cross opposite
-    open_row = df.between_time('09:30', '09:35').iloc[:1]
-    if not open_row.empty:
-        open_price = float(open_row['Open'].iloc[0])
-        change_to_11 = (morning['Close'].iloc[-1] / open_price - 1.0) if open_price else 0.0
-        strong_up = change_to_11 >= 0.015
-        strong_down = change_to_11 <= -0.015
-        recent = df.iloc[-3:]
-        macd_cross_down = (recent['MACD'].iloc[-1] < recent['Signal'].iloc[-1]) and (recent['MACD'].iloc[-2] >= recent['Signal'].iloc[-2])
-        macd_cross_up = (recent['MACD'].iloc[-1] > recent['Signal'].iloc[-1]) and (recent['MACD'].iloc[-2] <= recent['Signal'].iloc[-2])
-        # EMA20 trend filter
-        below_ema20 = last_close < float(now_row['EMA20'])
-        above_ema20 = last_close > float(now_row['EMA20'])
-        if strong_up and below_ema20 and macd_cross_down:
-            signals.append((t, f"~{last_close:.2f}", "Midday Reversal Down", "Consider short/puts on LH or VWAP fail"))
-        if strong_down and above_ema20 and macd_cross_up:
-            signals.append((t, f"~{last_close:.2f}", "Midday Reversal Up", "Consider long/calls on HL or VWAP reclaim"))
-
-    # Momentum shift: price crosses EMA20 with MACD confirmation (no strong morning trend required)
-    recent = df.iloc[-3:]
-    cross_up = (recent['Close'].iloc[-1] > recent['EMA20'].iloc[-1]) and (recent['Close'].iloc[-2] <= recent['EMA20'].iloc[-2]) and (recent['MACD'].iloc[-1] > recent['Signal'].iloc[-1])
-    cross_down = (recent['Close'].iloc[-1] < recent['EMA20'].iloc[-1]) and (recent['Close'].iloc[-2] >= recent['EMA20'].iloc[-2]) and (recent['MACD'].iloc[-1] < recent['Signal'].iloc[-1])
-    if cross_up:
-        signals.append((t, f"EMA20 {now_row['EMA20']:.2f}", "Momentum ↑", "Potential continuation on dips"))
-    if cross_down:
-        signals.append((t, f"EMA20 {now_row['EMA20']:.2f}", "Momentum ↓", "Potential fade on pops"))
-
-    # De-dupe by pattern type, keep priority order
-    priority_order = {
-        'Midday Reversal Down': 1,
-        'Midday Reversal Up': 1,
-        'Range Breakout': 2,
-        'Range Breakdown': 2,
-        'Volume Spike': 3,
-        'Momentum ↑': 4,
-        'Momentum ↓': 4,
-        'Retest R': 5,
-        'Retest S': 5,
-        'VWAP Test': 6,
-    }
-    # Convert to dict with best priority per pattern
-    # We'll emit multiple lines per ticker if distinct high-priority events exist
-    signals_sorted = sorted(signals, key=lambda x: (priority_order.get(x[2], 9), x[0]))
-    return signals_sorted
+    return detect_signals(intraday_stream([t]).snapshot().loc[[t]])
 
 
 def main():
     tickers = load_watchlist()
-    results = []
-    for t in tickers:
-        try:
-            sigs = scan_ticker(t)
-            results.extend(sigs)
-        except Exception as e:
-            print(f"WARN {t}: {e}", file=sys.stderr)
-            continue
-    # Global priority sort
-    priority_order = {
-        'Midday Reversal Down': 1,
-        'Midday Reversal Up': 1,
-        'Range Breakout': 2,
-        'Range Breakdown': 2,
-        'Volume Spike': 3,
-        'Momentum ↑': 4,
-        'Momentum ↓': 4,
-        'Retest R': 5,
-        'Retest S': 5,
-        'VWAP Test': 6,
-    }
-    results_sorted = sorted(results, key=lambda x: (priority_order.get(x[2], 9), x[0]))
+    every = float(sys.argv[sys.argv.index('--every') + 1]) if '--every' in sys.argv else None
+    while True:
+        run_scan(tickers, only_changes='--all' not in sys.argv)
+        if every is None:
+            break
+        sys.stdout.flush()
+        time.sleep(every)
+        _stream.update()  # Only new bars are committed
+        _stream.save()
+
+
+def run_scan(tickers, only_changes=True):
+    snap = intraday_stream(tickers).snapshot()
+    results = detect_signals(snap.loc[snap.index.isin(tickers)])
+    if only_changes:
+        results = changed_signals(results)
     # Format concise lines
     lines = []
-    for t, level, pattern, action in results_sorted:
+    for t, level, pattern, action in results:
         lines.append(f"{t}: {level} | {pattern} | {action}")
-    print("\n".join(lines))
+    if lines:
+        print("\n".join(lines))
 
 if __name__ == '__main__':
     main()
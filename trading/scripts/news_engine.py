@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+News Ingestion Engine
+asyncio engine behind news_monitor.py and trump_news_monitor.py, replacing their serial
+blocking polls of every source once per cycle.
+
+- One task per source on its own schedule (interval_sec). Fetches run in worker threads with a
+  per-request timeout, so a slow or failing source only delays itself; failures back off
+  exponentially up to MAX_BACKOFF_SEC.
+- Conditional GETs: ETag / Last-Modified remembered per source and sent back as
+  If-None-Match / If-Modified-Since (304 → nothing to parse); X and Truth Social are
+  queried with since_id instead.
+- Dedupe index of seen post IDs: a set in memory, an append-only file on disk
+  (cache/news/<engine>_seen.txt), compacted to the newest MAX_SEEN IDs.
+- Append-only event log: one JSON line per event (append_event), no more rewriting the
+  whole history file per event.
+- New posts go to the handler as soon as their source returns them. Their IDs (and the
+  source's ETag / since_id) are only recorded once the handler has processed them, so a
+  handler error or a crash in between means the posts are fetched and handled again.
+  The first poll of a source only fills the dedupe index (no alert flood for the backlog).
+
+Sources (SOURCES, per-engine subsets by name):
+- fed_press, whitehouse: RSS / Atom feeds
+- trump_x: X API v2 recent search (needs TWITTER_BEARER_TOKEN)
+- trump_truth_social: Truth Social public statuses API (Mastodon compatible)
+
+Posts: { id ('<source>:<native id>'), source, label, text, url, published }
+
+Usage:
+  engine = NewsEngine('news_monitor', ['fed_press', 'trump_x'], handler)
+  engine = NewsEngine('trump_news', feeds, handle_posts, batch=True)  # one call per poll
+  engine.run()                  # until interrupted
+  engine.run(duration=600)      # cron-style: ten minutes
+  engine.poll_once()            # every source once, concurrently → handler events
+"""
+
+import asyncio
+from email.utils import parsedate_to_datetime
+from html import unescape
+from pathlib import Path
+import json
+import logging
+import os
+import re
+import threading
+import time
+import xml.etree.ElementTree as ET
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+NEWS_CACHE_DIR = Path.home() / ".openclaw" / "workspace" / "trading" / "cache" / "news"
+NEWS_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+REQUEST_TIMEOUT_SEC = 10
+MAX_BACKOFF_SEC = 600
+MAX_SEEN = 20000           # Seen IDs kept after compaction
+USER_AGENT = 'Mozilla/5.0 (compatible; trading-news-monitor/1.0)'
+
+SOURCES = {
+    'fed_press': {
+        'kind': 'rss',
+        'label': 'Federal Reserve',
+        'url': 'https://www.federalreserve.gov/feeds/press_all.xml',
+        'interval_sec': 30,
+    },
+    'whitehouse': {
+        'kind': 'rss',
+        'label': 'White House',
+        'url': 'https://www.whitehouse.gov/feed/',
+        'interval_sec': 60,
+    },
+    'trump_x': {
+        'kind': 'x',
+        'label': 'Trump X',
+        'url': 'https://api.twitter.com/2/tweets/search/recent',
+        'query': 'from:realDonaldTrump -is:retweet',
+        'token_env': 'TWITTER_BEARER_TOKEN',
+        'interval_sec': 60,  # Recent search is rate limited per 15-minute window
+    },
+    'trump_truth_social': {
+        'kind': 'truth_social',
+        'label': 'Trump Truth Social',
+        'url': 'https://truthsocial.com/api/v1/accounts/107780257626128497/statuses',
+        'interval_sec': 20,
+    },
+}
+
+_TAG_RE = re.compile(r'<[^>]+>')
+_ATOM = '{http://www.w3.org/2005/Atom}'
+
+
+def _clean(html: str) -> str:
+    return re.sub(r'\s+', ' ', unescape(_TAG_RE.sub(' ', html or ''))).strip()
+
+
+def append_event(path: Path, event: dict):
+    """Append one event as a JSON line (O_APPEND: concurrent writers never interleave lines)."""
+    line = (json.dumps(event, default=str) + '\n').encode()
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, line)
+    finally:
+        os.close(fd)
+
+
+def read_events(path: Path, limit: int = None) -> list:
+    """Events from a JSON-lines log (last `limit` if given); unreadable lines are skipped."""
+    if not path.exists():
+        return []
+    lines = path.read_text().splitlines()
+    events = []
+    for line in lines[-limit:] if limit else lines:
+        try:
+            events.append(json.loads(line))
+        except ValueError:
+            continue
+    return events
+
+
+# --- parsers (response → posts) ---
+
+def _parse_rss(name: str, cfg: dict, resp) -> list:
+    root = ET.fromstring(resp.content)
+    posts = []
+    for item in root.iter('item'):  # RSS 2.0
+        link = (item.findtext('link') or '').strip()
+        published = item.findtext('pubDate')
+        try:
+            published = parsedate_to_datetime(published).isoformat() if published else None
+        except (TypeError, ValueError):
+            pass
+        posts.append({
+            'native_id': (item.findtext('guid') or link or item.findtext('title') or '').strip(),
+            'text': _clean(f"{item.findtext('title') or ''}. {item.findtext('description') or ''}"),
+            'url': link,
+            'published': published,
+        })
+    for entry in root.iter(f'{_ATOM}entry'):
+        link = entry.find(f'{_ATOM}link')
+        posts.append({
+            'native_id': (entry.findtext(f'{_ATOM}id') or '').strip(),
+            'text': _clean(f"{entry.findtext(f'{_ATOM}title') or ''}. {entry.findtext(f'{_ATOM}summary') or ''}"),
+            'url': link.get('href') if link is not None else '',
+            'published': entry.findtext(f'{_ATOM}updated'),
+        })
+    return posts
+
+
+def _parse_x(name: str, cfg: dict, resp) -> list:
+    return [{
+        'native_id': tweet['id'],
+        'text': tweet.get('text', ''),
+        'url': f"https://x.com/i/web/status/{tweet['id']}",
+        'published': tweet.get('created_at'),
+    } for tweet in resp.json().get('data', [])]
+
+
+def _parse_truth_social(name: str, cfg: dict, resp) -> list:
+    return [{
+        'native_id': status['id'],
+        'text': _clean(status.get('content', '')),
+        'url': status.get('url', ''),
+        'published': status.get('created_at'),
+    } for status in resp.json() if status.get('content')]
+
+
+PARSERS = {'rss': _parse_rss, 'x': _parse_x, 'truth_social': _parse_truth_social}
+
+
+class SeenIndex:
+    """Post IDs already handled: in-memory set backed by an append-only file."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.ids = list(dict.fromkeys(path.read_text().splitlines())) if path.exists() else []
+        self.seen = set(self.ids)
+
+    def unseen(self, ids: list) -> list:
+        """Returns: the ids not recorded yet (in order, without duplicates)"""
+        with self._lock:
+            return [i for i in dict.fromkeys(ids) if i not in self.seen]
+
+    def add(self, ids: list):
+        """Record ids as handled"""
+        with self._lock:
+            new = [i for i in dict.fromkeys(ids) if i not in self.seen]
+            if not new:
+                return
+            self.seen.update(new)
+            self.ids.extend(new)
+            with open(self.path, 'a') as f:
+                f.write(''.join(f'{i}\n' for i in new))
+            if len(self.ids) > 2 * MAX_SEEN:
+                self.ids = self.ids[-MAX_SEEN:]
+                self.seen = set(self.ids)
+                tmp = self.path.with_suffix(f'.{os.getpid()}.tmp')
+                tmp.write_text(''.join(f'{i}\n' for i in self.ids))
+                os.replace(tmp, self.path)
+
+
+class NewsEngine:
+    def __init__(self, name: str, sources, handler=None, sources_config: dict = None, batch: bool = False):
+        """
+        name: engine name (own dedupe index and HTTP state under cache/news/)
+        sources: source names from SOURCES (or sources_config)
+        handler: called with each new post (in a worker thread); may return an event or None
+        batch: handler takes the list of new posts from one poll and returns a list of events
+        """
+        config = sources_config or SOURCES
+        self.name = name
+        self.sources = {}
+        for src in sources:
+            cfg = config[src]
+            if cfg.get('token_env') and not os.getenv(cfg['token_env']):
+                logger.info(f"{src}: {cfg['token_env']} not set, source disabled")
+                continue
+            self.sources[src] = cfg
+        self.handler = handler
+        self.batch = batch
+        self.seen = SeenIndex(NEWS_CACHE_DIR / f'{name}_seen.txt')
+        self.state_file = NEWS_CACHE_DIR / f'{name}_http.json'
+        try:
+            self.state = json.loads(self.state_file.read_text())
+        except (FileNotFoundError, ValueError):
+            self.state = {}
+        self._state_lock = threading.Lock()
+        self._pending = {}  # src → HTTP state to save once the fetched posts are handled
+        self._sessions = {}
+        self.stats = {src: {'polls': 0, 'not_modified': 0, 'errors': 0, 'new': 0, 'last_ms': None}
+                      for src in self.sources}
+
+    # --- HTTP ---
+
+    def _session(self, src: str) -> requests.Session:
+        # One session per source: a source's fetches never overlap, sessions are not shared
+        if src not in self._sessions:
+            s = requests.Session()
+            s.headers['User-Agent'] = USER_AGENT
+            self._sessions[src] = s
+        return self._sessions[src]
+
+    def _save_state(self):
+        tmp = self.state_file.with_suffix(f'.{os.getpid()}.tmp')
+        tmp.write_text(json.dumps(self.state, indent=2))
+        os.replace(tmp, self.state_file)
+
+    def _update_state(self, src: str, update: dict):
+        st = self.state.get(src, {})
+        if update and any(st.get(k) != v for k, v in update.items()):
+            with self._state_lock:
+                self.state[src] = {**st, **update}
+                self._save_state()
+
+    def fetch(self, src: str, commit: bool = True) -> list:
+        """
+        One conditional request to src (blocking).
+        commit=False: leave the posts unrecorded and the source's HTTP state unchanged until
+        commit(src, handled posts), so unhandled posts are fetched again.
+        Returns: posts not seen before
+        """
+        cfg = self.sources[src]
+        st = self.state.get(src, {})
+        self._pending.pop(src, None)
+        headers, params = {}, {}
+        if st.get('etag'):
+            headers['If-None-Match'] = st['etag']
+        if st.get('last_modified'):
+            headers['If-Modified-Since'] = st['last_modified']
+        if cfg['kind'] == 'x':
+            headers['Authorization'] = f"Bearer {os.getenv(cfg['token_env'])}"
+            params = {'query': cfg['query'], 'max_results': 10, 'tweet.fields': 'created_at'}
+        elif cfg['kind'] == 'truth_social':
+            params = {'exclude_replies': 'true', 'limit': 20}
+        if st.get('since_id') and cfg['kind'] != 'rss':
+            params['since_id'] = st['since_id']
+
+        t0 = time.time()
+        resp = self._session(src).get(cfg['url'], headers=headers, params=params, timeout=REQUEST_TIMEOUT_SEC)
+        stats = self.stats[src]
+        stats['polls'] += 1
+        stats['last_ms'] = round((time.time() - t0) * 1000)
+        if resp.status_code == 304:
+            stats['not_modified'] += 1
+            return []
+        resp.raise_for_status()
+
+        posts = PARSERS[cfg['kind']](src, cfg, resp)
+        update = {k: v for k, v in (('etag', resp.headers.get('ETag')),
+                                    ('last_modified', resp.headers.get('Last-Modified'))) if v}
+        if cfg['kind'] != 'rss' and posts:
+            update['since_id'] = max((p['native_id'] for p in posts), key=lambda i: (len(i), i))
+        for p in posts:
+            p.update(id=f"{src}:{p.pop('native_id')}", source=src, label=cfg['label'])
+        posts = [p for p in posts if p['text']]
+        if not st.get('primed'):
+            # First poll only records what is already there
+            self.seen.add([p['id'] for p in posts])
+            self._update_state(src, {**update, 'primed': True})
+            return []
+
+        new_ids = set(self.seen.unseen([p['id'] for p in posts]))
+        new = list({p['id']: p for p in posts if p['id'] in new_ids}.values())
+        stats['new'] += len(new)
+        self._pending[src] = update
+        if commit:
+            self.commit(src, new)
+        return new
+
+    def commit(self, src: str, posts: list, complete: bool = True):
+        """
+        Record handled posts as seen; when every post of the fetch was handled (complete),
+        also save the source's new HTTP state (ETag / Last-Modified / since_id).
+        """
+        self.seen.add([p['id'] for p in posts])
+        update = self._pending.pop(src, None) if complete else None
+        if update:
+            self._update_state(src, update)
+
+    # --- scheduling ---
+
+    def _handle(self, posts: list):
+        """Returns: (events, posts handled without an error)"""
+        if not posts:
+            return [], []
+        if self.batch and self.handler:
+            try:
+                return [e for e in self.handler(posts) if e], posts
+            except Exception as e:
+                logger.warning(f"News handler failed for {len(posts)} post(s): {e}")
+                return [], []
+        events, handled = [], []
+        for post in posts:
+            try:
+                event = self.handler(post) if self.handler else post
+            except Exception as e:
+                logger.warning(f"News handler failed for {post['id']}: {e}")
+                continue
+            handled.append(post)
+            if event:
+                events.append(event)
+        return events, handled
+
+    def _deliver(self, src: str, posts: list) -> list:
+        """Handle one fetch's posts, then record the handled ones. Returns: handler events"""
+        events, handled = self._handle(posts)
+        self.commit(src, handled, complete=len(handled) == len(posts))
+        return events
+
+    async def _poll(self, src: str, stop_at: float = None):
+        interval = self.sources[src]['interval_sec']
+        failures = 0
+        while stop_at is None or time.time() < stop_at:
+            started = time.time()
+            try:
+                posts = await asyncio.to_thread(self.fetch, src, False)
+                failures = 0
+                if posts:
+                    logger.info(f"{src}: {len(posts)} new post(s)")
+                await asyncio.to_thread(self._deliver, src, posts)
+                delay = max(0.0, interval - (time.time() - started))
+            except Exception as e:
+                failures += 1
+                self.stats[src]['errors'] += 1
+                delay = min(MAX_BACKOFF_SEC, interval * 2 ** failures)
+                logger.warning(f"{src}: poll failed ({e}); retry in {delay:.0f}s")
+            if stop_at is not None:
+                delay = min(delay, max(0.0, stop_at - time.time()))
+            await asyncio.sleep(delay)
+
+    async def _run(self, duration: float = None):
+        stop_at = time.time() + duration if duration else None
+        await asyncio.gather(*(self._poll(src, stop_at) for src in self.sources))
+
+    def run(self, duration: float = None):
+        """Poll every source on its own schedule (for `duration` seconds, or until interrupted)."""
+        if not self.sources:
+            logger.warning(f"{self.name}: no enabled news sources")
+            return
+        schedule = ', '.join(f"{src} every {cfg['interval_sec']}s" for src, cfg in self.sources.items())
+        logger.info(f"{self.name}: polling {schedule}")
+        try:
+            asyncio.run(self._run(duration))
+        except KeyboardInterrupt:
+            logger.info(f"{self.name}: stopped")
+
+    async def _poll_once(self, handle: bool) -> list:
+        async def one(src):
+            try:
+                posts = await asyncio.to_thread(self.fetch, src, not handle)
+            except Exception as e:
+                self.stats[src]['errors'] += 1
+                logger.warning(f"{src}: poll failed ({e})")
+                return []
+            return await asyncio.to_thread(self._deliver, src, posts) if handle else posts
+        results = await asyncio.gather(*(one(src) for src in self.sources))
+        return [item for items in results for item in items]
+
+    def poll_once(self, handle: bool = True) -> list:
+        """
+        Every source once, concurrently; each source's posts are handled as soon as it returns.
+        Returns: handler events (new posts, recorded as seen, if handle=False)
+        """
+        return asyncio.run(self._poll_once(handle)) if self.sources else []
@@ -4,32 +4,45 @@ News monitoring for market-moving events
 Focus: Trump posts, Fed announcements, major economic news
 
 Real-time alerts for events that can shift markets dramatically
+
+Sources are polled by the asyncio news engine (news_engine.py): each on its own
+schedule with conditional GETs, so alerts go out seconds after a post appears.
+Events are appended to logs/news_events.jsonl (one JSON line per event).
 """
 import os
 import json
 import time
 from pathlib import Path
 from datetime import datetime
-import requests
+from functools import lru_cache
+
+from keyword_matcher import KeywordMatcher
+from news_engine import NewsEngine, append_event, read_events
 
 TRADING_DIR = Path(__file__).resolve().parents[1]
-NEWS_LOG = TRADING_DIR / 'logs' / 'news_events.json'
+NEWS_LOG = TRADING_DIR / 'logs' / 'news_events.jsonl'
 NEWS_LOG.parent.mkdir(exist_ok=True)
 
-# News sources to monitor
+# News sources to monitor (feed: news_engine.SOURCES name)
 SOURCES = {
     'trump_twitter': {
-        'enabled': False,  # Need Twitter API access
+        'enabled': True,  # Skipped by the engine without TWITTER_BEARER_TOKEN
+        'feed': 'trump_x',
+        'label': 'Trump Twitter',
         'keywords': ['tariff', 'china', 'trade', 'tax', 'fed', 'stock', 'market'],
         'impact': 'HIGH'
     },
     'trump_truth_social': {
-        'enabled': False,  # Need Truth Social API/scraper
+        'enabled': True,
+        'feed': 'trump_truth_social',
+        'label': 'Trump Truth Social',
         'keywords': ['tariff', 'china', 'trade', 'tax', 'fed', 'stock', 'market'],
         'impact': 'HIGH'
     },
     'fed_announcements': {
-        'enabled': False,  # Need Fed RSS/API
+        'enabled': True,
+        'feed': 'fed_press',
+        'label': 'Federal Reserve',
         'keywords': ['rate', 'hike', 'cut', 'inflation', 'employment'],
         'impact': 'HIGH'
     },
@@ -41,64 +54,81 @@ SOURCES = {
 }
 
 
-def load_news_history():
-    """Load previous news events"""
-    if NEWS_LOG.exists():
-        return json.loads(NEWS_LOG.read_text())
-    return {'events': []}
+ACTION_MATCHER = KeywordMatcher({
+    'bearish': ['tariff', 'war', 'crisis', 'recession'],
+    'bullish': ['tax cut', 'stimulus', 'rate cut'],
+})
+
+
+def load_news_history(limit=None):
+    """Load previous news events (last `limit` if given)"""
+    return {'events': read_events(NEWS_LOG, limit)}
 
 
 def save_news_event(event):
-    """Save a news event"""
-    history = load_news_history()
-    history['events'].append({
+    """Append a news event to the event log"""
+    append_event(NEWS_LOG, {
         **event,
         'timestamp': datetime.now().isoformat(),
         'processed': False
     })
-    NEWS_LOG.write_text(json.dumps(history, indent=2))
+
+
+_engine = None
+
+
+def get_engine():
+    """News engine over the enabled sources (shared by the check_* helpers and monitor_loop)"""
+    global _engine
+    if _engine is None:
+        feeds = [cfg['feed'] for cfg in SOURCES.values() if cfg['enabled'] and cfg.get('feed')]
+        _engine = NewsEngine('news_monitor', feeds, handle_posts, batch=True)
+    return _engine
+
+
+def _check(feed):
+    engine = get_engine()
+    return engine.fetch(feed) if feed in engine.sources else []
 
 
 def check_twitter_trump():
-    """
-    Monitor Trump's Twitter/X account
-    Placeholder - needs Twitter API credentials
-    """
-    # TODO: Implement Twitter API v2 monitoring
-    # Look for posts from @realDonaldTrump
-    # Filter for market-relevant keywords
-    # Return list of new posts since last check
-    return []
+    """New posts from Trump's Twitter/X account (X API v2, needs TWITTER_BEARER_TOKEN)"""
+    return _check('trump_x')
 
 
 def check_truth_social_trump():
-    """
-    Monitor Trump's Truth Social account
-    Placeholder - needs Truth Social API or web scraping
-    """
-    # TODO: Implement Truth Social monitoring
-    # Could use web scraping or unofficial API
-    # Truth Social doesn't have official public API yet
-    return []
+    """New posts from Trump's Truth Social account"""
+    return _check('trump_truth_social')
 
 
 def check_fed_news():
-    """
-    Monitor Federal Reserve announcements
-    """
-    # TODO: Implement Fed RSS feed monitoring
-    # https://www.federalreserve.gov/feeds/press_all.xml
-    return []
+    """New Federal Reserve press releases (RSS)"""
+    return _check('fed_press')
+
+
+@lru_cache(maxsize=32)
+def _matcher(keywords):
+    return KeywordMatcher(keywords)
 
 
 def analyze_market_impact(text, keywords):
     """
-    Analyze if news text contains market-moving keywords
+    Analyze if news text contains market-moving keywords (whole words, plurals allowed)
     Returns (has_impact: bool, matched_keywords: list)
     """
-    text_lower = text.lower()
-    matches = [kw for kw in keywords if kw in text_lower]
-    return (len(matches) > 0, matches)
+    return analyze_many([text], keywords)[0]
+
+
+def analyze_many(texts, keywords):
+    """
+    analyze_market_impact for a batch of texts, one compiled-matcher pass
+    Returns [(has_impact: bool, matched_keywords: list)] aligned with texts
+    """
+    results = []
+    for m in _matcher(tuple(keywords)).match_many(texts):
+        matches = [kw for kw in keywords if kw in m['categories']]
+        results.append((len(matches) > 0, matches))
+    return results
 
 
 def generate_trading_alert(event):
@@ -121,14 +151,14 @@ def determine_action(event):
     """
     Determine what action to take based on news
     """
-    text = event.get('text', '').lower()
+    signals = ACTION_MATCHER.match(event.get('text', ''))['categories']
     
     # Bearish signals
-    if any(word in text for word in ['tariff', 'war', 'crisis', 'recession']):
+    if 'bearish' in signals:
         return 'CAUTION - Consider tightening stops or reducing exposure'
     
     # Bullish signals
-    if any(word in text for word in ['tax cut', 'stimulus', 'rate cut']):
+    if 'bullish' in signals:
         return 'OPPORTUNITY - Watch for entry setups'
     
     # Neutral but important
@@ -152,100 +182,68 @@ def notify_user(alert):
     notify_file.write_text(json.dumps(alert, indent=2))
 
 
-def monitor_loop():
+def handle_posts(posts):
+    """
+    Engine handler: classify a poll's new posts (one matcher pass per source),
+    log and alert the market-moving ones
+    Returns: the saved events
+    """
+    events = []
+    for config in SOURCES.values():
+        batch = [p for p in posts if p['source'] == config.get('feed')]
+        if not batch:
+            continue
+        for post, (has_impact, keywords) in zip(batch, analyze_many([p['text'] for p in batch], config['keywords'])):
+            if not has_impact:
+                continue
+            event = {
+                'source': config['label'],
+                'text': post['text'],
+                'keywords': keywords,
+                'impact': config['impact'],
+                'id': post['id'],
+                'url': post.get('url'),
+                'timestamp': datetime.now().isoformat(),
+            }
+            save_news_event(event)
+            notify_user(generate_trading_alert(event))
+            events.append(event)
+    return events
+
+
+def monitor_loop(duration=None):
     """
     Main monitoring loop
-    Check all enabled sources every 60 seconds
+    Every enabled source on its own schedule (news_engine.SOURCES interval_sec)
     """
     print("📡 News Monitor Starting...")
     print("Monitoring for market-moving events...\n")
     
-    while True:
-        try:
-            # Check Trump Twitter/X
-            if SOURCES['trump_twitter']['enabled']:
-                tweets = check_twitter_trump()
-                for tweet in tweets:
-                    has_impact, keywords = analyze_market_impact(
-                        tweet['text'], 
-                        SOURCES['trump_twitter']['keywords']
-                    )
-                    if has_impact:
-                        event = {
-                            'source': 'Trump Twitter',
-                            'text': tweet['text'],
-                            'keywords': keywords,
-                            'impact': SOURCES['trump_twitter']['impact']
-                        }
-                        save_news_event(event)
-                        alert = generate_trading_alert(event)
-                        notify_user(alert)
-            
-            # Check Truth Social
-            if SOURCES['trump_truth_social']['enabled']:
-                posts = check_truth_social_trump()
-                for post in posts:
-                    has_impact, keywords = analyze_market_impact(
-                        post['text'],
-                        SOURCES['trump_truth_social']['keywords']
-                    )
-                    if has_impact:
-                        event = {
-                            'source': 'Trump Truth Social',
-                            'text': post['text'],
-                            'keywords': keywords,
-                            'impact': SOURCES['trump_truth_social']['impact']
-                        }
-                        save_news_event(event)
-                        alert = generate_trading_alert(event)
-                        notify_user(alert)
-            
-            # Check Fed announcements
-            if SOURCES['fed_announcements']['enabled']:
-                announcements = check_fed_news()
-                for ann in announcements:
-                    has_impact, keywords = analyze_market_impact(
-                        ann['text'],
-                        SOURCES['fed_announcements']['keywords']
-                    )
-                    if has_impact:
-                        event = {
-                            'source': 'Federal Reserve',
-                            'text': ann['text'],
-                            'keywords': keywords,
-                            'impact': SOURCES['fed_announcements']['impact']
-                        }
-                        save_news_event(event)
-                        alert = generate_trading_alert(event)
-                        notify_user(alert)
-            
-            # Sleep before next check
-            time.sleep(60)
-            
-        except KeyboardInterrupt:
-            print("\n📴 News monitor stopped")
-            break
-        except Exception as e:
-            print(f"⚠️  Error in monitoring loop: {e}")
-            time.sleep(60)
+    get_engine().run(duration)
+    print("\n📴 News monitor stopped")
 
 
 if __name__ == '__main__':
+    import logging
+    import sys
+    logging.basicConfig(level=logging.INFO)
+    
+    if '--watch' in sys.argv:
+        monitor_loop()
+        sys.exit(0)
+    
     print("""
     =====================================
     Market News Monitor
     =====================================
     
-    Current Status: PLACEHOLDER
-    
-    To enable real-time monitoring, we need:
-    1. Twitter API credentials (for Trump's @realDonaldTrump)
-    2. Truth Social scraper/API
-    3. Fed RSS feed parser
-    
-    This script is ready to integrate those sources.
+    Sources (news_engine.py):
+    1. Trump X posts (needs TWITTER_BEARER_TOKEN)
+    2. Trump Truth Social posts
+    3. Federal Reserve press release RSS
     
-    For now, run manually to test structure.
+    Run with --watch to start monitoring.
+    Without it, a sample event is logged and alerted to test the pipeline.
     =====================================
     """)
     
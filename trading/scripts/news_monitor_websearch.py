@@ -2,6 +2,7 @@
 """
 Web-search based news monitoring for market-moving events
 Uses OpenClaw's web_search capability to monitor Trump, Fed, and economic news
+Events go to the same log as news_monitor.py: logs/news_events.jsonl (one JSON line per event)
 """
 import json
 import sys
@@ -9,11 +10,14 @@ import time
 from pathlib import Path
 from datetime import datetime
 
+from news_engine import append_event, read_events
+
 # This will be called by OpenClaw AI which has web_search capability
 # When run standalone, it provides structure for OpenClaw to follow
 
 TRADING_DIR = Path(__file__).resolve().parents[1]
-NEWS_LOG = TRADING_DIR / 'logs' / 'news_events.json'
+NEWS_LOG = TRADING_DIR / 'logs' / 'news_events.jsonl'
+DEDUPE_EVENTS = 100  # Recent events checked for an identical text
 ALERT_DIR = TRADING_DIR / 'notifications'
 NEWS_LOG.parent.mkdir(exist_ok=True)
 ALERT_DIR.mkdir(exist_ok=True)
@@ -46,36 +50,22 @@ SEARCHES = {
     }
 }
 
-def load_news_history():
-    """Load previous news events"""
-    if NEWS_LOG.exists():
-        try:
-            return json.loads(NEWS_LOG.read_text())
-        except:
-            return {'events': [], 'last_check': None}
-    return {'events': [], 'last_check': None}
+def load_news_history(limit=None):
+    """Load previous news events (last `limit` if given)"""
+    return {'events': read_events(NEWS_LOG, limit)}
 
 
 def save_news_event(event):
-    """Save a news event"""
-    history = load_news_history()
-    
-    # Check if we've already logged this (dedupe)
-    existing = [e for e in history['events'] if e.get('text', '') == event.get('text', '')]
-    if existing:
+    """Append a news event to the event log (False if the same text was logged recently)"""
+    recent = read_events(NEWS_LOG, DEDUPE_EVENTS)
+    if any(e.get('text', '') == event.get('text', '') for e in recent):
         return False  # Already logged
     
-    history['events'].append({
+    append_event(NEWS_LOG, {
         **event,
         'timestamp': datetime.now().isoformat(),
         'processed': False
     })
-    history['last_check'] = datetime.now().isoformat()
-    
-    # Keep only last 100 events
-    history['events'] = history['events'][-100:]
-    
-    NEWS_LOG.write_text(json.dumps(history, indent=2))
     return True
 
 
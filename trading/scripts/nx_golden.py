@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+NX Golden-Output Regression
+Checks the shared NX scoring library (nx_metrics, nx_state) against:
+- the per-symbol reference implementations kept in the entry-point scripts
+  (nx_screener_production.calculate_metrics, nx_screener_production_v2.calculate_metrics)
+- a recorded snapshot of every entry point's output (nx_golden.json)
+
+Inputs are a deterministic synthetic universe (uneven histories, missing days),
+so the check runs offline and gives the same numbers on every machine.
+
+Usage:
+  python3 nx_golden.py            # library vs references vs snapshot
+  python3 nx_golden.py --record   # rewrite the snapshot after an intended metric change
+  python3 nx_golden.py --live     # library vs references on the bar store universe (no snapshot)
+Exit code 1 on any mismatch.
+"""
+
+import pandas as pd
+import numpy as np
+import json
+import logging
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from nx_metrics import (build_panel, compute_nx_scores, scores_to_records, compute_pro_scores,
+                        pro_scores_to_records, GENERATOR_WINDOWS)
+from nx_state import NXState
+import nx_screener_production as production
+import nx_screener_production_v2 as production_v2
+import nx_watchlist_generator as generator
+
+logger = logging.getLogger(__name__)
+
+GOLDEN_FILE = Path(__file__).parent / "nx_golden.json"
+
+# Rounded fields may differ by one unit in the last place (sum order vs per-symbol loops)
+DIGITS = {"comp_score": 3, "rs_pct": 3, "rvol": 2, "struct_q": 3, "htf_bias": 3, "rsi": 1}
+PRO_DIGITS = {"price": 2, "comp_score": 3, "rsi": 2, "rs_pct": 3, "rvol": 2, "htf_bias": 3,
+              "struct_score": 3, "corr_spy": 3, "dollar_vol_m": 1, "avg_vol_30d": 0, "vol_pct": 2,
+              "perf_6m_pct": 2, "perf_3m_pct": 2, "sma_50": 2, "sma_200": 2}
+
+
+def synthetic_universe(n_symbols=60, n_days=320, seed=7) -> dict:
+    """Deterministic OHLCV frames: trending/choppy symbols, short histories, missing days, SPY."""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end="2025-06-30", periods=n_days)
+    data = {}
+    for i in range(n_symbols + 1):
+        sym = "SPY" if i == n_symbols else f"SYN{i:03d}"
+        drift = 0.0004 if sym == "SPY" else rng.uniform(-0.002, 0.003)
+        vol = 0.01 if sym == "SPY" else rng.uniform(0.008, 0.035)
+        close = rng.uniform(20, 300) * np.exp(np.cumsum(rng.normal(drift, vol, n_days)))
+        spread = close * rng.uniform(0.002, vol * 1.5, n_days)
+        df = pd.DataFrame({
+            "Open": close + rng.normal(0, 0.3, n_days) * spread,
+            "High": close + spread,
+            "Low": close - spread,
+            "Close": close,
+            "Volume": rng.uniform(2e5, 5e6, n_days) * (1 + (np.arange(n_days) > n_days - 30) * rng.uniform(0, 1)),
+        }, index=dates)
+        if sym != "SPY":
+            if i % 7 == 3:
+                df = df.iloc[rng.integers(120, 230):]   # Short history (some below min bars)
+            if i % 5 == 1:
+                df = df.drop(df.index[rng.choice(len(df) - 1, 4, replace=False)])  # Trading halts
+        data[sym] = df
+    return data
+
+
+def _library_outputs(data: dict) -> dict:
+    """Every entry point's scored output through the shared library."""
+    spy = data["SPY"]
+    panel = build_panel(data)
+    today = spy.index[-1]
+
+    state = NXState.from_bars(list(data), data, until=today)
+    return {
+        "production": scores_to_records(compute_nx_scores(panel, spy["Close"], production.NX)),
+        "production_state": scores_to_records(state.scores(production.NX, live=data, live_day=today)),
+        "generator": scores_to_records(compute_nx_scores(panel, spy["Close"], generator.NX_CRITERIA,
+                                                         windows=GENERATOR_WINDOWS)),
+        "production_v2": pro_scores_to_records(compute_pro_scores(panel, spy["Close"], production_v2.NX_PARAMS)),
+    }
+
+
+def _reference_outputs(data: dict) -> dict:
+    """The per-symbol scripts' output for the same bars."""
+    spy = data["SPY"]
+    nx = [production.calculate_metrics(sym, df, spy) for sym, df in data.items()]
+    pro = [production_v2.calculate_metrics(sym, df, spy["Close"]) for sym, df in data.items() if len(df) >= 126]
+    return {
+        "production": [m for m in nx if m],
+        "production_v2": [m for m in pro if m],
+    }
+
+
+def _diff(name: str, got: list, want: list, digits: dict) -> list:
+    """Field-level differences between two record lists (matched by symbol)."""
+    got_by, want_by = {r["symbol"]: r for r in got}, {r["symbol"]: r for r in want}
+    problems = [f"{name}: {sym} missing" for sym in sorted(set(want_by) - set(got_by))]
+    problems += [f"{name}: {sym} unexpected" for sym in sorted(set(got_by) - set(want_by))]
+    for sym in sorted(set(got_by) & set(want_by)):
+        g, w = got_by[sym], want_by[sym]
+        for field in sorted(set(g) | set(w)):
+            a, b = g.get(field), w.get(field)
+            if field in digits and a is not None and b is not None:
+                ok = abs(float(a) - float(b)) <= 1.01 * 10 ** -digits[field]
+            elif isinstance(a, float) or isinstance(b, float):
+                ok = a is not None and b is not None and np.isclose(float(a), float(b), rtol=1e-9)
+            else:
+                ok = a == b
+            if not ok:
+                problems.append(f"{name}: {sym}.{field} = {a} (expected {b})")
+    return problems
+
+
+def run(record=False, live=False) -> int:
+    if live:
+        bars = production.get_bars(production.get_universe_symbols() + ["SPY"],
+                                   start=datetime.now() - timedelta(days=365))
+        data = {sym: df for sym, df in bars.items() if len(df) > 100}
+    else:
+        data = synthetic_universe()
+
+    library = _library_outputs(data)
+    reference = _reference_outputs(data)
+
+    problems = []
+    problems += _diff("production vs reference", library["production"], reference["production"], DIGITS)
+    problems += _diff("production_v2 vs reference", library["production_v2"], reference["production_v2"], PRO_DIGITS)
+    # nx_state's RS is positional, so it's only exact for symbols without missing days
+    spy_dates = data["SPY"].index
+    gap_free = {sym for sym, df in data.items() if df.index.equals(spy_dates[-len(df):])}
+    problems += _diff("nx_state vs engine",
+                      [r for r in library["production_state"] if r["symbol"] in gap_free],
+                      [r for r in library["production"] if r["symbol"] in gap_free], DIGITS)
+
+    if record and not live:
+        GOLDEN_FILE.write_text(json.dumps(library, indent=1))
+        logger.info(f"Snapshot written: {GOLDEN_FILE}")
+    elif not live:
+        if not GOLDEN_FILE.exists():
+            problems.append(f"snapshot missing: {GOLDEN_FILE} (run with --record)")
+        else:
+            golden = json.loads(GOLDEN_FILE.read_text())
+            for name, records in library.items():
+                digits = PRO_DIGITS if name == "production_v2" else DIGITS
+                problems += _diff(f"{name} vs snapshot", records, golden.get(name, []), digits)
+
+    for name, records in library.items():
+        logger.info(f"{name}: {len(records)} scored symbols")
+    for p in problems:
+        logger.error(p)
+    logger.info("NX golden check: " + ("PASS" if not problems else f"FAIL ({len(problems)} differences)"))
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+    sys.exit(run(record="--record" in sys.argv, live="--live" in sys.argv))
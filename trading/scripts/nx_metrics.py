@@ -0,0 +1,595 @@
+#!/usr/bin/env python3
+"""
+Vectorized NX Metric Engine
+Computes every NX metric for the whole universe at once from an aligned
+(dates × symbols) panel instead of one symbol at a time.
+
+- build_panel(data_map) → { 'Open'|'High'|'Low'|'Close'|'Volume': DataFrame[dates × symbols] }
+- compute_nx_scores(panel, spy_close, nx) → DataFrame indexed by symbol
+- scores_to_records(scores) → list of dicts in the watchlist.json candidate format
+- filter_candidates(records, nx) → (long, short) NX green-light split
+- compute_nx_history(panel, spy_close, nx) → the same metrics for every date (dates × symbols),
+  candidate_masks(metrics, nx) → per-date green-light masks (backtest.py)
+- on_own_bars(panel, rules) → any rolling rule set evaluated on each symbol's own bars
+  (box / trend screeners)
+- compute_pro_scores(panel, spy_close, params) → AMS Pro Screener NX (Pine) model,
+  used by nx_screener_production_v2
+
+Every NX entry point (nx_screener_production[_v2], nx_watchlist_generator[_v2])
+scores through this module; thresholds come from each script's NX dict.
+
+Each column is right-aligned on its own valid bars first, so close[-22] means
+"22 bars back for that symbol" exactly like the per-symbol code, even when
+symbols have different histories or trading halts.
+
+Metric definitions follow nx_screener_production.calculate_metrics (per-symbol
+reference, checked by nx_golden.py).
+"""
+
+import pandas as pd
+import numpy as np
+import logging
+import warnings
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+
+# Lookback windows and ready-flag ranges (defaults = nx_screener_production)
+NX_WINDOWS = {
+    "roc": (21, 63, 126),     # Momentum ROC lengths
+    "atr_len": 14,
+    "rs_lookback": 252,       # Common SPY/symbol bars for RS
+    "rvol_recent": 20,        # Recent volume window
+    "rvol_prior": 30,         # Prior volume window (immediately before recent)
+    "rvol_skip": 1,           # Bars excluded at the end (today's bar)
+    "struct_len": 21,         # Closes → struct_len - 1 up/down days
+    "rsi_len": 14,
+    "htf_week": 35,
+    "htf_month": 126,
+    "dollar_vol_len": 20,
+    "min_bars": 126,
+    "long_rsi": (30, 85),
+    "short_rsi": (15, 70),
+}
+
+# Watchlist generators' lookbacks (50-bar RVOL, 20-close structure, tighter RSI ready bands)
+GENERATOR_WINDOWS = {
+    "rvol_recent": 50,
+    "rvol_prior": 50,
+    "rvol_skip": 0,
+    "struct_len": 20,
+    "long_rsi": (45, 75),
+    "short_rsi": (25, 55),
+}
+
+
+def build_panel(data) -> dict:
+    """
+    Align per-symbol OHLCV frames into one (dates × symbols) frame per field.
+    Accepts { symbol: DataFrame } or a (symbol, field) MultiIndex DataFrame.
+    """
+    if isinstance(data, pd.DataFrame):
+        data = {sym: data[sym] for sym in data.columns.get_level_values(0).unique()}
+    data = {sym: df for sym, df in data.items() if df is not None and not df.empty}
+    if not data:
+        return {field: pd.DataFrame() for field in FIELDS}
+    return {
+        field: pd.concat({sym: df[field] for sym, df in data.items()}, axis=1).sort_index()
+        for field in FIELDS
+    }
+
+
+def _align_order(mask: np.ndarray) -> np.ndarray:
+    """Row order that moves each column's valid rows to the bottom, keeping date order."""
+    return np.argsort(mask, axis=0, kind="stable")
+
+
+def _aligned(values: np.ndarray, mask: np.ndarray, order: np.ndarray) -> np.ndarray:
+    return np.take_along_axis(np.where(mask, values, np.nan), order, axis=0)
+
+
+def on_own_bars(panel: dict, rules) -> dict:
+    """
+    Evaluate rules(panel) on each symbol's own bars: every column is right-aligned on its
+    valid closes first, so rolling windows never span dates only other symbols traded.
+    Results are mapped back to the panel's dates (NaN / False where the symbol has no bar).
+    Returns: rules' { name: DataFrame } on the panel's index
+    """
+    close = panel["Close"]
+    mask = close.notna().to_numpy()
+    order = _align_order(mask)
+    restore = np.argsort(order, axis=0, kind="stable")
+    compact = {field: pd.DataFrame(_aligned(df.reindex(index=close.index, columns=close.columns)
+                                            .to_numpy(dtype=np.float64), mask, order), columns=close.columns)
+               for field, df in panel.items()}
+    out = {}
+    for name, df in rules(compact).items():
+        values = np.take_along_axis(df.to_numpy(), restore, axis=0)
+        values = values & mask if values.dtype == bool else np.where(mask, values, np.nan)
+        out[name] = pd.DataFrame(values, index=close.index, columns=close.columns)
+    return out
+
+
+def _relative_strength(close: np.ndarray, mask: np.ndarray, spy: np.ndarray, lookback: int):
+    """
+    Return ratio vs SPY over the last `lookback` dates both traded, mapped to 0-1.
+    Returns: (rs_pct, has_common) per symbol
+    """
+    spy_mask = np.isfinite(spy)
+    joint = mask & spy_mask[:, None]
+    order = _align_order(joint)
+    sym = _aligned(close, joint, order)
+    bench = _aligned(np.broadcast_to(spy[:, None], close.shape), joint, order)
+    n_common = joint.sum(axis=0)
+
+    rows = sym.shape[0]
+    first = rows - np.clip(np.minimum(n_common, lookback), 1, None)
+    cols = np.arange(sym.shape[1])
+    sym_ret = np.where(sym[first, cols] > 0, sym[-1] / sym[first, cols], 1.0)
+    spy_ret = np.where(bench[first, cols] > 0, bench[-1] / bench[first, cols], 1.0)
+    rs_ratio = np.where(spy_ret > 0, sym_ret / spy_ret, 1.0)
+    rs_pct = np.clip((rs_ratio - 0.5) * 0.5 + 0.5, 0, 1)
+    return np.where(n_common > 0, rs_pct, 0.5), n_common > 0
+
+
+def compute_nx_scores(panel: dict, spy_close=None, nx: dict = None, windows: dict = None) -> pd.DataFrame:
+    """
+    NX metrics for every symbol in the panel in one pass.
+    nx: thresholds dict with tier_2_min / tier_3_min (the screener's NX dict).
+    windows: overrides for NX_WINDOWS.
+    Returns: DataFrame indexed by symbol with price, comp_score, rs_pct, rvol, struct_q,
+             htf_bias, rsi, regime, long_ready, short_ready, tier, atr_pct, avg_volume_usd
+    """
+    w = {**NX_WINDOWS, **(windows or {})}
+    nx = nx or {}
+    close_df = panel["Close"]
+    if close_df.empty:
+        return pd.DataFrame()
+
+    symbols = close_df.columns
+    index = close_df.index
+    close_raw = close_df.to_numpy(dtype=np.float64)
+    mask = np.isfinite(close_raw)
+    order = _align_order(mask)
+    n = mask.sum(axis=0)
+
+    # Only the trailing rows any metric looks at
+    depth = max(
+        max(w["roc"]) + 1, w["atr_len"] + 1, w["rvol_recent"] + w["rvol_prior"] + w["rvol_skip"],
+        w["struct_len"], w["rsi_len"] + 1, w["htf_week"], w["htf_month"], w["dollar_vol_len"],
+    )
+
+    def trailing(field):
+        arr = _aligned(panel[field].reindex(index=index, columns=symbols).to_numpy(dtype=np.float64), mask, order)
+        if arr.shape[0] < depth:
+            arr = np.vstack([np.full((depth - arr.shape[0], arr.shape[1]), np.nan), arr])
+        return arr[-depth:]
+
+    C, H, L, V = trailing("Close"), trailing("High"), trailing("Low"), trailing("Volume")
+    last = C[-1]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Momentum (ROC)
+        rocs = [np.where(n > k + 1, (last - C[-k - 1]) / C[-k - 1] * 100, 0.0) for k in w["roc"]]
+        momentum = sum(rocs) / len(rocs)
+
+        # ATR % over the last atr_len bars
+        k = w["atr_len"]
+        prev_close = C[-k - 1:-1]
+        tr = np.maximum(H[-k:] - L[-k:], np.maximum(np.abs(H[-k:] - prev_close), np.abs(L[-k:] - prev_close)))
+        atr = tr.mean(axis=0)
+        atr_pct = np.where(last > 0, atr / last * 100, 0.0)
+
+        # CompScore (momentum normalized by volatility)
+        comp_score = comp_score_from(momentum, atr_pct)
+
+        # Relative strength vs SPY (fallback: momentum proxy)
+        rs_pct = np.clip((momentum + 50) / 100.0, 0, 1)
+        if spy_close is not None:
+            spy = pd.Series(spy_close).dropna()
+            if len(spy) >= w["rs_lookback"]:
+                spy_aligned = spy.reindex(index).to_numpy(dtype=np.float64)
+                rs_pct, _ = _relative_strength(close_raw, mask, spy_aligned, w["rs_lookback"])
+
+        # Relative volume
+        skip, recent_len, prior_len = w["rvol_skip"], w["rvol_recent"], w["rvol_prior"]
+        end = depth - skip
+        recent = V[end - recent_len:end].mean(axis=0)
+        prior = V[end - recent_len - prior_len:end - recent_len].mean(axis=0)
+        rvol = np.where((n >= recent_len + prior_len + skip) & (prior > 0), recent / prior, 1.0)
+
+        # Structure quality (share of up days)
+        ups = (np.diff(C[-w["struct_len"]:], axis=0) > 0).sum(axis=0)
+        struct_q = np.where(n >= w["struct_len"] - 1, ups / (w["struct_len"] - 1), 0.5)
+
+        # HTF bias (weekly/monthly trend, tanh-mapped to 0-1)
+        wk_base, mo_base = C[-w["htf_week"]], C[-w["htf_month"]]
+        week_roc = np.where(wk_base > 0, (last - wk_base) / wk_base, 0.0)
+        month_roc = np.where(mo_base > 0, (last - mo_base) / mo_base, 0.0)
+        htf_bias = np.where(n >= w["htf_month"], (np.tanh((week_roc * 0.3 + month_roc * 0.2) / 0.5) + 1) / 2, 0.5)
+
+        # RSI (simple average gains/losses)
+        deltas = np.diff(C[-w["rsi_len"] - 1:], axis=0)
+        gains = np.maximum(deltas, 0).mean(axis=0)
+        losses = np.maximum(-deltas, 0).mean(axis=0)
+        rs = np.where(losses > 0, gains / losses, 100.0)
+        rsi = np.where(n > w["rsi_len"] + 1, 100 - 100 / (1 + rs), 50.0)
+
+        # Liquidity
+        dv = w["dollar_vol_len"]
+        avg_volume_usd = V[-dv:].mean(axis=0) * C[-dv:].mean(axis=0)
+
+    scores = finish_scores(symbols, last, comp_score, rs_pct, rvol, struct_q, htf_bias, rsi,
+                           atr_pct, avg_volume_usd, nx, w)
+
+    # Same eligibility as the per-symbol screener: enough history, positive price, finite metrics
+    keep = (n >= w["min_bars"]) & (last > 0) & np.isfinite(scores[["comp_score", "rvol", "rsi"]].to_numpy()).all(axis=1)
+    dropped = int((~keep).sum())
+    if dropped:
+        logger.debug(f"NX engine: {dropped} symbols without enough clean history")
+    return scores[keep]
+
+
+def comp_score_from(momentum, atr_pct):
+    """CompScore: momentum normalized by volatility, clamped to 0-1."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        comp = np.where(atr_pct > 0, (momentum / (atr_pct / 2.0) * 100 + 100) / 200.0, (momentum + 100) / 200.0)
+    return np.clip(comp, 0, 1)
+
+
+def nx_tier(comp_score, nx: dict):
+    """Tier 3 / 2 / 1 from CompScore and the tier_3_min / tier_2_min thresholds (any array shape)."""
+    return np.where(comp_score >= nx.get("tier_3_min", np.inf), 3,
+                    np.where(comp_score >= nx.get("tier_2_min", np.inf), 2, 1))
+
+
+def nx_flags(comp_score, rvol, atr_pct, rsi, nx: dict, w: dict):
+    """
+    Regime (0=squeeze, 1=normal, 2=breakout), ready flags and tier from raw metrics (any array shape).
+    Returns: (regime, long_ready, short_ready, tier)
+    """
+    regime = np.where((rvol < 1.0) & (atr_pct < 1.5), 0, np.where((rvol >= 1.5) & (atr_pct >= 2.0), 2, 1))
+
+    long_lo, long_hi = w["long_rsi"]
+    short_lo, short_hi = w["short_rsi"]
+    long_ready = ((rsi >= long_lo) & (rsi <= long_hi)).astype(int)
+    short_ready = ((rsi >= short_lo) & (rsi <= short_hi)).astype(int)
+
+    return regime, long_ready, short_ready, nx_tier(comp_score, nx)
+
+
+def finish_scores(symbols, last, comp_score, rs_pct, rvol, struct_q, htf_bias, rsi,
+                  atr_pct, avg_volume_usd, nx: dict, w: dict) -> pd.DataFrame:
+    """Derive regime, ready flags and tier from raw metric arrays and assemble the scores frame."""
+    regime, long_ready, short_ready, tier = nx_flags(comp_score, rvol, atr_pct, rsi, nx, w)
+
+    scores = pd.DataFrame({
+        "price": last,
+        "comp_score": comp_score,
+        "rs_pct": rs_pct,
+        "rvol": rvol,
+        "struct_q": struct_q,
+        "htf_bias": htf_bias,
+        "rsi": rsi,
+        "regime": regime,
+        "long_ready": long_ready,
+        "short_ready": short_ready,
+        "tier": tier,
+        "atr_pct": atr_pct,
+        "avg_volume_usd": avg_volume_usd,
+    }, index=pd.Index(symbols, name="symbol"))
+    return scores
+
+
+# Decimals kept in candidate records (the green-light rules compare these rounded values)
+RECORD_DIGITS = {"comp_score": 3, "rs_pct": 3, "rvol": 2, "struct_q": 3, "htf_bias": 3, "rsi": 1}
+
+
+def scores_to_records(scores: pd.DataFrame) -> list:
+    """Convert engine output to the candidate dicts written to watchlist.json."""
+    records = []
+    for sym, row in scores.iterrows():
+        records.append({
+            "symbol": sym,
+            "price": float(row["price"]),
+            **{field: round(float(row[field]), digits) for field, digits in RECORD_DIGITS.items()},
+            "regime": int(row["regime"]),
+            "long_ready": int(row["long_ready"]),
+            "short_ready": int(row["short_ready"]),
+            "tier": int(row["tier"]),
+        })
+    return records
+
+
+def candidate_masks(m, nx: dict):
+    """
+    NX green-light rules (tier, RVOL, structure, RS, HTF bias, ready flags) as array operations.
+    m: mapping of tier, rvol, struct_q, rs_pct, htf_bias, long_ready, short_ready arrays (any shape,
+       values rounded as in RECORD_DIGITS to match filter_candidates).
+    Returns: (long_mask, short_mask)
+    """
+    # Base criteria (tier, volume, structure)
+    base = (np.asarray(m["tier"]) >= 2) & (np.asarray(m["rvol"]) >= nx["rvol_min"]) & \
+        (np.asarray(m["struct_q"]) >= nx["struct_q_min"])
+    rs, htf = np.asarray(m["rs_pct"]), np.asarray(m["htf_bias"])
+    long_mask = base & (rs >= nx["rs_long_min"]) & (htf >= nx["htf_bias_long_min"]) & (np.asarray(m["long_ready"]) != 0)
+    short_mask = base & (rs <= nx["rs_short_max"]) & (htf <= nx["htf_bias_short_max"]) & (np.asarray(m["short_ready"]) != 0)
+    return long_mask, short_mask
+
+
+def filter_candidates(records: list, nx: dict):
+    """
+    NX green-light rules on candidate records (tier, RVOL, structure, RS, HTF bias, ready flags).
+    Returns: (long_candidates, short_candidates)
+    """
+    records = [m for m in records if m]
+    if not records:
+        return [], []
+    fields = ("tier", "rvol", "struct_q", "rs_pct", "htf_bias", "long_ready", "short_ready")
+    long_mask, short_mask = candidate_masks({f: np.array([m[f] for m in records]) for f in fields}, nx)
+    return ([m for m, ok in zip(records, long_mask) if ok],
+            [m for m, ok in zip(records, short_mask) if ok])
+
+
+def compute_nx_history(panel: dict, spy_close=None, nx: dict = None, windows: dict = None) -> dict:
+    """
+    compute_nx_scores for every date of the panel at once: row t holds the metrics a screener
+    run after that day's close would have produced (assumes no gaps inside a symbol's history).
+    Returns: { price, comp_score, rs_pct, rvol, struct_q, htf_bias, rsi, atr_pct, regime,
+               long_ready, short_ready, tier, eligible } as (dates × symbols) DataFrames
+    """
+    w = {**NX_WINDOWS, **(windows or {})}
+    nx = nx or {}
+    C = panel["Close"].astype(float)
+    if C.empty:
+        return {}
+    index, symbols = C.index, C.columns
+    H, L, V = (panel[f].reindex(index=index, columns=symbols).astype(float) for f in ("High", "Low", "Volume"))
+    n = C.notna().cumsum().to_numpy()
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Momentum (ROC)
+        rocs = [np.where(n > k + 1, ((C - C.shift(k)) / C.shift(k) * 100).to_numpy(), 0.0) for k in w["roc"]]
+        momentum = sum(rocs) / len(rocs)
+
+        # ATR % over the last atr_len bars
+        prev = C.shift(1)
+        tr = np.maximum(H - L, np.maximum((H - prev).abs(), (L - prev).abs()))
+        last = C.to_numpy()
+        atr_pct = np.where(last > 0, tr.rolling(w["atr_len"]).mean().to_numpy() / last * 100, 0.0)
+        comp_score = comp_score_from(momentum, atr_pct)
+
+        # Relative strength vs SPY over the last rs_lookback dates both traded
+        rs_pct = np.clip((momentum + 50) / 100.0, 0, 1)
+        if spy_close is not None:
+            spy = pd.Series(spy_close).reindex(index).to_numpy(dtype=np.float64)
+            spy_ok = np.isfinite(spy)
+            joint = np.isfinite(last) & spy_ok[:, None]
+            n_common = np.cumsum(joint, axis=0)
+            rows = np.arange(len(index))[:, None]
+            first = np.clip(rows - np.clip(np.minimum(n_common, w["rs_lookback"]), 1, None) + 1, 0, None)
+            cols = np.arange(len(symbols))
+            sym_ret = np.where(last[first, cols] > 0, last / last[first, cols], 1.0)
+            spy_ret = np.where(spy[first] > 0, spy[:, None] / spy[first], 1.0)
+            rs_ratio = np.where(spy_ret > 0, sym_ret / spy_ret, 1.0)
+            rs_hist = np.where(n_common > 0, np.clip((rs_ratio - 0.5) * 0.5 + 0.5, 0, 1), 0.5)
+            enough_spy = (np.cumsum(spy_ok) >= w["rs_lookback"])[:, None]
+            rs_pct = np.where(enough_spy, rs_hist, rs_pct)
+
+        # Relative volume
+        skip, recent_len, prior_len = w["rvol_skip"], w["rvol_recent"], w["rvol_prior"]
+        recent = V.shift(skip).rolling(recent_len).mean().to_numpy()
+        prior = V.shift(skip + recent_len).rolling(prior_len).mean().to_numpy()
+        rvol = np.where((n >= recent_len + prior_len + skip) & (prior > 0), recent / prior, 1.0)
+
+        # Structure quality (share of up days)
+        ups = (C.diff() > 0).astype(float).rolling(w["struct_len"] - 1).sum().to_numpy()
+        struct_q = np.where(n >= w["struct_len"] - 1, ups / (w["struct_len"] - 1), 0.5)
+
+        # HTF bias (weekly/monthly trend, tanh-mapped to 0-1)
+        wk_base, mo_base = C.shift(w["htf_week"] - 1).to_numpy(), C.shift(w["htf_month"] - 1).to_numpy()
+        week_roc = np.where(wk_base > 0, (last - wk_base) / wk_base, 0.0)
+        month_roc = np.where(mo_base > 0, (last - mo_base) / mo_base, 0.0)
+        htf_bias = np.where(n >= w["htf_month"], (np.tanh((week_roc * 0.3 + month_roc * 0.2) / 0.5) + 1) / 2, 0.5)
+
+        # RSI (simple average gains/losses)
+        deltas = C.diff()
+        gains = np.maximum(deltas, 0).rolling(w["rsi_len"]).mean().to_numpy()
+        losses = np.maximum(-deltas, 0).rolling(w["rsi_len"]).mean().to_numpy()
+        rs = np.where(losses > 0, gains / losses, 100.0)
+        rsi = np.where(n > w["rsi_len"] + 1, 100 - 100 / (1 + rs), 50.0)
+
+    regime, long_ready, short_ready, tier = nx_flags(comp_score, rvol, atr_pct, rsi, nx, w)
+    eligible = (n >= w["min_bars"]) & (last > 0) & np.isfinite(comp_score) & np.isfinite(rvol) & np.isfinite(rsi)
+
+    out = {"price": last, "comp_score": comp_score, "rs_pct": rs_pct, "rvol": rvol, "struct_q": struct_q,
+           "htf_bias": htf_bias, "rsi": rsi, "atr_pct": atr_pct, "regime": regime, "long_ready": long_ready,
+           "short_ready": short_ready, "tier": tier, "eligible": eligible}
+    return {k: pd.DataFrame(v, index=index, columns=symbols) for k, v in out.items()}
+
+
+# --- AMS Pro Screener NX (Pine port) ---
+
+def _squash(x):
+    """Pine squash: (e^(2x/10) - 1) / (e^(2x/10) + 1)"""
+    return np.tanh(x / 10)
+
+
+def compute_pro_scores(panel: dict, spy_close, params: dict) -> pd.DataFrame:
+    """
+    AMS Pro Screener NX model (nx_screener_production_v2) for every symbol at once.
+    params: the script's NX_PARAMS (filters, lookbacks, tier thresholds).
+    Returns: DataFrame indexed by symbol, only symbols passing every filter and long/short ready
+    """
+    close_df = panel["Close"]
+    if close_df.empty or spy_close is None:
+        return pd.DataFrame()
+    p = params
+    symbols = close_df.columns
+    index = close_df.index
+    close_raw = close_df.to_numpy(dtype=np.float64)
+    mask = np.isfinite(close_raw)
+    order = _align_order(mask)
+    n = mask.sum(axis=0)
+    cols = np.arange(len(symbols))
+
+    def aligned(field):
+        return _aligned(panel[field].reindex(index=index, columns=symbols).to_numpy(dtype=np.float64), mask, order)
+
+    C, H, L, V = aligned("Close"), aligned("High"), aligned("Low"), aligned("Volume")
+    rows = C.shape[0]
+    spy = pd.Series(spy_close).dropna()
+    S = spy.to_numpy(dtype=np.float64)
+
+    def back(arr, k):
+        """arr[-k] per column (k may vary per column); NaN beyond the history."""
+        k = np.broadcast_to(k, n.shape)
+        return np.where(k <= n, arr[np.clip(rows - k, 0, rows - 1), cols], np.nan)
+
+    def tail_mean(arr, k):
+        return np.where(n >= k, np.nanmean(arr[-k:], axis=0), np.nan)
+
+    with np.errstate(divide="ignore", invalid="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        price = C[-1]
+        avg_vol_30d = np.nanmean(V[-30:], axis=0)
+        sma_50, sma_200 = tail_mean(C, 50), tail_mean(C, 200)
+
+        bars_6m, bars_3m = np.minimum(126, n), np.minimum(63, n)
+        perf_6m = (price - back(C, bars_6m)) / back(C, bars_6m) * 100
+        perf_3m = (price - back(C, bars_3m)) / back(C, bars_3m) * 100
+
+        # ATR (last atr_len true ranges; first bar has no previous close)
+        k = p["atr_len"]
+        prev = np.vstack([np.full((1, C.shape[1]), np.nan), C[:-1]])
+        tr = np.fmax(H - L, np.fmax(np.abs(H - prev), np.abs(L - prev)))
+        vol_pct = tail_mean(tr, k) / price * 100.0
+
+        # Liquidity: 20-day median dollar volume
+        dollar_vol_m = np.where(n >= 20, np.nanmedian((C * V)[-20:], axis=0), np.nan) / 1e6
+        liq_ok = dollar_vol_m >= p["min_dollar_vol_m"]
+
+        # Momentum, volatility-normalized
+        def roc(kk, at=1):
+            base = back(C, kk + at)
+            return (back(C, at) - base) / base * 100.0
+        comp_mom = 0.2 * roc(p["short_roc"]) + 0.3 * roc(p["med_roc"]) + 0.5 * roc(p["long_roc"])
+        if p["use_vol_norm"]:
+            comp_mom = comp_mom / (np.maximum(vol_pct, 0.5) / p["norm_base"])
+
+        # HTF bias from the previous (confirmed) bar: 13-bar and 26-bar ROC
+        htf_bias = np.zeros(len(symbols))
+        if p["use_htf"]:
+            htf_bias = p["w_weekly"] * _squash(roc(13, at=2)) + p["w_monthly"] * _squash(roc(26, at=2))
+
+        # 1Y performance vs SPY (positional, like the per-symbol script)
+        bars_1y = np.minimum(252, n)
+        stock_perf_1y = (price - back(C, bars_1y)) / back(C, bars_1y) * 100
+        spy_base = np.where(bars_1y <= len(S), S[np.clip(len(S) - bars_1y, 0, None)], np.nan)
+        perf_1y_vs_spy = stock_perf_1y - (S[-1] - spy_base) / spy_base * 100
+
+        # RS percentile: share of daily excess returns below the lookback excess return
+        lb = p["rs_lookback"]
+        rs_pct = np.full(len(symbols), 0.5)
+        if len(S) >= lb:
+            rs_ex = (price - back(C, lb)) / back(C, lb) - (S[-1] - S[-lb]) / S[-lb]
+            sym_ret = np.vstack([np.full((max(lb - rows + 1, 1), C.shape[1]), np.nan), C[1:] / C[:-1] - 1])[-lb:]
+            spy_ret = np.concatenate([[np.nan], S[1:] / S[:-1] - 1])[-lb:]
+            hist_ex = sym_ret - spy_ret[:, None]
+            rs_pct = (hist_ex < rs_ex).sum(axis=0) / lb
+
+        # Smart RVOL: volume / 50-bar mean, capped at 3, EMA(10)
+        vol_frame = pd.DataFrame(V)
+        rvol_capped = (vol_frame / vol_frame.rolling(p["vol_look"]).mean()).clip(upper=3.0)
+        rvol_ema = rvol_capped.ewm(span=10).mean().to_numpy()[-1]
+        vol_trend = (tail_mean(V, 20) > tail_mean(V, 40)).astype(float)
+        vol_score = (rvol_ema / 3.0) * 0.7 + vol_trend * 0.3
+
+        # Structure: pivot highs/lows among the last bars (pivot_len = 5)
+        pivot_len = 5
+        struct_pts = np.zeros(len(symbols))
+        for i in range(-pivot_len, -1):
+            is_high = (H[i] > np.nanmax(H[i - pivot_len:i], axis=0)) & (H[i] > np.nanmax(H[i + 1:], axis=0))
+            is_low = (L[i] < np.nanmin(L[i - pivot_len:i], axis=0)) & (L[i] < np.nanmin(L[i + 1:], axis=0))
+            struct_pts += is_high | is_low
+        struct_score = np.minimum(struct_pts / (2 * pivot_len), 1.0) * 0.5
+
+        # Correlation vs SPY over the dates shared by both last-20-bar windows
+        rank = np.cumsum(mask, axis=0)
+        in_tail = mask & (rank > (n - 20))
+        spy_on_index = spy.reindex(index).to_numpy(dtype=np.float64)
+        joint = in_tail & index.isin(spy.index[-20:])[:, None] & np.isfinite(spy_on_index)[:, None]
+        x = np.where(joint, close_raw, np.nan)
+        y = np.where(joint, spy_on_index[:, None], np.nan)
+        xd, yd = x - np.nanmean(x, axis=0), y - np.nanmean(y, axis=0)
+        correlation = np.nansum(xd * yd, axis=0) / np.sqrt(np.nansum(xd ** 2, axis=0) * np.nansum(yd ** 2, axis=0))
+        low_corr = np.abs(correlation) <= p["max_abs_corr"]
+
+        # Composite
+        score_raw = np.nan_to_num(np.clip(comp_mom / 25.0, 0, 1))
+        comp_final = 0.40 * score_raw + 0.20 * (htf_bias + 1.0) / 2.0 + 0.20 * vol_score + 0.20 * struct_score
+        tier = np.where(comp_final >= p["min_score_t3"], 3, np.where(comp_final >= p["min_score_t2"], 2, 1))
+
+        # Dual momentum / RSI (simple 14-bar averages)
+        abs_mom = price > back(C, p["long_roc"])
+        deltas = np.diff(C[-p["rsi_len"] - 1:], axis=0)
+        gain, loss = np.maximum(deltas, 0).mean(axis=0), np.maximum(-deltas, 0).mean(axis=0)
+        rsi_val = 100 - (100 / (1 + gain / loss))
+
+        long_ready = liq_ok & low_corr & abs_mom & (rsi_val > 50) & (rs_pct >= p["rs_long_pct"]) & (tier >= 2)
+        short_ready = liq_ok & low_corr & ~abs_mom & (rsi_val < 50) & (rs_pct <= p["rs_short_pct"]) & (tier >= 2)
+
+        keep = (
+            (n >= p["long_roc"]) &
+            (price >= p["min_price"]) &
+            (avg_vol_30d >= p["min_avg_volume_30d"]) &
+            (price > sma_50) & (price > sma_200) &
+            (perf_6m >= p["min_perf_6m_pct"]) & (perf_3m >= p["min_perf_3m_pct"]) &
+            (vol_pct >= p["min_volatility_pct"]) & (vol_pct <= p["max_volatility_pct"]) &
+            liq_ok &
+            ~(perf_1y_vs_spy < p["min_perf_1y_vs_spy_pct"]) &
+            (rvol_ema >= p["min_rvol"]) &
+            (long_ready | short_ready)
+        )
+
+    scores = pd.DataFrame({
+        "price": price,
+        "comp_score": comp_final,
+        "rsi": rsi_val,
+        "rs_pct": rs_pct,
+        "rvol": rvol_ema,
+        "htf_bias": htf_bias,
+        "struct_score": struct_score,
+        "corr_spy": correlation,
+        "tier": tier,
+        "long_ready": long_ready,
+        "short_ready": short_ready,
+        "dollar_vol_m": dollar_vol_m,
+        "avg_vol_30d": avg_vol_30d,
+        "vol_pct": vol_pct,
+        "perf_6m_pct": perf_6m,
+        "perf_3m_pct": perf_3m,
+        "sma_50": sma_50,
+        "sma_200": sma_200,
+    }, index=pd.Index(symbols, name="symbol"))
+    return scores[keep]
+
+
+def pro_scores_to_records(scores: pd.DataFrame) -> list:
+    """Convert compute_pro_scores output to nx_screener_production_v2 candidate dicts."""
+    digits = {"price": 2, "comp_score": 3, "rsi": 2, "rs_pct": 3, "rvol": 2, "htf_bias": 3,
+              "struct_score": 3, "corr_spy": 3, "dollar_vol_m": 1, "avg_vol_30d": 0, "vol_pct": 2,
+              "perf_6m_pct": 2, "perf_3m_pct": 2, "sma_50": 2, "sma_200": 2}
+    records = []
+    for sym, row in scores.iterrows():
+        rec = {"symbol": sym}
+        for field in scores.columns:
+            if field == "tier":
+                rec[field] = int(row[field])
+            elif field in ("long_ready", "short_ready"):
+                rec[field] = bool(row[field])
+            else:
+                rec[field] = round(float(row[field]), digits[field])
+        records.append(rec)
+    return records
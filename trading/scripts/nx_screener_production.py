@@ -8,20 +8,22 @@ Robust, simple, production-ready.
 UPDATED: Includes earnings blackout (±14 days) and economic calendar integration
 """
 
-import yfinance as yf
 import pandas as pd
 import numpy as np
 import json
 from datetime import datetime, timedelta
 from pathlib import Path
 import logging
-import time
 import sys
 
 # Add scripts dir to path for imports
 SCRIPTS_DIR = Path.home() / ".openclaw" / "workspace" / "trading" / "scripts"
 sys.path.insert(0, str(SCRIPTS_DIR))
 
+from bar_store import get_bars, refresh as refresh_bars
+from nx_metrics import scores_to_records, filter_candidates as nx_filter_candidates
+from nx_state import NXState, BENCHMARK
+
 try:
     from earnings_calendar import get_blackout_symbols as get_earnings_blackout
     from economic_calendar import is_economic_blackout, get_blackout_reason, get_upcoming_events
@@ -134,40 +136,73 @@ def fetch_spy_data():
     """Fetch SPY data for relative strength calculations."""
     try:
         logger.info("Fetching SPY data...")
-        spy = yf.download("SPY", period="1y", progress=False)
+        spy = get_bars(["SPY"], start=datetime.now() - timedelta(days=365)).get("SPY")
         logger.info("SPY data fetched")
         return spy
     except Exception as e:
         logger.error(f"Failed to fetch SPY: {e}")
         return None
 
-def fetch_data(symbols, retries=2):
-    """Fetch OHLCV data for symbols. Simple, robust approach."""
+def fetch_data(symbols):
+    """
+    Fetch OHLCV data for symbols from the shared bar store.
+    Only missing days are downloaded, in concurrent multi-symbol chunks; dead symbols are skipped.
+    """
     logger.info(f"Fetching data for {len(symbols)} symbols...")
     
-    data_map = {}
+    start = datetime.now() - timedelta(days=365)
+    stats = refresh_bars(symbols, start=start)
+    if stats["chunks"]:
+        slowest = max(stats["chunks"], key=lambda c: c["seconds"])
+        failed = sum(1 for c in stats["chunks"] if c["error"])
+        logger.info(f"Fetch: {stats['updated']} symbols updated in {stats['seconds']:.1f}s "
+                    f"({len(stats['chunks'])} chunks, {failed} failed, slowest {slowest['seconds']:.1f}s)")
     
-    for i, symbol in enumerate(symbols):
-        if (i + 1) % 50 == 0:
-            logger.info(f"Progress: {i+1}/{len(symbols)}")
-        
-        for attempt in range(retries):
-            try:
-                df = yf.download(symbol, period="1y", progress=False)
-                if df is not None and len(df) > 100:
-                    data_map[symbol] = df
-                    break
-                time.sleep(0.1)
-            except Exception as e:
-                if attempt == retries - 1:
-                    logger.warning(f"Failed {symbol}: {str(e)[:50]}")
-                time.sleep(0.5)
+    bars = get_bars(symbols, start=start, refresh_stale=False)
+    data_map = {sym: df for sym, df in bars.items() if len(df) > 100}
     
     logger.info(f"Successfully fetched data for {len(data_map)} symbols")
     return data_map
 
+def score_universe(symbols, full=False):
+    """
+    NX scores for the universe from the persisted rolling state (nx_state).
+    Normal run: commit the new final daily bars (O(1) per symbol), score with today's live bar.
+    Full recompute only when the state is missing/corrupt/stale or full=True (--full).
+    Returns: DataFrame from NXState.scores (same format as nx_metrics.compute_nx_scores)
+    """
+    universe = list(dict.fromkeys(symbols + [BENCHMARK]))
+    today = datetime.now().date()
+    
+    state = None if full else NXState.load()
+    if state is not None and not state.covers(universe):
+        logger.info("NX state does not cover the universe - full recompute")
+        state = None
+    
+    if state is None:
+        logger.info("NX state: full recompute")
+        bars = fetch_data(universe)
+        state = NXState.from_bars(universe, bars, until=today)
+    else:
+        since = state.oldest_day() or (today - timedelta(days=365))
+        refresh_bars(universe, start=since)
+        bars = get_bars(universe, start=since, refresh_stale=False)
+        readjusted = state.commit(bars, until=today)
+        if readjusted:
+            # Split/dividend re-adjusted history: reseed just those symbols
+            logger.info(f"NX state: reseeding {len(readjusted)} re-adjusted symbols")
+            history = get_bars(readjusted, start=today - timedelta(days=365), refresh_stale=False)
+            state.reseed(history, until=today)
+        logger.info(f"NX state: incremental update from {since}")
+    
+    state.save()
+    return state.scores(NX, live=bars, live_day=today)
+
 def calculate_metrics(symbol, df, spy_df=None):
-    """Calculate NX metrics for a symbol. Simple, robust version."""
+    """
+    Calculate NX metrics for a symbol. Simple, robust version.
+    Per-symbol reference; main() scores the whole universe incrementally via nx_state (same formulas as nx_metrics).
+    """
     try:
         close = df['Close'].values
         volume = df['Volume'].values
@@ -185,9 +220,9 @@ def calculate_metrics(symbol, df, spy_df=None):
         
         momentum = (roc_21 + roc_63 + roc_126) / 3.0
         
-        # ATR % (volatility normalization)
+        # ATR % (volatility normalization, last 14 bars)
         tr_list = []
-        for i in range(1, min(len(close), 15)):
+        for i in range(max(1, len(close) - 14), len(close)):
             tr = max(
                 high[i] - low[i],
                 abs(high[i] - close[i-1]),
@@ -307,36 +342,7 @@ def calculate_metrics(symbol, df, spy_df=None):
 
 def filter_candidates(metrics_list):
     """Apply NX green-light filters (relaxed for discovery)."""
-    long_cand = []
-    short_cand = []
-    
-    for m in metrics_list:
-        if not m:
-            continue
-        
-        # Base criteria (tier, volume, structure)
-        if m["tier"] < 2:
-            continue
-        if m["rvol"] < NX["rvol_min"]:
-            continue
-        if m["struct_q"] < NX["struct_q_min"]:
-            continue
-        
-        # Long: require comp_score + RS bias + ready flag
-        if (m["comp_score"] >= NX["tier_2_min"] and
-            m["rs_pct"] >= NX["rs_long_min"] and
-            m["htf_bias"] >= NX["htf_bias_long_min"] and
-            m["long_ready"]):
-            long_cand.append(m)
-        
-        # Short: require comp_score + RS bias + ready flag
-        if (m["comp_score"] >= NX["tier_2_min"] and
-            m["rs_pct"] <= NX["rs_short_max"] and
-            m["htf_bias"] <= NX["htf_bias_short_max"] and
-            m["short_ready"]):
-            short_cand.append(m)
-    
-    return long_cand, short_cand
+    return nx_filter_candidates(metrics_list, NX)
 
 def save_watchlist(long_cand, short_cand, all_metrics=None, regime_info=None):
     """Save to watchlist.json. Only candidates matching strict NX criteria."""
@@ -393,21 +399,14 @@ def main():
         if len(earnings_blackout_syms) <= 20:
             logger.info(f"   Symbols: {', '.join(sorted(earnings_blackout_syms))}")
     
-    spy_df = fetch_spy_data()
-    data_map = fetch_data(symbols)
-    logger.info(f"Downloaded {len(data_map)} symbols")
-    
     logger.info("Calculating NX metrics...")
-    metrics = []
-    for i, (sym, df) in enumerate(data_map.items()):
-        if (i + 1) % 50 == 0:
-            logger.info(f"Metrics: {i+1}/{len(data_map)}")
-        m = calculate_metrics(sym, df, spy_df)
-        if m:
-            # Tag if in earnings blackout
-            if sym in earnings_blackout_syms:
-                m["earnings_blackout"] = True
-            metrics.append(m)
+    scores = score_universe(symbols, full="--full" in sys.argv)
+    spy_df = fetch_spy_data()
+    metrics = scores_to_records(scores.drop(BENCHMARK, errors="ignore") if BENCHMARK not in symbols else scores)
+    for m in metrics:
+        # Tag if in earnings blackout
+        if m["symbol"] in earnings_blackout_syms:
+            m["earnings_blackout"] = True
     
     logger.info(f"Calculated metrics for {len(metrics)} symbols")
     
@@ -11,16 +11,23 @@ Matches Pine Script logic exactly:
 - Structure: Pivot clarity score
 - Correlation: vs SPY, max 0.85
 - Composite: 0.40 momentum + 0.20 HTF + 0.20 volume + 0.20 structure
+
+Scoring runs through nx_metrics.compute_pro_scores (whole universe at once);
+calculate_metrics below is the per-symbol reference checked by nx_golden.py.
 """
 
-import yfinance as yf
 import pandas as pd
 import numpy as np
 import json
 import logging
+import sys
 from datetime import datetime, timedelta
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent))
+from bar_store import get_bars
+from nx_metrics import build_panel, compute_pro_scores, pro_scores_to_records
+
 logger = logging.getLogger(__name__)
 logging.basicConfig(
     level=logging.INFO,
@@ -99,22 +106,11 @@ def get_universe_symbols():
         'PANW', 'ZS', 'ANET', 'BILL', 'DBX', 'HON', 'BA', 'RTX', 'LMT', 'GOOG', 'UUUU',
     ]
 
-def download_data(symbols, period='1y'):
-    """Download OHLCV data for symbols."""
-    data_map = {}
-    failed = 0
-    for i, sym in enumerate(symbols):
-        if (i + 1) % 50 == 0:
-            logger.info(f"Downloaded {i+1}/{len(symbols)} (valid: {len(data_map)})")
-        try:
-            df = yf.download(sym, period=period, progress=False, threads=False)
-            if not df.empty and len(df) >= 126:  # Reduced from 252 for testing
-                data_map[sym] = df
-            elif not df.empty:
-                logger.debug(f"{sym}: Only {len(df)} bars")
-        except Exception as e:
-            failed += 1
-    logger.info(f"Downloaded {len(data_map)} valid symbols ({failed} failures)")
+def download_data(symbols, days=365):
+    """OHLCV data for symbols from the shared bar store (only missing days are downloaded)."""
+    bars = get_bars(symbols, start=datetime.now() - timedelta(days=days))
+    data_map = {sym: df for sym, df in bars.items() if len(df) >= 126}  # Reduced from 252 for testing
+    logger.info(f"Downloaded {len(data_map)} valid symbols ({len(symbols) - len(bars)} without data)")
     return data_map
 
 def atr(df, length=14):
@@ -146,7 +142,10 @@ def squash(x):
     return (np.exp(2*(x/10)) - 1) / (np.exp(2*(x/10)) + 1)
 
 def calculate_metrics(sym, df, spy_df):
-    """Calculate NX metrics for a symbol."""
+    """
+    Calculate NX metrics for a symbol.
+    Per-symbol reference; main() scores the whole universe with nx_metrics.compute_pro_scores.
+    """
     close = df['Close']
     high = df['High']
     low = df['Low']
@@ -339,24 +338,15 @@ def main():
     logger.info(f"Downloaded {len(data_map)} symbols with sufficient history")
     
     # Get SPY as benchmark
-    try:
-        spy_data = yf.download('SPY', period='1y', progress=False, threads=False)
-        spy_close = spy_data['Close']
-    except:
+    spy_data = get_bars(['SPY'], start=datetime.now() - timedelta(days=365)).get('SPY')
+    if spy_data is None or spy_data.empty:
         logger.error("Failed to download SPY data")
         return
+    spy_close = spy_data['Close']
     
     # Calculate metrics
     logger.info("Calculating NX metrics...")
-    candidates = []
-    
-    for i, (sym, df) in enumerate(data_map.items()):
-        if (i + 1) % 50 == 0:
-            logger.info(f"Metrics: {i+1}/{len(data_map)}")
-        
-        m = calculate_metrics(sym, df, spy_close)
-        if m:
-            candidates.append(m)
+    candidates = pro_scores_to_records(compute_pro_scores(build_panel(data_map), spy_close, NX_PARAMS))
     
     # Sort by score
     candidates.sort(key=lambda x: x['comp_score'], reverse=True)
@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""
+Incremental NX State
+Persists per-symbol rolling state after each screener run so the next update
+costs O(1) per symbol per new bar instead of recomputing a year of history.
+
+State per symbol (cache/nx_state.npz):
+- ring buffers: last closes (ROC/HTF/RS lookbacks), last volumes (RVOL window),
+  last atr_len true ranges
+- running sums: TR, recent/prior volume, 20-bar volume and close, up days, RSI gains/losses
+- bar count and day of the last committed bar
+
+Updates:
+- commit(bars, until=today): append final daily bars; each one adjusts the running
+  sums by the values entering and leaving their windows
+- scores(nx, live=bars): score with today's still-forming bar as a provisional
+  update, without touching the committed state (intraday reruns)
+
+A full recompute (from_bars) is only needed when the state file is missing, corrupt,
+built with different windows, or doesn't cover the universe. Running sums are
+re-derived from the ring buffers every RESYNC_EVERY commits to cap float drift.
+"""
+
+import pandas as pd
+import numpy as np
+from datetime import date
+from pathlib import Path
+import json
+import logging
+import os
+
+from nx_metrics import NX_WINDOWS, build_panel, comp_score_from, finish_scores, _align_order, _aligned
+
+logger = logging.getLogger(__name__)
+
+STATE_FILE = Path.home() / ".openclaw" / "workspace" / "trading" / "cache" / "nx_state.npz"
+STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
+
+STATE_VERSION = 1
+BENCHMARK = "SPY"
+RESYNC_EVERY = 250        # Commits between running-sum resyncs
+ADJUST_TOLERANCE = 1e-4   # Relative close change on an already-committed day → history was re-adjusted
+
+_SUMS = ("tr_sum", "vol_recent", "vol_prior", "vol_dv", "close_dv", "ups", "gains", "losses")
+_EPOCH = date(1970, 1, 1)
+
+
+def _day_num(ts) -> int:
+    return (pd.Timestamp(ts).date() - _EPOCH).days
+
+
+class NXState:
+    """Rolling NX state for a fixed symbol list (rows) with per-symbol ring buffers."""
+
+    def __init__(self, symbols, windows=None):
+        self.w = {**NX_WINDOWS, **(windows or {})}
+        w = self.w
+        self.symbols = list(symbols)
+        self.pos = {sym: i for i, sym in enumerate(self.symbols)}
+        n_sym = len(self.symbols)
+
+        self.ring = max(max(w["roc"]) + 1, w["htf_week"], w["htf_month"], w["rs_lookback"],
+                        w["struct_len"], w["rsi_len"] + 1, w["dollar_vol_len"])
+        self.vring = max(w["rvol_recent"] + w["rvol_prior"] + w["rvol_skip"], w["dollar_vol_len"])
+
+        self.close = np.full((n_sym, self.ring), np.nan)
+        self.volume = np.full((n_sym, self.vring), np.nan)
+        self.tr = np.full((n_sym, w["atr_len"]), np.nan)
+        self.n = np.zeros(n_sym, dtype=np.int64)              # Bars committed (ever)
+        self.last_day = np.full(n_sym, -1, dtype=np.int64)    # Days since epoch
+        self.sums = {k: np.zeros(n_sym) for k in _SUMS}
+        self.commits_since_resync = 0
+
+    # --- ring access ---
+
+    @staticmethod
+    def _back(ring, n, k, rows):
+        """Value k bars back (1 = newest) for each row; NaN where fewer than k bars."""
+        vals = ring[rows, (n - k) % ring.shape[1]]
+        return np.where(n >= k, vals, np.nan)
+
+    def _window(self, ring, ks):
+        """rows × len(ks) matrix of k-back values for every symbol."""
+        ks = np.asarray(list(ks))
+        vals = ring[np.arange(len(self.symbols))[:, None], (self.n[:, None] - ks[None, :]) % ring.shape[1]]
+        return np.where(self.n[:, None] >= ks[None, :], vals, np.nan)
+
+    # --- build / resync ---
+
+    @classmethod
+    def from_bars(cls, symbols, data_map: dict, until=None, windows=None):
+        """
+        Full recompute from daily bars ({symbol: DataFrame}).
+        Bars dated on/after `until` (today's forming bar) are left for live scoring.
+        """
+        state = cls(symbols, windows)
+        state._seed_rows(np.arange(len(state.symbols)), data_map, until)
+        return state
+
+    def _seed_rows(self, rows, data_map: dict, until=None):
+        """Refill the given rows from bar history and re-derive their running sums."""
+        syms = [self.symbols[i] for i in rows]
+        cutoff = None if until is None else _day_num(until)
+        frames = {}
+        for sym in syms:
+            df = data_map.get(sym)
+            if df is None or df.empty:
+                continue
+            if cutoff is not None:
+                days = np.array([_day_num(ts) for ts in df.index])
+                df = df[days < cutoff]
+            if not df.empty:
+                frames[sym] = df
+
+        self.close[rows] = np.nan
+        self.volume[rows] = np.nan
+        self.tr[rows] = np.nan
+        self.n[rows] = 0
+        self.last_day[rows] = -1
+
+        panel = build_panel(frames)
+        if panel["Close"].empty:
+            self._resync()
+            return
+
+        panel = {f: df.reindex(columns=syms) for f, df in panel.items()}
+        raw = panel["Close"].to_numpy(dtype=np.float64)
+        mask = np.isfinite(raw)
+        order = _align_order(mask)
+        n = mask.sum(axis=0)
+        depth = self.ring + 1
+
+        def aligned(field):
+            arr = _aligned(panel[field].to_numpy(dtype=np.float64), mask, order)
+            if arr.shape[0] < depth:
+                arr = np.vstack([np.full((depth - arr.shape[0], arr.shape[1]), np.nan), arr])
+            return arr[-depth:]
+
+        C, H, L, V = aligned("Close"), aligned("High"), aligned("Low"), aligned("Volume")
+        prev = np.vstack([np.full((1, C.shape[1]), np.nan), C[:-1]])
+        with np.errstate(invalid="ignore"):
+            TR = np.where(np.isfinite(prev),
+                          np.maximum(H - L, np.maximum(np.abs(H - prev), np.abs(L - prev))), H - L)
+
+        def fill(ring, src):
+            size = ring.shape[1]
+            ks = np.arange(1, size + 1)
+            cols = (n[:, None] - ks[None, :]) % size
+            ring[rows[:, None], cols] = src[depth - ks, :].T
+
+        fill(self.close, C)
+        fill(self.volume, np.nan_to_num(V))
+        fill(self.tr, TR)
+        self.n[rows] = n
+
+        days = np.array([_day_num(ts) for ts in panel["Close"].index])
+        last_idx = np.where(n > 0, len(days) - 1 - np.argmax(mask[::-1], axis=0), -1)
+        self.last_day[rows] = np.where(n > 0, days[np.clip(last_idx, 0, None)], -1)
+        self._resync()
+
+    def _resync(self):
+        """Re-derive every running sum from the ring buffers."""
+        w = self.w
+        r, p, sk = w["rvol_recent"], w["rvol_prior"], w["rvol_skip"]
+        S, L, D = w["struct_len"], w["rsi_len"], w["dollar_vol_len"]
+
+        self.sums["tr_sum"] = np.nansum(self._window(self.tr, range(1, w["atr_len"] + 1)), axis=1)
+        self.sums["vol_recent"] = np.nansum(self._window(self.volume, range(sk + 1, sk + r + 1)), axis=1)
+        self.sums["vol_prior"] = np.nansum(self._window(self.volume, range(sk + r + 1, sk + r + p + 1)), axis=1)
+        self.sums["vol_dv"] = np.nansum(self._window(self.volume, range(1, D + 1)), axis=1)
+        self.sums["close_dv"] = np.nansum(self._window(self.close, range(1, D + 1)), axis=1)
+
+        closes = self._window(self.close, range(1, max(S, L + 1) + 1))
+        deltas = closes[:, :-1] - closes[:, 1:]   # column j = delta ending j+1 bars back
+        with np.errstate(invalid="ignore"):
+            self.sums["ups"] = (deltas[:, :S - 1] > 0).sum(axis=1).astype(np.float64)
+            self.sums["gains"] = np.nansum(np.maximum(deltas[:, :L], 0), axis=1)
+            self.sums["losses"] = np.nansum(np.maximum(-deltas[:, :L], 0), axis=1)
+        self.commits_since_resync = 0
+
+    # --- incremental update ---
+
+    def _advance(self, rows, h, l, c, v) -> dict:
+        """Running sums after appending one bar to each row (state itself is not modified)."""
+        w, s = self.w, self.sums
+        n = self.n[rows]
+        cb = lambda k: self._back(self.close, n, k, rows)
+        vb = lambda k: self._back(self.volume, n, k, rows)
+        z = np.nan_to_num
+        r, p, sk = w["rvol_recent"], w["rvol_prior"], w["rvol_skip"]
+        A, S, L, D = w["atr_len"], w["struct_len"], w["rsi_len"], w["dollar_vol_len"]
+
+        prev = cb(1)
+        with np.errstate(invalid="ignore"):
+            tr_new = np.where(np.isfinite(prev), np.maximum(h - l, np.maximum(np.abs(h - prev), np.abs(l - prev))), h - l)
+            d_new = c - prev
+            d_old_struct = cb(S - 1) - cb(S)
+            d_old_rsi = cb(L) - cb(L + 1)
+
+            enter = v if sk == 0 else z(vb(sk))
+            shift = z(vb(r + sk))        # Leaves the recent window, enters the prior one
+            leave = z(vb(r + p + sk))
+
+            return {
+                "n": n + 1,
+                "tr_new": tr_new,
+                "tr_sum": s["tr_sum"][rows] + tr_new - z(self._back(self.tr, n, A, rows)),
+                "vol_recent": s["vol_recent"][rows] + enter - shift,
+                "vol_prior": s["vol_prior"][rows] + shift - leave,
+                "vol_dv": s["vol_dv"][rows] + v - z(vb(D)),
+                "close_dv": s["close_dv"][rows] + c - z(cb(D)),
+                "ups": s["ups"][rows] + (d_new > 0) - (d_old_struct > 0),
+                "gains": s["gains"][rows] + z(np.maximum(d_new, 0)) - z(np.maximum(d_old_rsi, 0)),
+                "losses": s["losses"][rows] + z(np.maximum(-d_new, 0)) - z(np.maximum(-d_old_rsi, 0)),
+            }
+
+    def _append(self, rows, h, l, c, v, day):
+        new = self._advance(rows, h, l, c, v)
+        n = self.n[rows]
+        self.close[rows, n % self.ring] = c
+        self.volume[rows, n % self.vring] = v
+        self.tr[rows, n % self.tr.shape[1]] = new["tr_new"]
+        self.n[rows] = new["n"]
+        self.last_day[rows] = day
+        for k in _SUMS:
+            self.sums[k][rows] = new[k]
+
+    @staticmethod
+    def _bar_values(df: pd.DataFrame):
+        close = df["Close"].to_numpy(dtype=np.float64)
+        high = np.where(np.isfinite(df["High"].to_numpy(dtype=np.float64)), df["High"].to_numpy(dtype=np.float64), close)
+        low = np.where(np.isfinite(df["Low"].to_numpy(dtype=np.float64)), df["Low"].to_numpy(dtype=np.float64), close)
+        volume = np.nan_to_num(df["Volume"].to_numpy(dtype=np.float64))
+        return high, low, close, volume
+
+    def commit(self, bars: dict, until=None) -> list:
+        """
+        Append final bars ({symbol: DataFrame}) newer than each symbol's last committed day
+        and older than `until`. Symbols not in the state are ignored.
+        Returns: symbols whose already-committed close changed (re-adjusted history → reseed them)
+        """
+        cutoff = None if until is None else _day_num(until)
+        pending = {}       # day → [(row, h, l, c, v)]
+        readjusted = []
+        for sym, df in bars.items():
+            i = self.pos.get(sym)
+            if i is None or df is None or df.empty:
+                continue
+            df = df.dropna(subset=["Close"])
+            days = np.array([_day_num(ts) for ts in df.index])
+            high, low, close, volume = self._bar_values(df)
+
+            # Committed close still matches the source?
+            if self.n[i] > 0:
+                same = np.nonzero(days == self.last_day[i])[0]
+                committed = self._back(self.close, self.n[i:i + 1], 1, np.array([i]))[0]
+                if len(same) and abs(close[same[0]] - committed) > ADJUST_TOLERANCE * abs(committed):
+                    readjusted.append(sym)
+                    continue
+
+            for j in np.nonzero((days > self.last_day[i]) & ((days < cutoff) if cutoff is not None else True))[0]:
+                pending.setdefault(int(days[j]), []).append((i, high[j], low[j], close[j], volume[j]))
+
+        committed_bars = 0
+        for day in sorted(pending):
+            rows, h, l, c, v = (np.array(col) for col in zip(*pending[day]))
+            self._append(rows.astype(np.int64), h, l, c, v, day)
+            committed_bars += len(rows)
+            self.commits_since_resync += 1
+
+        if self.commits_since_resync >= RESYNC_EVERY:
+            self._resync()
+        if committed_bars:
+            logger.info(f"NX state: committed {committed_bars} bars over {len(pending)} days")
+        return readjusted
+
+    def reseed(self, data_map: dict, until=None):
+        """Full recompute for just the symbols in data_map (e.g. after a split/dividend re-adjustment)."""
+        rows = np.array([self.pos[s] for s in data_map if s in self.pos], dtype=np.int64)
+        if len(rows):
+            self._seed_rows(rows, data_map, until)
+
+    # --- scoring ---
+
+    def scores(self, nx: dict, live: dict = None, live_day=None) -> pd.DataFrame:
+        """
+        NX scores for every symbol from the rolling state.
+        live: {symbol: DataFrame}; a bar dated live_day (default: its last bar) that is newer than
+              the committed state is scored as a provisional update and not committed.
+        Returns: DataFrame in the same format as nx_metrics.compute_nx_scores
+        """
+        w = self.w
+        n_sym = len(self.symbols)
+        all_rows = np.arange(n_sym)
+        n_old = self.n
+        n = n_old.copy()
+        sums = {k: v.copy() for k, v in self.sums.items()}
+        off = np.zeros(n_sym, dtype=np.int64)
+        live_close = np.full(n_sym, np.nan)
+
+        if live:
+            target = None if live_day is None else _day_num(live_day)
+            rows, bars = [], []
+            for sym, df in live.items():
+                i = self.pos.get(sym)
+                if i is None or df is None or df.empty:
+                    continue
+                day = _day_num(df.index[-1])
+                if day <= self.last_day[i] or (target is not None and day != target):
+                    continue
+                rows.append(i)
+                bars.append(self._bar_values(df.iloc[-1:]))
+            if rows:
+                rows = np.array(rows, dtype=np.int64)
+                h, l, c, v = (np.concatenate(col) for col in zip(*bars))
+                new = self._advance(rows, h, l, c, v)
+                n[rows] = new["n"]
+                for k in _SUMS:
+                    sums[k][rows] = new[k]
+                off[rows] = 1
+                live_close[rows] = c
+
+        def back(k, rows=all_rows):
+            o = off[rows]
+            kk = k - o
+            nn = n_old[rows]
+            vals = self.close[rows, (nn - kk) % self.ring]
+            vals = np.where((kk >= 1) & (nn >= kk), vals, np.nan)
+            return np.where((o == 1) & (kk == 0), live_close[rows], vals)
+
+        r, p, sk = w["rvol_recent"], w["rvol_prior"], w["rvol_skip"]
+        S, L, D, A = w["struct_len"], w["rsi_len"], w["dollar_vol_len"], w["atr_len"]
+        last = back(1)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rocs = []
+            for k in w["roc"]:
+                base = back(k + 1)
+                rocs.append(np.where(n > k + 1, (last - base) / base * 100, 0.0))
+            momentum = sum(rocs) / len(rocs)
+
+            atr_pct = np.where(last > 0, sums["tr_sum"] / A / last * 100, 0.0)
+            comp_score = comp_score_from(momentum, atr_pct)
+
+            rs_pct = np.clip((momentum + 50) / 100.0, 0, 1)
+            spy = self.pos.get(BENCHMARK)
+            if spy is not None and n[spy] >= w["rs_lookback"]:
+                spy_rows = np.full(n_sym, spy)
+                m = np.clip(np.minimum(np.minimum(n, n[spy]), w["rs_lookback"]), 1, None)
+                sym_start, spy_start = back(m), back(m, spy_rows)
+                sym_ret = np.where(sym_start > 0, last / sym_start, 1.0)
+                spy_ret = np.where(spy_start > 0, back(1, spy_rows) / spy_start, 1.0)
+                rs_ratio = np.where(spy_ret > 0, sym_ret / spy_ret, 1.0)
+                rs_pct = np.where(n > 0, np.clip((rs_ratio - 0.5) * 0.5 + 0.5, 0, 1), 0.5)
+
+            recent, prior = sums["vol_recent"] / r, sums["vol_prior"] / p
+            rvol = np.where((n >= r + p + sk) & (prior > 0), recent / prior, 1.0)
+
+            struct_q = np.where(n >= S - 1, sums["ups"] / (S - 1), 0.5)
+
+            wk_base, mo_base = back(w["htf_week"]), back(w["htf_month"])
+            week_roc = np.where(wk_base > 0, (last - wk_base) / wk_base, 0.0)
+            month_roc = np.where(mo_base > 0, (last - mo_base) / mo_base, 0.0)
+            htf_bias = np.where(n >= w["htf_month"], (np.tanh((week_roc * 0.3 + month_roc * 0.2) / 0.5) + 1) / 2, 0.5)
+
+            gains, losses = sums["gains"] / L, sums["losses"] / L
+            rs = np.where(losses > 0, gains / losses, 100.0)
+            rsi = np.where(n > L + 1, 100 - 100 / (1 + rs), 50.0)
+
+            avg_volume_usd = (sums["vol_dv"] / D) * (sums["close_dv"] / D)
+
+        scores = finish_scores(self.symbols, last, comp_score, rs_pct, rvol, struct_q, htf_bias, rsi,
+                               atr_pct, avg_volume_usd, nx, w)
+        keep = (n >= w["min_bars"]) & (last > 0) & np.isfinite(scores[["comp_score", "rvol", "rsi"]].to_numpy()).all(axis=1)
+        return scores[keep]
+
+    # --- persistence ---
+
+    def covers(self, symbols) -> bool:
+        return all(sym in self.pos for sym in symbols)
+
+    def oldest_day(self):
+        """Oldest last-committed day across symbols with history (None if empty)."""
+        days = self.last_day[self.n > 0]
+        return None if len(days) == 0 else _EPOCH + pd.Timedelta(days=int(days.min()))
+
+    def save(self, path: Path = STATE_FILE):
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                version=STATE_VERSION,
+                windows=json.dumps(self.w),
+                symbols=np.array(self.symbols),
+                close=self.close, volume=self.volume, tr=self.tr,
+                n=self.n, last_day=self.last_day,
+                commits_since_resync=self.commits_since_resync,
+                **{f"sum_{k}": v for k, v in self.sums.items()},
+            )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, windows=None, path: Path = STATE_FILE):
+        """Persisted state, or None if missing, corrupt, or built with different windows."""
+        if not path.exists():
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as z:
+                if int(z["version"]) != STATE_VERSION:
+                    logger.info("NX state: version changed - rebuilding")
+                    return None
+                state = cls([str(s) for s in z["symbols"]], windows)
+                if json.loads(str(z["windows"])) != json.loads(json.dumps(state.w)):
+                    logger.info("NX state: windows changed - rebuilding")
+                    return None
+                for name in ("close", "volume", "tr", "n", "last_day"):
+                    arr = z[name]
+                    if arr.shape != getattr(state, name).shape:
+                        raise ValueError(f"{name} shape {arr.shape}")
+                    setattr(state, name, arr.astype(getattr(state, name).dtype))
+                for k in _SUMS:
+                    state.sums[k] = z[f"sum_{k}"].astype(np.float64)
+                    if state.sums[k].shape != state.n.shape or not np.isfinite(state.sums[k]).all():
+                        raise ValueError(f"bad running sum {k}")
+                state.commits_since_resync = int(z["commits_since_resync"])
+            return state
+        except Exception as e:
+            logger.warning(f"NX state unreadable ({e}) - rebuilding")
+            return None
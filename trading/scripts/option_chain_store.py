@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Option Chain Store
+Daily snapshot of option chains and qualified contract IDs, so executors stop
+recomputing expiries and qualifying each contract with its own broker round trip.
+
+Per underlying, once per day (cache/option_chains/<SYMBOL>.json):
+- underlying conId, trading class, multiplier
+- listed expirations and strikes (reqSecDefOptParams, SMART)
+- conIds of every contract qualified today, keyed "YYYYMMDD|strike|right"
+
+Served from memory within a run and from disk across runs. Contracts not in the
+snapshot are qualified in one batched qualifyContracts call; quotes for all legs
+come from one reqTickers call (no per-contract sleeps).
+
+Usage:
+  store = OptionChainStore(ib)
+  legs = [store.leg('AAPL', 35, 187.3, 'P'), store.leg('MSFT', 35, 450, 'C')]  # listed expiry/strike
+  contracts = store.contracts(legs)      # one batched qualify for legs not in today's snapshot
+  quotes = store.tickers(contracts)      # { conId: Ticker }, one reqTickers call
+"""
+
+from datetime import datetime, date, timedelta
+from pathlib import Path
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+CHAIN_DIR = Path.home() / ".openclaw" / "workspace" / "trading" / "cache" / "option_chains"
+CHAIN_DIR.mkdir(parents=True, exist_ok=True)
+
+CHAIN_EXCHANGE = 'SMART'
+
+
+def _leg_key(expiry: str, strike: float, right: str) -> str:
+    return f"{expiry}|{float(strike):g}|{right.upper()[0]}"
+
+
+def _is_monthly(expiry: str) -> bool:
+    """Standard monthly expiry: the third Friday (day 15-21)."""
+    d = datetime.strptime(expiry, '%Y%m%d').date()
+    return d.weekday() == 4 and 15 <= d.day <= 21
+
+
+class OptionChainStore:
+    def __init__(self, ib):
+        self.ib = ib
+        self.today = date.today().isoformat()
+        self._chains = {}   # symbol -> snapshot dict
+        self._stocks = {}   # symbol -> qualified Stock
+        self.stats = {"broker_chain_requests": 0, "qualified": 0, "served_from_cache": 0}
+
+    # --- snapshots ---
+
+    def _path(self, symbol: str) -> Path:
+        return CHAIN_DIR / f"{symbol.upper()}.json"
+
+    def _save(self, symbol: str):
+        path = self._path(symbol)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(self._chains[symbol]))
+        os.replace(tmp, path)
+
+    def _load(self, symbol: str):
+        """Today's snapshot from memory or disk, else None."""
+        snap = self._chains.get(symbol)
+        if snap is None:
+            try:
+                snap = json.loads(self._path(symbol).read_text())
+            except (FileNotFoundError, ValueError):
+                return None
+            if snap.get("date") != self.today:
+                return None
+            self._chains[symbol] = snap
+        return snap
+
+    def stocks(self, symbols) -> dict:
+        """Qualified Stock contracts for symbols (one batched qualify for the unknown ones)."""
+        from ib_insync import Stock  # type: ignore
+        missing = []
+        for sym in symbols:
+            if sym in self._stocks:
+                continue
+            snap = self._load(sym)
+            if snap and snap.get("underlying_conid"):
+                self._stocks[sym] = Stock(sym, 'SMART', 'USD', conId=snap["underlying_conid"])
+            else:
+                missing.append(Stock(sym, 'SMART', 'USD'))
+        if missing:
+            for c in self.ib.qualifyContracts(*missing):
+                self._stocks[c.symbol] = c
+        return {sym: self._stocks[sym] for sym in symbols if sym in self._stocks}
+
+    def chain(self, symbol: str) -> dict:
+        """Today's chain snapshot: { expirations, strikes, trading_class, multiplier, contracts }"""
+        snap = self._load(symbol)
+        if snap is not None:
+            return snap
+        stock = self.stocks([symbol]).get(symbol)
+        if stock is None:
+            raise ValueError(f"could not qualify {symbol}")
+        self.stats["broker_chain_requests"] += 1
+        chains = self.ib.reqSecDefOptParams(symbol, '', 'STK', stock.conId)
+        chains = [c for c in chains if c.exchange == CHAIN_EXCHANGE] or chains
+        if not chains:
+            raise ValueError(f"no option chain for {symbol}")
+        main = max(chains, key=lambda c: len(c.expirations))  # Standard class over mini/adjusted ones
+        self._chains[symbol] = {
+            "date": self.today,
+            "underlying_conid": stock.conId,
+            "trading_class": main.tradingClass,
+            "multiplier": main.multiplier,
+            "expirations": sorted(main.expirations),
+            "strikes": sorted(float(s) for s in main.strikes),
+            "contracts": {},
+        }
+        self._save(symbol)
+        return self._chains[symbol]
+
+    # --- lookups ---
+
+    def expiry_for(self, symbol: str, dte: int, monthly: bool = True) -> str:
+        """Listed expiration closest to today + dte (monthlies only if any are listed). Returns: YYYYMMDD"""
+        expirations = [e for e in self.chain(symbol)["expirations"] if e > date.today().strftime('%Y%m%d')]
+        if monthly:
+            expirations = [e for e in expirations if _is_monthly(e)] or expirations
+        if not expirations:
+            raise ValueError(f"no listed expirations for {symbol}")
+        target = date.today() + timedelta(days=dte)
+        return min(expirations, key=lambda e: abs((datetime.strptime(e, '%Y%m%d').date() - target).days))
+
+    def nearest_strike(self, symbol: str, strike: float) -> float:
+        """Listed strike closest to strike."""
+        strikes = self.chain(symbol)["strikes"]
+        if not strikes:
+            raise ValueError(f"no listed strikes for {symbol}")
+        return min(strikes, key=lambda s: abs(s - strike))
+
+    def leg(self, symbol: str, dte: int, strike: float, right: str):
+        """(symbol, listed expiry nearest dte, listed strike nearest strike, right), or None if unavailable."""
+        try:
+            return (symbol, self.expiry_for(symbol, dte), self.nearest_strike(symbol, strike), right)
+        except Exception as e:
+            logger.warning(f"No option chain for {symbol}: {e}")
+            return None
+
+    def contracts(self, legs) -> list:
+        """
+        Qualified Option contracts for legs [(symbol, expiry, strike, right) or None, ...].
+        Snapshot conIds are reused; the rest are qualified in one batched call and snapshotted.
+        Returns: list aligned with legs (None where the leg is None or the contract doesn't exist)
+        """
+        from ib_insync import Option  # type: ignore
+        out, pending = [], []
+        for leg in legs:
+            if leg is None:
+                out.append(None)
+                continue
+            sym, expiry, strike, right = leg
+            snap = self.chain(sym)
+            key = _leg_key(expiry, strike, right)
+            opt = Option(sym, expiry, float(strike), right.upper()[0], 'SMART',
+                         multiplier=snap["multiplier"], currency='USD', tradingClass=snap["trading_class"])
+            conid = snap["contracts"].get(key)
+            if conid:
+                opt.conId = conid
+                self.stats["served_from_cache"] += 1
+            else:
+                pending.append((sym, key, opt))
+            out.append(opt)
+
+        if pending:
+            t0 = time.time()
+            qualified = {id(c) for c in self.ib.qualifyContracts(*(opt for _, _, opt in pending))}
+            touched = set()
+            for sym, key, opt in pending:
+                if id(opt) in qualified and opt.conId:
+                    self._chains[sym]["contracts"][key] = opt.conId
+                    touched.add(sym)
+                    self.stats["qualified"] += 1
+            for sym in touched:
+                self._save(sym)
+            logger.info(f"Qualified {len(qualified)}/{len(pending)} option contracts in {time.time() - t0:.2f}s")
+        return [opt if opt is not None and opt.conId else None for opt in out]
+
+    def tickers(self, contracts) -> dict:
+        """Market snapshots for all contracts in one reqTickers call. Returns: { conId: Ticker }"""
+        contracts = [c for c in contracts if c is not None]
+        if not contracts:
+            return {}
+        self.ib.reqMarketDataType(1)  # Live data
+        return {t.contract.conId: t for t in self.ib.reqTickers(*contracts)}
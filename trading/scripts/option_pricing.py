@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Option Pricing Engine
+Vectorized Black-Scholes (European) and Bjerksund-Stensland 1993 (American)
+prices and Greeks with continuous dividend yield, so screeners rank candidate
+contracts by model premium instead of flat "2% of price" estimates.
+
+Every function broadcasts over NumPy arrays: one call prices a whole
+underlying × strike × expiry grid.
+
+Volatility: pass implied vols (e.g. from cached chain snapshots) where known;
+realized_vol() gives the annualized close-to-close fallback.
+
+Usage:
+  from option_pricing import price, greeks, price_grid, realized_vol
+  price(S=100, K=95, T=35/365, sigma=0.30, right='P')        # American put
+  grid = price_grid(['AAPL', 'MSFT'], spots, vols, moneyness=np.arange(0.80, 1.001, 0.01),
+                    dtes=[30, 37, 44], right='P')             # DataFrame, one row per contract
+"""
+
+import numpy as np
+import pandas as pd
+
+RISK_FREE_RATE = 0.045       # Annual, continuous
+TRADING_DAYS = 252
+REALIZED_VOL_WINDOW = 30     # Daily returns used for the realized-vol fallback
+MIN_VOL = 0.05               # Floor for any volatility input
+MIN_T = 1e-6                 # Years; at/after expiry → intrinsic value
+
+_SQRT2 = np.sqrt(2.0)
+_SQRT2PI = np.sqrt(2.0 * np.pi)
+
+
+def norm_pdf(x):
+    return np.exp(-0.5 * np.square(x)) / _SQRT2PI
+
+
+def norm_cdf(x):
+    """Standard normal CDF (complementary error function approximation, |error| < 1.2e-7)."""
+    z = np.abs(x) / _SQRT2
+    t = 1.0 / (1.0 + 0.5 * z)
+    erfc = t * np.exp(-z * z - 1.26551223 + t * (1.00002368 + t * (0.37409196 + t * (0.09678418 + t * (
+        -0.18628806 + t * (0.27886807 + t * (-1.13520398 + t * (1.48851587 + t * (-0.82215223 + t * 0.17087277)))))))))
+    return np.where(x >= 0, 1.0 - 0.5 * erfc, 0.5 * erfc)
+
+
+def _is_call(right):
+    """'C'/'call'/'P'/'put' (scalar or array) → bool array."""
+    r = np.asarray(right)
+    if r.dtype == bool:
+        return r
+    return np.char.upper(np.char.strip(r.astype(str))).astype('U1') == 'C'
+
+
+def _inputs(S, K, T, sigma, r, q):
+    S, K, T, sigma, r, q = np.broadcast_arrays(*(np.asarray(a, dtype=np.float64) for a in (S, K, T, sigma, r, q)))
+    return S, K, np.maximum(T, MIN_T), np.maximum(sigma, MIN_VOL), r, q
+
+
+def _bs_call_carry(S, K, T, r, b, v):
+    """Generalized Black-Scholes call with cost of carry b (= r - q)."""
+    sq = v * np.sqrt(T)
+    d1 = (np.log(S / K) + (b + 0.5 * v * v) * T) / sq
+    return S * np.exp((b - r) * T) * norm_cdf(d1) - K * np.exp(-r * T) * norm_cdf(d1 - sq)
+
+
+def black_scholes(S, K, T, sigma, r=RISK_FREE_RATE, q=0.0, right='P'):
+    """European option price. T in years. Returns: ndarray (broadcast shape)"""
+    call = _is_call(right)
+    S, K, T, v, r, q = _inputs(S, K, T, sigma, r, q)
+    b = r - q
+    c = _bs_call_carry(S, K, T, r, b, v)
+    p = c - S * np.exp(-q * T) + K * np.exp(-r * T)  # Put-call parity
+    return np.where(call, c, p)
+
+
+def _phi(S, T, gamma, H, I, r, b, v):
+    sq = v * np.sqrt(T)
+    lam = (-r + gamma * b + 0.5 * gamma * (gamma - 1) * v * v) * T
+    d = -(np.log(S / H) + (b + (gamma - 0.5) * v * v) * T) / sq
+    kappa = 2 * b / (v * v) + (2 * gamma - 1)
+    return np.exp(lam) * S ** gamma * (norm_cdf(d) - (I / S) ** kappa * norm_cdf(d - 2 * np.log(I / S) / sq))
+
+
+def _bjs_call(S, K, T, r, b, v):
+    """Bjerksund-Stensland (1993) American call with cost of carry b."""
+    euro = _bs_call_carry(S, K, T, r, b, v)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        v2 = v * v
+        beta = (0.5 - b / v2) + np.sqrt((b / v2 - 0.5) ** 2 + 2 * r / v2)
+        b_inf = beta / (beta - 1) * K
+        b0 = np.maximum(K, r / (r - b) * K)
+        ht = -(b * T + 2 * v * np.sqrt(T)) * b0 / (b_inf - b0)
+        I = b0 + (b_inf - b0) * (1 - np.exp(ht))
+        alpha = (I - K) * I ** (-beta)
+        early = (alpha * S ** beta - alpha * _phi(S, T, beta, I, I, r, b, v)
+                 + _phi(S, T, 1, I, I, r, b, v) - _phi(S, T, 1, K, I, r, b, v)
+                 - K * _phi(S, T, 0, I, I, r, b, v) + K * _phi(S, T, 0, K, I, r, b, v))
+        early = np.where(S >= I, S - K, early)
+    # b >= r: never optimal to exercise early → European value
+    return np.where((b >= r) | ~np.isfinite(early), euro, np.maximum(early, euro))
+
+
+def bjerksund_stensland(S, K, T, sigma, r=RISK_FREE_RATE, q=0.0, right='P'):
+    """American option price (Bjerksund-Stensland 1993). T in years. Returns: ndarray"""
+    call = _is_call(right)
+    S, K, T, v, r, q = _inputs(S, K, T, sigma, r, q)
+    b = r - q
+    if call.all():
+        return _bjs_call(S, K, T, r, b, v)
+    p = _bjs_call(K, S, T, r - b, -b, v)  # Put via the Bjerksund-Stensland put-call transformation
+    return p if not call.any() else np.where(call, _bjs_call(S, K, T, r, b, v), p)
+
+
+def price(S, K, T, sigma, r=RISK_FREE_RATE, q=0.0, right='P', american=True):
+    """Option price (American by default; US equity options are American). Expired → intrinsic."""
+    value = (bjerksund_stensland if american else black_scholes)(S, K, T, sigma, r, q, right)
+    intrinsic = np.where(_is_call(right), np.maximum(np.asarray(S) - K, 0), np.maximum(K - np.asarray(S), 0))
+    return np.where(np.asarray(T) <= 0, intrinsic, value)
+
+
+def greeks(S, K, T, sigma, r=RISK_FREE_RATE, q=0.0, right='P', american=True) -> dict:
+    """
+    Greeks per share. vega = per 1 vol point, theta = per calendar day.
+    European: closed form. American: central differences on the Bjerksund-Stensland price.
+    Returns: { delta, gamma, vega, theta } (ndarrays)
+    """
+    call = _is_call(right)
+    S, K, T, v, r, q = _inputs(S, K, T, sigma, r, q)
+    if american:
+        f = lambda s=S, t=T, vol=v: bjerksund_stensland(s, K, t, vol, r, q, call)
+        h = 0.01 * S
+        up, mid, down = f(s=S + h), f(), f(s=S - h)
+        dt = np.minimum(1 / 365, T / 2)
+        return {
+            'delta': (up - down) / (2 * h),
+            'gamma': (up - 2 * mid + down) / (h * h),
+            'vega': (f(vol=v + 0.01) - f(vol=np.maximum(v - 0.01, MIN_VOL / 2))) / 2,
+            'theta': (f(t=T - dt) - mid) / (dt * 365),
+        }
+    sq = v * np.sqrt(T)
+    d1 = (np.log(S / K) + (r - q + 0.5 * v * v) * T) / sq
+    d2 = d1 - sq
+    dq, dr = np.exp(-q * T), np.exp(-r * T)
+    pdf = norm_pdf(d1)
+    delta = np.where(call, dq * norm_cdf(d1), -dq * norm_cdf(-d1))
+    decay = -S * dq * pdf * v / (2 * np.sqrt(T))
+    theta = np.where(call,
+                     decay - r * K * dr * norm_cdf(d2) + q * S * dq * norm_cdf(d1),
+                     decay + r * K * dr * norm_cdf(-d2) - q * S * dq * norm_cdf(-d1))
+    return {
+        'delta': delta,
+        'gamma': dq * pdf / (S * sq),
+        'vega': S * dq * pdf * np.sqrt(T) / 100,
+        'theta': theta / 365,
+    }
+
+
+def realized_vol(closes, window: int = REALIZED_VOL_WINDOW):
+    """
+    Annualized close-to-close volatility over the last `window` daily returns.
+    closes: Series/1-D array (→ float) or DataFrame with one column per symbol (→ Series).
+    """
+    frame = closes if isinstance(closes, (pd.Series, pd.DataFrame)) else pd.Series(np.asarray(closes, dtype=float))
+    rets = np.log(frame.astype(float)).diff().iloc[-window:]
+    vol = rets.std() * np.sqrt(TRADING_DAYS)
+    return vol.clip(lower=MIN_VOL) if isinstance(vol, pd.Series) else max(float(vol), MIN_VOL)
+
+
+def realized_vol_history(closes: pd.DataFrame, window: int = REALIZED_VOL_WINDOW) -> pd.DataFrame:
+    """realized_vol on every row: row t = realized_vol(closes[:t + 1]) for each column."""
+    vol = np.log(closes.astype(float)).diff().rolling(window, min_periods=2).std() * np.sqrt(TRADING_DAYS)
+    return vol.clip(lower=MIN_VOL)
+
+
+def round_strikes(strikes):
+    """Round to listed strike intervals ($5 above $200, $2.50 above $100, else $1)."""
+    k = np.asarray(strikes, dtype=np.float64)
+    interval = np.where(k > 200, 5.0, np.where(k > 100, 2.5, 1.0))
+    return np.round(k / interval) * interval
+
+
+def price_grid(symbols, spots, vols, moneyness, dtes, right='P', r=RISK_FREE_RATE, q=0.0,
+               american=True) -> pd.DataFrame:
+    """
+    Price every symbol × strike × expiry in one vectorized pass (Greeks: closed-form Black-Scholes,
+    within ~0.002 delta of the American values for the OTM short-dated contracts screened here).
+    spots, vols, q: per symbol (len(symbols)); vols may also be a full (symbols, moneyness, dtes)
+    array of implied vols. Strikes = spot × moneyness rounded to listed intervals.
+    Returns: DataFrame (symbol, spot, strike, dte, iv, premium, premium_pct, delta, gamma, vega,
+             theta, return_on_risk, annualized_ror), one row per distinct contract.
+             premium_pct / return_on_risk in percent; risk = cash secured (puts) or stock (calls).
+    """
+    U, M, E = len(symbols), len(moneyness), len(dtes)
+    spot = np.asarray(spots, dtype=np.float64).reshape(U, 1, 1)
+    vol = np.asarray(vols, dtype=np.float64)
+    vol = vol.reshape(U, 1, 1) if vol.ndim == 1 else vol.reshape(U, M, E)
+    div = np.broadcast_to(np.asarray(q, dtype=np.float64), (U,)).reshape(U, 1, 1) if np.ndim(q) else q
+    strike = round_strikes(spot * np.asarray(moneyness, dtype=np.float64).reshape(1, M, 1))
+    dte = np.asarray(dtes, dtype=np.float64).reshape(1, 1, E)
+    shape = (U, M, E)
+
+    T = dte / 365
+    prem = price(spot, strike, T, vol, r, div, right, american)
+    g = greeks(spot, strike, T, vol, r, div, right, american=False)
+    call = bool(np.all(_is_call(right)))
+    capital = np.broadcast_to(spot if call else strike, shape)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ror = prem / (capital - (0 if call else prem)) * 100
+
+    df = pd.DataFrame({
+        'symbol': np.repeat(np.asarray(symbols, dtype=object), M * E),
+        'spot': np.broadcast_to(spot, shape).ravel(),
+        'strike': np.broadcast_to(strike, shape).ravel(),
+        'dte': np.broadcast_to(dte, shape).ravel().astype(int),
+        'iv': np.broadcast_to(vol, shape).ravel(),
+        'premium': np.broadcast_to(prem, shape).ravel(),
+        'premium_pct': (np.broadcast_to(prem, shape) / capital * 100).ravel(),
+        'delta': np.broadcast_to(g['delta'], shape).ravel(),
+        'gamma': np.broadcast_to(g['gamma'], shape).ravel(),
+        'vega': np.broadcast_to(g['vega'], shape).ravel(),
+        'theta': np.broadcast_to(g['theta'], shape).ravel(),
+        'return_on_risk': np.broadcast_to(ror, shape).ravel(),
+    })
+    df['annualized_ror'] = df['return_on_risk'] * 365 / df['dte']
+    return df.drop_duplicates(['symbol', 'strike', 'dte']).reset_index(drop=True)
@@ -9,9 +9,11 @@ import os, json, sys
 from pathlib import Path
 from datetime import datetime, timedelta
 
+sys.path.insert(0, str(Path(__file__).parent))
+import trade_journal as journal
+
 # Paths
 TRADING_DIR = Path(__file__).resolve().parents[1]
-LOGS_DIR = TRADING_DIR / 'logs'
 WATCHLIST_PATH = TRADING_DIR / 'watchlist.json'
 RISK_PATH = TRADING_DIR / 'risk.json'
 
@@ -26,26 +28,18 @@ def round_option_strike(strike):
     return round(strike / interval) * interval
 
 def load_positions():
-    """Load current positions from logs (approved trades)"""
+    """Load current positions from the trade journal (approved trades)"""
     positions = []
-    if not LOGS_DIR.exists():
-        return positions
-    
-    for log_file in LOGS_DIR.glob('*.json'):
-        try:
-            with open(log_file) as f:
-                data = json.load(f)
-                intent = data.get('intent', {})
-                if intent.get('signal') in ('long', 'buy', 'entry'):
-                    positions.append({
-                        'ticker': intent.get('ticker'),
-                        'entry': intent.get('price'),
-                        'stop': intent.get('stop_loss'),
-                        'target': intent.get('take_profit'),
-                        'entry_date': datetime.fromtimestamp(intent.get('ts', 0) / 1000) if intent.get('ts') else None
-                    })
-        except Exception:
-            continue
+    for trade in journal.trades(source='webhook'):
+        intent = trade['data']
+        if intent.get('signal') in ('long', 'buy', 'entry'):
+            positions.append({
+                'ticker': intent.get('ticker'),
+                'entry': intent.get('price'),
+                'stop': intent.get('stop_loss'),
+                'target': intent.get('take_profit'),
+                'entry_date': datetime.fromtimestamp(intent.get('ts', 0) / 1000) if intent.get('ts') else None
+            })
     return positions
 
 def check_covered_call_opportunities(positions):
@@ -53,7 +47,7 @@ def check_covered_call_opportunities(positions):
     opportunities = []
     
     try:
-        import yfinance as yf
+        import yf_broker
     except ImportError:
         print("yfinance not installed. Run: pip install yfinance")
         return opportunities
@@ -70,8 +64,7 @@ def check_covered_call_opportunities(positions):
         
         # Get current price
         try:
-            stock = yf.Ticker(ticker)
-            current = float(stock.history(period='1d')['Close'].iloc[-1])
+            current = float(yf_broker.history(ticker, period='1d')['Close'].iloc[-1])
         except Exception:
             continue
         
@@ -123,7 +116,7 @@ def check_csp_opportunities():
     held_tickers = {p['ticker'] for p in positions}
     
     try:
-        import yfinance as yf
+        import yf_broker
     except ImportError:
         return opportunities
     
@@ -133,8 +126,7 @@ def check_csp_opportunities():
             continue
         
         try:
-            stock = yf.Ticker(ticker)
-            hist = stock.history(period='60d')
+            hist = yf_broker.history(ticker, period='60d')
             if hist.empty:
                 continue
             
@@ -175,9 +167,6 @@ def create_pending_intent(opp):
     """Create pending intent for options order approval"""
     import uuid, time
     
-    PENDING_DIR = TRADING_DIR / 'pending'
-    PENDING_DIR.mkdir(exist_ok=True)
-    
     intent_id = f"{int(time.time())}-{uuid.uuid4().hex[:8]}"
     token = uuid.uuid4().hex
     
@@ -202,9 +191,7 @@ def create_pending_intent(opp):
         }
     }
     
-    intent_file = PENDING_DIR / f"{intent_id}.json"
-    with open(intent_file, 'w') as f:
-        json.dump(intent, f, indent=2)
+    journal.add_pending(intent)
     
     return intent_id, token
 
@@ -2,46 +2,37 @@
 """
 Performance Dashboard - Track win rate, expectancy, and key metrics
 """
-import os, json, sys
+import os, sys
 from pathlib import Path
 from datetime import datetime, timedelta
 from collections import defaultdict
 
+sys.path.insert(0, str(Path(__file__).parent))
+import trade_journal as journal
+
 TRADING_DIR = Path(__file__).resolve().parents[1]
-LOGS_DIR = TRADING_DIR / 'logs'
 
 def get_all_trades():
-    """Load all executed trades from logs"""
-    if not LOGS_DIR.exists():
-        return []
-    
+    """Load all executed trades from the trade journal"""
     trades = []
-    for log_file in LOGS_DIR.glob('*.json'):
-        if log_file.name.startswith('rejected-'):
-            continue  # Skip rejected trades
-        
+    # Only include stock trades (not options for now)
+    for trade in journal.trades(source='webhook', kind='stock'):
+        intent = trade['data']
         try:
-            with open(log_file) as f:
-                data = json.load(f)
-                intent = data.get('intent', {})
-                result = data.get('result', '')
-                
-                # Only include stock trades (not options for now)
-                if not intent.get('option_type'):
-                    ts = intent.get('ts', 0)
-                    trade_date = datetime.fromtimestamp(ts / 1000) if ts else None
-                    
-                    trades.append({
-                        'id': intent.get('id'),
-                        'date': trade_date,
-                        'ticker': intent.get('ticker'),
-                        'side': intent.get('signal') or intent.get('side'),
-                        'entry': float(intent.get('price') or intent.get('entry') or 0),
-                        'stop': float(intent.get('stop_loss') or intent.get('stop') or 0),
-                        'target': float(intent.get('take_profit') or intent.get('tp1') or 0),
-                        'metrics': intent.get('metrics', {}),
-                        'result': result
-                    })
+            ts = intent.get('ts', 0)
+            trade_date = datetime.fromtimestamp(ts / 1000) if ts else None
+            
+            trades.append({
+                'id': intent.get('id'),
+                'date': trade_date,
+                'ticker': intent.get('ticker'),
+                'side': intent.get('signal') or intent.get('side'),
+                'entry': float(intent.get('price') or intent.get('entry') or 0),
+                'stop': float(intent.get('stop_loss') or intent.get('stop') or 0),
+                'target': float(intent.get('take_profit') or intent.get('tp1') or 0),
+                'metrics': intent.get('metrics', {}),
+                'result': trade['result'] or ''
+            })
         except Exception:
             continue
     
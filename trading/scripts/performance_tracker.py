@@ -3,11 +3,14 @@
 Track trading performance and adjust position sizing dynamically
 """
 import json
+import sys
 from pathlib import Path
 from datetime import datetime, timedelta
 
+sys.path.insert(0, str(Path(__file__).parent))
+import trade_journal as journal
+
 TRADING_DIR = Path(__file__).resolve().parents[1]
-LOGS_DIR = TRADING_DIR / 'logs'
 PERF_FILE = TRADING_DIR / 'performance.json'
 
 
@@ -33,22 +36,10 @@ def save_performance(perf):
 
 def analyze_recent_trades(days=7):
     """Analyze trades from the last N days"""
-    if not LOGS_DIR.exists():
-        return []
-    
     cutoff = datetime.now() - timedelta(days=days)
-    trades = []
-    
-    for log_file in LOGS_DIR.glob('*.json'):
-        try:
-            log_data = json.loads(log_file.read_text())
-            # Parse trade data from logs
-            # This is a placeholder - actual parsing depends on log format
-            trades.append(log_data)
-        except Exception:
-            continue
-    
-    return trades
+    # Executed trades from the journal
+    # This is a placeholder - P&L / R:R fields aren't recorded yet
+    return [t['data'] for t in journal.trades(since=cutoff.date())]
 
 
 def calculate_win_rate(trades):
@@ -7,7 +7,8 @@ Implements three quick-win rules to improve P&L:
 3. Gap risk management (close shorts at 3:55 PM, or size down)
 """
 
-import yfinance as yf
+import yf_broker
+import security_master
 import json
 from pathlib import Path
 from datetime import datetime, timedelta
@@ -31,33 +32,6 @@ logger = logging.getLogger(__name__)
 # Configuration
 EARNINGS_BLACKOUT_DAYS = 14  # Don't trade ±14 days around earnings
 
-SECTOR_MAP = {
-    # Tech
-    'AAPL': 'technology', 'MSFT': 'technology', 'NVDA': 'technology', 'INTC': 'technology',
-    'AMD': 'technology', 'QCOM': 'technology', 'ASML': 'technology', 'MRVL': 'technology',
-    'AVGO': 'technology', 'TXN': 'technology', 'LRCX': 'technology', 'KLA': 'technology',
-    'MCHP': 'technology', 'NXPI': 'technology', 'CRWD': 'technology', 'NET': 'technology',
-    'OKTA': 'technology', 'DDOG': 'technology', 'SNOW': 'technology', 'ZS': 'technology',
-    'CRM': 'technology', 'ADBE': 'technology', 'SNPS': 'technology', 'CDNS': 'technology',
-    # Finance
-    'JPM': 'finance', 'BAC': 'finance', 'WFC': 'finance', 'GS': 'finance', 'MS': 'finance',
-    'BLK': 'finance', 'AXP': 'finance', 'MA': 'finance', 'V': 'finance', 'COF': 'finance',
-    # Healthcare
-    'JNJ': 'healthcare', 'UNH': 'healthcare', 'PFE': 'healthcare', 'ABBV': 'healthcare',
-    'MRK': 'healthcare', 'LLY': 'healthcare', 'GILD': 'healthcare', 'REGN': 'healthcare',
-    'BIIB': 'healthcare', 'VRTX': 'healthcare',
-    # Energy
-    'XOM': 'energy', 'CVX': 'energy', 'COP': 'energy', 'MPC': 'energy', 'PSX': 'energy',
-    'HES': 'energy', 'EOG': 'energy', 'MRO': 'energy', 'COG': 'energy',
-    # Industrials
-    'CAT': 'industrials', 'BA': 'industrials', 'HON': 'industrials', 'GE': 'industrials',
-    'MMM': 'industrials', 'RTX': 'industrials', 'LMT': 'industrials', 'NOC': 'industrials',
-    # Consumer
-    'WMT': 'consumer', 'COST': 'consumer', 'MCD': 'consumer', 'SBUX': 'consumer',
-    'NKE': 'consumer', 'LULULEMON': 'consumer', 'TM': 'consumer', 'F': 'consumer',
-    'GM': 'consumer', 'TSLA': 'consumer',
-}
-
 class ProfitabilityFilters:
     """Implements three quick-win rules for better P&L."""
     
@@ -70,8 +44,7 @@ class ProfitabilityFilters:
         Returns: (can_trade: bool, reason: str)
         """
         try:
-            ticker = yf.Ticker(symbol)
-            earnings_date = ticker.info.get('earningsDate')
+            earnings_date = yf_broker.info(symbol).get('earningsDate')
             
             if not earnings_date:
                 return True, "No upcoming earnings data"
@@ -104,27 +77,25 @@ class ProfitabilityFilters:
         Returns: (can_trade: bool, reason: str)
         """
         try:
-            # Get symbol's sector
-            symbol_sector = SECTOR_MAP.get(symbol, 'unknown')
-            
-            if symbol_sector == 'unknown':
+            # Current positions
+            positions = []
+            if self.portfolio_file.exists():
+                with open(self.portfolio_file) as f:
+                    positions = [p for p in json.load(f).get('positions', []) if p['quantity'] != 0]
+            
+            # Symbol and book sectors in one security master lookup
+            held = [pos['symbol'] for pos in positions]
+            sectors = security_master.sectors([symbol] + held)
+            symbol_sector = sectors[0]
+            
+            if symbol_sector == security_master.UNKNOWN:
                 return True, "Unknown sector (safe to trade)"
             
-            # Check current positions
-            if not self.portfolio_file.exists():
+            if not positions:
                 return True, "No open positions"
             
-            with open(self.portfolio_file) as f:
-                portfolio = json.load(f)
-            
             # Find any open position in same sector
-            for pos in portfolio.get('positions', []):
-                if pos['quantity'] == 0:
-                    continue
-                
-                pos_symbol = pos['symbol']
-                pos_sector = SECTOR_MAP.get(pos_symbol, 'unknown')
-                
+            for pos_symbol, pos_sector in zip(held, sectors[1:]):
                 if pos_sector == symbol_sector:
                     return False, f"Already have {pos_symbol} in {symbol_sector} sector (limit: 1 per sector)"
             
@@ -141,8 +112,7 @@ class ProfitabilityFilters:
         """
         try:
             # Get beta for gap risk assessment
-            ticker = yf.Ticker(symbol)
-            beta = ticker.info.get('beta', 1.0)
+            beta = yf_broker.info(symbol).get('beta', 1.0)
             
             # High-beta names (>1.5) have higher gap risk
             if beta and beta > 1.5:
@@ -8,13 +8,36 @@ Identifies market conditions:
 - SQUEEZE: Low volume, tight range (watch for breakout setup)
 
 Uses: Range, volume, volatility, trend slope
+
+RegimeDetector.detect_batch() labels every bar of a whole universe (bars × symbols) in one
+vectorized pass; regime_panel() / get_regime_summaries() apply it to bar_store histories.
 """
 
 import numpy as np
+import pandas as pd
 import logging
 
 logger = logging.getLogger(__name__)
 
+TREND_BARS = 20    # Bars in the trend-slope regression
+ATR_BARS = 14      # Bars averaged for ATR
+
+
+def _rolling_sum(a: np.ndarray, window: int) -> np.ndarray:
+    """Sum of the trailing `window` rows along axis 0 (fewer rows at the top)."""
+    c = np.cumsum(a, axis=0)
+    out = c.copy()
+    out[window:] -= c[:-window]
+    return out
+
+
+def _shift(a: np.ndarray, k: int, fill=0.0) -> np.ndarray:
+    """Rows shifted down by k (row t holds row t - k)."""
+    out = np.full_like(a, fill)
+    out[k:] = a[:-k]
+    return out
+
+
 class RegimeDetector:
     """Detects market regime from price/volume data"""
     
@@ -36,92 +59,123 @@ class RegimeDetector:
             'details': { 'atr', 'slope', 'vol_ratio', 'range_pct' },
         }
         """
-        if len(close) < 20:
+        if len(close) < TREND_BARS:
             return {
                 'regime': 'unknown',
                 'confidence': 0,
                 'error': 'Insufficient data (need 20+ bars)',
             }
         
-        # Calculate components
-        
-        # 1. TREND SLOPE (linear regression on last 20 bars)
-        x = np.arange(len(close[-20:]))
-        y = close[-20:]
-        slope = np.polyfit(x, y, 1)[0]
-        slope_pct = (slope / close[-1]) * 100 if close[-1] > 0 else 0
-        
-        # Normalize slope: ±3% per bar = extreme
-        trend_score = min(1.0, abs(slope_pct) / 3.0)
-        
-        # 2. VOLATILITY (ATR % over last 14 bars)
-        tr_list = []
-        for i in range(1, min(len(close), 15)):
-            tr = max(
-                high[-(15-i)] - low[-(15-i)],
-                abs(high[-(15-i)] - close[-(16-i)]),
-                abs(low[-(15-i)] - close[-(16-i)])
-            )
-            tr_list.append(tr)
-        
-        atr = np.mean(tr_list) if tr_list else 0
-        atr_pct = (atr / close[-1]) * 100 if close[-1] > 0 else 0
-        
-        # Normalize volatility: >2% ATR = high volatility
-        vol_score = min(1.0, atr_pct / 2.0)
-        
-        # 3. VOLUME TREND (recent vs prior average)
-        if len(volume) >= 50:
-            recent_vol = np.mean(volume[-21:-1])
-            prior_vol = np.mean(volume[-51:-21])
-            vol_ratio = recent_vol / prior_vol if prior_vol > 0 else 1.0
-        else:
-            vol_ratio = 1.0
-        
-        # Normalize volume: 1.5x = elevated, 0.5x = depressed
-        volume_score = min(1.0, max(0, vol_ratio - 0.5) / 1.0)  # 0.5 to 1.5 → 0 to 1
+        batch = RegimeDetector.detect_batch(close, high, low, volume)
+        return {
+            'regime': str(batch['regime'][-1]),
+            'confidence': round(float(batch['confidence'][-1]), 2),
+            'scores': {k: round(float(v[-1]), 2) for k, v in batch['scores'].items()},
+            'details': {
+                'atr_pct': round(float(batch['details']['atr_pct'][-1]), 2),
+                'slope_pct_per_bar': round(float(batch['details']['slope_pct_per_bar'][-1]), 3),
+                'vol_ratio': round(float(batch['details']['vol_ratio'][-1]), 2),
+                'range_pct': round(float(batch['details']['range_pct'][-1]), 2),
+            },
+        }
+    
+    @staticmethod
+    def detect_batch(close, high, low, volume) -> dict:
+        """
+        Classify every bar of every symbol in one pass (same rules as detect_from_ohlcv,
+        evaluated on the window ending at each bar).
         
-        # 4. RANGE (true range as % of close)
-        range_pct = (high[-1] - low[-1]) / close[-1] * 100 if close[-1] > 0 else 0
+        Args:
+            close, high, low, volume: (bars × symbols) arrays or DataFrames, NaN before a
+                symbol's first bar. 1-D arrays are treated as a single symbol.
         
-        # Normalize range: 2% = normal, >3% = wide, <1% = tight
-        range_score = min(1.0, range_pct / 2.0)
+        Trend slope is a closed-form rolling OLS over TREND_BARS (cumulative sums of y and i*y);
+        ATR, volume and range windows are rolling sums, so the cost is O(bars × symbols).
+        Bars without a full TREND_BARS window are 'unknown'.
         
-        # REGIME CLASSIFICATION
-        # SQUEEZE: low vol, low volume, narrow range
-        if vol_score < 0.3 and volume_score < 0.3 and range_score < 0.4:
-            regime = 'squeeze'
-            confidence = 0.8
+        Returns: {
+            'regime': label matrix ('breakout' | 'normal' | 'choppy' | 'squeeze' | 'unknown'),
+            'confidence': matrix,
+            'scores': { 'trend', 'volatility', 'volume', 'range' } matrices,
+            'details': { 'atr_pct', 'slope_pct_per_bar', 'vol_ratio', 'range_pct' } matrices,
+        }
+        (DataFrames with the input's index/columns if close is a DataFrame)
+        """
+        frame = close if isinstance(close, pd.DataFrame) else None
+        close, high, low, volume = (np.asarray(a, dtype=float) for a in (close, high, low, volume))
+        single = close.ndim == 1
+        if single:
+            close, high, low, volume = (a.reshape(-1, 1) for a in (close, high, low, volume))
         
-        # CHOPPY: high vol, low trend, unclear direction
-        elif vol_score > 0.7 and trend_score < 0.3:
-            regime = 'choppy'
-            confidence = 0.8
+        present = ~np.isnan(close)
+        n_bars = np.cumsum(present, axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            valid_close = close > 0
+            
+            # 1. TREND SLOPE: OLS of the last TREND_BARS closes on x = 0..n-1
+            #    slope = (Σ x·y - x̄ Σ y) / Σ (x - x̄)², with Σ x·y = Σ i·y - (t - n + 1) Σ y
+            n = TREND_BARS
+            y = np.where(present, close, 0.0)
+            i = np.arange(len(close), dtype=float)[:, None]
+            sum_y = _rolling_sum(y, n)
+            sum_iy = _rolling_sum(y * i, n)
+            full = _rolling_sum(present.astype(float), n) == n
+            slope = (sum_iy - (i - (n - 1) / 2) * sum_y) / (n * (n * n - 1) / 12)
+            slope_pct = np.where(valid_close, slope / close * 100, 0.0)
+            trend_score = np.minimum(1.0, np.abs(slope_pct) / 3.0)
+            
+            # 2. VOLATILITY: mean true range of the last ATR_BARS bars
+            prev_close = _shift(close, 1, np.nan)
+            tr = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+            tr_ok = ~np.isnan(tr)
+            tr_count = _rolling_sum(tr_ok.astype(float), ATR_BARS)
+            atr = np.where(tr_count > 0, _rolling_sum(np.where(tr_ok, tr, 0.0), ATR_BARS) / tr_count, 0.0)
+            atr_pct = np.where(valid_close, atr / close * 100, 0.0)
+            vol_score = np.minimum(1.0, atr_pct / 2.0)
+            
+            # 3. VOLUME TREND: mean of the 20 bars before this one vs the 30 before those
+            v_ok = ~np.isnan(volume)
+            v = np.where(v_ok, volume, 0.0)
+            recent_vol = _shift(_rolling_sum(v, 20), 1) / _shift(_rolling_sum(v_ok.astype(float), 20), 1)
+            prior_vol = _shift(_rolling_sum(v, 30), 21) / _shift(_rolling_sum(v_ok.astype(float), 30), 21)
+            vol_ratio = np.where((n_bars >= 50) & (prior_vol > 0), recent_vol / prior_vol, 1.0)
+            vol_ratio = np.where(np.isnan(vol_ratio), 1.0, vol_ratio)
+            volume_score = np.minimum(1.0, np.maximum(0, vol_ratio - 0.5) / 1.0)
+            
+            # 4. RANGE: bar range as % of close
+            range_pct = np.where(valid_close, (high - low) / close * 100, 0.0)
+            range_score = np.minimum(1.0, range_pct / 2.0)
         
-        # BREAKOUT: high trend, high vol, high volume
-        elif trend_score > 0.6 and vol_score > 0.5 and volume_score > 0.5:
-            regime = 'breakout'
-            confidence = 0.8
+        conditions = [
+            ~full,
+            (vol_score < 0.3) & (volume_score < 0.3) & (range_score < 0.4),
+            (vol_score > 0.7) & (trend_score < 0.3),
+            (trend_score > 0.6) & (vol_score > 0.5) & (volume_score > 0.5),
+        ]
+        regime = np.select(conditions, ['unknown', 'squeeze', 'choppy', 'breakout'], 'normal')
+        confidence = np.select(conditions, [0.0, 0.8, 0.8, 0.8], 0.6)
         
-        # NORMAL: moderate everything
-        else:
-            regime = 'normal'
-            confidence = 0.6
+        def out(a):
+            if single:
+                return a[:, 0]
+            if frame is not None:
+                return pd.DataFrame(a, index=frame.index, columns=frame.columns)
+            return a
         
         return {
-            'regime': regime,
-            'confidence': round(confidence, 2),
+            'regime': out(regime),
+            'confidence': out(confidence),
             'scores': {
-                'trend': round(trend_score, 2),
-                'volatility': round(vol_score, 2),
-                'volume': round(volume_score, 2),
-                'range': round(range_score, 2),
+                'trend': out(trend_score),
+                'volatility': out(vol_score),
+                'volume': out(volume_score),
+                'range': out(range_score),
             },
             'details': {
-                'atr_pct': round(atr_pct, 2),
-                'slope_pct_per_bar': round(slope_pct, 3),
-                'vol_ratio': round(vol_ratio, 2),
-                'range_pct': round(range_pct, 2),
+                'atr_pct': out(atr_pct),
+                'slope_pct_per_bar': out(slope_pct),
+                'vol_ratio': out(vol_ratio),
+                'range_pct': out(range_pct),
             },
         }
     
@@ -182,6 +236,17 @@ class RegimeDetector:
             'notes': rec['notes'],
         }
 
+def _summarize(regime: dict) -> dict:
+    return {
+        'regime': regime['regime'],
+        'confidence': regime['confidence'],
+        'atr_pct': regime['details']['atr_pct'],
+        'trend_strength': 'strong' if regime['scores']['trend'] > 0.6 else 'weak',
+        'volatility_level': 'high' if regime['scores']['volatility'] > 0.6 else 'normal' if regime['scores']['volatility'] > 0.3 else 'low',
+        'volume_status': 'elevated' if regime['scores']['volume'] > 0.6 else 'normal',
+        'summary': f"{regime['regime'].upper()} regime (confidence {regime['confidence']:.0%})",
+    }
+
 def get_regime_summary(price_data: dict) -> dict:
     """
     Quick regime summary for a symbol.
@@ -202,15 +267,53 @@ def get_regime_summary(price_data: dict) -> dict:
     if 'error' in regime:
         return regime
     
-    return {
-        'regime': regime['regime'],
-        'confidence': regime['confidence'],
-        'atr_pct': regime['details']['atr_pct'],
-        'trend_strength': 'strong' if regime['scores']['trend'] > 0.6 else 'weak',
-        'volatility_level': 'high' if regime['scores']['volatility'] > 0.6 else 'normal' if regime['scores']['volatility'] > 0.3 else 'low',
-        'volume_status': 'elevated' if regime['scores']['volume'] > 0.6 else 'normal',
-        'summary': f"{regime['regime'].upper()} regime (confidence {regime['confidence']:.0%})",
-    }
+    return _summarize(regime)
+
+def regime_panel(bars: dict) -> dict:
+    """
+    Per-bar regimes for many symbols at once.
+    
+    Args:
+        bars: { symbol: DataFrame (Open/High/Low/Close/Volume, indexed by date) }, e.g. bar_store.get_bars()
+    
+    Rows are the union of all dates; a date missing for one symbol leaves its windows
+    through that date incomplete ('unknown').
+    
+    Returns: RegimeDetector.detect_batch() result as (dates × symbols) DataFrames
+    """
+    symbols = list(bars)
+    dates = pd.DatetimeIndex(np.unique(np.concatenate([df.index.values for df in bars.values()])))
+    fields = ('Close', 'High', 'Low', 'Volume')
+    panels = np.full((len(fields), len(dates), len(symbols)), np.nan)
+    for j, df in enumerate(bars.values()):
+        rows = dates.get_indexer(df.index)
+        panels[:, rows, j] = df[list(fields)].to_numpy(dtype=float).T
+    close = pd.DataFrame(panels[0], index=dates, columns=symbols)
+    return RegimeDetector.detect_batch(close, panels[1], panels[2], panels[3])
+
+def get_regime_summaries(bars: dict) -> dict:
+    """
+    get_regime_summary for every symbol from one batched pass (latest bar of each symbol).
+    
+    Returns: { symbol: summary dict (or error dict if fewer than 20 bars) }
+    """
+    if not bars:
+        return {}
+    batch = regime_panel(bars)
+    labels = batch['regime']
+    summaries = {}
+    for sym in labels.columns:
+        row = bars[sym].index.max()
+        if labels.at[row, sym] == 'unknown':
+            summaries[sym] = {'regime': 'unknown', 'confidence': 0, 'error': 'Insufficient data (need 20+ bars)'}
+            continue
+        summaries[sym] = _summarize({
+            'regime': labels.at[row, sym],
+            'confidence': round(float(batch['confidence'].at[row, sym]), 2),
+            'scores': {k: round(float(v.at[row, sym]), 2) for k, v in batch['scores'].items()},
+            'details': {'atr_pct': round(float(batch['details']['atr_pct'].at[row, sym]), 2)},
+        })
+    return summaries
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
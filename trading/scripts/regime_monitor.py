@@ -15,15 +15,23 @@ Regime Bands:
 - 2-3: Neutral
 - 4-5: Tightening
 - 6+: Defensive
+
+Indicators are collected concurrently (one worker each), so a check takes about as long
+as its slowest indicator. FRED series are cached on disk (cache/fred/<SERIES>.json) and
+refetched only after a series-appropriate interval (FRED_REFRESH_SEC); a stale copy is used
+if FRED is unreachable. Per-indicator fetch latency is recorded in regime_state.json.
 """
 
 import os
 import json
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
-import yfinance as yf
+import pandas as pd
+import yf_broker
 
 # Add parent directory to path for imports
 sys.path.append(str(Path(__file__).parent.parent))
@@ -39,6 +47,9 @@ except ImportError:
 REGIME_STATE_FILE = Path(__file__).parent.parent / "logs" / "regime_state.json"
 REGIME_STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
 
+FRED_CACHE_DIR = Path.home() / ".openclaw" / "workspace" / "trading" / "cache" / "fred"
+FRED_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
 # FRED Series IDs
 FRED_SERIES = {
     "DFII10": "10Y TIPS Real Yield",
@@ -47,6 +58,15 @@ FRED_SERIES = {
     "MANEMP": "ISM Manufacturing PMI"
 }
 
+# Seconds before a cached FRED series is refetched (matches each series' release cadence)
+FRED_REFRESH_SEC = {
+    "DFII10": 4 * 3600,            # Daily
+    "BAMLH0A0HYM2": 4 * 3600,      # Daily
+    "NFCI": 24 * 3600,             # Weekly (Wednesdays)
+    "MANEMP": 3 * 24 * 3600,       # Monthly
+}
+DEFAULT_FRED_REFRESH_SEC = 4 * 3600
+
 # Priority order (lower number = higher priority)
 ALERT_CONFIG = [
     {
@@ -120,21 +140,58 @@ class RegimeMonitor:
     
     def _save_state(self, state: Dict):
         """Save current regime state."""
-        with open(self.state_file, 'w') as f:
+        tmp = self.state_file.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, 'w') as f:
             json.dump(state, f, indent=2)
+        os.replace(tmp, self.state_file)
+    
+    def _load_fred_cache(self, series_id: str) -> Optional[Dict]:
+        try:
+            return json.loads((FRED_CACHE_DIR / f"{series_id}.json").read_text())
+        except (FileNotFoundError, ValueError):
+            return None
+    
+    def _save_fred_cache(self, series_id: str, start_date: datetime, data):
+        path = FRED_CACHE_DIR / f"{series_id}.json"
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({
+            "fetched_at": time.time(),
+            "start": start_date.strftime("%Y-%m-%d"),
+            "dates": [d.strftime("%Y-%m-%d") for d in data.index],
+            "values": [None if pd.isna(v) else float(v) for v in data.values],
+        }))
+        os.replace(tmp, path)
     
     def _get_fred_data(self, series_id: str, days_back: int = 30) -> Optional[List]:
-        """Fetch FRED data series."""
+        """
+        Fetch FRED data series (from the local cache while it is fresh).
+        Returns: Series indexed by date, or None
+        """
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=days_back)
+        cached = self._load_fred_cache(series_id)
+        
+        def from_cache():
+            data = pd.Series(cached["values"], index=pd.to_datetime(cached["dates"]), dtype=float)
+            return data[data.index >= pd.Timestamp(start_date.date())]
+        
+        covers = cached is not None and cached["start"] <= start_date.strftime("%Y-%m-%d")
+        max_age = FRED_REFRESH_SEC.get(series_id, DEFAULT_FRED_REFRESH_SEC)
+        if covers and time.time() - cached["fetched_at"] < max_age:
+            return from_cache()
+        
         if not self.fred:
-            return None
+            return from_cache() if covers else None
         
         try:
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=days_back)
             data = self.fred.get_series(series_id, start_date, end_date)
+            self._save_fred_cache(series_id, start_date, data)
             return data
         except Exception as e:
             print(f"Error fetching {series_id}: {e}")
+            if covers:
+                print(f"Using cached {series_id} from {datetime.fromtimestamp(cached['fetched_at']):%Y-%m-%d %H:%M}")
+                return from_cache()
             return None
     
     def check_vix_structure(self) -> Dict:
@@ -144,12 +201,9 @@ class RegimeMonitor:
         Weight: +3 (Tier 1, Priority #1)
         """
         try:
-            vix = yf.Ticker("^VIX")
-            vix3m = yf.Ticker("^VIX3M")
-            
             # Get most recent close
-            vx1 = vix.history(period="5d")['Close'].iloc[-1]
-            vx2 = vix3m.history(period="5d")['Close'].iloc[-1]
+            vx1 = yf_broker.history("^VIX", period="5d")['Close'].iloc[-1]
+            vx2 = yf_broker.history("^VIX3M", period="5d")['Close'].iloc[-1]
             
             ratio = vx1 / vx2
             
@@ -318,17 +372,28 @@ class RegimeMonitor:
                 "cooldown": 13
             }
     
+    def _timed(self, check):
+        t0 = time.perf_counter()
+        result = check()
+        return result, round((time.perf_counter() - t0) * 1000)
+    
     def calculate_regime(self) -> Dict:
-        """Run all checks and calculate regime state."""
+        """Run all checks concurrently and calculate regime state."""
         
-        # Run all checks
-        checks = [
-            self.check_vix_structure(),
-            self.check_hy_oas(),
-            self.check_real_yields(),
-            self.check_nfci(),
-            self.check_ism()
+        # Run all checks (each does its own FRED / yfinance round trip)
+        check_fns = [
+            self.check_vix_structure,
+            self.check_hy_oas,
+            self.check_real_yields,
+            self.check_nfci,
+            self.check_ism
         ]
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(check_fns)) as pool:
+            timed = list(pool.map(self._timed, check_fns))
+        checks = [result for result, _ in timed]
+        latency = {result["indicator"]: ms for result, ms in timed}
+        latency["total"] = round((time.perf_counter() - t0) * 1000)
         
         # Filter triggered alerts and sort by priority
         active_alerts = [c for c in checks if c.get("triggered")]
@@ -355,6 +420,7 @@ class RegimeMonitor:
             },
             "activeAlerts": active_alerts,
             "inactiveIndicators": inactive,
+            "latencyMs": latency,
             "timestamp": datetime.now().isoformat()
         }
     
@@ -375,6 +441,7 @@ class RegimeMonitor:
             "lastUpdate": current["timestamp"],
             "activeAlerts": current["activeAlerts"],
             "parameters": current["parameters"],
+            "latencyMs": current["latencyMs"],
             "history": self.state.get("history", [])[-20:]  # Keep last 20
         }
         
@@ -84,9 +84,10 @@ class RiskManager:
         """Fetch current portfolio state from IB."""
         try:
             from ib_insync import IB
+            from ib_order_service import client_id
             
             ib = IB()
-            ib.connect('127.0.0.1', 4002, clientId=107)
+            ib.connect('127.0.0.1', 4002, clientId=client_id('risk_manager'))
             
             # Get account summary
             accounts = ib.accountSummary()
@@ -2,55 +2,34 @@
 import sys
 import pandas as pd
 import numpy as np
-import yfinance as yf
 from datetime import datetime, timedelta
+from pathlib import Path
 
-ET = pd.Timestamp.now(tz='America/New_York').tz
-
-def compute_vwap(df):
-    tp = (df['High'] + df['Low'] + df['Close']) / 3.0
-    cum_vol = df['Volume'].cumsum().replace(0, np.nan)
-    return (tp * df['Volume']).cumsum() / cum_vol
-
-
-def fetch_intraday(ticker):
-    df = yf.download(ticker, period='1d', interval='5m', progress=False, prepost=False)
-    if df is None or df.empty:
-        return None
-    if isinstance(df.columns, pd.MultiIndex):
-        try:
-            df = df.xs(ticker, axis=1, level=1)
-        except Exception:
-            first = df.columns.get_level_values(1)[0]
-            df = df.xs(first, axis=1, level=1)
-    df = df.tz_convert('America/New_York') if df.index.tz is not None else df.tz_localize('UTC').tz_convert('America/New_York')
-    df['VWAP'] = compute_vwap(df)
-    return df
-
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import yf_broker
+from intraday_stream import get_stream
 
 def summarize(tickers):
     out = []
+    snapshot = get_stream(tickers).snapshot()  # One batched poll; levels kept incrementally
     for t in tickers:
         try:
-            df = fetch_intraday(t)
-            if df is None or df.empty:
+            if t not in snapshot.index:
                 continue
-            morning = df.between_time('09:30','11:00')
-            if morning.empty:
+            snap = snapshot.loc[t]
+            if pd.isna(snap['morning_high']):
                 continue
-            mhi = float(morning['High'].max())
-            mlo = float(morning['Low'].min())
-            last = df.iloc[-1]
-            price = float(last['Close'])
-            vwap = float(last['VWAP']) if not np.isnan(last['VWAP']) else None
-            vol_med = float(df['Volume'].median()) if len(df) >= 5 else 0.0
-            last_vol = float(last['Volume'])
+            mhi = float(snap['morning_high'])
+            mlo = float(snap['morning_low'])
+            price = float(snap['last'])
+            vwap = float(snap['vwap']) if not np.isnan(snap['vwap']) else None
+            vol_med = float(snap['volume_median']) if snap['bars'] >= 5 else 0.0
+            last_vol = float(snap['last_volume'])
             vol_x = (last_vol/vol_med) if vol_med>0 else 0.0
             # recent news via yfinance if available
             news_items = []
             try:
-                info = yf.Ticker(t)
-                news = info.news or []
+                news = yf_broker.news(t)
                 cutoff = datetime.now().timestamp() - 36*3600
                 for n in news[:5]:
                     if n.get('provider') and n.get('title') and n.get('published_at',0) >= cutoff:
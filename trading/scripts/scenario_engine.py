@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Portfolio Scenario Engine
+Overnight gap risk for every stock and option position at once: thousands of gap scenarios
+applied to the whole book in one vectorized pass, instead of fixed +1/2/5% gaps per position.
+
+Scenarios (one gap-return vector over all underlyings per row):
+- historical: every overnight gap (open / prior close - 1) of the last HISTORY_DAYS sessions,
+  all underlyings on the same date, so cross-asset moves stay together
+- simulated: SIMULATIONS correlated Student-t draws (T_DF degrees of freedom) using the cached
+  daily-return correlation (correlation_matrix.covariance), scaled to each symbol's
+  historical overnight gap volatility
+
+Repricing per scenario:
+- stock: quantity × move
+- options: delta-gamma-theta (method='greeks', default) from option_pricing.greeks, or full
+  Bjerksund-Stensland repricing (method='full'); both advance time by HORIZON_DAYS
+
+Returns the P&L distribution, VaR / CVaR at CONFIDENCE levels and the worst contributors
+(each position's average P&L in the tail beyond VaR at the first confidence level).
+
+Positions (gap_risk_eod_check.get_current_positions format):
+  symbol, quantity (signed: shares or contracts), type ('STK', 'OPT', 'CSP', 'SHORT_CALL', ...)
+  options also: strike, right ('P'/'C'), days_to_expiration or expiry (YYYYMMDD), multiplier
+  optional: underlying_price (default: latest bar store close), iv (default: realized vol)
+
+Usage:
+  from scenario_engine import portfolio_risk
+  risk = portfolio_risk(positions)
+  risk['var']['95'], risk['cvar']['95'], risk['contributors'][:3]
+"""
+
+from datetime import datetime, timedelta
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+HISTORY_DAYS = 500         # Sessions of historical overnight gaps
+SIMULATIONS = 10000        # Simulated gap vectors
+T_DF = 4                   # Student-t degrees of freedom (fat tails)
+HORIZON_DAYS = 1           # Calendar days of theta / time decay per scenario
+CONFIDENCE = (0.95, 0.99)
+MAX_CONTRIBUTORS = 5
+DEFAULT_GAP_VOL = 0.01     # Overnight gap std when a symbol has no usable history
+DEFAULT_IV = 0.30          # Option vol when neither the position nor the bars provide one
+OPTION_TYPES = {"OPT", "CSP", "SHORT_CALL", "SHORT_PUT", "CALL", "PUT"}
+
+
+def _option_fields(pos: dict, today):
+    """(is_option, right, strike, dte, multiplier) for a position dict."""
+    kind = str(pos.get("type", "")).upper()
+    is_option = kind in OPTION_TYPES or pos.get("strike") is not None
+    if not is_option:
+        return False, "P", np.nan, 0.0, float(pos.get("multiplier") or 1)
+    right = str(pos.get("right") or ("C" if "CALL" in kind else "P")).upper()[0]
+    dte = pos.get("days_to_expiration")
+    if dte is None and pos.get("expiry"):
+        dte = (datetime.strptime(str(pos["expiry"])[:8], "%Y%m%d").date() - today).days
+    return True, right, float(pos.get("strike") or np.nan), float(dte or 0), float(pos.get("multiplier") or 100)
+
+
+def _label(pos: dict, is_option: bool, right: str, strike: float, dte: float) -> str:
+    if not is_option:
+        return f"{pos['symbol']} STK"
+    if not strike > 0:
+        return f"{pos['symbol']} {right} (no strike)"
+    return f"{pos['symbol']} {strike:g}{right} {dte:.0f}d"
+
+
+def _gap_history(bars: dict, symbols: list) -> pd.DataFrame:
+    """Overnight gaps (dates × symbols) over the last HISTORY_DAYS sessions."""
+    opens = pd.DataFrame({s: bars[s]["Open"] for s in symbols if s in bars}).sort_index()
+    closes = pd.DataFrame({s: bars[s]["Close"] for s in symbols if s in bars}).sort_index()
+    gaps = (opens / closes.shift(1) - 1).reindex(columns=symbols)
+    return gaps.iloc[1:].tail(HISTORY_DAYS).dropna(how="all")
+
+
+def _simulate(gap_vol: np.ndarray, corr: np.ndarray, n: int, rng) -> np.ndarray:
+    """n correlated Student-t gap vectors with per-symbol std gap_vol."""
+    cov = corr * np.outer(gap_vol, gap_vol)
+    vals, vecs = np.linalg.eigh((cov + cov.T) / 2)
+    root = vecs * np.sqrt(np.clip(vals, 0, None))  # Pairwise-complete estimates need not be PSD
+    z = rng.standard_normal((n, len(gap_vol))) @ root.T
+    scale = np.sqrt((T_DF - 2) / rng.chisquare(T_DF, size=(n, 1)))  # Unit-variance t
+    return z * scale
+
+
+def _correlation(symbols: list) -> np.ndarray:
+    """Cached daily-return correlation; identity where missing."""
+    corr = np.eye(len(symbols))
+    try:
+        from correlation_matrix import covariance
+        cov = covariance(symbols)
+    except Exception as e:
+        logger.warning(f"Covariance cache unavailable: {e}")
+        cov = None
+    if cov is not None:
+        c = cov.to_numpy()
+        sd = np.sqrt(np.diag(c))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cached = c / np.outer(sd, sd)
+        corr = np.where(np.isfinite(cached), np.clip(cached, -1, 1), corr)
+        np.fill_diagonal(corr, 1.0)
+    return corr
+
+
+def portfolio_risk(positions: list, bars: dict = None, method: str = "greeks", simulations: int = SIMULATIONS,
+                   horizon_days: float = HORIZON_DAYS, seed=None, keep_distribution: bool = False) -> dict:
+    """
+    Overnight gap P&L distribution of the whole portfolio.
+    bars: { symbol: daily DataFrame } (default: bar store, HISTORY_DAYS sessions)
+    Returns: { positions, scenarios, historical, simulated, method, expected_pnl, worst_pnl,
+               var: {'95': loss, ...}, cvar: {...}, contributors: [...], unpriced: [...], seconds }
+             (+ pnl, position_pnl, labels arrays if keep_distribution)
+    """
+    from option_pricing import greeks, price, realized_vol
+
+    t0 = time.time()
+    today = datetime.now().date()
+    fields = [(pos, *_option_fields(pos, today)) for pos in positions if pos.get("quantity")]
+    unpriced = [_label(p, o, r, k, d) for p, o, r, k, d, _ in fields if o and not (k > 0 and d >= 0)]
+    fields = [f for f in fields if not f[1] or (f[3] > 0 and f[4] >= 0)]
+    if not fields:
+        return {"positions": 0, "scenarios": 0, "unpriced": unpriced}
+
+    symbols = list(dict.fromkeys(p["symbol"] for p, *_ in fields))
+    if bars is None:
+        from bar_store import get_bars
+        bars = get_bars(symbols, start=today - timedelta(days=int(HISTORY_DAYS * 1.5)))
+
+    # Underlying spots and vols
+    closes = pd.DataFrame({s: bars[s]["Close"] for s in symbols if s in bars}).sort_index().reindex(columns=symbols)
+    spot = closes.ffill().iloc[-1].to_numpy(dtype=float) if not closes.empty else np.full(len(symbols), np.nan)
+    vol = realized_vol(closes).to_numpy(dtype=float) if len(closes) > 2 else np.full(len(symbols), np.nan)
+    col = {s: i for i, s in enumerate(symbols)}
+    for p, *_ in fields:
+        if p.get("underlying_price"):
+            spot[col[p["symbol"]]] = float(p["underlying_price"])
+
+    # Scenario matrix (scenarios × underlyings)
+    hist = _gap_history(bars, symbols)
+    gap_vol = hist.std().to_numpy(dtype=float) if len(hist) > 1 else np.full(len(symbols), np.nan)
+    gap_vol = np.where(np.isfinite(gap_vol) & (gap_vol > 0), gap_vol, DEFAULT_GAP_VOL)
+    rng = np.random.default_rng(seed)
+    sim = _simulate(gap_vol, _correlation(symbols), simulations, rng) if simulations else np.empty((0, len(symbols)))
+    gaps = np.clip(np.vstack([hist.fillna(0.0).to_numpy(dtype=float), sim]), -0.95, None)
+
+    # Position arrays
+    pos_list, is_opt, right, strike, dte, mult = zip(*fields)
+    u = np.array([col[p["symbol"]] for p in pos_list])
+    qty = np.array([float(p["quantity"]) for p in pos_list])
+    is_opt, strike, dte, mult = np.array(is_opt), np.array(strike), np.array(dte), np.array(mult)
+    right = np.array(right)
+    iv = np.array([float(p.get("iv") or np.nan) for p in pos_list])
+    iv = np.where(np.isfinite(iv), iv, vol[u])
+    iv = np.where(np.isfinite(iv), iv, DEFAULT_IV)
+    S = spot[u]
+    missing = ~np.isfinite(S)
+    if missing.any():
+        unpriced += [f"{pos_list[i]['symbol']} (no price)" for i in np.nonzero(missing)[0]]
+        S = np.where(missing, 0.0, S)
+
+    # Reprice (scenarios × positions)
+    dS = S * gaps[:, u]
+    pnl_unit = dS.copy()  # Stock: 1 share per unit
+    opt = np.nonzero(is_opt & ~missing)[0]
+    if len(opt):
+        T = np.maximum(dte[opt], 0.5) / 365  # Expiring today: half a day left
+        if method == "full":
+            v0 = price(S[opt], strike[opt], T, iv[opt], right=right[opt])
+            v1 = price(S[opt] + dS[:, opt], strike[opt], np.maximum(T - horizon_days / 365, 0), iv[opt],
+                       right=right[opt])
+            pnl_unit[:, opt] = v1 - v0
+        else:
+            g = greeks(S[opt], strike[opt], T, iv[opt], right=right[opt])
+            pnl_unit[:, opt] = g["delta"] * dS[:, opt] + 0.5 * g["gamma"] * dS[:, opt] ** 2 + g["theta"] * horizon_days
+    position_pnl = pnl_unit * (qty * mult)
+    position_pnl[:, missing] = 0.0
+    pnl = position_pnl.sum(axis=1)
+
+    var, cvar = {}, {}
+    tail = None
+    for c in CONFIDENCE:
+        cutoff = np.quantile(pnl, 1 - c)
+        in_tail = pnl <= cutoff
+        var[f"{c * 100:g}"] = round(float(-cutoff), 2)
+        cvar[f"{c * 100:g}"] = round(float(-pnl[in_tail].mean()), 2)
+        tail = in_tail if tail is None else tail
+
+    labels = [_label(p, o, r, k, d) for p, o, r, k, d, _ in fields]
+    tail_pnl = position_pnl[tail].mean(axis=0)
+    order = np.argsort(tail_pnl)[:MAX_CONTRIBUTORS]
+    contributors = [{
+        "position": labels[i],
+        "symbol": pos_list[i]["symbol"],
+        "quantity": float(qty[i]),
+        "tail_pnl": round(float(tail_pnl[i]), 2),
+        "worst_pnl": round(float(position_pnl[:, i].min()), 2),
+    } for i in order if tail_pnl[i] < 0]
+
+    result = {
+        "positions": len(fields),
+        "scenarios": len(pnl),
+        "historical": len(hist),
+        "simulated": len(sim),
+        "method": method,
+        "expected_pnl": round(float(pnl.mean()), 2),
+        "worst_pnl": round(float(pnl.min()), 2),
+        "var": var,
+        "cvar": cvar,
+        "contributors": contributors,
+        "unpriced": unpriced,
+        "seconds": round(time.time() - t0, 3),
+    }
+    if keep_distribution:
+        result.update(pnl=pnl, position_pnl=position_pnl, labels=labels)
+    return result
@@ -3,6 +3,9 @@
 Sector Concentration Manager
 Enforces: Max 1 position per sector
 Reduces correlation risk and diversifies trading portfolio
+
+Sectors come from the security master (security_master.py); the book and a whole
+candidate list are checked with one grouped count (filter_by_sector).
 """
 
 import json
@@ -10,99 +13,29 @@ from pathlib import Path
 from datetime import datetime
 import logging
 
-logger = logging.getLogger(__name__)
+import numpy as np
 
-# Sector classification (symbol → sector)
-SECTOR_MAP = {
-    # Technology
-    'AAPL': 'Technology', 'MSFT': 'Technology', 'NVDA': 'Technology', 'GOOGL': 'Technology',
-    'META': 'Technology', 'INTC': 'Technology', 'AMD': 'Technology', 'AVGO': 'Technology',
-    'QCOM': 'Technology', 'ASML': 'Technology', 'NXPI': 'Technology', 'MCHP': 'Technology',
-    'LRCX': 'Technology', 'KLA': 'Technology', 'AMAT': 'Technology', 'CRWD': 'Technology',
-    'NET': 'Technology', 'DDOG': 'Technology', 'OKTA': 'Technology', 'SNOW': 'Technology',
-    'CRM': 'Technology', 'NOW': 'Technology', 'ADBE': 'Technology', 'CSCO': 'Technology',
-    'INTU': 'Technology', 'PAYC': 'Technology', 'SNPS': 'Technology', 'CDNS': 'Technology',
-    'SPLK': 'Technology', 'TWLO': 'Technology', 'ZM': 'Technology', 'TEAM': 'Technology',
-    'RBLX': 'Technology', 'U': 'Technology', 'DASH': 'Technology', 'COIN': 'Technology',
-    
-    # Financials
-    'JPM': 'Financials', 'BAC': 'Financials', 'WFC': 'Financials', 'GS': 'Financials',
-    'MS': 'Financials', 'BLK': 'Financials', 'HOOD': 'Financials', 'SOFI': 'Financials',
-    'PYPL': 'Financials', 'SQ': 'Financials', 'ICL': 'Financials', 'APO': 'Financials',
-    'KKR': 'Financials', 'BX': 'Financials', 'ARES': 'Financials', 'TPG': 'Financials',
-    'SCHW': 'Financials', 'IBKR': 'Financials', 'TROW': 'Financials', 'ONYX': 'Financials',
-    
-    # Energy
-    'XOM': 'Energy', 'CVX': 'Energy', 'COP': 'Energy', 'MPC': 'Energy', 'PSX': 'Energy',
-    'VLO': 'Energy', 'HES': 'Energy', 'EOG': 'Energy', 'FANG': 'Energy', 'OKE': 'Energy',
-    'GEVO': 'Energy', 'PLUG': 'Energy', 'FCEL': 'Energy',
-    
-    # Healthcare
-    'JNJ': 'Healthcare', 'UNH': 'Healthcare', 'PFE': 'Healthcare', 'ABBV': 'Healthcare',
-    'TMO': 'Healthcare', 'ISRG': 'Healthcare', 'DXCM': 'Healthcare', 'VEEV': 'Healthcare',
-    'TDOC': 'Healthcare', 'GILD': 'Healthcare', 'BIIB': 'Healthcare', 'REGN': 'Healthcare',
-    'VRTX': 'Healthcare', 'ALXN': 'Healthcare', 'MRK': 'Healthcare', 'LLY': 'Healthcare',
-    
-    # Industrials
-    'CAT': 'Industrials', 'BA': 'Industrials', 'HON': 'Industrials', 'ITW': 'Industrials',
-    'GE': 'Industrials', 'MMM': 'Industrials', 'RTX': 'Industrials', 'LUV': 'Industrials',
-    'UAL': 'Industrials', 'DAL': 'Industrials', 'ALK': 'Industrials', 'WAB': 'Industrials',
-    'UNP': 'Industrials', 'CSX': 'Industrials', 'KSU': 'Industrials',
-    
-    # Consumer Discretionary
-    'AMZN': 'Consumer Discretionary', 'TSLA': 'Consumer Discretionary', 'MCD': 'Consumer Discretionary',
-    'NKE': 'Consumer Discretionary', 'SBUX': 'Consumer Discretionary', 'TJX': 'Consumer Discretionary',
-    'RCL': 'Consumer Discretionary', 'CCL': 'Consumer Discretionary', 'ROST': 'Consumer Discretionary',
-    'DKS': 'Consumer Discretionary', 'ULTA': 'Consumer Discretionary',
-    
-    # Consumer Staples
-    'WMT': 'Consumer Staples', 'PG': 'Consumer Staples', 'KO': 'Consumer Staples',
-    'PEP': 'Consumer Staples', 'MO': 'Consumer Staples', 'PM': 'Consumer Staples',
-    'GIS': 'Consumer Staples', 'ADM': 'Consumer Staples', 'MKC': 'Consumer Staples',
-    
-    # Real Estate
-    'SPG': 'Real Estate', 'DLR': 'Real Estate', 'PSA': 'Real Estate', 'ARE': 'Real Estate',
-    'WELL': 'Real Estate', 'PLD': 'Real Estate', 'VICI': 'Real Estate', 'COIN': 'Real Estate',
-    
-    # Utilities
-    'NEE': 'Utilities', 'DUK': 'Utilities', 'SO': 'Utilities', 'EXC': 'Utilities',
-    'AES': 'Utilities', 'PEG': 'Utilities', 'ES': 'Utilities', 'EIX': 'Utilities',
-    
-    # Materials
-    'NEM': 'Materials', 'FCX': 'Materials', 'TECK': 'Materials', 'ALB': 'Materials',
-    'LIN': 'Materials', 'SHW': 'Materials', 'APD': 'Materials', 'ECL': 'Materials',
-    'DOW': 'Materials', 'LYB': 'Materials',
-    
-    # Communication Services
-    'NFLX': 'Communication Services', 'DIS': 'Communication Services', 'PARA': 'Communication Services',
-    'FOXA': 'Communication Services', 'FOX': 'Communication Services', 'CMCSA': 'Communication Services',
-    'CHTR': 'Communication Services', 'ATUS': 'Communication Services', 'PINS': 'Communication Services',
-    'SNAP': 'Communication Services', 'ROKU': 'Communication Services', 'TTD': 'Communication Services',
-    'MOMO': 'Communication Services', 'BILI': 'Communication Services', 'IQ': 'Communication Services',
-}
+import security_master
+
+logger = logging.getLogger(__name__)
 
 def get_sector(symbol: str) -> str:
-    """Get sector for a symbol. Returns 'Unknown' if not classified."""
-    return SECTOR_MAP.get(symbol.upper(), 'Unknown')
+    """Get sector for a symbol (security master). Returns 'Unknown' if not classified."""
+    return security_master.sector(symbol)
 
 def get_position_sectors(positions: list) -> dict:
     """
-    Map positions to sectors.
+    Map positions to sectors (one batched security master lookup).
     
     Args:
         positions: List of position dicts with 'symbol', 'quantity'
     
     Returns: Dict { sector: [symbols...] }
     """
+    symbols = [p['symbol'] for p in positions if p['quantity'] != 0]
     sector_map = {}
-    for pos in positions:
-        if pos['quantity'] == 0:
-            continue
-        symbol = pos['symbol']
-        sector = get_sector(symbol)
-        if sector not in sector_map:
-            sector_map[sector] = []
-        sector_map[sector].append(symbol)
+    for symbol, sector in zip(symbols, security_master.sectors(symbols)):
+        sector_map.setdefault(sector, []).append(symbol)
     
     return sector_map
 
@@ -143,6 +76,38 @@ def check_sector_limit(positions: list, max_per_sector: int = 1) -> dict:
         'sector_counts': {s: len(syms) for s, syms in sector_map.items()},
     }
 
+def filter_by_sector(symbols: list, positions: list, max_per_sector: int = 1) -> dict:
+    """
+    Check a whole candidate list against the book in one grouped operation.
+    Each candidate is checked independently against current long positions.
+    
+    Args:
+        symbols: Candidate symbols
+        positions: Current positions
+        max_per_sector: Max per sector
+    
+    Returns: {
+        'allowed': bool ndarray aligned with symbols,
+        'sectors': [str] aligned with symbols,
+        'counts': int ndarray (current positions in each candidate's sector),
+        'held': { sector: [symbols...] } (long positions),
+    }
+    """
+    held = [p['symbol'] for p in positions if p['quantity'] > 0]
+    codes, names = security_master.sector_codes(list(symbols) + held)
+    cand, book = codes[:len(symbols)], codes[len(symbols):]
+    counts = np.bincount(book, minlength=len(names))[cand]
+    by_sector = {}
+    for symbol, code in zip(held, book):
+        by_sector.setdefault(names[code], []).append(symbol)
+    
+    return {
+        'allowed': counts < max_per_sector,
+        'sectors': [names[c] for c in cand],
+        'counts': counts,
+        'held': by_sector,
+    }
+
 def can_add_position(symbol: str, positions: list, max_per_sector: int = 1) -> dict:
     """
     Check if new position can be added without violating sector limit.
@@ -159,14 +124,13 @@ def can_add_position(symbol: str, positions: list, max_per_sector: int = 1) -> d
         'current_in_sector': int,
     }
     """
-    sector = get_sector(symbol)
-    current_positions = [p for p in positions if get_sector(p['symbol']) == sector and p['quantity'] > 0]
-    count = len(current_positions)
+    check = filter_by_sector([symbol], positions, max_per_sector)
+    sector, count = check['sectors'][0], int(check['counts'][0])
     
-    if count >= max_per_sector:
+    if not check['allowed'][0]:
         return {
             'allowed': False,
-            'reason': f'Sector "{sector}" already at limit ({max_per_sector}): {[p["symbol"] for p in current_positions]}',
+            'reason': f'Sector "{sector}" already at limit ({max_per_sector}): {check["held"][sector]}',
             'sector': sector,
             'current_in_sector': count,
         }
@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Security Master
+Local reference table for every symbol we trade or screen: sector, industry, market cap
+bucket, optionability and ETF flag. Replaces the hand-typed SECTOR_MAP dicts.
+
+- refresh() fetches missing / stale symbols concurrently (yf_broker.info + listed option
+  expirations) and writes them in one atomic replace, merged under an exclusive lock.
+  A failed fetch (error or empty .info) keeps the previous row and its fetch date, so the
+  symbol is retried after RETRY_AFTER_SEC; symbols never fetched fall back to SEED_SECTORS
+  (the old hand-typed map) until a fetch succeeds.
+- The table is one structured NumPy file (cache/security_master.npy), rows sorted by symbol.
+  Readers load it once and reload only when its mtime changes; the in-memory index keeps a
+  symbol → row dict (O(1) lookups) and integer sector codes for vectorized group-bys.
+- Sectors use GICS names ('Financials', 'Consumer Discretionary', ...); ETFs are 'ETF',
+  symbols without data 'Unknown'.
+
+Usage:
+  python3 security_master.py refresh [--force]     # screener universe + major ETFs
+  python3 security_master.py AAPL COIN XLK          # show rows
+
+  import security_master
+  security_master.sector('COIN')                    # 'Financials'
+  security_master.lookup(symbols)                   # DataFrame, one batched refresh
+  security_master.sector_totals(symbols, values)    # Series { sector: sum }, one bincount
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from pathlib import Path
+import fcntl
+import logging
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import yf_broker
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = Path.home() / ".openclaw" / "workspace" / "trading" / "cache"
+CACHE_DIR.mkdir(parents=True, exist_ok=True)
+MASTER_FILE = CACHE_DIR / "security_master.npy"
+MASTER_LOCK_FILE = CACHE_DIR / "security_master.lock"
+
+MAX_AGE_DAYS = 30        # Re-fetch rows older than this
+UNKNOWN_MAX_AGE_DAYS = 1 # ... or this, for rows without a sector
+MAX_WORKERS = 16         # Concurrent yfinance requests
+RETRY_AFTER_SEC = 15 * 60  # Failed symbols are not re-fetched sooner than this (per process)
+
+UNKNOWN = 'Unknown'
+ETF = 'ETF'
+COLUMNS = ('sector', 'industry', 'cap_bucket', 'market_cap', 'optionable', 'is_etf')
+MASTER_DTYPE = np.dtype([
+    ("symbol", "U12"), ("sector", "U24"), ("industry", "U48"), ("cap_bucket", "U5"),
+    ("market_cap", "f8"), ("optionable", "?"), ("is_etf", "?"), ("fetched_day", "i4"),
+])
+MISSING_ROW = np.array([("", UNKNOWN, "", "", np.nan, False, False, -1)], dtype=MASTER_DTYPE)
+
+# Yahoo sector names → GICS names used across the trading scripts
+SECTOR_NAMES = {
+    'Financial Services': 'Financials',
+    'Consumer Cyclical': 'Consumer Discretionary',
+    'Consumer Defensive': 'Consumer Staples',
+    'Basic Materials': 'Materials',
+}
+# (minimum market cap, bucket), largest first
+CAP_BUCKETS = ((200e9, 'mega'), (10e9, 'large'), (2e9, 'mid'), (300e6, 'small'), (0, 'micro'))
+FUND_TYPES = {'ETF', 'MUTUALFUND'}
+
+# Fallback sectors for symbols Yahoo hasn't answered for yet (the old SECTOR_MAP)
+SEED_SECTORS = {
+    # Technology
+    'AAPL': 'Technology', 'MSFT': 'Technology', 'NVDA': 'Technology', 'GOOGL': 'Technology',
+    'META': 'Technology', 'INTC': 'Technology', 'AMD': 'Technology', 'AVGO': 'Technology',
+    'QCOM': 'Technology', 'ASML': 'Technology', 'NXPI': 'Technology', 'MCHP': 'Technology',
+    'LRCX': 'Technology', 'KLA': 'Technology', 'AMAT': 'Technology', 'CRWD': 'Technology',
+    'NET': 'Technology', 'DDOG': 'Technology', 'OKTA': 'Technology', 'SNOW': 'Technology',
+    'CRM': 'Technology', 'NOW': 'Technology', 'ADBE': 'Technology', 'CSCO': 'Technology',
+    'INTU': 'Technology', 'PAYC': 'Technology', 'SNPS': 'Technology', 'CDNS': 'Technology',
+    'SPLK': 'Technology', 'TWLO': 'Technology', 'ZM': 'Technology', 'TEAM': 'Technology',
+    'RBLX': 'Technology', 'U': 'Technology', 'DASH': 'Technology',
+
+    # Financials
+    'JPM': 'Financials', 'BAC': 'Financials', 'WFC': 'Financials', 'GS': 'Financials',
+    'MS': 'Financials', 'BLK': 'Financials', 'HOOD': 'Financials', 'SOFI': 'Financials',
+    'PYPL': 'Financials', 'SQ': 'Financials', 'ICL': 'Financials', 'APO': 'Financials',
+    'KKR': 'Financials', 'BX': 'Financials', 'ARES': 'Financials', 'TPG': 'Financials',
+    'SCHW': 'Financials', 'IBKR': 'Financials', 'TROW': 'Financials', 'ONYX': 'Financials',
+    'COIN': 'Financials',
+
+    # Energy
+    'XOM': 'Energy', 'CVX': 'Energy', 'COP': 'Energy', 'MPC': 'Energy', 'PSX': 'Energy',
+    'VLO': 'Energy', 'HES': 'Energy', 'EOG': 'Energy', 'FANG': 'Energy', 'OKE': 'Energy',
+    'GEVO': 'Energy', 'PLUG': 'Energy', 'FCEL': 'Energy',
+
+    # Healthcare
+    'JNJ': 'Healthcare', 'UNH': 'Healthcare', 'PFE': 'Healthcare', 'ABBV': 'Healthcare',
+    'TMO': 'Healthcare', 'ISRG': 'Healthcare', 'DXCM': 'Healthcare', 'VEEV': 'Healthcare',
+    'TDOC': 'Healthcare', 'GILD': 'Healthcare', 'BIIB': 'Healthcare', 'REGN': 'Healthcare',
+    'VRTX': 'Healthcare', 'ALXN': 'Healthcare', 'MRK': 'Healthcare', 'LLY': 'Healthcare',
+
+    # Industrials
+    'CAT': 'Industrials', 'BA': 'Industrials', 'HON': 'Industrials', 'ITW': 'Industrials',
+    'GE': 'Industrials', 'MMM': 'Industrials', 'RTX': 'Industrials', 'LUV': 'Industrials',
+    'UAL': 'Industrials', 'DAL': 'Industrials', 'ALK': 'Industrials', 'WAB': 'Industrials',
+    'UNP': 'Industrials', 'CSX': 'Industrials', 'KSU': 'Industrials',
+
+    # Consumer Discretionary
+    'AMZN': 'Consumer Discretionary', 'TSLA': 'Consumer Discretionary', 'MCD': 'Consumer Discretionary',
+    'NKE': 'Consumer Discretionary', 'SBUX': 'Consumer Discretionary', 'TJX': 'Consumer Discretionary',
+    'RCL': 'Consumer Discretionary', 'CCL': 'Consumer Discretionary', 'ROST': 'Consumer Discretionary',
+    'DKS': 'Consumer Discretionary', 'ULTA': 'Consumer Discretionary',
+
+    # Consumer Staples
+    'WMT': 'Consumer Staples', 'PG': 'Consumer Staples', 'KO': 'Consumer Staples',
+    'PEP': 'Consumer Staples', 'MO': 'Consumer Staples', 'PM': 'Consumer Staples',
+    'GIS': 'Consumer Staples', 'ADM': 'Consumer Staples', 'MKC': 'Consumer Staples',
+
+    # Real Estate
+    'SPG': 'Real Estate', 'DLR': 'Real Estate', 'PSA': 'Real Estate', 'ARE': 'Real Estate',
+    'WELL': 'Real Estate', 'PLD': 'Real Estate', 'VICI': 'Real Estate',
+
+    # Utilities
+    'NEE': 'Utilities', 'DUK': 'Utilities', 'SO': 'Utilities', 'EXC': 'Utilities',
+    'AES': 'Utilities', 'PEG': 'Utilities', 'ES': 'Utilities', 'EIX': 'Utilities',
+
+    # Materials
+    'NEM': 'Materials', 'FCX': 'Materials', 'TECK': 'Materials', 'ALB': 'Materials',
+    'LIN': 'Materials', 'SHW': 'Materials', 'APD': 'Materials', 'ECL': 'Materials',
+    'DOW': 'Materials', 'LYB': 'Materials',
+
+    # Communication Services
+    'NFLX': 'Communication Services', 'DIS': 'Communication Services', 'PARA': 'Communication Services',
+    'FOXA': 'Communication Services', 'FOX': 'Communication Services', 'CMCSA': 'Communication Services',
+    'CHTR': 'Communication Services', 'ATUS': 'Communication Services', 'PINS': 'Communication Services',
+    'SNAP': 'Communication Services', 'ROKU': 'Communication Services', 'TTD': 'Communication Services',
+    'MOMO': 'Communication Services', 'BILI': 'Communication Services', 'IQ': 'Communication Services',
+
+}
+
+_EPOCH = date(1970, 1, 1)
+_failed_at = {}  # symbol → time.monotonic() of its last failed fetch
+
+
+def _today() -> int:
+    return (datetime.now().date() - _EPOCH).days
+
+
+def cap_bucket(market_cap) -> str:
+    """'mega' | 'large' | 'mid' | 'small' | 'micro' ('' if unknown)"""
+    if not market_cap or not np.isfinite(market_cap):
+        return ''
+    return next(name for floor, name in CAP_BUCKETS if market_cap >= floor)
+
+
+class SecurityIndex:
+    """In-memory security master, reloaded when the file changes on disk."""
+
+    def __init__(self, path: Path = MASTER_FILE):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._set(np.empty(0, dtype=MASTER_DTYPE))
+
+    def _set(self, arr: np.ndarray):
+        # Trailing MISSING_ROW: row -1 (symbol not in the master) reads as Unknown
+        self.arr = np.concatenate([arr, MISSING_ROW])
+        self.pos = {sym: i for i, sym in enumerate(arr["symbol"].tolist())}
+        names, codes = np.unique(self.arr["sector"], return_inverse=True)
+        self.sectors = names.tolist()
+        self.sector_code = codes.astype(np.int32)
+
+    def _refresh(self):
+        try:
+            st = self.path.stat()
+            stamp = (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            stamp = None
+        if stamp != self._stamp:
+            with self._lock:
+                if stamp != self._stamp:
+                    arr = np.empty(0, dtype=MASTER_DTYPE)
+                    if stamp is not None:
+                        try:
+                            arr = np.load(self.path)
+                        except Exception as e:
+                            logger.warning(f"Security master unreadable ({e}); treating as empty")
+                    self._set(arr)
+                    self._stamp = stamp
+
+    def rows(self, symbols) -> np.ndarray:
+        """Row numbers aligned with symbols (-1 where not in the master)."""
+        self._refresh()
+        pos = self.pos
+        return np.fromiter((pos.get(s.upper(), -1) for s in symbols), dtype=np.int64, count=len(symbols))
+
+    def codes(self, symbols):
+        """Returns: (sector codes aligned with symbols, sector names indexed by code)"""
+        idx = self.rows(symbols)
+        return self.sector_code[idx], self.sectors
+
+    def frame(self, symbols) -> pd.DataFrame:
+        """Master rows for symbols (Unknown / defaults where missing), indexed by symbol."""
+        idx = self.rows(symbols)
+        rows = self.arr[idx]
+        return pd.DataFrame({col: rows[col] for col in COLUMNS},
+                            index=pd.Index([s.upper() for s in symbols], name='symbol'))
+
+
+_index = SecurityIndex()
+
+
+# --- fetching ---
+
+def _fetch_one(symbol: str, prev) -> tuple:
+    """
+    One master row for symbol. Raises on fetch errors or an empty .info.
+    Optionability is fetched separately; if that fails the previous flag is kept.
+    """
+    info = yf_broker.info(symbol)
+    if not info:
+        raise ValueError("empty info")
+    is_etf = str(info.get('quoteType', '')).upper() in FUND_TYPES
+    sector = info.get('sector')
+    sector = ETF if is_etf else SECTOR_NAMES.get(sector, sector) or UNKNOWN
+    industry = info.get('industry') or (info.get('category') if is_etf else None) or ''
+    market_cap = float(info.get('marketCap') or info.get('totalAssets') or np.nan)
+    try:
+        optionable = bool(yf_broker.options(symbol))
+    except Exception as e:
+        logger.debug(f"Failed to fetch option expirations for {symbol}: {e}")
+        optionable = bool(prev["optionable"])
+    return (symbol, sector, industry, cap_bucket(market_cap), market_cap, optionable, is_etf, _today())
+
+
+def _write(rows: list):
+    """Merge master rows into the file under an exclusive lock."""
+    with open(MASTER_LOCK_FILE, "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        _index._refresh()
+        merged = {str(r["symbol"]): tuple(r) for r in _index.arr[:-1]}
+        merged.update({r[0]: r for r in rows})
+        arr = np.array(list(merged.values()), dtype=MASTER_DTYPE)
+        arr.sort(order="symbol")
+        tmp = MASTER_FILE.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            np.save(f, arr)
+        os.replace(tmp, MASTER_FILE)
+
+
+def refresh(symbols, force=False) -> dict:
+    """
+    Fetch every symbol that is missing or older than MAX_AGE_DAYS (UNKNOWN_MAX_AGE_DAYS for
+    rows without a sector; all of them if force),
+    concurrently, then write the master once. Symbols that failed within RETRY_AFTER_SEC
+    are skipped.
+    Returns: { requested, fetched, failed, seeded, seconds }
+    """
+    symbols = sorted({s.upper() for s in symbols})
+    today = _today()
+    if force:
+        stale = symbols
+    else:
+        idx = _index.rows(symbols)
+        fetched = _index.arr["fetched_day"][idx]
+        max_age = np.where(_index.arr["sector"][idx] == UNKNOWN, UNKNOWN_MAX_AGE_DAYS, MAX_AGE_DAYS)
+        stale = [s for s, f, age in zip(symbols, fetched, max_age) if f < 0 or today - f > age]
+    now = time.monotonic()
+    stale = [s for s in stale if now - _failed_at.get(s, -RETRY_AFTER_SEC) >= RETRY_AFTER_SEC]
+
+    t0 = time.time()
+    rows, failed, seeded = [], 0, 0
+    if stale:
+        idx = _index.rows(stale)
+        previous = _index.arr[idx]
+
+        def fetch(args):
+            sym, prev = args
+            try:
+                return _fetch_one(sym, prev)
+            except Exception as e:
+                logger.debug(f"Failed to fetch security info for {sym}: {e}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(stale))) as pool:
+            for sym, prev, row in zip(stale, previous, pool.map(fetch, zip(stale, previous))):
+                if row is not None:
+                    _failed_at.pop(sym, None)
+                    rows.append(row)
+                    continue
+                # Keep the previous row and its fetch date so the symbol is retried; a symbol
+                # never fetched gets its seed sector meanwhile (fetched_day -1)
+                failed += 1
+                _failed_at[sym] = time.monotonic()
+                if prev["fetched_day"] < 0 and prev["sector"] == UNKNOWN and sym in SEED_SECTORS:
+                    rows.append((sym, SEED_SECTORS[sym], '', '', np.nan, False, False, -1))
+                    seeded += 1
+        if rows:
+            _write(rows)
+    stats = {"requested": len(symbols), "fetched": len(rows) - seeded, "failed": failed,
+             "seeded": seeded, "seconds": round(time.time() - t0, 2)}
+    if stale:
+        logger.info(f"Security master refresh: {stats}")
+    return stats
+
+
+# --- queries ---
+
+def lookup(symbols, refresh_missing=True) -> pd.DataFrame:
+    """
+    Master rows for symbols (one batched refresh of missing / stale symbols first).
+    Returns: DataFrame indexed by symbol [sector, industry, cap_bucket, market_cap, optionable, is_etf]
+    """
+    symbols = list(symbols)
+    if refresh_missing and symbols:
+        refresh(symbols)
+    return _index.frame(symbols)
+
+
+def sector(symbol: str, refresh_missing=True) -> str:
+    """Sector for a symbol ('Unknown' if not classified)."""
+    return sectors([symbol], refresh_missing)[0]
+
+
+def sectors(symbols, refresh_missing=True) -> np.ndarray:
+    """Sector names aligned with symbols."""
+    codes, names = sector_codes(symbols, refresh_missing)
+    return np.asarray(names, dtype=object)[codes]
+
+
+def sector_codes(symbols, refresh_missing=True):
+    """
+    Integer sector codes for vectorized group-bys (np.bincount, boolean masks...).
+    Returns: (int ndarray aligned with symbols, sector names indexed by code)
+    """
+    symbols = list(symbols)
+    if refresh_missing and symbols:
+        refresh(symbols)
+    return _index.codes(symbols)
+
+
+def sector_totals(symbols, values=None, refresh_missing=True) -> pd.Series:
+    """
+    Group-by sector in one pass: sum of values per sector (count of symbols if values is None).
+    Returns: Series { sector: total }, sectors without symbols omitted, largest first
+    """
+    codes, names = sector_codes(symbols, refresh_missing)
+    weights = None if values is None else np.asarray(values, dtype=float)
+    totals = np.bincount(codes, weights=weights, minlength=len(names))
+    present = np.bincount(codes, minlength=len(names)) > 0
+    return pd.Series(totals[present], index=np.asarray(names, dtype=object)[present]).sort_values(ascending=False)
+
+
+def _universe() -> list:
+    """Screener universe plus the major ETFs."""
+    from nx_screener_production import get_universe_symbols
+    from market_universe import get_major_etfs
+    return sorted(set(get_universe_symbols()) | set(get_major_etfs()))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    args = sys.argv[1:]
+    if args and args[0] == "refresh":
+        print(refresh(_universe(), force="--force" in args))
+    else:
+        print(lookup(args or ["AAPL", "COIN", "JPM", "XLK"]).to_string())
@@ -4,6 +4,7 @@ Test IB Gateway connection
 """
 import sys
 from ib_insync import IB, util
+from ib_order_service import client_id
 
 def test_connection():
     ib = IB()
@@ -11,11 +12,11 @@ def test_connection():
     print("Attempting to connect to IB Gateway...")
     print("Host: 127.0.0.1")
     print("Port: 4002 (paper trading)")
-    print("Client ID: 101")
+    print(f"Client ID: {client_id('test')}")
     print()
     
     try:
-        ib.connect('127.0.0.1', 4002, clientId=101, timeout=10)
+        ib.connect('127.0.0.1', 4002, clientId=client_id('test'), timeout=10)
         print("✅ Connected successfully!")
         print()
         
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Trade Journal
+Embedded SQLite store for trade intents and executions, replacing the per-trade
+JSON files in trading/pending/ and trading/logs/ (which every reader globbed and
+parsed on each call).
+
+One row per intent / execution:
+- status: pending | executed | rejected
+- source: webhook (listener / options_monitor intents) | auto_options (auto_options_executor fills)
+- kind:   stock | option
+- indexed on trade_date, ticker, strategy, token and status
+
+Usage:
+  python3 trade_journal.py migrate   # one-time import of logs/*.json and pending/*.json (idempotent)
+  python3 trade_journal.py stats
+  python3 trade_journal.py check     # regression check of intent dating on a scratch journal (exit 1 on failure)
+
+  import trade_journal as journal
+  journal.add_pending(intent)
+  journal.find_pending(token=token)
+  journal.trades(since=date.today(), source='webhook')
+"""
+
+from contextlib import closing
+from datetime import datetime, date
+from pathlib import Path
+import json
+import logging
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+TRADING_DIR = Path(__file__).resolve().parents[1]
+JOURNAL_PATH = TRADING_DIR / 'trade_journal.db'
+LOGS_DIR = TRADING_DIR / 'logs'
+PENDING_DIR = TRADING_DIR / 'pending'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    id          TEXT PRIMARY KEY,
+    token       TEXT,
+    status      TEXT NOT NULL,
+    source      TEXT NOT NULL,
+    kind        TEXT NOT NULL,
+    strategy    TEXT,
+    ticker      TEXT,
+    side        TEXT,
+    option_type TEXT,
+    ts          INTEGER,
+    trade_date  TEXT,
+    data        TEXT NOT NULL,
+    result      TEXT,
+    updated_at  TEXT
+);
+CREATE INDEX IF NOT EXISTS trades_date ON trades (trade_date);
+CREATE INDEX IF NOT EXISTS trades_ticker ON trades (ticker, trade_date);
+CREATE INDEX IF NOT EXISTS trades_strategy ON trades (strategy, trade_date);
+CREATE INDEX IF NOT EXISTS trades_status ON trades (status, source, trade_date);
+CREATE UNIQUE INDEX IF NOT EXISTS trades_token ON trades (token) WHERE token IS NOT NULL;
+"""
+
+_ready = set()
+_ready_lock = threading.Lock()
+
+
+def connect(path: Path = None) -> sqlite3.Connection:
+    """Connection to the journal (schema created on first use). Cheap; open one per operation."""
+    path = Path(path or JOURNAL_PATH)
+    conn = sqlite3.connect(path, timeout=10)
+    conn.row_factory = sqlite3.Row
+    if path not in _ready:
+        with _ready_lock:
+            conn.execute("PRAGMA journal_mode=WAL")  # Readers don't block the listener's writes
+            conn.executescript(SCHEMA)
+            _backfill_dates(conn)
+            _ready.add(path)
+    return conn
+
+
+def _created_at(intent: dict) -> datetime:
+    """
+    When an intent was created (local time): the epoch-seconds prefix of its id
+    ('<epoch>-<hex>', webhook_listener / options_monitor), else its alert ts
+    (epoch ms or ISO date-time, per alerts.schema.json), else now.
+    """
+    prefix = str(intent.get('id', '')).split('-', 1)[0]
+    if prefix.isdigit():
+        return datetime.fromtimestamp(int(prefix))
+    ts = intent.get('ts')
+    try:
+        if isinstance(ts, (int, float)):
+            return datetime.fromtimestamp(ts / 1000)
+        if isinstance(ts, str) and ts:
+            parsed = datetime.fromisoformat(ts.replace('Z', '+00:00'))
+            return parsed.astimezone().replace(tzinfo=None) if parsed.tzinfo else parsed
+    except (ValueError, OverflowError, OSError):
+        logger.warning(f"Journal: unparseable ts {ts!r} on intent {intent.get('id')}")
+    return datetime.now()
+
+
+def _backfill_dates(conn: sqlite3.Connection):
+    """Date rows journaled before trade_date came from the creation time (ts null or ISO)."""
+    rows = conn.execute("SELECT id, data FROM trades WHERE trade_date IS NULL").fetchall()
+    with conn:
+        for r in rows:
+            created = _created_at(json.loads(r['data']))
+            conn.execute("UPDATE trades SET ts = ?, trade_date = ? WHERE id = ?",
+                         (int(created.timestamp() * 1000), created.date().isoformat(), r['id']))
+    if rows:
+        logger.info(f"Journal: dated {len(rows)} rows without a trade_date")
+
+
+def _row(intent: dict, status: str, source: str, result=None) -> dict:
+    """Journal columns for an intent (webhook/options_monitor format)."""
+    created = _created_at(intent)
+    side = intent.get('signal') or intent.get('side')
+    return {
+        'id': str(intent['id']),
+        'token': intent.get('token'),
+        'status': status,
+        'source': source,
+        'kind': 'option' if intent.get('option_type') else 'stock',
+        'strategy': intent.get('type') or intent.get('setup'),
+        'ticker': intent.get('ticker'),
+        'side': str(side).lower() if side else None,
+        'option_type': intent.get('option_type'),
+        'ts': int(created.timestamp() * 1000),
+        'trade_date': created.date().isoformat(),
+        'data': json.dumps(intent),
+        'result': result,
+        'updated_at': datetime.now().isoformat(),
+    }
+
+
+def _fill_row(fill: dict, fill_id: str = None) -> dict:
+    """Journal columns for an auto_options_executor fill (no intent, executed_at timestamp)."""
+    executed = datetime.fromisoformat(fill['executed_at'])
+    return {
+        'id': fill_id or f"options_{int(executed.timestamp() * 1000)}",
+        'token': None,
+        'status': 'executed',
+        'source': 'auto_options',
+        'kind': 'option',
+        'strategy': fill.get('type'),
+        'ticker': fill.get('ticker'),
+        'side': 'sell',
+        'option_type': {'C': 'call', 'P': 'put'}.get(fill.get('right'), fill.get('right')),
+        'ts': int(executed.timestamp() * 1000),
+        'trade_date': executed.date().isoformat(),
+        'data': json.dumps(fill),
+        'result': fill.get('status'),
+        'updated_at': datetime.now().isoformat(),
+    }
+
+
+def _upsert(conn: sqlite3.Connection, row: dict, replace=True):
+    cols = ', '.join(row)
+    marks = ', '.join('?' for _ in row)
+    verb = 'INSERT OR REPLACE' if replace else 'INSERT OR IGNORE'
+    cur = conn.execute(f"{verb} INTO trades ({cols}) VALUES ({marks})", list(row.values()))
+    return cur.rowcount
+
+
+def add_pending(intent: dict):
+    """Store a new intent awaiting approval."""
+    with closing(connect()) as conn, conn:
+        _upsert(conn, _row(intent, 'pending', 'webhook'))
+
+
+def mark_executed(intent: dict, result: str):
+    """Pending intent → executed (result = broker message)."""
+    with closing(connect()) as conn, conn:
+        _upsert(conn, _row(intent, 'executed', 'webhook', result))
+
+
+def mark_rejected(intent: dict):
+    """Pending intent → rejected."""
+    with closing(connect()) as conn, conn:
+        _upsert(conn, _row(intent, 'rejected', 'webhook'))
+
+
+def record_option_fill(fill: dict):
+    """Store an auto_options_executor fill."""
+    with closing(connect()) as conn, conn:
+        _upsert(conn, _fill_row(fill))
+
+
+def find_pending(intent_id: str = None, token: str = None):
+    """
+    Pending intent by id or approval token (indexed lookup).
+    Returns: intent dict, or None if unknown or no longer pending
+    """
+    key, value = ('token', token) if token else ('id', intent_id)
+    with closing(connect()) as conn:
+        row = conn.execute(f"SELECT data FROM trades WHERE {key} = ? AND status = 'pending'",
+                           (value,)).fetchone()
+    return json.loads(row['data']) if row else None
+
+
+def list_pending() -> list:
+    """All pending intents, oldest first."""
+    with closing(connect()) as conn:
+        rows = conn.execute("SELECT data FROM trades WHERE status = 'pending' ORDER BY ts").fetchall()
+    return [json.loads(r['data']) for r in rows]
+
+
+def count_pending() -> int:
+    with closing(connect()) as conn:
+        return conn.execute("SELECT COUNT(*) FROM trades WHERE status = 'pending'").fetchone()[0]
+
+
+def _where(since=None, until=None, **filters):
+    clauses, args = [], []
+    if since is not None:
+        clauses.append("trade_date >= ?")
+        args.append(since.isoformat() if isinstance(since, date) else since)
+    if until is not None:
+        clauses.append("trade_date <= ?")
+        args.append(until.isoformat() if isinstance(until, date) else until)
+    for col, value in filters.items():
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple, set)):
+            clauses.append(f"{col} IN ({', '.join('?' for _ in value)})")
+            args.extend(value)
+        else:
+            clauses.append(f"{col} = ?")
+            args.append(value)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", args
+
+
+def trades(since=None, until=None, status='executed', source=None, kind=None,
+           ticker=None, strategy=None, side=None) -> list:
+    """
+    Journal rows matching the filters (dates inclusive, by local trade date).
+    Any filter may be a single value or a list; None = don't filter.
+    Returns: list of { id, status, source, kind, strategy, ticker, side, option_type,
+             ts, trade_date, data (intent or fill dict), result }, oldest first
+    """
+    where, args = _where(since, until, status=status, source=source, kind=kind,
+                         ticker=ticker, strategy=strategy, side=side)
+    with closing(connect()) as conn:
+        rows = conn.execute(f"SELECT * FROM trades{where} ORDER BY ts", args).fetchall()
+    out = []
+    for r in rows:
+        rec = dict(r)
+        rec['data'] = json.loads(rec['data'])
+        rec.pop('token', None)
+        rec.pop('updated_at', None)
+        out.append(rec)
+    return out
+
+
+def count(since=None, until=None, status='executed', source=None, kind=None,
+          ticker=None, strategy=None, side=None) -> int:
+    """Number of journal rows matching the filters (same filters as trades())."""
+    where, args = _where(since, until, status=status, source=source, kind=kind,
+                         ticker=ticker, strategy=strategy, side=side)
+    with closing(connect()) as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM trades{where}", args).fetchone()[0]
+
+
+def migrate(logs_dir: Path = LOGS_DIR, pending_dir: Path = PENDING_DIR) -> dict:
+    """
+    One-time import of the JSON trade files. Safe to re-run: rows already in the
+    journal are kept (the journal wins over stale files). Files are left in place.
+    - logs/<id>.json          { intent, result }  → executed
+    - logs/rejected-<id>.json intent              → rejected
+    - logs/options_<ts>.json  fill                → executed (auto_options)
+    - pending/<id>.json       intent              → pending
+    Other logs (gap_risk_*, news, regime state...) are not trades and are skipped.
+    Returns: { imported, skipped, errors }
+    """
+    t0 = time.time()
+    stats = {'imported': 0, 'skipped': 0, 'errors': 0}
+    files = [(p, 'pending') for p in sorted(Path(pending_dir).glob('*.json'))]
+    files += [(p, 'log') for p in sorted(Path(logs_dir).glob('*.json'))]
+
+    with closing(connect()) as conn, conn:
+        for path, where in files:
+            try:
+                data = json.loads(path.read_text())
+                if where == 'pending':
+                    row = _row(data, 'pending', 'webhook') if data.get('id') else None
+                elif path.name.startswith('options_'):
+                    row = _fill_row(data, fill_id=path.stem) if data.get('executed_at') else None
+                elif path.name.startswith('rejected-'):
+                    row = _row(data, 'rejected', 'webhook') if data.get('id') else None
+                elif isinstance(data.get('intent'), dict) and data['intent'].get('id'):
+                    row = _row(data['intent'], 'executed', 'webhook', data.get('result'))
+                else:
+                    row = None
+                if row is None:
+                    stats['skipped'] += 1
+                    continue
+                if where == 'log':
+                    # A log supersedes a leftover pending file for the same intent
+                    conn.execute("DELETE FROM trades WHERE id = ? AND status = 'pending'", (row['id'],))
+                stats['imported'] += _upsert(conn, row, replace=False)
+            except Exception as e:
+                logger.warning(f"Journal migrate: {path.name}: {e}")
+                stats['errors'] += 1
+
+    logger.info(f"Journal migrate: {stats} in {time.time() - t0:.2f}s → {JOURNAL_PATH}")
+    return stats
+
+
+def check() -> int:
+    """
+    Regression check on a scratch journal: intents with an ISO, null or epoch-ms ts
+    (and ids with or without an epoch prefix) all get a trade_date and are found by
+    trades(since=...).
+    Returns: 0 if every case passes, 1 otherwise
+    """
+    global JOURNAL_PATH
+    now = datetime.now()
+    day = now.date().isoformat()
+    epoch = int(now.timestamp())
+    cases = [
+        ({'id': f'{epoch}-aaaa0001', 'ts': '2020-01-02T15:30:00Z'}, day),   # id wins over ts
+        ({'id': f'{epoch}-aaaa0002', 'ts': None}, day),
+        ({'id': f'{epoch}-aaaa0003', 'ts': epoch * 1000}, day),
+        ({'id': 'manual-1', 'ts': '2020-01-02T10:00:00'}, '2020-01-02'),
+        ({'id': 'manual-2', 'ts': 1577977200000}, datetime.fromtimestamp(1577977200).date().isoformat()),
+        ({'id': 'manual-3', 'ts': None}, day),
+    ]
+    failures = 0
+    saved = JOURNAL_PATH
+    with tempfile.TemporaryDirectory() as tmp:
+        JOURNAL_PATH = Path(tmp) / 'trade_journal.db'
+        try:
+            for intent, want in cases:
+                intent = {**intent, 'ticker': 'SPY', 'signal': 'buy'}
+                mark_executed(intent, 'ok')
+                found = [t['trade_date'] for t in trades(since=want, until=want) if t['id'] == intent['id']]
+                if found != [want]:
+                    logger.error(f"FAIL {intent['id']} ts={intent['ts']!r}: trade_date {found} (want {want})")
+                    failures += 1
+        finally:
+            JOURNAL_PATH = saved
+    logger.info(f"Journal check: {len(cases) - failures}/{len(cases)} intents dated")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    cmd = sys.argv[1] if len(sys.argv) > 1 else 'stats'
+    if cmd == 'migrate':
+        print(migrate())
+    elif cmd == 'stats':
+        with closing(connect()) as conn:
+            for r in conn.execute("SELECT status, source, kind, COUNT(*) n FROM trades "
+                                  "GROUP BY status, source, kind ORDER BY status"):
+                print(f"{r['status']:<9} {r['source']:<13} {r['kind']:<7} {r['n']}")
+    elif cmd == 'check':
+        sys.exit(check())
+    else:
+        print("Usage: trade_journal.py [migrate|stats|check]")
+        sys.exit(1)
@@ -8,48 +8,57 @@ TODO: Confirm exact indicator windows and thresholds with Ryan.
 import sys
 import json
 import pandas as pd
+from datetime import datetime, timedelta
 try:
-    import yfinance as yf  # type: ignore
+    from bar_store import get_bars
+    from nx_metrics import build_panel, on_own_bars
 except Exception as e:
-    print("Missing dependency: yfinance (pip install yfinance)")
+    print(f"Missing dependency: {e} (pip install yfinance)")
     sys.exit(1)
 
 DEFAULT_WATCHLIST = ["NVDA","AMD","SMCI","DELL","PLTR","TSLA"]
 
+def trend_signals(panel: dict) -> dict:
+    """
+    MA50/MA200 + MACD + 52w-low rules on every date of a (dates × symbols) panel
+    (nx_metrics.build_panel); row t only uses the symbol's own bars up to t.
+    Returns: { signal, ma50, ma200, macd, macd_signal } DataFrames
+    """
+    return on_own_bars(panel, _trend_rules)
+
+
+def _trend_rules(panel: dict) -> dict:
+    close = panel["Close"]
+    ma50 = close.rolling(50).mean()
+    ma200 = close.rolling(200).mean()
+    ema12 = close.ewm(span=12, adjust=False).mean()
+    ema26 = close.ewm(span=26, adjust=False).mean()
+    macd = ema12 - ema26
+    macd_signal = macd.ewm(span=9, adjust=False).mean()
+    low_52w = close.rolling(252, min_periods=1).min()
+    signal = ((close > ma50) & (close > ma200) & (ma50 > ma200) & (macd > macd_signal)
+              & ~(close <= low_52w * 1.3))
+    return {"signal": signal, "ma50": ma50, "ma200": ma200, "macd": macd, "macd_signal": macd_signal}
+
+
 def screen(tickers):
     out = []
-    for t in tickers:
-        try:
-            data = yf.download(t, period="1y", progress=False)
-            if data.empty:
-                continue
-            data["MA50"] = data["Close"].rolling(50).mean()
-            data["MA200"] = data["Close"].rolling(200).mean()
-            ema12 = data["Close"].ewm(span=12, adjust=False).mean()
-            ema26 = data["Close"].ewm(span=26, adjust=False).mean()
-            data["MACD"] = ema12 - ema26
-            data["Signal"] = data["MACD"].ewm(span=9, adjust=False).mean()
-            latest = data.iloc[-1]
-            conds = [
-                latest["Close"] > latest["MA50"],
-                latest["Close"] > latest["MA200"],
-                latest["MA50"] > latest["MA200"],
-                latest["MACD"] > latest["Signal"],
-            ]
-            if not all(conds):
-                continue
-            low_52w = data["Close"].min()
-            if latest["Close"] <= low_52w * 1.3:
-                continue
-            out.append({
-                "Ticker": t,
-                "Price": round(float(latest["Close"]), 2),
-                "MA50": round(float(latest["MA50"]), 2),
-                "MA200": round(float(latest["MA200"]), 2),
-                "MACD_minus_Signal": round(float(latest["MACD"] - latest["Signal"]), 3),
-            })
-        except Exception as e:
-            print(f"WARN: {t}: {e}")
+    bars = get_bars(tickers, start=datetime.now() - timedelta(days=365))
+    bars = {t: bars[t] for t in tickers if t in bars and not bars[t].empty}
+    if not bars:
+        return pd.DataFrame(out)
+    sig = trend_signals(build_panel(bars))
+    for t, data in bars.items():
+        day = data.index[-1]
+        if not sig["signal"].at[day, t]:
+            continue
+        out.append({
+            "Ticker": t,
+            "Price": round(float(data["Close"].iloc[-1]), 2),
+            "MA50": round(float(sig["ma50"].at[day, t]), 2),
+            "MA200": round(float(sig["ma200"].at[day, t]), 2),
+            "MACD_minus_Signal": round(float(sig["macd"].at[day, t] - sig["macd_signal"].at[day, t]), 3),
+        })
     return pd.DataFrame(out)
 
 if __name__ == "__main__":
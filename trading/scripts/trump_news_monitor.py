@@ -4,8 +4,11 @@ Trump Policy News Monitor
 Tracks X (@realDonaldTrump) and Truth Social posts
 Alerts on market-moving announcements: tariffs, trade, taxes, Fed policy
 
-Runs: Every 5 minutes during trading hours
+Runs: Every 5 minutes during trading hours (one concurrent pass over all sources),
+      or continuously with --watch (news_engine.py: each source on its own schedule,
+      alerts seconds after a post appears)
 Alerts: Telegram with market impact assessment
+Log: logs/trump_news.jsonl, one JSON line per classified post
 """
 
 import os
@@ -16,6 +19,11 @@ from pathlib import Path
 import requests
 from enum import Enum
 
+from keyword_matcher import KeywordMatcher
+from news_engine import NewsEngine, append_event, read_events
+
+FEEDS = ['trump_x', 'trump_truth_social', 'whitehouse']
+
 class MarketImpact(Enum):
     CRITICAL = "🚨 CRITICAL"  # Immediate trading halt needed
     HIGH = "⚠️ HIGH"           # Potential position adjustment needed
@@ -25,8 +33,9 @@ class MarketImpact(Enum):
 class TrumpNewsMonitor:
     def __init__(self):
         self.trading_dir = Path(__file__).resolve().parents[1]
-        self.log_file = self.trading_dir / 'logs' / 'trump_news.json'
+        self.log_file = self.trading_dir / 'logs' / 'trump_news.jsonl'
         self.log_file.parent.mkdir(exist_ok=True)
+        self.engine = NewsEngine('trump_news', FEEDS, self.handle_posts, batch=True)
         
         # Telegram config
         self.telegram_bot_token = os.getenv('TELEGRAM_BOT_TOKEN')
@@ -70,36 +79,38 @@ class TrumpNewsMonitor:
                 'sectors': ['All sectors']
             }
         }
+        self.matcher = KeywordMatcher(self.keywords)
     
-    def load_history(self):
-        """Load previously seen posts"""
-        if self.log_file.exists():
-            return json.loads(self.log_file.read_text())
+    def load_history(self, limit=None):
+        """Load previously logged posts (last `limit` if given)"""
+        posts = read_events(self.log_file, limit)
         return {
-            'last_check': None,
-            'posts': []
+            'last_check': posts[-1]['timestamp'] if posts else None,
+            'posts': posts
         }
     
-    def save_history(self, history):
-        """Save post history"""
-        self.log_file.write_text(json.dumps(history, indent=2))
+    def log_post(self, entry):
+        """Append one classified post to the log"""
+        append_event(self.log_file, entry)
+    
+    def _highest_impact(self, match):
+        impacts = match['impacts']
+        if MarketImpact.CRITICAL in impacts:
+            return MarketImpact.CRITICAL
+        if MarketImpact.HIGH in impacts:
+            return MarketImpact.HIGH
+        return MarketImpact.LOW
     
     def classify_impact(self, post_text):
-        """Determine market impact level"""
-        text_lower = post_text.lower()
-        highest_impact = MarketImpact.LOW
-        matching_keywords = []
-        
-        for category, config in self.keywords.items():
-            for term in config['terms']:
-                if term.lower() in text_lower:
-                    matching_keywords.append((category, config['impact']))
-                    if config['impact'].value.startswith('🚨'):
-                        highest_impact = MarketImpact.CRITICAL
-                    elif highest_impact != MarketImpact.CRITICAL and config['impact'].value.startswith('⚠️'):
-                        highest_impact = MarketImpact.HIGH
-        
-        return highest_impact, matching_keywords
+        """
+        Determine market impact level (one compiled-matcher pass, whole words)
+        Returns: (highest impact, [(category, impact) per matched term])
+        """
+        return self.classify_many([post_text])[0]
+    
+    def classify_many(self, texts):
+        """classify_impact for a batch of posts in one matcher pass"""
+        return [(self._highest_impact(m), m['hits']) for m in self.matcher.match_many(texts)]
     
     def generate_alert(self, post_data, impact_level, keywords):
         """Generate Telegram alert"""
@@ -113,8 +124,10 @@ class TrumpNewsMonitor:
         emoji = impact_emoji.get(impact_level, "📰")
         timestamp = datetime.now().strftime("%I:%M %p MT")
         
-        # Extract key topics
-        topics = set([kw[0].replace('_', ' ').title() for kw in keywords])
+        # Extract key topics and the sectors they touch
+        categories = list(dict.fromkeys(kw[0] for kw in keywords))
+        topics = [c.replace('_', ' ').title() for c in categories]
+        sectors = list(dict.fromkeys(s for c in categories for s in self.keywords[c]['sectors']))
         
         alert = f"""{emoji} {impact_level.value} - Trump Policy Alert
 
@@ -125,7 +138,7 @@ class TrumpNewsMonitor:
 📱 Source: {post_data.get('source', 'Unknown')}
 
 🔄 Action Recommended:
-- Check affected sectors: Tech, Finance, Energy, Manufacturing
+- Check affected sectors: {', '.join(sectors)}
 - Monitor position exposure to tariff-sensitive stocks
 - Be ready to adjust if market gaps on open
 - Watch sector rotation patterns
@@ -161,53 +174,53 @@ class TrumpNewsMonitor:
             print(f"❌ Error sending alert: {e}")
             return False
     
+    def _fetch(self, feed):
+        return self.engine.fetch(feed) if feed in self.engine.sources else []
+    
     def monitor_x_api(self):
         """
-        Monitor X (Twitter) for Trump posts
-        Requires: Twitter API v2 Bearer Token
+        New X (Twitter) posts from @realDonaldTrump
+        Requires: Twitter API v2 Bearer Token (TWITTER_BEARER_TOKEN)
         """
-        # TODO: Implement with Twitter API v2
-        # Bearer token from: https://developer.twitter.com/
-        # Endpoint: /2/tweets/search/recent with query: from:@realDonaldTrump
-        
-        print("⚠️  X monitoring requires Twitter API v2 setup")
-        print("   Steps:")
-        print("   1. Get Twitter API key from https://developer.twitter.com/")
-        print("   2. Store in .env as TWITTER_BEARER_TOKEN")
-        print("   3. Query: from:@realDonaldTrump -is:retweet")
-        return []
+        return self._fetch('trump_x')
     
     def monitor_truth_social_api(self):
-        """
-        Monitor Truth Social for Trump posts
-        Requires: Truth Social API access or web scraping
-        """
-        # TODO: Implement with Truth Social API or beautifulsoup
-        # Truth Social account: @realDonaldTrump
-        # Base URL: https://truthsocial.com/@realDonaldTrump
-        
-        print("⚠️  Truth Social monitoring requires web scraping setup")
-        print("   Steps:")
-        print("   1. Use beautifulsoup + requests for web scraping")
-        print("   2. Monitor: https://truthsocial.com/@realDonaldTrump")
-        print("   3. Check every 5 minutes during market hours")
-        return []
+        """New Truth Social posts from @realDonaldTrump (public statuses API)"""
+        return self._fetch('trump_truth_social')
     
     def monitor_rss_feeds(self):
         """
-        Monitor RSS/webhooks for policy news
+        New White House policy announcements (RSS)
         More reliable than direct API monitoring
         """
-        # Alternative: Monitor news aggregators
-        sources = {
-            'policy_announcements': 'https://www.whitehouse.gov/feed/',
-            'trump_news': 'https://www.newsmax.com/feed/',  # Example
-            'tariff_news': 'https://www.cnbc.com/id/100003114/news/',  # Trade news
-        }
-        
-        # In production, implement RSS parsing
-        print("⚠️  RSS feed monitoring requires feedparser setup")
-        return []
+        return self._fetch('whitehouse')
+    
+    def handle_posts(self, posts):
+        """
+        Engine handler: classify a poll's new posts in one matcher pass, log them and
+        alert the market-moving ones
+        Returns: log entries of the alerted posts
+        """
+        entries = []
+        for post, (impact, keywords) in zip(posts, self.classify_many([p['text'] for p in posts])):
+            if not keywords:
+                continue
+            post_data = {'text': post['text'], 'source': post['label']}
+            sent = self.send_telegram_alert(self.generate_alert(post_data, impact, keywords))
+            entry = {
+                'id': post['id'],
+                'source': post['label'],
+                'text': post['text'],
+                'url': post.get('url'),
+                'published': post.get('published'),
+                'impact': impact.name,
+                'topics': sorted({kw[0] for kw in keywords}),
+                'alert_sent': sent,
+                'timestamp': datetime.now().isoformat(),
+            }
+            self.log_post(entry)
+            entries.append(entry)
+        return entries
     
     def check_manually(self):
         """
@@ -229,32 +242,39 @@ class TrumpNewsMonitor:
         """)
     
     def run(self):
-        """Main monitoring loop"""
+        """One concurrent pass over every source (cron: every 5 minutes)"""
         print("🚀 Trump News Monitor Starting")
-        print("⏰ Checking every 5 minutes during market hours")
+        print(f"📡 Sources: {', '.join(self.engine.sources) or 'none enabled'}")
         print("")
         
-        # Monitor sources
-        x_posts = self.monitor_x_api()
-        truth_posts = self.monitor_truth_social_api()
-        rss_posts = self.monitor_rss_feeds()
-        
-        # For now, use manual checking
-        self.check_manually()
+        alerts = self.engine.poll_once()
         
         # Log status
         status = {
             'timestamp': datetime.now().isoformat(),
-            'x_checked': len(x_posts) > 0,
-            'truth_social_checked': len(truth_posts) > 0,
-            'rss_checked': len(rss_posts) > 0,
-            'alerts_sent': 0
+            'sources': {src: {k: s[k] for k in ('polls', 'not_modified', 'errors', 'new', 'last_ms')}
+                        for src, s in self.engine.stats.items()},
+            'alerts_sent': sum(1 for a in alerts if a['alert_sent']),
         }
         
         print(f"\n✅ Monitor status: {json.dumps(status, indent=2)}")
         
         return status
+    
+    def watch(self, duration=None):
+        """Continuous monitoring: each source on its own schedule, alerts as posts arrive"""
+        print("🚀 Trump News Monitor watching (Ctrl+C to stop)")
+        self.engine.run(duration)
 
 if __name__ == "__main__":
+    import logging
+    import sys
+    logging.basicConfig(level=logging.INFO)
+    
     monitor = TrumpNewsMonitor()
-    monitor.run()
+    if '--watch' in sys.argv:
+        monitor.watch()
+    elif '--manual' in sys.argv:
+        monitor.check_manually()
+    else:
+        monitor.run()
@@ -8,13 +8,14 @@ TradingView → Webhook → Confirm-to-Execute (Paper) Listener
 Security:
 - Require SECRET via env MOLT_WEBHOOK_SECRET for ALL POST endpoints.
 - Approve/deny links use one-time tokens; do not embed the secret in URLs.
-- Never expose secrets in logs. Store pending intents under trading/pending/.
+- Never expose secrets in logs. Pending intents are stored in the trade journal.
 
 Env:
   MOLT_WEBHOOK_SECRET=changeme
   IB_HOST=127.0.0.1
   IB_PORT=7497      # 7497 paper, 7496 live
-  IB_CLIENT_ID=101
+  IB_CLIENT_ID=101   # first order-service connection (pool: 101, 111, ...)
+  IB_POOL_SIZE=2
   CANARY=1          # 1-share by default when set
   TELEGRAM_BOT_TOKEN=... (optional)
   TELEGRAM_CHAT_ID=...   (optional)
@@ -26,6 +27,7 @@ Usage:
 import os, json, time, uuid, pathlib, urllib.parse, urllib.request, sys
 from flask import Flask, request, jsonify
 from datetime import datetime, time as dtime
+from concurrent.futures import ThreadPoolExecutor
 import zoneinfo
 import nest_asyncio
 
@@ -33,6 +35,11 @@ import nest_asyncio
 SCRIPTS_DIR = pathlib.Path(__file__).parent
 sys.path.insert(0, str(SCRIPTS_DIR))
 
+from gate_pipeline import Gate, run_gates
+from hot_config import HotConfig, WatchlistIndex
+import trade_journal as journal
+from ib_order_service import get_service
+
 # Import regime params helper
 try:
     from get_regime_params import get_regime_params
@@ -44,55 +51,20 @@ except ImportError:
 # Allow nested event loops (required for Flask + ib_insync)
 nest_asyncio.apply()
 
-PENDING_DIR = pathlib.Path(__file__).resolve().parents[1] / 'pending'
-LOGS_DIR = pathlib.Path(__file__).resolve().parents[1] / 'logs'
 CONF_DIR = pathlib.Path(__file__).resolve().parents[1]
-PENDING_DIR.mkdir(parents=True, exist_ok=True)
-LOGS_DIR.mkdir(parents=True, exist_ok=True)
+# Intents and executions live in the trade journal (trade_journal.py), not pending/ and logs/
 
 try:
     import jsonschema  # type: ignore
 except Exception:
     jsonschema = None
 
-try:
-    from ib_insync import IB, Stock, MarketOrder, LimitOrder, BracketOrder, StopOrder  # type: ignore
-except Exception:
-    IB = None  # optional
-
 app = Flask(__name__)
 SECRET = os.getenv('MOLT_WEBHOOK_SECRET')
-IB_HOST = os.getenv('IB_HOST', '127.0.0.1')
-IB_PORT = int(os.getenv('IB_PORT', '7497'))
-IB_CLIENT_ID = int(os.getenv('IB_CLIENT_ID', '101'))
 
-# Global IB connection (reuse across requests)
-_ib_connection = None
-_ib_lock = None
+# Orders go through the long-lived IB order service (pooled connections, cached contracts)
+ORDERS = get_service()
 
-def get_ib_connection():
-    """Get or create IB connection (thread-safe)"""
-    global _ib_connection, _ib_lock
-    import threading
-    
-    if _ib_lock is None:
-        _ib_lock = threading.Lock()
-    
-    with _ib_lock:
-        if _ib_connection is None or not _ib_connection.isConnected():
-            if IB is None:
-                return None
-            _ib_connection = IB()
-            try:
-                print(f"Attempting IB connection to {IB_HOST}:{IB_PORT} with clientId {IB_CLIENT_ID}")
-                _ib_connection.connect(IB_HOST, IB_PORT, clientId=IB_CLIENT_ID, timeout=10)
-                print(f"✅ IB connected successfully! Account: {_ib_connection.managedAccounts()}")
-            except Exception as e:
-                print(f"❌ IB connection failed: {type(e).__name__}: {e}")
-                import traceback
-                traceback.print_exc()
-                _ib_connection = None
-        return _ib_connection
 CANARY = os.getenv('CANARY', '1') not in ('0', 'false', 'False')
 TG_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
 TG_CHAT = os.getenv('TELEGRAM_CHAT_ID')
@@ -102,9 +74,10 @@ BASE_URL = os.getenv('BASE_URL')  # required for Telegram approve links
 RISK_PATH = CONF_DIR / 'risk.json'
 FLAGS_PATH = CONF_DIR / 'feature_flags.json'
 WATCHLIST_PATH = CONF_DIR / 'watchlist.json'
-RISK = json.loads(RISK_PATH.read_text()) if RISK_PATH.exists() else {}
-FLAGS = json.loads(FLAGS_PATH.read_text()) if FLAGS_PATH.exists() else { 'setups': {} }
-WATCH = json.loads(WATCHLIST_PATH.read_text()) if WATCHLIST_PATH.exists() else {}
+# Re-read on change (screener rewrites watchlist.json; no restart needed) - use .get()
+RISK = HotConfig(RISK_PATH, {})
+FLAGS = HotConfig(FLAGS_PATH, { 'setups': {} })
+WATCH = HotConfig(WATCHLIST_PATH, {}, build=WatchlistIndex)
 
 ALERT_SCHEMA = {
     'type': 'object',
@@ -144,23 +117,27 @@ def require_secret(data):
     return True
 
 def within_trading_window_now():
+    hours = RISK.get().get('time_restrictions',{}).get('trading_hours',{})
     try:
-        tz = zoneinfo.ZoneInfo(RISK.get('time_restrictions',{}).get('trading_hours',{}).get('timezone','America/New_York'))
+        tz = zoneinfo.ZoneInfo(hours.get('timezone','America/New_York'))
     except Exception:
         tz = zoneinfo.ZoneInfo('America/New_York')
     now = datetime.now(tz).time()
-    start_s = RISK.get('time_restrictions',{}).get('trading_hours',{}).get('start','09:45')
-    end_s = RISK.get('time_restrictions',{}).get('trading_hours',{}).get('end','15:45')
+    start_s = hours.get('start','09:45')
+    end_s = hours.get('end','15:45')
     sh, sm = map(int, start_s.split(':'))
     eh, em = map(int, end_s.split(':'))
     return dtime(sh, sm) <= now <= dtime(eh, em)
 
 def rs_ratio_vs_spy(ticker, days):
     try:
-        import yfinance as yf  # lazy import
-        stock = yf.Ticker(ticker).history(period=f"{max(days+5, days)}d")
-        spy = yf.Ticker('SPY').history(period=f"{max(days+5, days)}d")
-        if stock.empty or spy.empty:
+        from bar_store import get_bars  # lazy import
+        from datetime import timedelta
+        # Calendar window wide enough to hold `days` trading bars
+        bars = get_bars([ticker, 'SPY'], start=datetime.now() - timedelta(days=days * 2 + 10))
+        stock = bars.get(ticker)
+        spy = bars.get('SPY')
+        if stock is None or spy is None or len(stock) < days or len(spy) < days:
             return None
         sret = (stock['Close'].iloc[-1] / stock['Close'].iloc[-days] - 1)
         bret = (spy['Close'].iloc[-1] / spy['Close'].iloc[-days] - 1)
@@ -170,9 +147,10 @@ def rs_ratio_vs_spy(ticker, days):
 
 def volume_ratio(ticker):
     try:
-        import yfinance as yf
-        hist = yf.Ticker(ticker).history(period='3mo')
-        if hist.empty:
+        from bar_store import get_bars
+        from datetime import timedelta
+        hist = get_bars([ticker], start=datetime.now() - timedelta(days=92)).get(ticker)
+        if hist is None or hist.empty:
             return None
         avg = float(hist['Volume'].tail(20).mean())
         last = float(hist['Volume'].iloc[-1])
@@ -183,53 +161,51 @@ def volume_ratio(ticker):
 def check_earnings_window(ticker):
     """
     Check if ticker has earnings within blackout window
+    Uses the shared earnings index (earnings_calendar) rather than a live lookup per alert.
     Returns: (ok: bool, reason: str)
     """
     try:
-        import yfinance as yf
-        from datetime import timedelta
-        
-        stock = yf.Ticker(ticker)
-        calendar = stock.calendar
+        from earnings_calendar import days_until_earnings
         
-        if calendar is None or calendar.empty:
+        days_until = days_until_earnings(ticker)
+        if days_until is None:
             # No earnings data available, allow trade
             return True, "No earnings data"
         
-        # Get next earnings date
-        if 'Earnings Date' in calendar:
-            earnings_dates = calendar['Earnings Date']
-            if isinstance(earnings_dates, str):
-                from dateutil import parser
-                next_earnings = parser.parse(earnings_dates)
-            else:
-                # Sometimes it's a list or array
-                next_earnings = earnings_dates[0] if hasattr(earnings_dates, '__iter__') else earnings_dates
-            
-            # Calculate days until earnings
-            now = datetime.now()
-            days_until = (next_earnings - now).days
-            
-            # Blackout: 5 days before to 2 days after
-            if -2 <= days_until <= 5:
-                return False, f"Earnings in {days_until} days (blackout: -2 to +5 days)"
+        # Blackout: 5 days before to 2 days after
+        if -2 <= days_until <= 5:
+            return False, f"Earnings in {days_until} days (blackout: -2 to +5 days)"
         
         return True, "Outside earnings window"
     except Exception as e:
         # If check fails, allow trading (fail open, but log)
         return True, f"Earnings check failed: {e}"
 
+REGIME_TTL_SEC = 15 * 60
+_regime_cache = {'ts': 0.0, 'state': None}
+
+def _market_regime():
+    """(SPY above 200 EMA, last VIX close) from the bar store, cached for REGIME_TTL_SEC"""
+    now = time.time()
+    if _regime_cache['state'] is None or now - _regime_cache['ts'] > REGIME_TTL_SEC:
+        from bar_store import get_bars
+        from datetime import timedelta
+        bars = get_bars(['SPY', '^VIX'], start=datetime.now() - timedelta(days=365))
+        spy, vix = bars.get('SPY'), bars.get('^VIX')
+        state = None
+        if spy is not None and vix is not None and not spy.empty and not vix.empty:
+            ema200 = spy['Close'].ewm(span=200, adjust=False).mean().iloc[-1]
+            state = (bool(spy['Close'].iloc[-1] > ema200), float(vix['Close'].iloc[-1]))
+        _regime_cache.update(ts=now, state=state)
+    return _regime_cache['state']
+
 def regime_allows(setup):
     # Simple regime gate using SPY 200 EMA and VIX level
     try:
-        import yfinance as yf
-        spy = yf.Ticker('SPY').history(period='1y')
-        vix = yf.Ticker('^VIX').history(period='6mo')
-        if spy.empty or vix.empty:
+        state = _market_regime()
+        if state is None:
             return True
-        ema200 = spy['Close'].ewm(span=200, adjust=False).mean().iloc[-1]
-        above = spy['Close'].iloc[-1] > ema200
-        vix_last = float(vix['Close'].iloc[-1])
+        above, vix_last = state
         if above and vix_last < 20:
             return True  # bull: all allowed
         if not above and vix_last > 25:
@@ -241,16 +217,11 @@ def regime_allows(setup):
         return True
 
 def check_daily_loss_limit():
-    """Check if daily loss limit has been exceeded"""
-    import subprocess
+    """Check if daily loss limit has been exceeded (in-process daily_pnl_tracker)"""
     try:
-        result = subprocess.run(
-            ['python3', str(CONF_DIR / 'scripts' / 'daily_pnl_tracker.py')],
-            capture_output=True,
-            text=True,
-            timeout=5
-        )
-        return result.returncode == 0, result.stdout
+        from daily_pnl_tracker import check_daily_loss_limit as daily_loss_check
+        ok, _current, _limit, msg = daily_loss_check()
+        return ok, msg
     except Exception as e:
         # If check fails, allow trading (fail open)
         return True, f"Daily loss check failed: {e}"
@@ -260,126 +231,157 @@ def is_trading_paused():
     pause_file = CONF_DIR / '.pause'
     return pause_file.exists()
 
-def passes_filters(alert):
-    # Normalize fields to internal names
-    ticker = alert.get('ticker') or alert.get('symbol')
-    signal = (alert.get('signal') or alert.get('side') or '').lower()
-    setup = alert.get('setup_type')
-
-    # Kill switch / manual pause
-    if is_trading_paused():
-        return False, "Trading paused (kill switch active)"
-
-    # Daily loss circuit breaker
-    loss_ok, loss_msg = check_daily_loss_limit()
-    if not loss_ok:
-        return False, "Daily loss limit exceeded - circuit breaker active"
-
-    # Trading window
-    if not within_trading_window_now():
-        return False, "Outside trading window"
-
-    # Watchlist (accept both flat and grouped)
-    in_watch = False
-    if isinstance(WATCH, dict) and ticker:
-        if 'watchlist' in WATCH:
-            in_watch = any(x.get('ticker') == ticker for x in WATCH['watchlist'])
-        else:
-            for arr in WATCH.values():
-                if isinstance(arr, list) and ticker in arr:
-                    in_watch = True
-                    break
-    if not in_watch:
-        return False, f"Ticker {ticker} not in watchlist"
-    
-    # Earnings blackout window
-    earnings_ok, earnings_reason = check_earnings_window(ticker)
-    if not earnings_ok:
-        return False, earnings_reason
-
-    # Prefer AMS-NX inline metrics if present; else fall back to yfinance lookups
-    rsPct = alert.get('rsPct')
-    zScore = alert.get('zScore')
-    rvol = alert.get('rvol')
-
-    # RS threshold logic (percentile 0..1)
-    if rsPct is None:
-        # Fallback to ratio vs SPY (slower)
-        days = 40 if setup in ('trend_following','momentum_breakout') else 20
-        rs = rs_ratio_vs_spy(ticker, days)
-        if rs is None:
-            return False, "RS ratio unavailable"
-        # Map to rough percentile gate by ratio
-        if signal in ('long','buy','entry'):
-            if rs < 1.03:
-                return False, f"RS ratio {rs:.2f} < 1.03"
-        else:
-            if rs > 0.97:
-                return False, f"RS ratio {rs:.2f} > 0.97"
-    else:
-        try:
-            rsPct = float(rsPct)
-        except Exception:
-            return False, "Invalid rsPct"
-        if signal in ('long','buy','entry') and rsPct < 0.60:
-            return False, f"rsPct {rsPct:.2f} < 0.60"
-        if signal in ('short','sell') and rsPct > 0.40:
-            return False, f"rsPct {rsPct:.2f} > 0.40"
-
-    # Volume filter
-    if rvol is None:
-        vr = volume_ratio(ticker)
-        if vr is None or vr < 1.2:
-            return False, f"Volume ratio {vr if vr else 'n/a'} < 1.2"
+# --- pre-trade gates (see gate_pipeline.py) ---
+# ctx: { ticker, signal, setup, alert }
+
+def _is_long(ctx):
+    return ctx['signal'] in ('long','buy','entry')
+
+def gate_pause(ctx):
+    return not is_trading_paused(), "Trading paused (kill switch active)"
+
+def gate_trading_window(ctx):
+    return within_trading_window_now(), "Outside trading window"
+
+def gate_watchlist(ctx):
+    # Watchlist (flat, grouped, or screener output) - O(1) set lookup
+    ticker = ctx['ticker']
+    return WATCH.get().contains(ticker), f"Ticker {ticker} not in watchlist"
+
+def gate_rs_pct(ctx):
+    # RS threshold logic (AMS-NX inline percentile 0..1)
+    try:
+        rsPct = float(ctx['alert'].get('rsPct'))
+    except Exception:
+        return False, "Invalid rsPct"
+    if _is_long(ctx) and rsPct < 0.60:
+        return False, f"rsPct {rsPct:.2f} < 0.60"
+    if ctx['signal'] in ('short','sell') and rsPct > 0.40:
+        return False, f"rsPct {rsPct:.2f} > 0.40"
+    return True, "rsPct ok"
+
+def gate_rs_ratio(ctx):
+    # Fallback to ratio vs SPY when the alert carries no rsPct
+    days = 40 if ctx['setup'] in ('trend_following','momentum_breakout') else 20
+    rs = rs_ratio_vs_spy(ctx['ticker'], days)
+    if rs is None:
+        return False, "RS ratio unavailable"
+    # Map to rough percentile gate by ratio
+    if _is_long(ctx):
+        if rs < 1.03:
+            return False, f"RS ratio {rs:.2f} < 1.03"
     else:
-        try:
-            rvol = float(rvol)
-        except Exception:
-            return False, "Invalid rvol"
-        if rvol < 1.2:
-            return False, f"rvol {rvol:.2f} < 1.2"
+        if rs > 0.97:
+            return False, f"RS ratio {rs:.2f} > 0.97"
+    return True, "RS ratio ok"
 
+def gate_rvol(ctx):
+    try:
+        rvol = float(ctx['alert'].get('rvol'))
+    except Exception:
+        return False, "Invalid rvol"
+    if rvol < 1.2:
+        return False, f"rvol {rvol:.2f} < 1.2"
+    return True, "rvol ok"
+
+def gate_volume_ratio(ctx):
+    vr = volume_ratio(ctx['ticker'])
+    if vr is None or vr < 1.2:
+        return False, f"Volume ratio {vr if vr else 'n/a'} < 1.2"
+    return True, "Volume ratio ok"
+
+def gate_zscore(ctx):
     # Z-score check with regime-based threshold
-    if zScore is not None:
+    try:
+        zScore = float(ctx['alert'].get('zScore'))
+    except Exception:
+        return False, "Invalid zScore"
+    
+    # Get regime threshold (default to 2.0 if regime unavailable)
+    z_threshold = 2.0
+    if REGIME_AVAILABLE:
         try:
-            zScore = float(zScore)
-        except Exception:
-            return False, "Invalid zScore"
-        
-        # Get regime threshold (default to 2.0 if regime unavailable)
-        z_threshold = 2.0
-        if REGIME_AVAILABLE:
-            try:
-                regime = get_regime_params()
-                z_threshold = regime.get('zEnter', 2.0)
-            except Exception as e:
-                app.logger.warning(f"Regime check failed: {e}")
-        
-        if signal in ('long','buy','entry') and abs(zScore) < z_threshold:
-            return False, f"zScore {zScore:.2f} < {z_threshold} (regime threshold)"
-        if signal in ('short','sell') and abs(zScore) < z_threshold:
-            return False, f"zScore {zScore:.2f} < {z_threshold} (regime threshold)"
-
-    # Regime gate (use setup if provided; otherwise allow)
-    if setup and not regime_allows(setup):
-        return False, "Market regime gate blocked this setup"
+            regime = get_regime_params()
+            z_threshold = regime.get('zEnter', 2.0)
+        except Exception as e:
+            app.logger.warning(f"Regime check failed: {e}")
     
-    # Correlation check (warning only, not blocking)
+    if abs(zScore) < z_threshold and (_is_long(ctx) or ctx['signal'] in ('short','sell')):
+        return False, f"zScore {zScore:.2f} < {z_threshold} (regime threshold)"
+    return True, "zScore ok"
+
+def gate_daily_loss(ctx):
+    loss_ok, _msg = check_daily_loss_limit()
+    return loss_ok, "Daily loss limit exceeded - circuit breaker active"
+
+def gate_earnings(ctx):
+    return check_earnings_window(ctx['ticker'])
+
+def gate_regime(ctx):
+    return regime_allows(ctx['setup']), "Market regime gate blocked this setup"
+
+def gate_correlation(ctx):
+    # Warning only, not blocking (precomputed matrix lookup, see correlation_matrix.py)
+    from correlation_checker import get_open_positions, check_correlation
+    ok, warnings = check_correlation(ctx['ticker'], [p for p in get_open_positions() if p != ctx['ticker']])
+    return ok, f"Correlation warning for {ctx['ticker']}: {'; '.join(warnings)}"
+
+def build_gates(alert):
+    """Gate list for an alert: inline AMS-NX metrics are checked locally, else looked up."""
+    gates = [
+        Gate('pause', gate_pause),
+        Gate('trading_window', gate_trading_window),
+        Gate('watchlist', gate_watchlist),
+    ]
+    gates.append(Gate('rs_pct', gate_rs_pct) if alert.get('rsPct') is not None
+                 else Gate('rs_ratio', gate_rs_ratio, parallel=True, fail_open=False))
+    gates.append(Gate('rvol', gate_rvol) if alert.get('rvol') is not None
+                 else Gate('volume_ratio', gate_volume_ratio, parallel=True, fail_open=False))
+    if alert.get('zScore') is not None:
+        gates.append(Gate('zscore', gate_zscore))
+    gates += [
+        Gate('daily_loss', gate_daily_loss, parallel=True),
+        Gate('earnings', gate_earnings, parallel=True),
+        Gate('correlation', gate_correlation, parallel=True, hard=False),
+    ]
+    # Regime gate (use setup if provided; otherwise allow)
+    if alert.get('setup_type'):
+        gates.append(Gate('regime', gate_regime, parallel=True))
+    return gates
+
+def run_filters(alert):
+    """Run the pre-trade gate pipeline for an alert. Returns: GateResult"""
+    ctx = {
+        'ticker': alert.get('ticker') or alert.get('symbol'),
+        'signal': (alert.get('signal') or alert.get('side') or '').lower(),
+        'setup': alert.get('setup_type'),
+        'alert': alert,
+    }
+    if ctx['ticker'] and (alert.get('rsPct') is None or alert.get('rvol') is None):
+        # Refresh the bars once here rather than from each concurrent bar gate
+        try:
+            from bar_store import refresh
+            refresh([ctx['ticker'], 'SPY'])
+        except Exception as e:
+            app.logger.warning(f"Bar refresh failed: {e}")
+    result = run_gates(build_gates(alert), ctx)
+    for w in result.warnings:
+        app.logger.warning(w)
+    return result
+
+def passes_filters(alert):
+    result = run_filters(alert)
+    return result.ok, result.reason
+
+def warm_gate_caches():
+    """Prefetch bars for watchlist tickers + SPY/VIX and the regime state (background, at startup)"""
+    tickers = set(WATCH.get().symbols)
     try:
-        import subprocess
-        result = subprocess.run(
-            ['python3', str(CONF_DIR / 'scripts' / 'correlation_checker.py'), ticker],
-            capture_output=True,
-            text=True,
-            timeout=10
-        )
-        if result.returncode != 0:
-            # High correlation detected, but we'll allow with warning
-            app.logger.warning(f"Correlation warning for {ticker}: {result.stdout}")
+        from bar_store import refresh
+        refresh(sorted(tickers) + ['SPY', '^VIX'])
+        _market_regime()
     except Exception as e:
-        app.logger.warning(f"Correlation check failed: {e}")
-
-    return True, "filters ok"
+        app.logger.warning(f"Gate cache warm-up failed: {e}")
 
 def send_telegram(text, buttons=None):
     if not (TG_TOKEN and TG_CHAT):
@@ -407,9 +409,9 @@ def webhook():
         except Exception as e:
             return jsonify({'status':'error','message':f'invalid payload: {e}'}), 400
     # gate by filters (RS, volume, regime, watchlist, window)
-    ok, why = passes_filters(data)
-    if not ok:
-        return jsonify({'status':'rejected','reason': why}), 400
+    gates = run_filters(data)
+    if not gates.ok:
+        return jsonify({'status':'rejected','reason': gates.reason, 'gates': gates.to_dict()}), 400
     intent_id = f"{int(time.time())}-{uuid.uuid4().hex[:8]}"
     token = uuid.uuid4().hex  # one-time approve/reject token
     # Normalize legacy vs AMS-NX payloads
@@ -444,9 +446,13 @@ def webhook():
             'rsPct': data.get('rsPct'),
             'rvol': data.get('rvol')
         },
-        'regime': regime_info
+        'regime': regime_info,
+        'gates': {
+            'latency_ms': gates.latency_ms,
+            'warnings': gates.warnings
+        }
     }
-    (PENDING_DIR / f"{intent_id}.json").write_text(json.dumps(intent, indent=2))
+    journal.add_pending(intent)
     app.logger.info(f"PENDING (no exec): {intent}")
     
     # AUTO-EXECUTE in canary mode (1 share, low risk)
@@ -476,8 +482,7 @@ def webhook():
             send_telegram(txt)
         
         # Auto-approve and execute
-        path = PENDING_DIR / f"{intent_id}.json"
-        return _approve_intent(intent, path)
+        return _approve_intent(intent)
 
     # Telegram approve UI (optional)
     if TG_TOKEN and TG_CHAT and BASE_URL:
@@ -543,23 +548,14 @@ def act_get():
     token = request.args.get('token')
     if not (op and token):
         return jsonify({'status':'error','message':'missing op or token'}), 400
-    # find pending by token
-    target = None
-    for p in PENDING_DIR.glob('*.json'):
-        try:
-            intent = json.loads(p.read_text())
-            if intent.get('token') == token:
-                target = (p, intent)
-                break
-        except Exception:
-            continue
-    if not target:
+    # find pending by token (indexed)
+    intent = journal.find_pending(token=token)
+    if not intent:
         return jsonify({'status':'error','message':'unknown or expired token'}), 404
-    path, intent = target
     if op == 'approve':
-        return _approve_intent(intent, path)
+        return _approve_intent(intent)
     elif op == 'reject':
-        return _reject_intent(intent, path)
+        return _reject_intent(intent)
     else:
         return jsonify({'status':'error','message':'invalid op'}), 400
 
@@ -571,11 +567,10 @@ def approve_post():
     intent_id = data.get('id')
     if not intent_id:
         return jsonify({'status':'error','message':'missing id'}), 400
-    path = PENDING_DIR / f"{intent_id}.json"
-    if not path.exists():
+    intent = journal.find_pending(intent_id=intent_id)
+    if not intent:
         return jsonify({'status':'error','message':'unknown id'}), 404
-    intent = json.loads(path.read_text())
-    return _approve_intent(intent, path)
+    return _approve_intent(intent)
 
 @app.route('/reject', methods=['POST'])
 def reject_post():
@@ -585,122 +580,21 @@ def reject_post():
     intent_id = data.get('id')
     if not intent_id:
         return jsonify({'status':'error','message':'missing id'}), 400
-    path = PENDING_DIR / f"{intent_id}.json"
-    if not path.exists():
+    intent = journal.find_pending(intent_id=intent_id)
+    if not intent:
         return jsonify({'status':'error','message':'unknown id'}), 404
-    intent = json.loads(path.read_text())
-    return _reject_intent(intent, path)
+    return _reject_intent(intent)
 
 # --- helpers ---
 
-def round_option_strike(strike, ticker):
-    """Round strike to valid option intervals"""
-    # Most stocks use $5 intervals for far OTM, $2.50 for ATM, $1 for near
-    # For simplicity, use $5 for high-priced stocks, $2.50 otherwise
-    if strike > 200:
-        interval = 5.0
-    elif strike > 100:
-        interval = 2.5
-    else:
-        interval = 1.0
-    
-    return round(strike / interval) * interval
-
-def _place_order(intent):
-    if IB is None:
-        return False, 'ib_insync not installed; dry-run only'
-    
-    # Create event loop for this thread if needed
-    import asyncio
-    try:
-        loop = asyncio.get_event_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-    
-    try:
-        ib = get_ib_connection()
-        if ib is None:
-            return False, 'IB connection unavailable'
-        
-        # Check if this is an options order
-        if intent.get('option_type'):
-            # Options order (covered call or cash-secured put)
-            from ib_insync import Option  # type: ignore
-            from datetime import datetime, timedelta
-            
-            ticker = intent['ticker']
-            strike = round_option_strike(float(intent['strike']), ticker)
-            dte = int(intent.get('dte', 30))
-            opt_type = intent['option_type'].upper()  # 'CALL' or 'PUT'
-            qty = int(intent.get('quantity', 1))  # contracts, not shares
-            
-            # Calculate expiry date (use 3rd Friday of next month for standard monthly)
-            from calendar import monthrange
-            now = datetime.now()
-            target_month = now.month + 1 if dte > 15 else now.month
-            target_year = now.year if target_month <= 12 else now.year + 1
-            target_month = target_month if target_month <= 12 else 1
-            
-            # Find 3rd Friday of target month
-            first_day = datetime(target_year, target_month, 1)
-            # First Friday
-            days_to_friday = (4 - first_day.weekday()) % 7
-            first_friday = first_day + timedelta(days=days_to_friday)
-            # Third Friday (add 2 weeks)
-            third_friday = first_friday + timedelta(weeks=2)
-            expiry_str = third_friday.strftime('%Y%m%d')
-            
-            # Create option contract
-            contract = Option(ticker, expiry_str, strike, opt_type, 'SMART')
-            ib.qualifyContracts(contract)
-            
-            # Sell option (covered call or CSP)
-            action = intent.get('action', 'SELL').upper()
-            order = MarketOrder(action, qty)
-            trade = ib.placeOrder(contract, order)
-            
-            return True, f'option {action} ${strike} {opt_type} exp {expiry_str} orderId={getattr(trade.order, "orderId", None)}'
-        else:
-            # Stock order (swing trade)
-            contract = Stock(intent['ticker'], 'SMART', 'USD')
-            ib.qualifyContracts(contract)
-            qty = max(1, int(intent.get('qty') or 1))
-            side = 'BUY' if str(intent.get('signal','')).lower() in ('buy','entry','long') else 'SELL'
-            sl = intent.get('stop_loss')
-            tp = intent.get('take_profit')
-            if sl and tp:
-                # Bracket order: parent market + child stop + child limit target
-                parent = MarketOrder(side, qty, tif='DAY', transmit=False)
-                stop   = LimitOrder('SELL' if side=='BUY' else 'BUY', qty, float(tp) if side=='SELL' else float(sl), tif='DAY', transmit=False)  # placeholder
-                # Correct children: use StopOrder + LimitOrder
-                from ib_insync import StopOrder  # type: ignore
-                child_stop = StopOrder('SELL' if side=='BUY' else 'BUY', qty, float(sl), tif='DAY', parentId=0, transmit=False)
-                child_lmt  = LimitOrder('SELL' if side=='BUY' else 'BUY', qty, float(tp), tif='DAY', parentId=0, transmit=True)
-                trade_p = ib.placeOrder(contract, parent)
-                pid = trade_p.order.orderId
-                child_stop.parentId = pid
-                child_lmt.parentId = pid
-                ib.placeOrder(contract, child_stop)
-                ib.placeOrder(contract, child_lmt)
-                return True, f'bracket placed parentId={pid}'
-            else:
-                order = MarketOrder(side, qty)
-                trade = ib.placeOrder(contract, order)
-                return True, f'orderId={getattr(trade.order, "orderId", None)}'
-    except Exception as e:
-        return False, str(e)
+# Journal writes + Telegram after a fill, off the order service's event loop
+_post_trade_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='post-trade')
 
-def _approve_intent_async(intent, path):
-    """Process approval in background thread"""
-    import threading
-    
-    def process():
-        placed, msg = _place_order(intent)
+def _approve_intent_async(intent):
+    """Queue the order on the order service; record/notify when the broker answers"""
+    def process(placed, msg):
         if placed:
-            (LOGS_DIR / f"{intent['id']}.json").write_text(json.dumps({'intent': intent, 'result': msg}, indent=2))
-            try: path.unlink()
-            except Exception: pass
+            journal.mark_executed(intent, msg)
             if TG_TOKEN and TG_CHAT:
                 # Handle both stock and options confirmations
                 if intent.get('option_type'):
@@ -713,14 +607,11 @@ def _approve_intent_async(intent, path):
             if TG_TOKEN and TG_CHAT:
                 send_telegram(f"⚠️ Failed to place order for {intent['ticker']}: {msg}")
     
-    # Start background thread
-    thread = threading.Thread(target=process)
-    thread.daemon = True
-    thread.start()
+    ORDERS.submit(intent).add_done_callback(lambda fut: _post_trade_pool.submit(process, *fut.result()))
 
-def _approve_intent(intent, path):
+def _approve_intent(intent):
     """Approve and return immediately (process in background)"""
-    _approve_intent_async(intent, path)
+    _approve_intent_async(intent)
     
     # Return immediately
     ticker = intent.get('ticker')
@@ -733,10 +624,8 @@ def _approve_intent(intent, path):
     
     return jsonify({'status':'processing','id': intent['id'], 'message': msg})
 
-def _reject_intent(intent, path):
-    (LOGS_DIR / f"rejected-{intent['id']}.json").write_text(json.dumps(intent, indent=2))
-    try: path.unlink()
-    except Exception: pass
+def _reject_intent(intent):
+    journal.mark_rejected(intent)
     if TG_TOKEN and TG_CHAT:
         # Handle both stock and options rejections
         if intent.get('option_type'):
@@ -753,13 +642,14 @@ START_TS = time.time()
 
 @app.route('/status', methods=['GET'])
 def status_get():
-    pending = len(list(PENDING_DIR.glob('*.json')))
+    pending = journal.count_pending()
     return jsonify({
         'service': 'webhook-listener',
         'mode': 'paper',
-        'host': IB_HOST,
-        'port': IB_PORT,
+        'host': ORDERS.host,
+        'port': ORDERS.port,
         'pending': pending,
+        'orders': ORDERS.stats(),
         'uptime_sec': int(time.time() - START_TS)
     })
 
@@ -769,5 +659,8 @@ def health_get():
     return jsonify({'ok': True, 'service': 'webhook-listener'}), 200
 
 if __name__ == '__main__':
+    import threading
+    threading.Thread(target=warm_gate_caches, daemon=True).start()
+    ORDERS.start()  # Connect the IB pool before the first approval
     port = int(os.getenv('PORT', '5001'))
     app.run(host='127.0.0.1', port=port)
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+yfinance Request Broker
+Single access layer for every yfinance call in the process, so identical requests
+(SPY / ^VIX history, .info for the same ticker...) stop hitting Yahoo many times a minute.
+
+- TTL cache keyed by (symbol, endpoint, period, interval, options); TTL by endpoint/interval
+- Request coalescing: concurrent callers asking for the same key share one fetch
+- Token-bucket rate limiter shared by all fetches (YF_RATE_PER_SEC / YF_BURST)
+- yf.download calls are serialized: yfinance collects each call's frames and errors in
+  module globals (shared._DFS / _ERRORS), so concurrent calls return partial frames
+- Hit / miss / coalesced / throttled counters via stats()
+
+Results are returned as copies; callers may add columns without touching the cache.
+Errors are not cached (every waiter of the failed fetch gets the exception).
+
+Usage:
+  import yf_broker
+  hist = yf_broker.history('^VIX', period='5d')
+  info = yf_broker.info('AAPL')
+  df = yf_broker.download('AAPL', period='1d', interval='5m')
+  yf_broker.stats()
+"""
+
+from concurrent.futures import Future
+import copy
+import logging
+import os
+import threading
+import time
+
+import yfinance as yf
+
+logger = logging.getLogger(__name__)
+
+RATE_PER_SEC = float(os.getenv('YF_RATE_PER_SEC', '4'))  # Sustained requests per second
+BURST = int(os.getenv('YF_BURST', '8'))                     # Bucket size
+
+# Seconds a cached result stays fresh
+TTL_INTRADAY = 60          # 1m-90m bars
+TTL_DAILY = 15 * 60        # Daily or longer bars (matches bar_store.REFRESH_TTL_SEC)
+TTL_INFO = 6 * 3600
+TTL_CALENDAR = 12 * 3600
+TTL_NEWS = 10 * 60
+MAX_ENTRIES = 5000         # Oldest entries dropped beyond this
+
+_download_lock = threading.Lock()  # One yf.download at a time (see module docstring)
+
+
+class TokenBucket:
+    """Blocking token bucket: acquire() waits until a request may go out."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+        self.waits = 0
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+                self.waits += 1
+            time.sleep(wait)
+
+
+class RequestBroker:
+    def __init__(self, rate: float = RATE_PER_SEC, burst: int = BURST):
+        self.bucket = TokenBucket(rate, burst)
+        self._cache = {}     # key -> (expires_at, value)
+        self._inflight = {}  # key -> Future
+        self._lock = threading.Lock()
+        self.counters = {'hits': 0, 'misses': 0, 'coalesced': 0, 'errors': 0}
+
+    def fetch(self, key: tuple, ttl: float, fn):
+        """
+        Cached / coalesced / rate-limited call of fn() for key (ttl <= 0: coalesce and rate-limit only).
+        Returns: a copy of the result
+        """
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit and hit[0] > time.monotonic():
+                self.counters['hits'] += 1
+                return copy.copy(hit[1])
+            fut = self._inflight.get(key)
+            owner = fut is None
+            if owner:
+                fut = self._inflight[key] = Future()
+                self.counters['misses'] += 1
+            else:
+                self.counters['coalesced'] += 1
+
+        if not owner:
+            return copy.copy(fut.result())
+
+        try:
+            self.bucket.acquire()
+            value = fn()
+        except BaseException as e:
+            with self._lock:
+                self.counters['errors'] += 1
+                del self._inflight[key]
+            fut.set_exception(e)
+            raise
+        with self._lock:
+            if ttl > 0:
+                self._cache[key] = (time.monotonic() + ttl, value)
+            if len(self._cache) > MAX_ENTRIES:
+                for old in sorted(self._cache, key=lambda k: self._cache[k][0])[:len(self._cache) - MAX_ENTRIES]:
+                    del self._cache[old]
+            del self._inflight[key]
+        fut.set_result(value)
+        return copy.copy(value)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.counters['hits'] + self.counters['misses'] + self.counters['coalesced']
+            return {
+                **self.counters,
+                'throttled': self.bucket.waits,
+                'entries': len(self._cache),
+                'hit_rate': round((self.counters['hits'] + self.counters['coalesced']) / total, 3) if total else None,
+            }
+
+
+_broker = RequestBroker()
+
+
+def _bars_ttl(interval: str) -> float:
+    return TTL_INTRADAY if interval.endswith(('m', 'h')) and not interval.endswith('mo') else TTL_DAILY
+
+
+def _key(symbols, endpoint: str, period=None, interval=None, **options) -> tuple:
+    sym = symbols.upper() if isinstance(symbols, str) else tuple(s.upper() for s in symbols)
+    return (sym, endpoint, period, interval, tuple(sorted(options.items())))
+
+
+def history(symbol: str, period: str = '1mo', interval: str = '1d', **kw):
+    """yf.Ticker(symbol).history(period, interval, **kw) through the broker. Returns: DataFrame"""
+    return _broker.fetch(_key(symbol, 'history', period, interval, **kw), _bars_ttl(interval),
+                         lambda: yf.Ticker(symbol).history(period=period, interval=interval, **kw))
+
+
+def download(symbols, period: str = None, interval: str = '1d', ttl: float = None, **kw):
+    """yf.download(symbols, period, interval, **kw) through the broker (progress off). Returns: DataFrame"""
+    kw.setdefault('progress', False)
+    call = dict(kw, interval=interval, **({'period': period} if period is not None else {}))
+
+    def fetch():
+        with _download_lock:
+            return yf.download(symbols, **call)
+
+    return _broker.fetch(_key(symbols, 'download', period, interval, **kw),
+                         _bars_ttl(interval) if ttl is None else ttl, fetch)
+
+
+def info(symbol: str) -> dict:
+    """yf.Ticker(symbol).info through the broker ({} if Yahoo returns nothing)."""
+    return _broker.fetch(_key(symbol, 'info'), TTL_INFO, lambda: yf.Ticker(symbol).info or {})
+
+
+def calendar(symbol: str):
+    """yf.Ticker(symbol).calendar through the broker."""
+    return _broker.fetch(_key(symbol, 'calendar'), TTL_CALENDAR, lambda: yf.Ticker(symbol).calendar)
+
+
+def options(symbol: str) -> tuple:
+    """yf.Ticker(symbol).options (listed expiration dates) through the broker."""
+    return _broker.fetch(_key(symbol, 'options'), TTL_INFO, lambda: tuple(yf.Ticker(symbol).options or ()))
+
+
+def news(symbol: str) -> list:
+    """yf.Ticker(symbol).news through the broker."""
+    return _broker.fetch(_key(symbol, 'news'), TTL_NEWS, lambda: yf.Ticker(symbol).news or [])
+
+
+def stats() -> dict:
+    """{ hits, misses, coalesced, errors, throttled, entries, hit_rate }"""
+    return _broker.stats()
+
+
+def clear():
+    _broker.clear()